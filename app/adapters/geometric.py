@@ -0,0 +1,122 @@
+"""
+Adaptador geométrico — matriz aproximada de distancias/duraciones sin OSRM.
+
+distancia ≈ haversine × factor de rodeo
+duración  ≈ distancia / velocidad media
+
+El factor de rodeo y la velocidad media se aprenden de las matrices reales de
+OSRM /table (media exponencial), de modo que la aproximación se ajusta a la
+red viaria del pueblo con el uso. Implementa el contrato MatrixProvider.
+
+Vectorizado con NumPy: ~1 ms para 200 paradas, sin llamadas de red.
+"""
+
+import threading
+
+import numpy as np
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_EARTH_RADIUS_M = 6_371_000.0
+
+# Valores iniciales razonables para un casco urbano antes de aprender nada
+_DEFAULT_DETOUR_FACTOR = 1.35
+_DEFAULT_SPEED_MPS = 8.0         # ~29 km/h
+
+_LEARN_ALPHA = 0.2               # peso de cada nueva observación en la media exponencial
+_LEARN_MIN_PAIR_M = 100.0        # pares más cercanos se ignoran (ruido de snap)
+_DETOUR_BOUNDS = (1.0, 3.0)
+_SPEED_BOUNDS = (2.0, 25.0)
+
+_detour_factor: float = _DEFAULT_DETOUR_FACTOR
+_speed_mps: float = _DEFAULT_SPEED_MPS
+_lock = threading.Lock()
+
+
+def _haversine_matrix(coords: list[tuple[float, float]]) -> np.ndarray:
+    """Matriz NxN de distancias haversine en metros (float64)."""
+    arr = np.radians(np.asarray(coords, dtype=np.float64))
+    lat = arr[:, 0][:, None]
+    lon = arr[:, 1][:, None]
+    dlat = lat.T - lat
+    dlon = lon.T - lon
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlon / 2) ** 2
+    return 2 * _EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def get_geometric_matrix(
+    coords: list[tuple[float, float]],
+) -> tuple[list[list[int]], list[list[int]]] | None:
+    """Calcula la matriz NxN aproximada de duración y distancia.
+
+    Mismo formato que get_osrm_matrix: (dur_matrix, dist_matrix) como listas
+    de listas de int, índice 0 = depósito. None si hay menos de 2 coords.
+    """
+    if len(coords) < 2:
+        return None
+
+    with _lock:
+        detour, speed = _detour_factor, _speed_mps
+
+    dist = _haversine_matrix(coords) * detour
+    dur = dist / speed
+    return np.rint(dur).astype(int).tolist(), np.rint(dist).astype(int).tolist()
+
+
+def learn_from_matrix(
+    coords: list[tuple[float, float]],
+    dur_matrix: list[list[int]],
+    dist_matrix: list[list[int]],
+) -> None:
+    """Ajusta factor de rodeo y velocidad media con una matriz real de OSRM.
+
+    Usa la mediana de los ratios OSRM/haversine de los pares suficientemente
+    separados (robusta ante calles de sentido único) y la combina con el valor
+    actual mediante una media exponencial.
+    """
+    if len(coords) < 2:
+        return
+
+    hav = _haversine_matrix(coords)
+    dist = np.asarray(dist_matrix, dtype=np.float64)
+    dur = np.asarray(dur_matrix, dtype=np.float64)
+    if dist.shape != hav.shape or dur.shape != hav.shape:
+        return
+
+    mask = (hav >= _LEARN_MIN_PAIR_M) & (dist > 0) & (dur > 0)
+    if not mask.any():
+        return
+
+    detour_obs = float(np.median(dist[mask] / hav[mask]))
+    speed_obs = float(np.median(dist[mask] / dur[mask]))
+
+    global _detour_factor, _speed_mps
+    with _lock:
+        _detour_factor = float(np.clip(
+            (1 - _LEARN_ALPHA) * _detour_factor + _LEARN_ALPHA * detour_obs,
+            *_DETOUR_BOUNDS,
+        ))
+        _speed_mps = float(np.clip(
+            (1 - _LEARN_ALPHA) * _speed_mps + _LEARN_ALPHA * speed_obs,
+            *_SPEED_BOUNDS,
+        ))
+        logger.debug(
+            "Matriz geométrica: rodeo=%.3f (obs %.3f), velocidad=%.2f m/s (obs %.2f)",
+            _detour_factor, detour_obs, _speed_mps, speed_obs,
+        )
+
+
+def get_learned_params() -> dict[str, float]:
+    """Factor de rodeo y velocidad media actuales (para diagnóstico)."""
+    with _lock:
+        return {"detour_factor": _detour_factor, "speed_mps": _speed_mps}
+
+
+def reset_learned_params() -> None:
+    """Restaura los valores iniciales (tras rebuild-map o en tests)."""
+    global _detour_factor, _speed_mps
+    with _lock:
+        _detour_factor = _DEFAULT_DETOUR_FACTOR
+        _speed_mps = _DEFAULT_SPEED_MPS
@@ -0,0 +1,65 @@
+"""
+Clientes HTTP compartidos: asíncrono (httpx) para OSRM y Google, y una
+sesión síncrona (requests) para las llamadas a Google desde hilos.
+
+Un único cliente de cada tipo por proceso reutiliza conexiones keep-alive
+entre peticiones (sin handshake TLS por llamada). Se crean lazily al primer
+uso y se cierran en el shutdown de la aplicación (lifespan de app.main).
+"""
+
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+_SYNC_POOL_SIZE = 16  # conexiones por host: validación concurrente + refresco
+
+_client: httpx.AsyncClient | None = None
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Devuelve el cliente compartido, creándolo si no existe o se cerró."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(limits=_LIMITS)
+    return _client
+
+
+async def close_async_client() -> None:
+    """Cierra el cliente compartido y libera el pool de conexiones."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        logger.info("Cliente HTTP compartido cerrado")
+    _client = None
+
+
+def get_sync_session() -> requests.Session:
+    """Devuelve la sesión requests compartida (pool keep-alive), creándola si no existe."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_SYNC_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def close_sync_session() -> None:
+    """Cierra la sesión síncrona compartida."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,287 @@
+"""
+Almacén clave → JSON en SQLite (modo WAL) para cachés persistentes.
+
+Sustituye a los ficheros JSON reescritos enteros en cada alta:
+  - put/delete son O(1): una fila por clave, sin reescribir el resto.
+  - WAL: los lectores no bloquean al escritor y varios procesos (workers de
+    uvicorn) pueden compartir el fichero sin corromperlo; busy_timeout
+    absorbe la contención puntual entre procesos.
+  - synchronous=NORMAL: en WAL no hay fsync por commit; un corte de luz
+    puede perder las últimas escrituras, nunca dejar la base inconsistente.
+
+Una conexión por almacén, compartida entre hilos y protegida por un lock
+propio (independiente de los locks de los servicios que lo usan).
+La base se abre lazily en la primera operación.
+
+migrate_json() importa una única vez un fichero JSON antiguo {clave: valor}.
+
+InvalidationLog: registro de eventos "caché X, claves con prefijo P han
+cambiado" en el mismo tipo de fichero, para que cada proceso expulse de su
+memoria lo que otro ha modificado (ver adapters/shared_state.py).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_BUSY_TIMEOUT_S = 5.0
+
+
+class SqliteKVStore:
+    """Tabla clave (TEXT) → valor JSON en un fichero SQLite."""
+
+    def __init__(self, path: Path, table: str) -> None:
+        if not table.isidentifier():
+            raise ValueError(f"Nombre de tabla no válido: {table!r}")
+        self.path = path
+        self.table = table
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    # ── Conexión ──────────────────────────────────────────────────────────────
+
+    def _db(self) -> sqlite3.Connection:
+        """Conexión abierta (la crea y prepara el esquema la primera vez). Con lock."""
+        if self._conn is None:
+            conn = _connect(self.path)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS _meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ── Lectura ───────────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            row = self._db().execute(
+                f"SELECT value FROM {self.table} WHERE key = ?", (key,),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        """Todas las entradas (lectura completa: para el arranque)."""
+        with self._lock:
+            rows = self._db().execute(f"SELECT key, value FROM {self.table}").fetchall()
+        for key, value in rows:
+            yield key, json.loads(value)
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            return [k for (k,) in self._db().execute(f"SELECT key FROM {self.table}")]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    # ── Escritura ─────────────────────────────────────────────────────────────
+
+    def put(self, key: str, value: Any) -> None:
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[tuple[str, Any]]) -> None:
+        """Inserta o reemplaza varias entradas en una sola transacción."""
+        rows = [(k, json.dumps(v, ensure_ascii=False)) for k, v in items]
+        if not rows:
+            return
+        with self._lock:
+            db = self._db()
+            with _transaction(db):
+                db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", rows,
+                )
+
+    def transform(self, key: str, fn: Callable[[Any | None], Any | None]) -> Any | None:
+        """Lee, transforma y escribe key en una transacción (atómico entre procesos).
+
+        fn recibe el valor actual (o None) y devuelve el nuevo; si devuelve
+        None no se escribe nada. Devuelve lo que devolvió fn.
+        """
+        with self._lock:
+            db = self._db()
+            with _transaction(db):
+                row = db.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                new = fn(json.loads(row[0]) if row else None)
+                if new is not None:
+                    db.execute(
+                        f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)",
+                        (key, json.dumps(new, ensure_ascii=False)),
+                    )
+        return new
+
+    def delete_expired(self, field: str, now: float) -> int:
+        """Borra las entradas cuyo valor tiene field (epoch) < now. Devuelve cuántas."""
+        if not field.isidentifier():
+            raise ValueError(f"Campo no válido: {field!r}")
+        with self._lock:
+            cur = self._db().execute(
+                f"DELETE FROM {self.table} WHERE json_extract(value, '$.{field}') < ?", (now,),
+            )
+            return cur.rowcount
+
+    def delete(self, key: str) -> None:
+        self.delete_many([key])
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        rows = [(k,) for k in keys]
+        if not rows:
+            return
+        with self._lock:
+            db = self._db()
+            with _transaction(db):
+                db.executemany(f"DELETE FROM {self.table} WHERE key = ?", rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute(f"DELETE FROM {self.table}")
+
+    # ── Migración ─────────────────────────────────────────────────────────────
+
+    def migrate_json(self, json_path: Path) -> int:
+        """Importa json_path ({clave: valor}) una sola vez. Devuelve nº de entradas.
+
+        La marca de migración se guarda en la propia base: borrar o editar el
+        JSON después no tiene efecto. El JSON se deja intacto como copia.
+        """
+        marker = f"migrated:{self.table}"
+        with self._lock:
+            db = self._db()
+            if db.execute("SELECT 1 FROM _meta WHERE key = ?", (marker,)).fetchone():
+                return 0
+            data: dict = {}
+            if json_path.exists():
+                try:
+                    data = json.loads(json_path.read_text("utf-8"))
+                except Exception as e:
+                    logger.error("No se pudo leer %s para migrar: %s", json_path, e)
+                    return 0
+            with _transaction(db):
+                db.executemany(
+                    f"INSERT OR IGNORE INTO {self.table} (key, value) VALUES (?, ?)",
+                    [(k, json.dumps(v, ensure_ascii=False)) for k, v in data.items()],
+                )
+                db.execute("INSERT INTO _meta (key, value) VALUES (?, ?)", (marker, str(json_path)))
+        if data:
+            logger.info("Migradas %d entradas de %s a %s", len(data), json_path.name, self.path.name)
+        return len(data)
+
+
+class InvalidationLog:
+    """Eventos (origen, caché, prefijo) numerados, compartidos entre procesos."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = _connect(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "origin TEXT NOT NULL, cache TEXT NOT NULL, prefix TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS invalidations_trimmed "
+                "(id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def publish(self, origin: str, cache: str, prefix: str) -> None:
+        self.publish_many(origin, cache, [prefix])
+
+    def publish_many(self, origin: str, cache: str, prefixes: Iterable[str]) -> None:
+        """Varios eventos de la misma caché en una sola transacción."""
+        now = time.time()
+        rows = [(origin, cache, prefix, now) for prefix in prefixes]
+        if not rows:
+            return
+        with self._lock:
+            db = self._db()
+            with _transaction(db):
+                db.executemany(
+                    "INSERT INTO invalidations (origin, cache, prefix, ts) VALUES (?, ?, ?, ?)", rows,
+                )
+
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._db().execute("SELECT COALESCE(MAX(seq), 0) FROM invalidations").fetchone()[0]
+
+    def since(self, seq: int) -> list[tuple[int, str, str, str]]:
+        """Eventos posteriores a seq: (seq, origen, caché, prefijo), en orden."""
+        with self._lock:
+            return self._db().execute(
+                "SELECT seq, origin, cache, prefix FROM invalidations WHERE seq > ? ORDER BY seq",
+                (seq,),
+            ).fetchall()
+
+    def trim(self, older_than: float) -> None:
+        """Borra eventos anteriores a older_than (epoch) y apunta hasta qué seq se
+        ha borrado: un proceso que no los haya leído lo ve en trimmed_through()."""
+        with self._lock:
+            db = self._db()
+            with _transaction(db):
+                (upto,) = db.execute(
+                    "SELECT MAX(seq) FROM invalidations WHERE ts < ?", (older_than,),
+                ).fetchone()
+                if upto is None:
+                    return
+                db.execute("DELETE FROM invalidations WHERE seq <= ?", (upto,))
+                db.execute(
+                    "INSERT INTO invalidations_trimmed (id, seq) VALUES (1, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET seq = MAX(seq, excluded.seq)",
+                    (upto,),
+                )
+
+    def trimmed_through(self) -> int:
+        """Mayor seq borrado por trim() (0 = nunca se ha borrado nada)."""
+        with self._lock:
+            row = self._db().execute("SELECT seq FROM invalidations_trimmed WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    """Conexión en autocommit con WAL, synchronous=NORMAL y busy_timeout."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(
+        path, timeout=_BUSY_TIMEOUT_S, isolation_level=None, check_same_thread=False,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def _transaction(db: sqlite3.Connection) -> Iterator[None]:
+    """BEGIN IMMEDIATE … COMMIT/ROLLBACK sobre una conexión en autocommit."""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
@@ -21,7 +21,18 @@ def _find_lkh() -> str | None:
     return None
 
 
-_LKH_BIN: str | None = _find_lkh()
+# Se busca la primera vez que hace falta (no al importar): ver lkh_binary()
+_LKH_BIN: str | None = None
+_lkh_searched = False
+
+
+def lkh_binary() -> str | None:
+    """Ruta del binario LKH3 (buscada una sola vez), o None si no está."""
+    global _LKH_BIN, _lkh_searched
+    if not _lkh_searched:
+        _LKH_BIN = _find_lkh()
+        _lkh_searched = True
+    return _LKH_BIN
 
 
 def _solve_with_lkh(
@@ -37,7 +48,8 @@ def _solve_with_lkh(
       cost(i → fantasma) = 0  →  cualquier nodo puede ser el último
       cost(fantasma → 0)  = 0  →  retorno gratuito al depósito
     """
-    if _LKH_BIN is None:
+    lkh_bin = lkh_binary()
+    if lkh_bin is None:
         return None
 
     import subprocess
@@ -75,7 +87,7 @@ def _solve_with_lkh(
             f.write("RUNS = 10\nSEED = 1\n")
 
         proc = subprocess.run(
-            [_LKH_BIN, par_file],
+            [lkh_bin, par_file],
             capture_output=True, text=True, timeout=60,
         )
 
@@ -1,14 +1,25 @@
 """
 Adaptador OSRM — snap a red viaria y matriz de distancias.
+
+Cada operación tiene versión síncrona (requests) y asíncrona (*_async, sobre
+el cliente httpx compartido). Ambas comparten la lógica de interpretación
+de respuestas y la caché de snap.
 """
 
-import json
+import math
+import threading
+from collections.abc import Callable
 from pathlib import Path
 
 import requests
 
-from app.core.config import OSRM_BASE_URL, OSRM_TIMEOUT
+from app.adapters.http import get_async_client
+from app.adapters.kvstore import SqliteKVStore
+from app.adapters.shared_state import poll, publish, subscribe
+from app.core.concurrency import run_cpu
+from app.core.config import OSRM_BASE_URL, OSRM_TIMEOUT, SNAP_MEMORY_MAX
 from app.core.logging import get_logger
+from app.core.ttlstore import TTLStore, register_cache
 from app.utils.normalization import normalize_text
 
 logger = get_logger(__name__)
@@ -35,11 +46,21 @@ def _significant_words(name: str) -> frozenset[str]:
 
 
 # ── Caché de snap ──────────────────────────────────────────────────────────
-# Persiste resultados de OSRM /nearest en disco. Sin TTL: solo se invalida
-# al reconstruir el mapa (rebuild-map borra snap_cache.json).
+# Persiste resultados de OSRM /nearest en snap_cache.sqlite3 (una fila por
+# snap, compartida por todos los workers). Sin TTL: solo se invalida al
+# reconstruir el mapa (clear_snap_cache, que avisa a los demás procesos).
+# Se lee la primera vez que se consulta (o en el calentamiento del lifespan),
+# no al importar el módulo. En memoria es una LRU de SNAP_MEMORY_MAX
+# entradas; un fallo en memoria se busca en SQLite (lo que haya guardado
+# otro worker o lo expulsado de la LRU) antes de preguntar a OSRM.
+# snap_cache.json (formato antiguo) se migra una sola vez.
 
 _SNAP_CACHE_FILE = Path(__file__).resolve().parent.parent / "data" / "snap_cache.json"
-_snap_cache: dict[str, list[float]] = {}
+_SNAP_DB = Path(__file__).resolve().parent.parent / "data" / "snap_cache.sqlite3"
+_snap_cache: TTLStore[list[float]] = TTLStore(SNAP_MEMORY_MAX, math.inf)
+_snap_store: SqliteKVStore | None = None
+_snap_loaded = False
+_snap_lock = threading.Lock()
 
 
 def _snap_key(lat: float, lon: float, hint: str) -> str:
@@ -47,45 +68,154 @@ def _snap_key(lat: float, lon: float, hint: str) -> str:
     return f"{lat:.5f},{lon:.5f}>{normalize_text(hint) if hint else ''}"
 
 
+def _get_snap_store() -> SqliteKVStore:
+    """Almacén SQLite del snap (se crea y migra el JSON antiguo la primera vez)."""
+    global _snap_store
+    if _snap_store is None or _snap_store.path != _SNAP_DB:
+        store = SqliteKVStore(_SNAP_DB, "snap")
+        store.migrate_json(_SNAP_CACHE_FILE)
+        _snap_store = store
+    return _snap_store
+
+
+def _cached_snap(key: str) -> list[float] | None:
+    """Snap guardado para key: memoria y, si no está, SQLite (y lo sube a memoria)."""
+    poll()
+    cached = _snap_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        stored = _get_snap_store().get(key)
+    except Exception as e:
+        logger.error("Error leyendo snap_cache: %s", e)
+        return None
+    if stored is not None:
+        _snap_cache[key] = stored
+    return stored
+
+
+def load_snap_cache() -> int:
+    """Carga la caché de snap de disco la primera vez que se llama. Devuelve nº de entradas.
+
+    Rellena _snap_cache en su sitio sin pisar las entradas que ya haya en memoria.
+    """
+    global _snap_loaded
+    if _snap_loaded:
+        return len(_snap_cache)
+    with _snap_lock:
+        if not _snap_loaded:
+            poll()
+            _load_snap_cache()
+            _snap_loaded = True
+    return len(_snap_cache)
+
+
 def _load_snap_cache() -> None:
-    """Carga el caché de snap desde disco al arrancar el módulo."""
-    global _snap_cache
-    if not _SNAP_CACHE_FILE.exists():
-        _snap_cache = {}
-        return
+    """Vuelca el caché de snap de disco en _snap_cache. Bajo _snap_lock."""
     try:
-        _snap_cache = json.loads(_SNAP_CACHE_FILE.read_text("utf-8"))
+        rows = list(_get_snap_store().items())
+        _snap_cache.update([(k, v) for k, v in rows if k not in _snap_cache])
         logger.info("Snap cache cargado: %d entradas", len(_snap_cache))
     except Exception as e:
         logger.error("Error cargando snap_cache: %s", e)
-        _snap_cache = {}
 
 
-def _save_snap_cache() -> None:
-    """Persiste el caché de snap en disco."""
+def _save_snap_cache(key: str, snapped: list[float]) -> None:
+    """Persiste un snap en disco (una fila; no reescribe el resto)."""
     try:
-        _SNAP_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        _SNAP_CACHE_FILE.write_text(
-            json.dumps(_snap_cache, ensure_ascii=False, indent=2), "utf-8"
-        )
+        _get_snap_store().put(key, snapped)
     except Exception as e:
         logger.error("Error guardando snap_cache: %s", e)
 
 
 def clear_snap_cache() -> None:
-    """Limpia el caché de snap en memoria y en disco.
+    """Limpia el caché de snap en memoria y en disco, en este y en los demás workers.
 
     Llamar tras rebuild-map: el nuevo mapa OSRM puede reubicar nodos,
     así que las coordenadas snapeadas anteriores quedan obsoletas.
     """
-    global _snap_cache
-    _snap_cache = {}
+    global _snap_loaded
+    _snap_cache.clear()  # en su sitio: routing.py importa _snap_cache por nombre
+    _snap_loaded = True  # el disco se vacía: no hay nada que cargar
     try:
+        _get_snap_store().clear()
         if _SNAP_CACHE_FILE.exists():
             _SNAP_CACHE_FILE.unlink()
-            logger.info("Snap cache eliminado tras rebuild")
+        logger.info("Snap cache eliminado tras rebuild")
     except Exception as e:
         logger.error("Error eliminando snap_cache: %s", e)
+    publish("snap")
+
+
+def _choose_snap_candidate(
+    data: dict,
+    street_hint: str,
+    max_dist_m: float,
+) -> tuple[float, float] | None:
+    """Elige el candidato de OSRM /nearest según distancia y nombre de calle.
+
+    Returns:
+        (snap_lat, snap_lon), o None si no hay candidatos o el más cercano
+        supera max_dist_m (fuera del mapa).
+    """
+    if data.get("code") != "Ok" or not data.get("waypoints"):
+        return None
+
+    candidates = data["waypoints"]
+    nearest_dist = candidates[0].get("distance", float("inf"))
+    if nearest_dist > max_dist_m:
+        return None
+
+    hint_words = _significant_words(street_hint)
+    best: dict | None = None
+    best_dist = float("inf")
+
+    if hint_words:
+        for wp in candidates:
+            cand_name = wp.get("name", "")
+            if not cand_name:
+                continue
+            if hint_words.issubset(_significant_words(cand_name)):
+                dist = wp.get("distance", float("inf"))
+                if dist < best_dist:
+                    best = wp
+                    best_dist = dist
+
+    if best is None and hint_words:
+        nearest_name = candidates[0].get("name", "")
+        logger.debug(
+            "snap fallback '%s' → '%s' (%.0f m) — ningún candidato con nombre coincidente",
+            street_hint, nearest_name, nearest_dist,
+        )
+        best = candidates[0]
+
+    chosen = best if best is not None else candidates[0]
+    snap_lon, snap_lat = chosen["location"]
+    return snap_lat, snap_lon
+
+
+def _snap_lookup(lat: float, lon: float, street_hint: str) -> tuple[str, list[float] | None]:
+    """(clave, snap en caché o None): memoria y, si no está, SQLite."""
+    load_snap_cache()
+    key = _snap_key(lat, lon, street_hint)
+    return key, _cached_snap(key)
+
+
+def _nearest_request(lat: float, lon: float, n_candidates: int) -> tuple[str, dict]:
+    """URL y parámetros de OSRM /nearest (lon,lat en la URL)."""
+    return f"{OSRM_BASE_URL}/nearest/v1/driving/{lon},{lat}", {"number": n_candidates}
+
+
+def _snap_result(
+    key: str, data: dict, street_hint: str, max_dist_m: float,
+) -> tuple[float, float] | None:
+    """Elige el candidato de la respuesta /nearest y lo guarda en la caché de snap."""
+    snapped = _choose_snap_candidate(data, street_hint, max_dist_m)
+    if snapped is None:
+        return None
+    _snap_cache[key] = [snapped[0], snapped[1]]
+    _save_snap_cache(key, [snapped[0], snapped[1]])
+    return snapped
 
 
 def snap_to_street(
@@ -108,63 +238,69 @@ def snap_to_street(
     Returns:
         (snap_lat, snap_lon) del nodo en la red viaria, o None si fuera del mapa.
     """
-    key = _snap_key(lat, lon, street_hint)
-    if key in _snap_cache:
-        cached = _snap_cache[key]
+    key, cached = _snap_lookup(lat, lon, street_hint)
+    if cached is not None:
         return cached[0], cached[1]
 
     try:
-        r = requests.get(
-            f"{OSRM_BASE_URL}/nearest/v1/driving/{lon},{lat}",
-            params={"number": n_candidates},
-            timeout=5,
-        )
+        url, params = _nearest_request(lat, lon, n_candidates)
+        r = requests.get(url, params=params, timeout=5)
         r.raise_for_status()
-        data = r.json()
-        if data.get("code") != "Ok" or not data.get("waypoints"):
-            return None
-
-        candidates = data["waypoints"]
-        nearest_dist = candidates[0].get("distance", float("inf"))
-        if nearest_dist > max_dist_m:
-            return None
-
-        hint_words = _significant_words(street_hint)
-        best: dict | None = None
-        best_dist = float("inf")
-
-        if hint_words:
-            for wp in candidates:
-                cand_name = wp.get("name", "")
-                if not cand_name:
-                    continue
-                if hint_words.issubset(_significant_words(cand_name)):
-                    dist = wp.get("distance", float("inf"))
-                    if dist < best_dist:
-                        best = wp
-                        best_dist = dist
-
-        if best is None and hint_words:
-            nearest_name = candidates[0].get("name", "")
-            logger.debug(
-                "snap fallback '%s' → '%s' (%.0f m) — ningún candidato con nombre coincidente",
-                street_hint, nearest_name, nearest_dist,
-            )
-            best = candidates[0]
-
-        chosen = best if best is not None else candidates[0]
-        snap_lon, snap_lat = chosen["location"]
-
-        _snap_cache[key] = [snap_lat, snap_lon]
-        _save_snap_cache()
-
-        return snap_lat, snap_lon
+        return _snap_result(key, r.json(), street_hint, max_dist_m)
 
     except Exception as e:
         logger.error("Error en snap_to_street (%.4f, %.4f): %s", lat, lon, e)
         return None
 
 
+async def snap_to_street_async(
+    lat: float,
+    lon: float,
+    street_hint: str,
+    n_candidates: int = _SNAP_CANDIDATES,
+    max_dist_m: float = _SNAP_MAX_DIST_M,
+    *,
+    on_cache_hit: Callable[[], object] | None = None,
+) -> tuple[float, float] | None:
+    """Versión asíncrona de snap_to_street() (misma caché y misma estrategia).
+
+    La caché (lectura de SQLite en un fallo de memoria, escritura del
+    resultado) se consulta en el pool de CPU, fuera del event loop.
+    on_cache_hit() se llama si el snap sale de la caché (progreso de /optimize).
+    """
+    key, cached = await run_cpu(_snap_lookup, lat, lon, street_hint)
+    if cached is not None:
+        if on_cache_hit is not None:
+            on_cache_hit()
+        return cached[0], cached[1]
+
+    try:
+        url, params = _nearest_request(lat, lon, n_candidates)
+        r = await get_async_client().get(url, params=params, timeout=5)
+        r.raise_for_status()
+        return await run_cpu(_snap_result, key, r.json(), street_hint, max_dist_m)
+
+    except Exception as e:
+        logger.error("Error en snap_to_street_async (%.4f, %.4f): %s", lat, lon, e)
+        return None
+
+
+def _table_url(coords: list[tuple[float, float]]) -> str:
+    coords_str = ";".join(f"{lon},{lat}" for lat, lon in coords)
+    return f"{OSRM_BASE_URL}/table/v1/driving/{coords_str}"
+
+
+def _parse_table(data: dict) -> tuple[list[list[int]], list[list[int]]] | None:
+    """Convierte la respuesta de OSRM /table en matrices de enteros."""
+    if data.get("code") != "Ok":
+        logger.error("OSRM /table error: %s", data.get("message", ""))
+        return None
+
+    dur_matrix  = [[round(v) for v in row] for row in data["durations"]]
+    dist_matrix = [[round(v) for v in row] for row in data["distances"]]
+    return dur_matrix, dist_matrix
+
+
 def get_osrm_matrix(
     coords: list[tuple[float, float]],
 ) -> tuple[list[list[int]], list[list[int]]] | None:
@@ -179,28 +315,64 @@ def get_osrm_matrix(
     if len(coords) < 2:
         return None
 
-    coords_str = ";".join(f"{lon},{lat}" for lat, lon in coords)
     try:
         r = requests.get(
-            f"{OSRM_BASE_URL}/table/v1/driving/{coords_str}",
+            _table_url(coords),
             params={"annotations": "duration,distance"},
             timeout=OSRM_TIMEOUT,
         )
         r.raise_for_status()
-        data = r.json()
+        return _parse_table(r.json())
 
-        if data.get("code") != "Ok":
-            logger.error("OSRM /table error: %s", data.get("message", ""))
-            return None
+    except Exception as e:
+        logger.error("Error en OSRM /table: %s", e)
+        return None
+
+
+async def get_osrm_matrix_async(
+    coords: list[tuple[float, float]],
+) -> tuple[list[list[int]], list[list[int]]] | None:
+    """Versión asíncrona de get_osrm_matrix()."""
+    if len(coords) < 2:
+        return None
 
-        dur_matrix  = [[round(v) for v in row] for row in data["durations"]]
-        dist_matrix = [[round(v) for v in row] for row in data["distances"]]
-        return dur_matrix, dist_matrix
+    try:
+        r = await get_async_client().get(
+            _table_url(coords),
+            params={"annotations": "duration,distance"},
+            timeout=OSRM_TIMEOUT,
+        )
+        r.raise_for_status()
+        return _parse_table(r.json())
 
     except Exception as e:
         logger.error("Error en OSRM /table: %s", e)
         return None
 
 
-# Cargar caché de snap al importar el módulo
-_load_snap_cache()
+async def get_osrm_route_async(
+    coords: list[tuple[float, float]],
+    *,
+    overview: str = "full",
+    timeout: float = OSRM_TIMEOUT,
+) -> dict | None:
+    """Primera ruta de OSRM /route entre coords (lat, lon) con geometría GeoJSON.
+
+    Devuelve el dict de la ruta (geometry, distance, …) o None si OSRM no
+    encuentra ruta. Los errores de red se propagan (httpx.HTTPError).
+    """
+    coords_str = ";".join(f"{lon},{lat}" for lat, lon in coords)
+    r = await get_async_client().get(
+        f"{OSRM_BASE_URL}/route/v1/driving/{coords_str}",
+        params={"overview": overview, "geometries": "geojson"},
+        timeout=timeout,
+    )
+    r.raise_for_status()
+    data = r.json()
+    if data.get("code") != "Ok" or not data.get("routes"):
+        return None
+    return data["routes"][0]
+
+
+register_cache("snap", lambda: _snap_cache)
+subscribe("snap", _snap_cache.evict_prefix)
@@ -0,0 +1,166 @@
+"""
+Estado compartido entre procesos (uvicorn --workers N) sobre SQLite/WAL.
+
+Cada worker tiene en memoria su copia (LRU) de las cachés; la fuente de
+verdad es SQLite (adapters.kvstore), que todos los procesos leen y escriben
+fila a fila sin pisarse:
+
+  - Lectura: un fallo en memoria relee la fila de SQLite (geocoding, snap,
+    sesiones de ruta), así lo que escribe un worker lo ven los demás.
+  - Invalidación: quien cambia o borra algo que otros pueden tener en memoria
+    publica (canal, prefijo de clave) con publish(). Cada proceso consulta
+    los eventos nuevos como mucho cada SHARED_STATE_POLL_S, desde sus propias
+    lecturas (poll()), y ejecuta los manejadores registrados con subscribe()
+    para ese canal. Los eventos propios se ignoran (ya se aplicaron).
+  - Los eventos de más de _EVENTS_KEEP_S se borran al arrancar otro proceso.
+    Un worker que lleva más tiempo sin consultar (las consultas solo ocurren
+    dentro de peticiones) pierde los que no había leído: lo detecta con
+    trimmed_through() y vacía todo lo que tiene en memoria (prefijo "").
+
+Las tablas de estado compartido que no son cachés (sesiones de ruta, estado
+del rebuild) viven en shared_state.sqlite3: get_store(tabla).
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from app.adapters.kvstore import InvalidationLog, SqliteKVStore
+from app.core.config import SHARED_STATE_POLL_S
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_DB = Path(__file__).resolve().parent.parent / "data" / "shared_state.sqlite3"
+_EVENTS_KEEP_S = 3600.0  # eventos más viejos se borran al arrancar otro proceso
+
+# Identifica a este proceso en los eventos que publica
+_ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+_lock = threading.Lock()
+# Un solo hilo consulta y aplica a la vez; los demás no esperan (ver poll())
+_poll_lock = threading.Lock()
+_log: InvalidationLog | None = None
+_stores: dict[str, SqliteKVStore] = {}
+_last_seq: int | None = None   # último evento visto (None = aún sin leer)
+_next_poll = 0.0
+_handlers: dict[str, list[Callable[[str], object]]] = {}
+
+
+def _get_log() -> InvalidationLog:
+    global _log
+    with _lock:
+        if _log is None:
+            _log = InvalidationLog(_DB)
+        return _log
+
+
+def get_store(table: str) -> SqliteKVStore:
+    """Tabla clave → JSON de shared_state.sqlite3 (una conexión por tabla)."""
+    with _lock:
+        store = _stores.get(table)
+        if store is None or store.path != _DB:
+            store = _stores[table] = SqliteKVStore(_DB, table)
+        return store
+
+
+def subscribe(channel: str, handler: Callable[[str], object]) -> None:
+    """handler(prefijo) se ejecuta cuando otro proceso publica en channel.
+
+    handler("") debe descartar todo lo del canal: es lo que se pide cuando este
+    proceso ha perdido eventos (ver poll()).
+    """
+    _handlers.setdefault(channel, []).append(handler)
+
+
+def publish(channel: str, prefix: str = "") -> None:
+    """Avisa a los demás procesos de que las claves prefix* de channel han cambiado."""
+    try:
+        _get_log().publish(_ORIGIN, channel, prefix)
+    except Exception as e:
+        logger.error("No se pudo publicar invalidación %s:%s: %s", channel, prefix, e)
+
+
+def publish_many(channel: str, prefixes: Iterable[str]) -> None:
+    """Como publish() para varios prefijos, en una sola escritura."""
+    prefixes = list(prefixes)
+    try:
+        _get_log().publish_many(_ORIGIN, channel, prefixes)
+    except Exception as e:
+        logger.error("No se pudieron publicar %d invalidaciones %s: %s", len(prefixes), channel, e)
+
+
+def poll(force: bool = False) -> int:
+    """Aplica los eventos de otros procesos (como mucho cada SHARED_STATE_POLL_S).
+
+    La primera llamada solo fija el punto de partida: lo anterior ya está en
+    SQLite, que es de donde este proceso carga. Devuelve nº de eventos aplicados.
+
+    Si otro hilo ya está consultando, devuelve 0 sin esperar: él aplica los
+    eventos, cada uno una sola vez y en orden, y el cursor nunca retrocede.
+    Sin espera tampoco hay interbloqueo con los locks que toman los
+    manejadores (p. ej. el de geocoding, desde cuyas lecturas se llama).
+    """
+    if not _poll_lock.acquire(blocking=False):
+        return 0
+    try:
+        return _poll_locked(force)
+    finally:
+        _poll_lock.release()
+
+
+def _poll_locked(force: bool) -> int:
+    """Cuerpo de poll(). Con _poll_lock."""
+    global _last_seq, _next_poll
+    now = time.monotonic()
+    if not force and now < _next_poll:
+        return 0
+    _next_poll = now + SHARED_STATE_POLL_S
+    try:
+        log = _get_log()
+        if _last_seq is None:
+            _last_seq = log.last_seq()
+            log.trim(time.time() - _EVENTS_KEEP_S)
+            return 0
+        events = log.since(_last_seq)
+        trimmed = log.trimmed_through()
+    except Exception as e:
+        logger.error("No se pudieron leer invalidaciones: %s", e)
+        return 0
+    applied = 0
+    if trimmed > _last_seq:
+        _last_seq = trimmed
+        logger.warning("Invalidaciones borradas antes de leerlas: se vacían las cachés en memoria")
+        for channel, handlers in _handlers.items():
+            for handler in handlers:
+                try:
+                    handler("")
+                    applied += 1
+                except Exception as e:
+                    logger.error("Error vaciando %s: %s", channel, e)
+    for seq, origin, channel, prefix in events:
+        _last_seq = seq
+        if origin == _ORIGIN:
+            continue
+        for handler in _handlers.get(channel, []):
+            try:
+                handler(prefix)
+                applied += 1
+            except Exception as e:
+                logger.error("Error aplicando invalidación %s:%s: %s", channel, prefix, e)
+    return applied
+
+
+def reset() -> None:
+    """Olvida conexiones y posición en el registro (tests, cambio de _DB)."""
+    global _log, _last_seq, _next_poll
+    with _lock:
+        if _log is not None:
+            _log.close()
+        for store in _stores.values():
+            store.close()
+        _log, _last_seq, _next_poll = None, None, 0.0
+        _stores.clear()
@@ -0,0 +1,24 @@
+"""
+Ejecución de trabajo bloqueante o intensivo en CPU fuera del event loop.
+
+Los endpoints async delegan aquí el solver (LKH3 vía subprocess), el fuzzy
+matching y el parseo de CSV para no bloquear al resto de peticiones.
+Pool propio: no compite con el threadpool de Starlette.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+_CPU_WORKERS = max(2, os.cpu_count() or 2)
+_executor = ThreadPoolExecutor(max_workers=_CPU_WORKERS, thread_name_prefix="cpu")
+
+
+async def run_cpu(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Ejecuta fn(*args, **kwargs) en el pool de CPU y espera su resultado."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
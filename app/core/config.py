@@ -25,6 +25,13 @@ GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
 GOOGLE_GEOCODING_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 GOOGLE_PLACES_URL = "https://maps.googleapis.com/maps/api/place/findplacefromtext/json"
 GOOGLE_CACHE_TTL_DAYS = 30      # días antes de expirar entradas de Google/Places
+GEOCODE_NEGATIVE_TTL_H = 12.0   # horas que se recuerda un FAILED antes de volver a consultar Google
+GEOCODE_REFRESH_QPS = 1.0       # ritmo del refresco en segundo plano de entradas caducadas
+GEOCODE_REFRESH_MAX_PENDING = 500  # claves caducadas en cola de refresco como máximo
+GOOGLE_RATE_LIMIT_QPS = 20.0    # ritmo máximo (e inicial) de llamadas a Google (Geocoding + Places)
+GOOGLE_RATE_MIN_QPS = 1.0       # suelo del ritmo adaptativo cuando Google responde 429/5xx
+GOOGLE_RATE_INCREASE_QPS = 0.25 # QPS que recupera el ritmo por cada respuesta normal
+GOOGLE_RATE_BURST = 10          # ráfaga permitida tras un periodo inactivo
 
 # ── Zona de trabajo: Posadas, Córdoba ─────────────────────────
 # Depósito/taller de salida: Avenida de Andalucía, Posadas
@@ -37,6 +44,30 @@ POSADAS_CENTER = (DEPOT_LAT, DEPOT_LON)    # lat, lon
 MAX_STOPS = 200         # máximo de paradas por petición
 GEOCODE_TIMEOUT = 30    # timeout por llamada a APIs externas
 OSRM_TIMEOUT = 60       # timeout para llamadas a OSRM
+CSV_UPLOAD_MAX_BYTES = 5 * 1024 * 1024  # tamaño máximo del CSV en /validation/upload
+
+# ── Coalescencia de peticiones duplicadas (single-flight) ────
+SINGLE_FLIGHT_LINGER_S = 10.0   # segundos que se sirve el resultado a reintentos tardíos
+
+# ── Sesiones de ruta (route_id) ──────────────────────────────
+ROUTE_SESSION_TTL_S = 8 * 3600  # caducidad deslizante: una jornada de reparto
+ROUTE_SESSION_MAX = 50          # sesiones en memoria (~0.3 MB c/u con 200 paradas)
+PREFETCH_SESSION_TTL_S = 24 * 3600  # matrices precalentadas la tarde anterior (/validation/prefetch)
+PREFETCH_SESSION_MAX = 5            # repartos precalentados en memoria
+
+# ── Sesiones de validación (validation_id, PATCH incremental) ─
+VALIDATION_SESSION_TTL_S = 8 * 3600  # caducidad deslizante: se corrige durante la jornada
+VALIDATION_SESSION_MAX = 50          # sesiones en memoria (filas + resultado por dirección)
+
+# ── Cachés en memoria (LRU, ver /api/admin/caches) ───────────
+GEOCODE_MEMORY_MAX = 200_000    # direcciones en memoria; la expulsada se relee de SQLite
+SNAP_MEMORY_MAX = 100_000       # snaps en memoria; el expulsado se relee de snap_cache.sqlite3
+
+# ── Catálogo de calles (streets.json) ────────────────────────
+CATALOG_CHECK_S = 5.0           # cada cuánto se mira si streets.json ha cambiado (mtime)
+
+# ── Estado compartido entre workers (uvicorn --workers N) ────
+SHARED_STATE_POLL_S = 0.5       # cada cuánto mira un worker las invalidaciones de los demás
 
 # ── Bounding box del área de reparto ─────────────────────────
 # Cubre Posadas, Rivero de Posadas, Palma del Río y carreteras
@@ -0,0 +1,46 @@
+"""
+Contadores de llamadas a APIs externas, por endpoint.
+
+Cada llamada registra su resultado ("ok", "throttled", "timeout", "network",
+"error") y su latencia. snapshot() devuelve, por endpoint: nº de llamadas,
+desglose por resultado y latencia media / máxima en ms. Seguro entre hilos.
+"""
+
+import threading
+from collections import Counter
+from typing import Any
+
+
+class CallStats:
+    """Llamadas, resultados y latencia por endpoint."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._outcomes: dict[str, Counter[str]] = {}
+        self._total_s: dict[str, float] = {}
+        self._max_s: dict[str, float] = {}
+
+    def record(self, endpoint: str, latency_s: float, outcome: str) -> None:
+        with self._lock:
+            self._outcomes.setdefault(endpoint, Counter())[outcome] += 1
+            self._total_s[endpoint] = self._total_s.get(endpoint, 0.0) + latency_s
+            self._max_s[endpoint] = max(self._max_s.get(endpoint, 0.0), latency_s)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            result: dict[str, dict[str, Any]] = {}
+            for endpoint, outcomes in self._outcomes.items():
+                calls = sum(outcomes.values())
+                result[endpoint] = {
+                    "calls": calls,
+                    "outcomes": dict(outcomes),
+                    "avg_ms": round(self._total_s[endpoint] / calls * 1000, 1),
+                    "max_ms": round(self._max_s[endpoint] * 1000, 1),
+                }
+            return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._outcomes.clear()
+            self._total_s.clear()
+            self._max_s.clear()
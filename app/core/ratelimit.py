@@ -0,0 +1,98 @@
+"""
+Token bucket compartido para limitar el ritmo de llamadas a APIs externas.
+
+  rate_per_s: tokens que se reponen por segundo (ritmo sostenido)
+  burst:      capacidad del cubo (ráfaga permitida tras un periodo inactivo)
+
+Cada llamada reserva un token: si no hay, el saldo queda negativo y la
+llamada espera lo que falte para reponerlo. Las reservas se hacen bajo un
+threading.Lock, así el mismo cubo sirve a la vez al camino síncrono
+(acquire, time.sleep en el hilo del llamante) y al asíncrono (acquire_async,
+asyncio.sleep sin bloquear el event loop), y las esperas quedan ordenadas.
+
+AdaptiveTokenBucket ajusta el ritmo con AIMD según lo que responde la API:
+  - on_success(): suma `increase` al ritmo (hasta el máximo configurado).
+  - on_throttle(retry_after): 429/5xx → ritmo × `decrease` (como mucho una vez
+    por cooldown_s, para que una tanda de 429 simultáneos no lo hunda) y vacía
+    el cubo; con Retry-After, nadie vuelve a llamar hasta que pase.
+"""
+
+import asyncio
+import math
+import threading
+import time
+
+
+class TokenBucket:
+    """Limitador de ritmo por token bucket, seguro entre hilos y corrutinas."""
+
+    def __init__(self, rate_per_s: float, burst: int) -> None:
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Repone los tokens acumulados desde la última operación. Bajo _lock."""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def _reserve(self) -> float:
+        """Reserva un token y devuelve los segundos que hay que esperar."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate_per_s
+
+    def acquire(self) -> None:
+        """Espera (bloqueando el hilo) hasta disponer de un token."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Espera (sin bloquear el event loop) hasta disponer de un token."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket con ritmo AIMD entre min_rate y el ritmo inicial (máximo)."""
+
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: int,
+        *,
+        min_rate: float = 1.0,
+        increase: float = 0.25,
+        decrease: float = 0.5,
+        cooldown_s: float = 1.0,
+    ) -> None:
+        super().__init__(rate_per_s, burst)
+        self.max_rate = rate_per_s
+        self.min_rate = min(min_rate, rate_per_s)
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown_s = cooldown_s
+        self._last_decrease = -math.inf
+
+    def on_success(self) -> None:
+        """Respuesta normal: aumento aditivo del ritmo."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate_per_s = min(self.max_rate, self.rate_per_s + self.increase)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        """429/5xx: reducción multiplicativa y pausa (Retry-After, si lo hay)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now - self._last_decrease >= self.cooldown_s:
+                self.rate_per_s = max(self.min_rate, self.rate_per_s * self.decrease)
+                self._last_decrease = now
+            # Sin tokens: la siguiente llamada espera al menos 1/rate (+ Retry-After).
+            # min() y no resta: varios 429 a la vez no acumulan pausas.
+            self._tokens = min(self._tokens, 0.0, -(retry_after or 0.0) * self.rate_per_s)
@@ -0,0 +1,89 @@
+"""
+Arranque en segundo plano y estado de "listo" del servidor.
+
+El servidor acepta peticiones en cuanto se importa la app; las cargas caras
+(caché de geocodificación, caché de snap, catálogo de calles, binario LKH)
+las hace Readiness.run() desde el lifespan, en un hilo, paso a paso. Mientras
+tanto cada módulo sigue cargando lazily lo que necesite la primera petición
+(misma carga, protegida por su lock), así que nada depende de que el
+calentamiento haya terminado.
+
+/health dice si el proceso responde; /ready si ya terminó el calentamiento
+(para el balanceador o el script de arranque).
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+WarmUpStep = Callable[[], object]
+
+
+class Readiness:
+    """Ejecuta pasos de calentamiento con nombre y guarda su duración y resultado."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started_at: float | None = None
+        self._finished_at: float | None = None
+        self._steps: dict[str, dict] = {}
+        self._done = threading.Event()
+
+    def is_ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._started_at = self._finished_at = None
+            self._steps = {}
+            self._done.clear()
+
+    def run_sync(self, steps: dict[str, WarmUpStep]) -> None:
+        """Ejecuta los pasos en orden. Un paso que falla se anota y no para el resto."""
+        with self._lock:
+            self._done.clear()
+            self._started_at, self._finished_at = time.perf_counter(), None
+            self._steps = {name: {"status": "pending"} for name in steps}
+        for name, fn in steps.items():
+            t0 = time.perf_counter()
+            info: dict = {"status": "ok"}
+            try:
+                detail = fn()
+                if detail is not None:
+                    info["detail"] = detail
+            except Exception as e:
+                logger.error("Calentamiento '%s' falló: %s", name, e)
+                info = {"status": "error", "error": str(e)}
+            info["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            with self._lock:
+                self._steps[name] = info
+        with self._lock:
+            self._finished_at = time.perf_counter()
+        self._done.set()
+        logger.info("Servidor listo en %.0f ms", self.snapshot()["startup_ms"] or 0)
+
+    async def run(self, steps: dict[str, WarmUpStep]) -> None:
+        """run_sync en un hilo: el bucle de eventos sigue atendiendo peticiones."""
+        await asyncio.to_thread(self.run_sync, steps)
+
+    def snapshot(self) -> dict:
+        """{ready, startup_ms, steps: {nombre: {status, ms, detail|error}}}."""
+        with self._lock:
+            started, finished = self._started_at, self._finished_at
+            steps = {name: dict(info) for name, info in self._steps.items()}
+        startup_ms = None
+        if started is not None and finished is not None:
+            startup_ms = round((finished - started) * 1000, 1)
+        return {"ready": self._done.is_set(), "startup_ms": startup_ms, "steps": steps}
+
+
+# Instancia del proceso (la usan el lifespan de main.py y /ready)
+startup = Readiness()
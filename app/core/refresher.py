@@ -0,0 +1,126 @@
+"""
+Cola de refresco en segundo plano con presupuesto de ritmo propio.
+
+Para stale-while-revalidate: el camino de la petición sirve el dato caducado y
+encola su clave con submit(); un hilo daemon la procesa después, sin bloquear
+a nadie, a un ritmo máximo de rate_per_s (TokenBucket propio, aparte del de
+las peticiones de usuario).
+
+  - submit() es O(1) y no bloquea: descarta claves ya pendientes (dedup) y,
+    si la cola está llena, la clave nueva (se volverá a encolar al usarse).
+  - El hilo se arranca al primer submit(). Con autostart=False no hay hilo y
+    run_pending() procesa la cola en el hilo llamante (tests, scripts).
+  - Un error en fn(key) se registra y no detiene el worker.
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Callable
+
+from app.core.logging import get_logger
+from app.core.ratelimit import TokenBucket
+
+logger = get_logger(__name__)
+
+_STOP = object()
+
+
+class BackgroundRefresher:
+    """Worker de un hilo que llama a fn(key) para cada clave encolada."""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[str], None],
+        rate_per_s: float,
+        max_pending: int = 1000,
+        *,
+        autostart: bool = True,
+    ) -> None:
+        self.name = name
+        self.fn = fn
+        self.max_pending = max_pending
+        self.autostart = autostart
+        self._bucket = TokenBucket(rate_per_s, 1)
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, key: str) -> bool:
+        """Encola key si no está ya pendiente. True si se ha encolado."""
+        with self._lock:
+            if key in self._pending or len(self._pending) >= self.max_pending:
+                return False
+            self._pending.add(key)
+            if self.autostart and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name=f"{self.name}-refresh", daemon=True,
+                )
+                self._thread.start()
+        self._queue.put(key)
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def run_pending(self) -> int:
+        """Procesa en este hilo todo lo encolado (sin esperar al ritmo). Devuelve cuántas."""
+        done = 0
+        while True:
+            try:
+                key = self._queue.get_nowait()
+            except queue.Empty:
+                return done
+            if key is _STOP:
+                self._queue.task_done()
+                continue
+            self._process(key)
+            done += 1
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Espera hasta timeout s a que no quede nada pendiente. True si se vació."""
+        deadline = time.monotonic() + timeout
+        while self.pending():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self) -> None:
+        """Detiene el hilo tras la clave en curso; lo pendiente se descarta."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._pending.clear()
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout=5)
+
+    # ── Worker ────────────────────────────────────────────────────────────────
+
+    def _loop(self) -> None:
+        while True:
+            key = self._queue.get()
+            if key is _STOP:
+                self._queue.task_done()
+                return
+            self._bucket.acquire()
+            self._process(key)
+
+    def _process(self, key: str) -> None:
+        try:
+            self.fn(key)
+        except Exception as e:
+            logger.error("%s: error refrescando '%s': %s", self.name, key, e)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+            self._queue.task_done()
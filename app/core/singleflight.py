@@ -0,0 +1,97 @@
+"""
+Single-flight: coalescencia de peticiones idénticas concurrentes.
+
+Dobles toques, reintentos tras timeouts del móvil y el modo 2 repartidores
+envían cuerpos idénticos con segundos de diferencia. En lugar de ejecutar el
+pipeline completo (y las llamadas a Google) varias veces:
+
+  - La primera petición con una clave lanza el cálculo.
+  - Las duplicadas concurrentes esperan ese mismo cálculo y comparten resultado.
+  - Tras terminar con éxito, el resultado se conserva linger_s segundos para
+    reintentos tardíos. Los errores no se conservan: un reintento recalcula.
+
+La clave es un hash canónico del cuerpo de la petición (request_key).
+Todo ocurre en el event loop: no hace falta lock.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def request_key(namespace: str, body: BaseModel) -> str:
+    """Hash canónico (sha256) de un cuerpo de petición Pydantic."""
+    canonical = json.dumps(
+        body.model_dump(mode="json"),
+        sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+    )
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+class SingleFlight(Generic[T]):
+    """Coalescencia de cálculos async por clave, con ventana post-finalización."""
+
+    def __init__(self, name: str, linger_s: float, max_recent: int = 256) -> None:
+        self.name = name
+        self.linger_s = linger_s
+        self.max_recent = max_recent
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._recent: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0, "recent_hits": 0}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Devuelve el resultado de fn() compartido entre llamadas con la misma clave."""
+        self._stats["calls"] += 1
+        now = time.monotonic()
+
+        recent = self._recent.get(key)
+        if recent is not None:
+            expires, result = recent
+            if now < expires:
+                self._stats["recent_hits"] += 1
+                logger.info("%s: reintento servido desde resultado reciente", self.name)
+                return result
+            del self._recent[key]
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self._stats["coalesced"] += 1
+            logger.info("%s: petición duplicada en curso — esperando resultado compartido", self.name)
+        else:
+            self._stats["executed"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._on_done, key))
+
+        # shield: si un cliente se desconecta no cancela el cálculo de los demás
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or self.linger_s <= 0:
+            return
+        self._recent[key] = (time.monotonic() + self.linger_s, task.result())
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+
+    def clear(self) -> None:
+        """Olvida resultados recientes (no cancela cálculos en curso)."""
+        self._recent.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {**self._stats, "inflight": len(self._inflight), "recent": len(self._recent)}
@@ -0,0 +1,194 @@
+"""
+Almacén en memoria acotado en tamaño y en tiempo (LRU + TTL).
+
+Para estado en memoria que no debe crecer sin límite en un proceso de larga
+vida: resultados exactos de /optimize preview, sesiones de ruta (route_id),
+cachés de geocodificación y de snap, GeoJSON del editor de mapa…
+
+  - max_items: al superarse se expulsa la entrada usada hace más tiempo.
+  - ttl_s:     las entradas caducan ttl_s segundos tras escribirse o, con
+               sliding=True, tras su último uso (math.inf = sin caducidad).
+
+Interfaz tipo dict (store[k] = v, store[k], get, pop, in, values, items).
+Thread-safe: se usa desde el event loop y desde tareas en segundo plano.
+
+Cada almacén cuenta aciertos, fallos, expulsiones por tamaño y caducidades
+(stats()). Los módulos registran los suyos con register_cache() para que
+/api/admin/caches los liste y permita vaciarlos por prefijo de clave.
+"""
+
+import itertools
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+_SIZE_SAMPLE = 200  # entradas medidas para estimar la memoria de un almacén
+
+
+def _deep_sizeof(obj: Any, depth: int = 4) -> int:
+    """Tamaño aproximado de obj y de lo que contiene (dicts, listas, tuplas, atributos)."""
+    size = sys.getsizeof(obj)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, depth - 1) + _deep_sizeof(v, depth - 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(v, depth - 1) for v in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _deep_sizeof(vars(obj), depth - 1)
+    return size
+
+
+class TTLStore(Generic[T]):
+    """Diccionario acotado por número de entradas y antigüedad."""
+
+    def __init__(self, max_items: int, ttl_s: float, *, sliding: bool = False) -> None:
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self.sliding = sliding
+        self._items: OrderedDict[str, tuple[float, T]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def __setitem__(self, key: str, value: T) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._items[key] = (now, value)
+            self._items.move_to_end(key)
+            self._evict(now)
+
+    def update(self, items: Iterable[tuple[str, T]]) -> None:
+        """Varias escrituras con un solo lock (cargas iniciales)."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._items:
+                self._items.update((key, (now, value)) for key, value in items)
+            else:
+                for key, value in items:
+                    if key in self._items:
+                        self._items.move_to_end(key)
+                    self._items[key] = (now, value)
+            self._evict(now)
+
+    def __getitem__(self, key: str) -> T:
+        """Valor de key; KeyError si no existe o ha caducado."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self._counts["misses"] += 1
+                raise KeyError(key)
+            stamp, value = entry
+            if now - stamp > self.ttl_s:
+                del self._items[key]
+                self._counts["expirations"] += 1
+                self._counts["misses"] += 1
+                raise KeyError(key)
+            self._counts["hits"] += 1
+            self._items.move_to_end(key)
+            if self.sliding:
+                self._items[key] = (now, value)
+            return value
+
+    def __contains__(self, key: object) -> bool:
+        """True si key está vigente (no cuenta como acceso ni la renueva)."""
+        if not isinstance(key, str):
+            return False
+        with self._lock:
+            entry = self._items.get(key)
+        return entry is not None and time.monotonic() - entry[0] <= self.ttl_s
+
+    def get(self, key: str) -> T | None:
+        try:
+            return self[key]
+        except KeyError:
+            return None
+
+    def pop(self, key: str, default: T | None = None) -> T | None:
+        with self._lock:
+            entry = self._items.pop(key, None)
+        return entry[1] if entry is not None else default
+
+    def values(self) -> list[T]:
+        """Valores vigentes, del usado hace más tiempo al más reciente (sin renovarlos)."""
+        return [v for _, v in self.items()]
+
+    def items(self) -> list[tuple[str, T]]:
+        """(clave, valor) vigentes, del usado hace más tiempo al más reciente."""
+        now = time.monotonic()
+        with self._lock:
+            return [(k, v) for k, (stamp, v) in self._items.items() if now - stamp <= self.ttl_s]
+
+    def evict_prefix(self, prefix: str) -> int:
+        """Expulsa las entradas cuya clave empieza por prefix ("" = todas). Devuelve cuántas."""
+        with self._lock:
+            keys = [k for k in self._items if k.startswith(prefix)]
+            for k in keys:
+                del self._items[k]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def memory_bytes(self) -> int:
+        """Memoria aproximada: tamaño medio de una muestra de entradas × nº de entradas."""
+        with self._lock:
+            n = len(self._items)
+            sample = list(itertools.islice(self._items.items(), _SIZE_SAMPLE))
+        if not sample:
+            return 0
+        sampled = sum(_deep_sizeof(k) + _deep_sizeof(v) for k, v in sample)
+        return sampled * n // len(sample)
+
+    def stats(self) -> dict[str, Any]:
+        """Entradas, límites, contadores y memoria aproximada."""
+        with self._lock:
+            counts = dict(self._counts)
+            items = len(self._items)
+        lookups = counts["hits"] + counts["misses"]
+        return {
+            "items": items,
+            "max_items": self.max_items,
+            "ttl_s": self.ttl_s if self.ttl_s != float("inf") else None,
+            **counts,
+            "hit_rate": round(counts["hits"] / lookups, 3) if lookups else None,
+            "bytes": self.memory_bytes(),
+        }
+
+    def _evict(self, now: float) -> None:
+        """Purga por antigüedad (desde la más vieja) y por tamaño. Con lock."""
+        while self._items:
+            oldest, (stamp, _) = next(iter(self._items.items()))
+            if now - stamp > self.ttl_s:
+                self._counts["expirations"] += 1
+            elif len(self._items) > self.max_items:
+                self._counts["evictions"] += 1
+            else:
+                break
+            del self._items[oldest]
+
+
+# ── Registro de cachés del proceso (para /api/admin/caches) ───────────────────
+# Se registra una función que devuelve el almacén vigente, no el almacén: así
+# se ve el que haya en cada momento en el módulo (p. ej. sustituido en tests).
+
+_registry: dict[str, Callable[[], TTLStore[Any]]] = {}
+
+
+def register_cache(name: str, getter: Callable[[], TTLStore[Any]]) -> None:
+    _registry[name] = getter
+
+
+def registered_caches() -> dict[str, TTLStore[Any]]:
+    """nombre → almacén, en orden de registro."""
+    return {name: getter() for name, getter in _registry.items()}
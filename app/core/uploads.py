@@ -0,0 +1,79 @@
+"""
+Lectura en streaming de un fichero subido como multipart/form-data.
+
+UploadFile de FastAPI no llega al endpoint hasta que el cuerpo entero se ha
+leído y volcado a un fichero temporal. multipart_file_chunks() en cambio
+parsea el cuerpo según llega (python-multipart, dependencia de FastAPI para
+formularios) y entrega los bytes del campo pedido trozo a trozo: el endpoint
+puede procesar el principio del fichero mientras el final aún viaja por la red.
+
+Los demás campos del formulario se ignoran; los parámetros van en la query.
+"""
+
+from typing import AsyncIterator
+
+from python_multipart.multipart import (
+    MultipartParseError,
+    MultipartParser,
+    parse_options_header,
+)
+
+
+async def multipart_file_chunks(
+    body: AsyncIterator[bytes], content_type: str, field: str = "file",
+) -> AsyncIterator[bytes]:
+    """Bytes del campo `field` de un cuerpo multipart, según llegan.
+
+    Lanza ValueError si el cuerpo no es multipart/form-data, está mal formado
+    o no trae el campo.
+    """
+    ctype, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if ctype != b"multipart/form-data" or not boundary:
+        raise ValueError("Se esperaba multipart/form-data con un fichero")
+
+    pending: list[bytes] = []
+    header_field = bytearray()
+    header_value = bytearray()
+    state = {"in_field": False, "found": False}
+
+    def on_part_begin() -> None:
+        state["in_field"] = False
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header_value.extend(data[start:end])
+
+    def on_header_end() -> None:
+        if bytes(header_field).lower() == b"content-disposition":
+            _, options = parse_options_header(bytes(header_value))
+            if options.get(b"name") == field.encode() and not state["found"]:
+                state["in_field"] = state["found"] = True
+        header_field.clear()
+        header_value.clear()
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if state["in_field"]:
+            pending.append(data[start:end])
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_part_data": on_part_data,
+    })
+    try:
+        async for chunk in body:
+            parser.write(chunk)
+            if pending:
+                data = b"".join(pending)
+                pending.clear()
+                yield data
+        parser.finalize()
+    except MultipartParseError as e:
+        raise ValueError(f"Cuerpo multipart mal formado: {e}") from e
+    if not state["found"]:
+        raise ValueError(f"Falta el campo '{field}' con el fichero")
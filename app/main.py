@@ -14,14 +14,22 @@ Servicios requeridos:
   LKH3 → binario local  (solver TSP)
 """
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.adapters.http import close_async_client, close_sync_session
+from app.adapters.lkh3 import lkh_binary
+from app.adapters.osrm import load_snap_cache
 from app.core.config import BASE_DIR
+from app.core.readiness import startup
 from app.routers import optimize, validation, system, map_editor
+from app.services import geocoding
+from app.services.geocoding import stop_background_refresh
 from osm_app.router import router as osm_router
 
 logging.basicConfig(
@@ -30,7 +38,33 @@ logging.basicConfig(
     datefmt="%H:%M:%S",
 )
 
+
+# Cargas del arranque, en este orden y en segundo plano (ver core/readiness.py)
+_WARM_UP_STEPS = {
+    "geocode_cache": geocoding.warm_up,
+    "snap_cache": load_snap_cache,
+    "lkh": lkh_binary,
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque/parada.
+
+    Al arrancar lanza el calentamiento de cachés sin esperarlo: el servidor
+    acepta peticiones enseguida y /ready indica cuándo ha terminado. Al
+    apagar detiene el refresco de geocodificación y cierra los pools HTTP.
+    """
+    warm_up = asyncio.create_task(startup.run(_WARM_UP_STEPS))
+    yield
+    warm_up.cancel()
+    stop_background_refresh()
+    await close_async_client()
+    close_sync_session()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Posadas Route Planner",
     description="API de optimización de rutas de reparto para Posadas (Córdoba)",
     version="1.0.0",
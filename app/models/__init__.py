@@ -76,6 +76,21 @@ class OptimizeRequest(BaseModel):
             "Usado para mostrar en la UI cuando la parada es un lugar."
         ),
     )
+    preview: bool = Field(
+        default=False,
+        description=(
+            "Si es true, devuelve al instante un orden aproximado (matriz geométrica, "
+            "sin snap ni OSRM) y calcula la ruta exacta en segundo plano. "
+            "El resultado exacto se obtiene en GET /optimize/result/{result_id}."
+        ),
+    )
+    route_id: str | None = Field(
+        default=None,
+        description=(
+            "Sesión de una optimización previa: re-optimizar reutiliza sus snaps y su "
+            "matriz para las coordenadas que ya conoce."
+        ),
+    )
 
 
 # ═══════════════════════════════════════════
@@ -127,6 +142,15 @@ class OptimizeResponse(BaseModel):
     success: bool = True
     summary: RouteSummary
     stops: list[StopInfo]
+    preview: bool = Field(False, description="True si el orden es una aproximación geométrica")
+    result_id: str | None = Field(
+        None,
+        description="Id para recoger la ruta exacta calculada en segundo plano (solo en preview)",
+    )
+    route_id: str | None = Field(
+        None,
+        description="Sesión de la ruta exacta para /route-evaluate, /api/route-segment y re-optimizar",
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -19,6 +19,24 @@ class CsvRow(BaseModel):
 
 class StartRequest(BaseModel):
     rows: list[CsvRow]
+    retry_failed: bool = False  # ignora la caché negativa: reintenta en Google los FAILED recientes
+
+
+class PrefetchRequest(BaseModel):
+    rows: list[CsvRow]
+    start_address: str = ""  # origen del reparto; vacío = depósito (como en /optimize)
+
+
+class RowEdit(BaseModel):
+    id: int       # posición de la fila en el /start original, o id devuelto al añadirla
+    row: CsvRow
+
+
+class ValidationPatch(BaseModel):
+    add: list[CsvRow] = []
+    update: list[RowEdit] = []
+    remove: list[int] = []        # ids de fila
+    retry_failed: bool = False    # vuelve a geocodificar las direcciones afectadas que fallaron
 
 
 class OverrideRequest(BaseModel):
@@ -27,6 +45,11 @@ class OverrideRequest(BaseModel):
     lon: float
 
 
+class OverrideBatchRequest(BaseModel):
+    overrides: list[OverrideRequest]
+    snap: bool = False   # además snapea cada pin a la red viaria y deja el snap en caché
+
+
 # ── Response ──────────────────────────────────────────────────────────────────
 
 class GeocodedStop(BaseModel):
@@ -36,7 +59,7 @@ class GeocodedStop(BaseModel):
     packages: list[Package]
     lat: float
     lon: float
-    confidence: str  # EXACT_ADDRESS | EXACT_PLACE | OVERRIDE
+    confidence: str  # EXACT_ADDRESS | EXACT_PLACE | INTERPOLATED | OVERRIDE
     tipo: str = "Normal"  # 'Express' si algún paquete es Express, si no 'Normal'
 
 
@@ -52,3 +75,54 @@ class StartResponse(BaseModel):
     failed: list[FailedStop]
     total_packages: int
     unique_addresses: int
+    validation_id: str = ""  # sesión para corregir con PATCH /validation/sessions/{id}
+
+
+class ValidationDiff(BaseModel):
+    validation_id: str
+    added_ids: list[int] = []          # ids asignados a las filas añadidas, en orden
+    geocoded: list[GeocodedStop] = []  # paradas nuevas o cambiadas (sustituyen por address)
+    failed: list[FailedStop] = []
+    removed: list[str] = []            # address de las paradas que ya no existen
+    regeocoded: int = 0                # direcciones geocodificadas en esta llamada
+    total_packages: int = 0
+    unique_addresses: int = 0
+
+
+class OverrideBatchResponse(BaseModel):
+    ok: bool = True
+    saved: int                   # direcciones guardadas (las repetidas cuentan una vez)
+    snapped: int = 0             # pins con snap en caché (solo con snap=true)
+    snap_failed: list[str] = []  # direcciones sin snap: fuera del mapa u OSRM no responde
+
+
+class UploadResponse(StartResponse):
+    skipped_rows: int = 0     # filas con contenido pero sin dirección
+    bytes_read: int = 0       # tamaño del CSV
+    read_ms: float = 0.0      # recepción + parseo + agrupado (hasta la última fila)
+    elapsed_ms: float = 0.0   # total, incluida la geocodificación
+    rows_per_s: float = 0.0   # filas / read_ms
+
+
+class PrefetchStatus(BaseModel):
+    job_id: str
+    status: str            # pending | running | done | error
+    total: int = 0         # direcciones únicas
+    geocoded: int = 0
+    failed: int = 0
+    snapped: int = 0
+    matrix_ready: bool = False
+    elapsed_ms: float = 0.0
+    error: str = ""
+
+
+class ValidationJobStatus(BaseModel):
+    job_id: str
+    status: str               # pending | running | done | cancelled | error
+    total: int = 0            # direcciones únicas
+    processed: int = 0        # direcciones ya resueltas (geocoded + failed)
+    total_packages: int = 0
+    geocoded: list[GeocodedStop] = []   # parciales mientras corre, en el orden del CSV
+    failed: list[FailedStop] = []
+    elapsed_ms: float = 0.0
+    error: str = ""
@@ -10,6 +10,7 @@ Endpoints para el editor nativo de red viaria de la app Flutter.
 """
 
 import asyncio
+import time
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
@@ -22,6 +23,7 @@ from app.models.map_editor import (
     SaveResponse,
 )
 from app.adapters.osrm import clear_snap_cache
+from app.adapters.shared_state import get_store
 from app.services.map_editor import apply_and_save, get_geojson
 
 logger = get_logger(__name__)
@@ -30,21 +32,56 @@ router = APIRouter(prefix="/editor", tags=["map-editor"])
 
 _START_SH = PROJECT_DIR / "start.sh"
 
-# ── Estado del rebuild (en memoria; se reinicia con el proceso) ───────────────
-_rebuild: dict[str, object] = {
+# ── Estado del rebuild (compartido entre workers: shared_state.sqlite3) ───────
+# Un solo rebuild a la vez en todo el servidor: el worker que lo lanza lo
+# marca como en curso en una transacción (_claim_rebuild). Si ese worker
+# muere a mitad, la marca se ignora pasado _REBUILD_STALE_S.
+
+_REBUILD_KEY = "rebuild"
+_REBUILD_STALE_S = 3600.0
+_REBUILD_IDLE: dict = {
     "running": False,
     "status":  "idle",    # idle | running | ok | error
     "message": "",
 }
 
 
+def _is_running(state: dict, now: float) -> bool:
+    return bool(state["running"]) and now - state.get("started_at", 0.0) < _REBUILD_STALE_S
+
+
+def _rebuild_state() -> dict:
+    """Estado actual del rebuild (lanzado desde cualquier worker)."""
+    state = get_store("map_editor").get(_REBUILD_KEY) or _REBUILD_IDLE
+    return {**state, "running": _is_running(state, time.time())}
+
+
+def _set_rebuild(**fields: object) -> None:
+    """Actualiza campos del estado del rebuild."""
+    get_store("map_editor").transform(
+        _REBUILD_KEY, lambda state: {**(state or _REBUILD_IDLE), **fields},
+    )
+
+
+def _claim_rebuild() -> bool:
+    """Marca el rebuild como en curso si no lo está ya. False si otro se adelantó."""
+    now = time.time()
+
+    def claim(state: dict | None) -> dict | None:
+        if state is not None and _is_running(state, now):
+            return None
+        return {"running": True, "status": "running", "message": "Iniciando rebuild…", "started_at": now}
+
+    return get_store("map_editor").transform(_REBUILD_KEY, claim) is not None
+
+
 # ── Background task ───────────────────────────────────────────────────────────
 
 async def _run_rebuild_bg() -> None:
-    """Ejecuta ./start.sh rebuild-map como subproceso async en background."""
-    global _rebuild
-    _rebuild.update(running=True, status="running", message="Iniciando rebuild…")
+    """Ejecuta ./start.sh rebuild-map como subproceso async en background.
 
+    El estado ya está marcado como en curso (_claim_rebuild).
+    """
     try:
         proc = await asyncio.create_subprocess_exec(
             "bash", str(_START_SH), "rebuild-map",
@@ -57,23 +94,23 @@ async def _run_rebuild_bg() -> None:
 
         if proc.returncode == 0:
             clear_snap_cache()
-            _rebuild.update(
+            _set_rebuild(
                 status="ok",
                 message="Rebuild completado. OSRM activo con el nuevo mapa.",
             )
             logger.info("rebuild-map completado correctamente")
         else:
-            _rebuild.update(
+            _set_rebuild(
                 status="error",
                 message=f"rebuild-map falló (código {proc.returncode})",
             )
             logger.error("rebuild-map error:\n%s", output)
 
     except Exception as exc:
-        _rebuild.update(status="error", message=str(exc))
+        _set_rebuild(status="error", message=str(exc))
         logger.exception("Error inesperado en rebuild")
     finally:
-        _rebuild["running"] = False
+        _set_rebuild(running=False)
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────────
@@ -110,13 +147,15 @@ async def save_map_changes(request: SaveRequest) -> SaveResponse:
 @router.post("/rebuild")
 async def trigger_rebuild() -> JSONResponse:
     """Lanza ./start.sh rebuild-map en background y devuelve inmediatamente."""
-    if _rebuild["running"]:
+    if _rebuild_state()["running"]:
         raise HTTPException(status_code=409, detail="Ya hay un rebuild en curso.")
     if not PBF_PATH.exists():
         raise HTTPException(
             status_code=404,
             detail=f"PBF no encontrado: {PBF_PATH}",
         )
+    if not _claim_rebuild():
+        raise HTTPException(status_code=409, detail="Ya hay un rebuild en curso.")
     asyncio.create_task(_run_rebuild_bg())
     return JSONResponse({"status": "started"})
 
@@ -124,4 +163,7 @@ async def trigger_rebuild() -> JSONResponse:
 @router.get("/rebuild/status", response_model=RebuildStatusResponse)
 async def get_rebuild_status() -> RebuildStatusResponse:
     """Devuelve el estado actual del rebuild (para polling desde Flutter)."""
-    return RebuildStatusResponse(**_rebuild)  # type: ignore[arg-type]
+    state = _rebuild_state()
+    return RebuildStatusResponse(
+        running=state["running"], status=state["status"], message=state["message"],
+    )
@@ -5,15 +5,45 @@ POST /optimize
   Recibe paradas pre-agrupadas y validadas (con coords) desde el flujo de
   validación, calcula el orden óptimo de visita (TSP via LKH3 + OSRM)
   y devuelve la ruta completa con geometría y lista de paradas.
+  Cada ruta exacta abre una sesión (route_id) con snaps y matrices; con
+  route_id en la petición, re-optimizar los reutiliza (services.route_sessions);
+  sin él, se usa la sesión precalentada por /validation/prefetch si cubre
+  todas las paradas.
+  Con preview=true devuelve al instante un orden aproximado y calcula la
+  ruta exacta en segundo plano.
+
+GET /optimize/result/{result_id}
+  Ruta exacta de una petición preview: 202 mientras se calcula, 200 al terminar.
+
+Las respuestas de /optimize y /optimize/result se negocian por Accept
+(JSON u application/msgpack) y Accept-Encoding (br/gzip), ver core.responses.
+
+POST /route-evaluate
+  Distancia de una ruta ya ordenada; con route_id, sin llamar a OSRM.
+
+POST /optimize/stream
+  Igual que /optimize pero emite NDJSON (un evento JSON por línea) según avanza:
+  snap (i/N, aciertos de caché), matrix, solver_start, solver_end y result/error.
 """
 
+import asyncio
+import json
 import time
+import uuid
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from app.core.config import START_ADDRESS, MAX_STOPS, DEPOT_LAT, DEPOT_LON
+from app.core.config import (
+    START_ADDRESS,
+    MAX_STOPS,
+    DEPOT_LAT,
+    DEPOT_LON,
+    SINGLE_FLIGHT_LINGER_S,
+)
 from app.core.logging import get_logger
+from app.core.responses import negotiated_response
 from app.models import (
     OptimizeRequest,
     OptimizeResponse,
@@ -22,14 +52,31 @@ from app.models import (
     StopInfo,
     RouteSummary,
 )
-from app.services.geocoding import geocode, get_corrected_street
-from app.services.routing import optimize_route, snap_to_street, format_distance, get_osrm_matrix
+from app.core.concurrency import run_cpu
+from app.core.singleflight import SingleFlight, request_key
+from app.core.ttlstore import TTLStore, register_cache
+from app.services.geocoding import geocode_async, get_corrected_street
+from app.services.ports import ProgressSink
+from app.services.route_sessions import (
+    RouteSession,
+    create_session,
+    find_prefetched_session,
+    get_session,
+)
+from app.services.routing import (
+    optimize_route_async,
+    preview_route,
+    snap_to_street_async,
+    format_distance,
+    get_osrm_matrix_async,
+)
 from app.utils.validation import validate_coord as _validate_coord
 
 
 class RouteEvaluateRequest(BaseModel):
     """Petición al endpoint /route-evaluate."""
     coords: list[list[float]]
+    route_id: str | None = None
 
 
 class RouteEvaluateResponse(BaseModel):
@@ -41,6 +88,41 @@ class RouteEvaluateResponse(BaseModel):
 router = APIRouter(tags=["optimize"])
 logger = get_logger(__name__)
 
+# Peticiones /optimize idénticas y simultáneas comparten un único cálculo
+_optimize_flights: SingleFlight[OptimizeResponse] = SingleFlight(
+    "optimize", linger_s=SINGLE_FLIGHT_LINGER_S,
+)
+
+
+# ── Resultados exactos de peticiones preview ──────────────────────────────────
+# result_id → OptimizeResponse | HTTPException | None=pendiente.
+# Acotado en tamaño y tiempo: el cliente recoge el resultado en segundos.
+
+_EXACT_RESULTS_MAX = 100
+_EXACT_RESULTS_TTL_S = 600.0
+_exact_results: TTLStore[OptimizeResponse | HTTPException | None] = TTLStore(
+    _EXACT_RESULTS_MAX, _EXACT_RESULTS_TTL_S,
+)
+register_cache("optimize.exact_results", lambda: _exact_results)
+
+
+def _store_exact_result(result_id: str, result: OptimizeResponse | HTTPException | None) -> None:
+    """Guarda el estado de un cálculo exacto."""
+    _exact_results[result_id] = result
+
+
+async def _run_exact_in_background(result_id: str, req: OptimizeRequest) -> None:
+    """Calcula la ruta exacta (snap + OSRM + LKH3) para una petición preview."""
+    try:
+        response = await _compute_route(req)
+        response.result_id = result_id
+        _store_exact_result(result_id, response)
+    except HTTPException as exc:
+        _store_exact_result(result_id, exc)
+    except Exception as exc:
+        logger.exception("Error calculando la ruta exacta %s", result_id)
+        _store_exact_result(result_id, HTTPException(500, detail=str(exc)))
+
 
 # ── Resolución de coordenadas desde el request ────────────────────────────────
 
@@ -73,6 +155,49 @@ def _resolve_coords_from_request(
     return geocoded_ok, geocoded_fail
 
 
+# ── Snap concurrente a la red viaria ──────────────────────────────────────────
+
+_SNAP_CONCURRENCY = 16  # peticiones simultáneas a OSRM /nearest por ruta
+
+
+async def _snap_all(
+    geocoded_ok: list[tuple[str, tuple[float, float], int]],
+    progress: ProgressSink | None,
+    session: RouteSession | None = None,
+) -> list[tuple[float, float] | None]:
+    """Snapea todas las paradas en paralelo; conserva el orden de entrada.
+
+    Las coords que ya conoce la sesión de ruta se toman de ella sin OSRM.
+    Los eventos 'snap' se emiten según terminan (i = nº de paradas resueltas);
+    si salió de la caché lo dice el propio snap_to_street_async.
+    """
+    sem = asyncio.Semaphore(_SNAP_CONCURRENCY)
+    n = len(geocoded_ok)
+    done = 0
+    hits = 0
+
+    async def _one(addr: str, coord: tuple[float, float]) -> tuple[float, float] | None:
+        nonlocal done, hits
+        lat, lon = coord
+        snapped = session.snapped(coord) if session is not None else None
+        cached = snapped is not None
+        if snapped is None:
+            def _hit() -> None:
+                nonlocal cached
+                cached = True
+
+            street_hint = await run_cpu(get_corrected_street, addr)
+            async with sem:
+                snapped = await snap_to_street_async(lat, lon, street_hint, on_cache_hit=_hit)
+        done += 1
+        hits += cached
+        if progress is not None:
+            progress("snap", i=done, n=n, cached=cached, cache_hits=hits, ok=snapped is not None)
+        return snapped
+
+    return list(await asyncio.gather(*(_one(addr, coord) for addr, coord, _ in geocoded_ok)))
+
+
 # ── Construcción de la lista de paradas ───────────────────────────────────────
 
 def _build_stops(
@@ -140,9 +265,102 @@ def _build_stops(
     },
     summary="Optimizar ruta desde lista de direcciones",
 )
-def optimize(req: OptimizeRequest):
+async def optimize(req: OptimizeRequest, request: Request, background_tasks: BackgroundTasks):
+    if not req.preview:
+        result = await _optimize_flights.run(
+            request_key("optimize", req), lambda: _compute_route(req),
+        )
+        return negotiated_response(request, result)
+
+    response = await _compute_route(req, preview=True)
+    result_id = uuid.uuid4().hex
+    response.result_id = result_id
+    _store_exact_result(result_id, None)
+    background_tasks.add_task(_run_exact_in_background, result_id, req)
+    return negotiated_response(request, response)
+
+
+@router.get(
+    "/optimize/result/{result_id}",
+    response_model=OptimizeResponse,
+    responses={202: {"description": "Cálculo exacto en curso"}, 404: {"model": ErrorResponse}},
+    summary="Ruta exacta de una petición preview",
+)
+async def optimize_result(result_id: str, request: Request):
+    try:
+        result = _exact_results[result_id]
+    except KeyError:
+        raise HTTPException(404, detail="Resultado no encontrado o expirado") from None
+    if result is None:
+        return JSONResponse(status_code=202, content={"status": "pending", "result_id": result_id})
+    if isinstance(result, HTTPException):
+        raise result
+    return negotiated_response(request, result)
+
+
+@router.post(
+    "/optimize/stream",
+    response_class=StreamingResponse,
+    summary="Optimizar ruta emitiendo eventos de progreso (NDJSON)",
+)
+async def optimize_stream(req: OptimizeRequest):
+    """Ejecuta /optimize en una tarea y emite cada evento de progreso como una
+    línea JSON. El último evento es siempre 'result' (con el OptimizeResponse)
+    o 'error' (con status_code y detail). Cada evento lleva t_ms desde el inicio.
+    Con preview=true se emite antes un evento 'preview' con el orden aproximado.
+    """
+    events: asyncio.Queue[dict | None] = asyncio.Queue()
+    loop = asyncio.get_running_loop()
     t_start = time.perf_counter()
 
+    def emit(event: str, **fields: object) -> None:
+        # Seguro desde el event loop y desde el pool de CPU (eventos del solver)
+        t_ms = round((time.perf_counter() - t_start) * 1000, 1)
+        loop.call_soon_threadsafe(events.put_nowait, {"event": event, "t_ms": t_ms, **fields})
+
+    async def worker() -> None:
+        try:
+            if req.preview:
+                preview = await _compute_route(req, preview=True)
+                emit("preview", response=preview.model_dump(mode="json"))
+            response = await _compute_route(req, progress=emit)
+            emit("result", response=response.model_dump(mode="json"))
+        except HTTPException as exc:
+            emit("error", status_code=exc.status_code, detail=exc.detail)
+        except Exception as exc:
+            logger.exception("Error en /optimize/stream")
+            emit("error", status_code=500, detail=str(exc))
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, None)
+
+    task = asyncio.create_task(worker())
+
+    async def lines():
+        try:
+            while (item := await events.get()) is not None:
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def _compute_route(
+    req: OptimizeRequest,
+    *,
+    preview: bool = False,
+    progress: ProgressSink | None = None,
+) -> OptimizeResponse:
+    """Pipeline completo de /optimize.
+
+    preview=True omite el snap a la red viaria y sustituye OSRM + LKH3 por la
+    matriz geométrica y el vecino más cercano (preview_route).
+    progress recibe los eventos de snap, matriz y solver (ver /optimize/stream).
+    """
+    t_start = time.perf_counter()
+    session = None if preview else await run_cpu(get_session, req.route_id)
+
     addresses = [a.strip() for a in req.addresses if a.strip()]
     if not addresses:
         raise HTTPException(400, detail="La lista de direcciones está vacía")
@@ -189,17 +407,21 @@ def optimize(req: OptimizeRequest):
     # 2. Origen — geocodificar si es custom, luego snap a red viaria
     origin_addr = req.start_address or START_ADDRESS
     if req.start_address:
-        origin_coord, _ = geocode(origin_addr)
+        origin_coord, _ = await geocode_async(origin_addr)
         if origin_coord is None:
             raise HTTPException(400, detail=f"No se pudo geocodificar el origen: {origin_addr}")
-        origin_hint = get_corrected_street(origin_addr)
+        origin_hint = await run_cpu(get_corrected_street, origin_addr)
     else:
         origin_coord = (DEPOT_LAT, DEPOT_LON)
         origin_hint = START_ADDRESS
 
-    origin_snapped = snap_to_street(origin_coord[0], origin_coord[1], origin_hint)
-    if origin_snapped is not None:
-        origin_coord = origin_snapped
+    origin_raw = origin_coord
+    if not preview:
+        origin_snapped = session.snapped(origin_coord) if session is not None else None
+        if origin_snapped is None:
+            origin_snapped = await snap_to_street_async(origin_coord[0], origin_coord[1], origin_hint)
+        if origin_snapped is not None:
+            origin_coord = origin_snapped
 
     # 3. Coordenadas de paradas (pre-resueltas en validación)
     geocoded_ok, geocoded_fail = _resolve_coords_from_request(req, unique_addresses)
@@ -207,16 +429,26 @@ def optimize(req: OptimizeRequest):
     if not geocoded_ok:
         raise HTTPException(400, detail="No se pudo geocodificar ninguna dirección.")
 
-    # 3b. Snap a red viaria (OSRM /nearest) — valida rutabilidad y ajusta coords
+    # Sin route_id: reparto precalentado la tarde anterior (/validation/prefetch)
+    if session is None and not preview:
+        session = await run_cpu(
+            find_prefetched_session, [origin_raw] + [coord for _, coord, _ in geocoded_ok],
+        )
+
+    # 3b. Snap a red viaria (OSRM /nearest) — valida rutabilidad y ajusta coords.
+    #     En preview se usan las coords tal cual: el snap llega con la ruta exacta.
+    #     Las peticiones a OSRM van en paralelo (acotadas por _SNAP_CONCURRENCY).
+    if preview:
+        snap_results: list[tuple[float, float] | None] = [coord for _, coord, _ in geocoded_ok]
+    else:
+        snap_results = await _snap_all(geocoded_ok, progress, session)
+
     snap_coord_by_i: dict[int, tuple[float, float]] = {}
     routable_ok: list[tuple[str, tuple[float, float], int]] = []
-    for addr, coord, orig_i in geocoded_ok:
-        lat, lon = coord
-        street_hint = get_corrected_street(addr)
-        snapped = snap_to_street(lat, lon, street_hint)
+    for (addr, coord, orig_i), snapped in zip(geocoded_ok, snap_results):
         if snapped is None:
             geocoded_fail.append((addr, orig_i))
-            logger.warning("Fuera del mapa OSRM: %s (%.4f, %.4f) → excluida", addr, lat, lon)
+            logger.warning("Fuera del mapa OSRM: %s (%.4f, %.4f) → excluida", addr, coord[0], coord[1])
         else:
             snap_coord_by_i[orig_i] = snapped
             routable_ok.append((addr, coord, orig_i))
@@ -252,6 +484,7 @@ def optimize(req: OptimizeRequest):
     ok_aliases = [unique_aliases[orig_i] for _, _, orig_i in geocoded_ok]
 
     all_coords = [origin_coord] + ok_coords_snapped
+    all_raw_coords = [origin_raw] + [coord for _, coord, _ in geocoded_ok]
     all_addresses = [origin_addr] + ok_addresses
     all_primary_names = [""] + ok_primary_names
     all_names_lists: list[list[str]] = [[]] + ok_all_names
@@ -259,8 +492,18 @@ def optimize(req: OptimizeRequest):
     all_pkg_counts = [0] + ok_pkg_counts
     all_aliases_list = [""] + ok_aliases
 
-    # 4. Orden óptimo (LKH3)
-    solver_result = optimize_route(all_coords)
+    # 4. Orden óptimo (LKH3) o aproximado (preview)
+    if preview:
+        solver_result = await run_cpu(preview_route, all_coords)
+    else:
+        # Re-optimizar con sesión: si conoce todas las coords, submatriz sin OSRM
+        matrix = session.submatrix(all_coords) if session is not None else None
+        if session is not None:
+            logger.info(
+                "Sesión %s reutilizada (matriz %s)", req.route_id or "precalentada",
+                "completa" if matrix is not None else "no aplicable: coords nuevas",
+            )
+        solver_result = await optimize_route_async(all_coords, matrix=matrix, progress=progress)
     if solver_result is None:
         raise HTTPException(
             503,
@@ -268,6 +511,13 @@ def optimize(req: OptimizeRequest):
         )
 
     wp_order = solver_result["waypoint_order"]
+    route_id = None
+    if not preview and "dist_matrix" in solver_result:
+        route_id = await run_cpu(
+            create_session,
+            all_raw_coords, all_coords,
+            solver_result["dur_matrix"], solver_result["dist_matrix"], wp_order,
+        )
     stop_details_map = {sd["original_index"]: sd for sd in solver_result.get("stop_details", [])}
     ordered_coords = [all_coords[i] for i in wp_order]
 
@@ -294,6 +544,8 @@ def optimize(req: OptimizeRequest):
             computing_time_ms=computing_ms,
         ),
         stops=stops,
+        preview=preview,
+        route_id=route_id,
     )
 
 
@@ -305,9 +557,12 @@ def optimize(req: OptimizeRequest):
     responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}},
     summary="Evaluar distancia de una ruta ya ordenada (OSRM)",
 )
-def route_evaluate(req: RouteEvaluateRequest):
+async def route_evaluate(req: RouteEvaluateRequest):
     """Recibe coords ya ordenadas (depósito en posición 0) y calcula la
-    distancia total sumando pares consecutivos de la matriz OSRM."""
+    distancia total sumando pares consecutivos de la matriz OSRM.
+
+    Con route_id y coords de esa sesión se usa la matriz guardada.
+    """
     if len(req.coords) < 2:
         raise HTTPException(400, detail="Se necesitan al menos 2 coordenadas (depósito + 1 parada).")
 
@@ -317,12 +572,14 @@ def route_evaluate(req: RouteEvaluateRequest):
             raise HTTPException(400, detail=f"Coordenada {i} inválida: {raw}")
         coords.append((raw[0], raw[1]))
 
-    matrix = get_osrm_matrix(coords)
-    if matrix is None:
-        raise HTTPException(503, detail="OSRM no pudo calcular las distancias.")
-
-    _, dist_matrix = matrix
-    total_dist = float(sum(dist_matrix[i][i + 1] for i in range(len(coords) - 1)))
+    session = await run_cpu(get_session, req.route_id)
+    total_dist = session.path_distance(coords) if session is not None else None
+    if total_dist is None:
+        matrix = await get_osrm_matrix_async(coords)
+        if matrix is None:
+            raise HTTPException(503, detail="OSRM no pudo calcular las distancias.")
+        _, dist_matrix = matrix
+        total_dist = float(sum(dist_matrix[i][i + 1] for i in range(len(coords) - 1)))
 
     return RouteEvaluateResponse(
         total_distance_m=total_dist,
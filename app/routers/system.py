@@ -1,10 +1,25 @@
-"""Router de sistema: health check, estado de servicios Docker, segmento de ruta GPS."""
+"""Router de sistema: health check, readiness, estado de servicios Docker,
+caché de geocodificación, cachés en memoria, catálogo de calles, segmento de ruta GPS."""
 
-import requests
-from fastapi import APIRouter, Request
+import asyncio
 
-from app.core.config import OSRM_BASE_URL, OSRM_TIMEOUT
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.adapters.http import get_async_client
+from app.adapters.osrm import get_osrm_route_async
+from app.adapters.shared_state import publish, subscribe
+from app.core.config import OSRM_BASE_URL
 from app.core.logging import get_logger
+from app.core.readiness import startup
+from app.core.ttlstore import registered_caches
+from app.services.geocoding import (
+    get_cache_stats,
+    get_catalog_stats,
+    get_google_stats,
+    reload_street_catalog,
+)
+from app.services.route_sessions import get_session
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -16,13 +31,26 @@ async def health(request: Request):
     return {"status": "ok", "version": request.app.version}
 
 
+@router.get("/ready", tags=["system"])
+async def ready() -> JSONResponse:
+    """Calentamiento del arranque: 503 mientras se cargan las cachés, 200 al terminar.
+
+    Incluye la duración de cada paso (startup_ms total y ms por paso).
+    """
+    snap = startup.snapshot()
+    return JSONResponse(
+        {"status": "ready" if snap["ready"] else "starting", **snap},
+        status_code=200 if snap["ready"] else 503,
+    )
+
+
 @router.get("/api/services/status", tags=["system"])
 async def services_status():
     """Estado del servicio OSRM."""
     osrm_ok = False
 
     try:
-        r = requests.get(
+        r = await get_async_client().get(
             f"{OSRM_BASE_URL}/route/v1/driving/-5.105,37.802;-5.110,37.800?overview=false",
             timeout=5,
         )
@@ -36,34 +64,105 @@ async def services_status():
     }
 
 
+@router.get("/api/geocoding/stats", tags=["system"])
+async def geocoding_stats():
+    """Caché de geocodificación: entradas, caducadas, fallos recientes y refresco.
+
+    refreshed / changed / dropped / errors cuentan los refrescos en segundo
+    plano desde el arranque; stale_served, las consultas servidas caducadas.
+    google: ritmo adaptativo actual y, por endpoint (geocoding / places),
+    llamadas, resultados (ok, throttled, timeout…) y latencia media / máxima.
+    """
+    return {**await asyncio.to_thread(get_cache_stats), "google": get_google_stats()}
+
+
+# ── Cachés en memoria (admin) ─────────────────────────────────────────────────
+# Con varios workers, una expulsión se anuncia en el canal "admin.evict"
+# ("nombre|prefijo") y cada worker la aplica a su memoria en su siguiente poll.
+
+def _evict_local(message: str) -> int:
+    name, _, prefix = message.partition("|")
+    store = registered_caches().get(name)
+    return store.evict_prefix(prefix) if store is not None else 0
+
+
+subscribe("admin.evict", _evict_local)
+
+
+@router.get("/api/admin/caches", tags=["system"])
+async def list_caches():
+    """Cachés en memoria de este worker: entradas, límite, TTL, aciertos, fallos,
+    expulsiones, caducidades y memoria aproximada (bytes)."""
+    return {name: store.stats() for name, store in registered_caches().items()}
+
+
+@router.post("/api/admin/caches/{name}/evict", tags=["system"])
+async def evict_cache(name: str, prefix: str = ""):
+    """Vacía la caché name, entera o solo las claves que empiezan por prefix.
+
+    Solo memoria, en todos los workers: geocoding, snap y sesiones releen de
+    SQLite lo expulsado. Claves: geocode.* "calle#número" / "@alias"; snap
+    "lat,lon>calle" (un prefijo "37.80" vacía una franja de la zona).
+    """
+    store = registered_caches().get(name)
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"Caché '{name}' no existe")
+    evicted = _evict_local(f"{name}|{prefix}")
+    publish("admin.evict", f"{name}|{prefix}")
+    logger.info("Caché '%s': %d entradas expulsadas (prefijo '%s')", name, evicted, prefix)
+    return {"cache": name, "evicted": evicted, "items": len(store)}
+
+
+# ── Catálogo de calles (admin) ────────────────────────────────────────────────
+
+@router.get("/api/admin/catalog", tags=["system"])
+async def catalog_stats():
+    """Versión vigente del catálogo de calles (y las anteriores): nº de calles,
+    huella, mtime de streets.json, tiempo de construcción de los índices y
+    contadores de memo, fuzzy matching y correcciones de cada versión."""
+    return await asyncio.to_thread(get_catalog_stats)
+
+
+@router.post("/api/admin/catalog/reload", tags=["system"])
+async def catalog_reload():
+    """Relee streets.json sin reiniciar (también lo hacen solos los workers al
+    ver cambiar su mtime). Los índices se construyen fuera del bucle de eventos
+    y la versión nueva sustituye a la anterior de una vez."""
+    return await asyncio.to_thread(reload_street_catalog)
+
+
 @router.get("/api/route-segment", tags=["routing"])
 async def route_segment(
     origin_lat: float,
     origin_lon: float,
     dest_lat: float,
     dest_lon: float,
+    route_id: str | None = None,
 ):
     """Geometría GeoJSON del camino entre dos puntos (OSRM).
 
     Usado por la app en modo reparto para dibujar el tramo GPS → siguiente parada.
+    Con route_id, los tramos entre dos paradas de la sesión se piden a OSRM una
+    sola vez y se sirven desde la sesión.
     """
-    coords_str = f"{origin_lon},{origin_lat};{dest_lon},{dest_lat}"
-    url = f"{OSRM_BASE_URL}/route/v1/driving/{coords_str}"
-
+    session = await asyncio.to_thread(get_session, route_id)
+    leg_key = None
+    if session is not None:
+        idx = session.indices([(origin_lat, origin_lon), (dest_lat, dest_lon)])
+        if idx is not None:
+            leg_key = (idx[0], idx[1])
+            if leg_key in session.legs:
+                return session.legs[leg_key]
     try:
-        r = requests.get(
-            url,
-            params={"overview": "full", "geometries": "geojson"},
-            timeout=OSRM_TIMEOUT,
-        )
-        r.raise_for_status()
-        data = r.json()
-        if data.get("code") != "Ok" or not data.get("routes"):
+        route = await get_osrm_route_async([(origin_lat, origin_lon), (dest_lat, dest_lon)])
+        if route is None:
             return {"geometry": None, "distance_m": 0}
-        route = data["routes"][0]
-        return {
+        leg = {
             "geometry": route["geometry"],
             "distance_m": round(route.get("distance", 0)),
         }
+        if session is not None and leg_key is not None:
+            session.legs[leg_key] = leg
+        return leg
     except Exception as e:
         return {"geometry": None, "distance_m": 0, "error": str(e)}
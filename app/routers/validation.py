@@ -5,104 +5,503 @@ POST /api/validation/start
   1. Recibe filas del CSV {cliente, direccion, ciudad, nota, alias}
   2. Agrupa por clave canónica (expande abreviaturas, elimina sufijos de ciudad)
   3. Geocodifica cada dirección única: Google Geocoding → Places → FAILED
-  4. Devuelve geocoded[] (con coords) y failed[] (sin coords)
+     (hasta _GEOCODE_CONCURRENCY a la vez; el ritmo hacia Google lo limita
+     el token bucket de services.geocoding). Las direcciones que fallaron hace
+     poco salen FAILED de la caché negativa salvo retry_failed=true.
+  4. Devuelve geocoded[] (con coords) y failed[] (sin coords), en JSON o
+     MessagePack y comprimido según Accept / Accept-Encoding
+
+POST /api/validation/upload
+  Como /start, pero recibe el CSV tal cual (multipart, campo "file") en vez
+  de las filas en JSON. Parsea y agrupa según llegan los bytes y lanza la
+  geocodificación de cada dirección nueva en cuanto aparece; responde con
+  filas/s además de geocoded[]/failed[].
+
+POST /api/validation/jobs
+  Como /start, pero responde 202 con un job_id al momento y geocodifica en
+  segundo plano (services.validation_jobs): nada de esperar minutos tras el
+  proxy_read_timeout de nginx.
+
+GET /api/validation/jobs/{job_id} · DELETE /api/validation/jobs/{job_id}
+  Progreso (processed/total) y geocoded[]/failed[] parciales; cancelación.
+
+PATCH /api/validation/sessions/{validation_id} · GET (estado completo)
+  /start guarda sus filas y resultados bajo un validation_id
+  (services.validation_sessions). El PATCH añade, cambia o quita filas,
+  geocodifica solo las direcciones nuevas o afectadas y devuelve un diff.
 
 POST /api/validation/override
   Registra coordenadas manuales para una dirección → caché permanente.
+
+POST /api/validation/override/batch
+  Varios pins de una vez: se validan todos antes de guardar nada y se
+  escriben en una sola transacción. Con snap=true además deja en caché el
+  snap de cada pin para la optimización.
+
+POST /api/validation/prefetch
+  Precalienta en segundo plano las cachés del reparto de mañana (geocoding,
+  snaps y matriz OSRM, ver services.prefetch). Responde 202 con un job_id.
+
+GET /api/validation/prefetch/{job_id}
+  Progreso del precalentado: geocodificadas, snaps, matriz lista.
 """
 
+import asyncio
+import time
 from collections import OrderedDict
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 
-from app.core.config import MAX_STOPS
+from app.core.concurrency import run_cpu
+from app.core.config import CSV_UPLOAD_MAX_BYTES, MAX_STOPS, SINGLE_FLIGHT_LINGER_S
 from app.core.logging import get_logger
+from app.core.responses import negotiated_response
+from app.core.singleflight import SingleFlight, request_key
+from app.core.uploads import multipart_file_chunks
 from app.models import Package
 from app.models.validation import (
+    CsvRow,
     StartRequest,
+    OverrideBatchRequest,
+    OverrideBatchResponse,
     OverrideRequest,
     GeocodedStop,
     FailedStop,
+    PrefetchRequest,
+    PrefetchStatus,
     StartResponse,
+    UploadResponse,
+    ValidationDiff,
+    ValidationJobStatus,
+    ValidationPatch,
+)
+from app.services import prefetch, validation_jobs, validation_sessions
+from app.services.geocoding import (
+    GeoResult,
+    geocode_async,
+    add_override,
+    add_overrides,
+    address_key,
+    canonical_address,
+    get_corrected_street,
 )
-from app.services.geocoding import geocode, add_override, address_key, canonical_address
+from app.services.routing import snap_to_street_async
+from app.services.validation_sessions import ValidationSession
+from app.utils.csv_rows import CsvRowParser
 from app.utils.validation import validate_coord
 
 router = APIRouter(prefix="/validation", tags=["validation"])
 logger = get_logger(__name__)
 
+_GEOCODE_CONCURRENCY = 8  # direcciones geocodificándose a la vez por petición
+_PATCH_ATTEMPTS = 3        # PATCH que pierde contra otro worker: reintentos antes del 409
 
-@router.post("/start", response_model=StartResponse)
-def validation_start(req: StartRequest):
-    """Valida las direcciones del CSV: dedup → geocodifica → geocoded/failed."""
-    rows = req.rows
-    total_packages = len(rows)
+# Grupos, resultado por grupo y respuesta (sin validation_id) de un /start
+_Validated = tuple[OrderedDict[str, dict], list[tuple[GeoResult | None, str]], StartResponse]
+
+# Peticiones /start idénticas y simultáneas comparten geocodificación (no la sesión)
+_start_flights: SingleFlight[_Validated] = SingleFlight(
+    "validation_start", linger_s=SINGLE_FLIGHT_LINGER_S,
+)
+
+
+def _too_many_addresses(n: int, at_least: bool = False) -> HTTPException:
+    return HTTPException(
+        status_code=422,
+        detail=(
+            f"Demasiadas direcciones únicas: {'al menos ' if at_least else ''}{n} "
+            f"(máximo {MAX_STOPS} tras deduplicar). "
+            f"Divide el reparto en lotes más pequeños."
+        ),
+    )
 
-    # 1. Agrupar por clave canónica (expande abreviaturas y sufijos de ciudad)
+
+def _add_row(groups: OrderedDict[str, dict], row: CsvRow, row_id: int) -> dict | None:
+    """Añade la fila a su grupo; devuelve el grupo si es nuevo."""
+    key = address_key(row.direccion)
+    group = groups.get(key)
+    is_new = group is None
+    if group is None:
+        group = groups[key] = {
+            "address": canonical_address(row.direccion),
+            "packages": [],
+            "alias": "",
+            "row_ids": [],
+        }
+    group["row_ids"].append(row_id)
+    if not group["alias"] and row.alias.strip():
+        group["alias"] = row.alias.strip()
+    tipo = "Express" if row.tipo.strip().lower() == "express" else "Normal"
+    group["packages"].append(
+        Package(client_name=row.cliente, nota=row.nota, agencia=row.agencia, tipo=tipo)
+    )
+    return group if is_new else None
+
+
+def _group_rows(rows: list[CsvRow]) -> OrderedDict[str, dict]:
+    """Agrupa filas por clave canónica (expande abreviaturas y sufijos de ciudad)."""
     groups: OrderedDict[str, dict] = OrderedDict()
-    for row in rows:
-        key = address_key(row.direccion)
-        if key not in groups:
-            groups[key] = {
-                "address": canonical_address(row.direccion),
-                "packages": [],
-                "alias": "",
-            }
-        if not groups[key]["alias"] and row.alias.strip():
-            groups[key]["alias"] = row.alias.strip()
-        tipo = "Express" if row.tipo.strip().lower() == "express" else "Normal"
-        groups[key]["packages"].append(
-            Package(client_name=row.cliente, nota=row.nota, agencia=row.agencia, tipo=tipo)
+    for row_id, row in enumerate(rows):
+        _add_row(groups, row, row_id)
+    return groups
+
+
+async def _geocode_group(
+    group: dict, sem: asyncio.Semaphore, retry_failed: bool,
+) -> tuple[GeoResult | None, str]:
+    async with sem:
+        return await geocode_async(
+            group["address"], alias=group["alias"],
+            use_negative_cache=not retry_failed,
         )
 
-    # 2. Limitar a MAX_STOPS direcciones únicas (post-dedup controla llamadas API)
-    if len(groups) > MAX_STOPS:
-        raise HTTPException(
-            status_code=422,
-            detail=(
-                f"Demasiadas direcciones únicas: {len(groups)} "
-                f"(máximo {MAX_STOPS} tras deduplicar). "
-                f"Divide el reparto en lotes más pequeños."
-            ),
+
+def _to_stop(group: dict, coord: GeoResult | None, confidence: str) -> GeocodedStop | FailedStop:
+    """Parada de respuesta de un grupo según su resultado de geocodificación."""
+    addr = group["address"]
+    packages: list[Package] = group["packages"]
+    alias = group["alias"]
+    stop_tipo = "Express" if any(p.tipo == "Express" for p in packages) else "Normal"
+
+    if coord:
+        lat, lon = coord
+        primary = next((p.client_name for p in packages if p.client_name), "")
+        return GeocodedStop(
+            address=addr,
+            alias=alias,
+            client_name=primary,
+            packages=packages,
+            lat=lat,
+            lon=lon,
+            confidence=confidence,
+            tipo=stop_tipo,
         )
+    return FailedStop(
+        address=addr,
+        alias=alias,
+        packages=packages,
+        tipo=stop_tipo,
+    )
+
 
-    # 3. Geocodificar y clasificar en una sola pasada
+def _classify(
+    groups: OrderedDict[str, dict], results: list[tuple[GeoResult | None, str]],
+) -> tuple[list[GeocodedStop], list[FailedStop]]:
+    """Reparte los grupos en geocoded/failed según su resultado (mismo orden)."""
     geocoded: list[GeocodedStop] = []
     failed: list[FailedStop] = []
-
-    for group in groups.values():
-        addr = group["address"]
-        packages: list[Package] = group["packages"]
-        primary = next((p.client_name for p in packages if p.client_name), "")
-        alias = group["alias"]
-        stop_tipo = "Express" if any(p.tipo == "Express" for p in packages) else "Normal"
-        coord, confidence = geocode(addr, alias=alias)
-
-        if coord:
-            lat, lon = coord
-            geocoded.append(GeocodedStop(
-                address=addr,
-                alias=alias,
-                client_name=primary,
-                packages=packages,
-                lat=lat,
-                lon=lon,
-                confidence=confidence,
-                tipo=stop_tipo,
-            ))
+    for group, (coord, confidence) in zip(groups.values(), results):
+        stop = _to_stop(group, coord, confidence)
+        if isinstance(stop, GeocodedStop):
+            geocoded.append(stop)
         else:
-            failed.append(FailedStop(
-                address=addr,
-                alias=alias,
-                packages=packages,
-                tipo=stop_tipo,
-            ))
-
-    return StartResponse(
+            failed.append(stop)
+    return geocoded, failed
+
+
+@router.post("/start", response_model=StartResponse)
+async def validation_start(req: StartRequest, request: Request):
+    """Valida las direcciones del CSV: dedup → geocodifica → geocoded/failed.
+
+    Peticiones idénticas concurrentes (doble toque, reintentos) se coalescen:
+    comparten la geocodificación, pero cada una recibe su propia sesión.
+    """
+    groups, results, shared = await _start_flights.run(
+        request_key("validation_start", req), lambda: _geocode_rows(req),
+    )
+    validation_id = _create_validation_session(req.rows, groups, results)
+    result = shared.model_copy(update={"validation_id": validation_id})
+    return negotiated_response(request, result)
+
+
+async def _geocode_rows(req: StartRequest) -> _Validated:
+    """Agrupa y geocodifica las filas: grupos, resultados y respuesta sin validation_id."""
+    rows = req.rows
+
+    # 1. Agrupar por clave canónica (parseo de direcciones en el pool de CPU)
+    groups = await run_cpu(_group_rows, rows)
+
+    # 2. Limitar a MAX_STOPS direcciones únicas (post-dedup controla llamadas API)
+    if len(groups) > MAX_STOPS:
+        raise _too_many_addresses(len(groups))
+
+    # 3. Geocodificar en paralelo (acotado) conservando el orden de los grupos
+    sem = asyncio.Semaphore(_GEOCODE_CONCURRENCY)
+    results = await asyncio.gather(
+        *(_geocode_group(g, sem, req.retry_failed) for g in groups.values())
+    )
+
+    # 4. Clasificar en una sola pasada
+    geocoded, failed = _classify(groups, results)
+
+    return groups, results, StartResponse(
+        geocoded=geocoded,
+        failed=failed,
+        total_packages=len(rows),
+        unique_addresses=len(groups),
+    )
+
+
+def _create_validation_session(
+    rows: list[CsvRow],
+    groups: OrderedDict[str, dict],
+    results: list[tuple[GeoResult | None, str]],
+) -> str:
+    """Sesión para corregir filas después sin reenviar el CSV (PATCH); devuelve su id."""
+    keys = [""] * len(rows)
+    for key, group in groups.items():
+        for row_id in group["row_ids"]:
+            keys[row_id] = key
+    return validation_sessions.create_session(rows, keys, {
+        key: _session_result(group, coord, confidence)
+        for (key, group), (coord, confidence) in zip(groups.items(), results)
+    })
+
+
+def _session_result(group: dict, coord: GeoResult | None, confidence: str) -> dict:
+    """Resultado de una dirección tal como se guarda en la sesión de validación."""
+    return {
+        "address": group["address"],
+        "alias": group["alias"],
+        "lat": coord[0] if coord else None,
+        "lon": coord[1] if coord else None,
+        "confidence": confidence,
+    }
+
+
+def _session_stop_result(result: dict) -> tuple[GeoResult | None, str]:
+    """(coord, confianza) de un resultado guardado en la sesión."""
+    coord = (result["lat"], result["lon"]) if result["lat"] is not None else None
+    return coord, result["confidence"]
+
+
+def _session_groups(session: ValidationSession, keys: set[str] | None = None) -> OrderedDict[str, dict]:
+    """Grupos de las filas de la sesión (solo los de `keys` si se indica), en orden de fila."""
+    groups: OrderedDict[str, dict] = OrderedDict()
+    for row_id in sorted(session.rows):
+        if keys is None or session.keys[row_id] in keys:
+            _add_row(groups, session.rows[row_id], row_id)
+    return groups
+
+
+def _feed_upload(
+    parser: CsvRowParser, groups: OrderedDict[str, dict], chunk: bytes | None,
+) -> list[dict]:
+    """Parsea un trozo del CSV (None = fin) y agrupa sus filas; devuelve los grupos nuevos."""
+    rows = parser.feed(chunk) if chunk is not None else parser.close()
+    first_id = parser.rows - len(rows)
+    new_groups = []
+    for i, row in enumerate(rows):
+        group = _add_row(groups, CsvRow(**row), first_id + i)
+        if group is not None:
+            new_groups.append(group)
+    return new_groups
+
+
+@router.post("/upload", response_model=UploadResponse)
+async def validation_upload(request: Request, retry_failed: bool = False):
+    """Valida un CSV subido como multipart (campo "file") según llega.
+
+    Cada dirección única empieza a geocodificarse en cuanto aparece su primera
+    fila, mientras el resto del fichero se sigue recibiendo. El alias de un
+    grupo puede llegar en una fila posterior: la tarea geocodifica con el alias
+    que había al lanzarla y, si al terminar de leer el grupo tiene otro, se
+    relanza con el definitivo (mismo resultado que /start).
+    No se guardan el cuerpo ni las filas, pero cada grupo guarda un Package por
+    fila (la respuesta los devuelve): la memoria crece con las filas.
+    Sin single-flight: el cuerpo no se conoce entero hasta el final.
+    """
+    t0 = time.perf_counter()
+    parser = CsvRowParser()
+    groups: OrderedDict[str, dict] = OrderedDict()
+    sem = asyncio.Semaphore(_GEOCODE_CONCURRENCY)
+    tasks: list[asyncio.Task[tuple[GeoResult | None, str]]] = []
+    launched_alias: list[str] = []   # alias con el que se lanzó la tarea de cada grupo
+    n_bytes = 0
+
+    def _launch(group: dict) -> asyncio.Task[tuple[GeoResult | None, str]]:
+        # Copia: la tarea no ve los cambios de alias de filas posteriores
+        snapshot = {"address": group["address"], "alias": group["alias"]}
+        return asyncio.create_task(_geocode_group(snapshot, sem, retry_failed))
+
+    def _start(new_groups: list[dict]) -> None:
+        if len(groups) > MAX_STOPS:
+            raise _too_many_addresses(len(groups), at_least=True)
+        for g in new_groups:
+            tasks.append(_launch(g))
+            launched_alias.append(g["alias"])
+
+    try:
+        try:
+            chunks = multipart_file_chunks(request.stream(), request.headers.get("content-type", ""))
+            async for chunk in chunks:
+                n_bytes += len(chunk)
+                if n_bytes > CSV_UPLOAD_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"CSV demasiado grande (máximo {CSV_UPLOAD_MAX_BYTES // 1024} KB)",
+                    )
+                _start(await run_cpu(_feed_upload, parser, groups, chunk))
+            _start(await run_cpu(_feed_upload, parser, groups, None))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e)) from e
+        read_s = time.perf_counter() - t0
+        for i, group in enumerate(groups.values()):
+            if group["alias"] != launched_alias[i]:
+                tasks[i].cancel()
+                tasks[i] = _launch(group)
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    geocoded, failed = _classify(groups, list(results))
+    elapsed_s = time.perf_counter() - t0
+    rows_per_s = parser.rows / read_s if read_s > 0 else 0.0
+    logger.info(
+        "CSV subido: %d filas, %d direcciones, %.0f filas/s",
+        parser.rows, len(groups), rows_per_s,
+    )
+    result = UploadResponse(
+        geocoded=geocoded,
+        failed=failed,
+        total_packages=parser.rows,
+        unique_addresses=len(groups),
+        skipped_rows=parser.skipped,
+        bytes_read=n_bytes,
+        read_ms=round(read_s * 1000, 1),
+        elapsed_ms=round(elapsed_s * 1000, 1),
+        rows_per_s=round(rows_per_s, 1),
+    )
+    return negotiated_response(request, result)
+
+
+@router.get("/sessions/{validation_id}", response_model=StartResponse)
+async def validation_session_get(validation_id: str, request: Request):
+    """Estado completo de una sesión de validación, como lo devolvería /start."""
+    session = await run_cpu(validation_sessions.get_session, validation_id)
+    if session is None:
+        raise HTTPException(404, detail="Validación no encontrada o expirada")
+    groups = await run_cpu(_session_groups, session)
+    geocoded, failed = _classify(groups, [
+        _session_stop_result(session.results[key]) for key in groups
+    ])
+    return negotiated_response(request, StartResponse(
         geocoded=geocoded,
         failed=failed,
-        total_packages=total_packages,
+        total_packages=len(session.rows),
         unique_addresses=len(groups),
+        validation_id=validation_id,
+    ))
+
+
+@router.patch("/sessions/{validation_id}", response_model=ValidationDiff)
+async def validation_session_patch(validation_id: str, req: ValidationPatch, request: Request):
+    """Aplica altas, cambios y bajas de filas y devuelve solo lo que cambia.
+
+    Solo se reagrupan las direcciones afectadas y solo se geocodifican las
+    nuevas, las que cambian de alias y, con retry_failed, las afectadas que
+    habían fallado. Las demás conservan su resultado.
+    """
+    conflicts = 0
+    while True:
+        session = await run_cpu(validation_sessions.get_session, validation_id)
+        if session is None:
+            raise HTTPException(404, detail="Validación no encontrada o expirada")
+        async with session.lock:
+            if await run_cpu(validation_sessions.get_session, validation_id) is not session:
+                continue   # otro PATCH de este worker la ha sustituido mientras esperaba
+            diff = await _apply_patch(validation_id, session, req)
+        if diff is not None:
+            return negotiated_response(request, diff)
+        # Otro worker guardó la sesión mientras tanto: se reaplica sobre su estado
+        conflicts += 1
+        if conflicts >= _PATCH_ATTEMPTS:
+            raise HTTPException(409, detail="La validación se está modificando a la vez; reintenta")
+
+
+async def _apply_patch(
+    validation_id: str, session: ValidationSession, req: ValidationPatch,
+) -> ValidationDiff | None:
+    """Aplica el PATCH sobre session y lo guarda; None si otro worker la guardó antes."""
+    removed_ids = set(req.remove)
+    unknown = sorted(
+        {rid for rid in removed_ids if rid not in session.rows}
+        | {edit.id for edit in req.update if edit.id not in session.rows or edit.id in removed_ids}
+    )
+    if unknown:
+        raise HTTPException(422, detail=f"Filas desconocidas o eliminadas: {unknown}")
+
+    # 1. Filas nuevas del estado (sobre copias: un 422 no deja la sesión a medias)
+    rows = dict(session.rows)
+    keys = dict(session.keys)
+    affected: set[str] = set()
+    for row_id in removed_ids:
+        affected.add(keys.pop(row_id))
+        del rows[row_id]
+    for edit in req.update:
+        affected.add(keys[edit.id])
+        rows[edit.id] = edit.row
+        keys[edit.id] = address_key(edit.row.direccion)
+        affected.add(keys[edit.id])
+    added_ids = list(range(session.next_id, session.next_id + len(req.add)))
+    for row_id, row in zip(added_ids, req.add):
+        rows[row_id] = row
+        keys[row_id] = address_key(row.direccion)
+        affected.add(keys[row_id])
+
+    n_groups = len(set(keys.values()))
+    if n_groups > MAX_STOPS:
+        raise _too_many_addresses(n_groups)
+
+    # 2. Reagrupar solo las direcciones afectadas
+    updated = ValidationSession(rows, keys, session.results, session.next_id + len(req.add))
+    groups = await run_cpu(_session_groups, updated, affected)
+
+    # 3. Geocodificar las que no tienen resultado válido para su alias
+    def _needs_geocode(key: str, group: dict) -> bool:
+        prev = session.results.get(key)
+        return (
+            prev is None
+            or prev["alias"] != group["alias"]
+            or (req.retry_failed and prev["lat"] is None)
+        )
+
+    pending = [(key, g) for key, g in groups.items() if _needs_geocode(key, g)]
+    sem = asyncio.Semaphore(_GEOCODE_CONCURRENCY)
+    fresh = await asyncio.gather(*(_geocode_group(g, sem, req.retry_failed) for _, g in pending))
+
+    results = {k: v for k, v in session.results.items() if k not in affected or k in groups}
+    for (key, group), (coord, confidence) in zip(pending, fresh):
+        results[key] = _session_result(group, coord, confidence)
+
+    # 4. Diff: paradas afectadas que siguen existiendo y las que desaparecen
+    geocoded, failed = _classify(groups, [_session_stop_result(results[key]) for key in groups])
+    removed = [
+        session.results[key]["address"]
+        for key in sorted(affected - groups.keys())
+        if key in session.results
+    ]
+
+    updated.results = results
+    updated.version = session.version
+    try:
+        saved = await run_cpu(validation_sessions.save_session, validation_id, updated)
+    except Exception:
+        raise HTTPException(503, detail="No se pudo guardar la validación; reintenta")
+    if not saved:
+        return None
+
+    return ValidationDiff(
+        validation_id=validation_id,
+        added_ids=added_ids,
+        geocoded=geocoded,
+        failed=failed,
+        removed=removed,
+        regeocoded=len(pending),
+        total_packages=len(rows),
+        unique_addresses=n_groups,
     )
 
 
@@ -113,4 +512,97 @@ def validation_override(req: OverrideRequest):
     if error:
         raise HTTPException(status_code=400, detail=f"Coordenadas inválidas: {error}")
     add_override(req.address, req.lat, req.lon)
+    # Un /start reciente ya no refleja el pin: que el siguiente recalcule
+    _start_flights.clear()
     return {"ok": True, "address": req.address}
+
+
+@router.post("/override/batch", response_model=OverrideBatchResponse)
+async def validation_override_batch(req: OverrideBatchRequest):
+    """Registra varios pins de una vez: o todos o ninguno, con una sola escritura."""
+    if len(req.overrides) > MAX_STOPS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Demasiados pins: {len(req.overrides)} (máximo {MAX_STOPS} por llamada)",
+        )
+    errors = [
+        f"{o.address}: {error}" for o in req.overrides
+        if (error := validate_coord(o.lat, o.lon))
+    ]
+    if errors:
+        raise HTTPException(status_code=400, detail=f"Coordenadas inválidas: {'; '.join(errors)}")
+    saved = await asyncio.to_thread(
+        add_overrides, [(o.address, o.lat, o.lon) for o in req.overrides],
+    )
+    _start_flights.clear()
+    if not req.snap:
+        return OverrideBatchResponse(saved=saved)
+
+    # Precalienta la caché de snap con el mismo hint que usará /optimize
+    sem = asyncio.Semaphore(_GEOCODE_CONCURRENCY)
+
+    async def _snap(o: OverrideRequest) -> tuple[float, float] | None:
+        async with sem:
+            return await snap_to_street_async(o.lat, o.lon, get_corrected_street(o.address))
+
+    snapped = await asyncio.gather(*(_snap(o) for o in req.overrides))
+    snap_failed = [o.address for o, s in zip(req.overrides, snapped) if s is None]
+    return OverrideBatchResponse(
+        saved=saved, snapped=len(snapped) - len(snap_failed), snap_failed=snap_failed,
+    )
+
+
+@router.post("/jobs", response_model=ValidationJobStatus, status_code=202)
+async def validation_job_create(req: StartRequest, background_tasks: BackgroundTasks):
+    """Como /start, pero responde al momento con un job_id y geocodifica en segundo plano."""
+    groups = await run_cpu(_group_rows, req.rows)
+    if len(groups) > MAX_STOPS:
+        raise _too_many_addresses(len(groups))
+    job = validation_jobs.create_job(list(groups.values()), len(req.rows))
+    sem = asyncio.Semaphore(_GEOCODE_CONCURRENCY)
+
+    async def _process(group: dict) -> GeocodedStop | FailedStop:
+        coord, confidence = await _geocode_group(group, sem, req.retry_failed)
+        return _to_stop(group, coord, confidence)
+
+    background_tasks.add_task(validation_jobs.run_job, job, _process, _GEOCODE_CONCURRENCY)
+    return job.status()
+
+
+@router.get("/jobs/{job_id}", response_model=ValidationJobStatus)
+async def validation_job_status(job_id: str, request: Request):
+    """Progreso de una validación y paradas resueltas hasta ahora."""
+    status = validation_jobs.get_status(job_id)
+    if status is None:
+        raise HTTPException(404, detail="Validación no encontrada o expirada")
+    return negotiated_response(request, status)
+
+
+@router.delete("/jobs/{job_id}", response_model=ValidationJobStatus)
+async def validation_job_cancel(job_id: str):
+    """Cancela una validación en curso (lo ya resuelto se conserva)."""
+    status = validation_jobs.cancel_job(job_id)
+    if status is None:
+        raise HTTPException(404, detail="Validación no encontrada o expirada")
+    return status
+
+
+@router.post("/prefetch", response_model=PrefetchStatus, status_code=202)
+async def validation_prefetch(req: PrefetchRequest, background_tasks: BackgroundTasks):
+    """Precalienta en segundo plano geocoding, snaps y matriz del reparto de mañana."""
+    groups = await run_cpu(_group_rows, req.rows)
+    if len(groups) > MAX_STOPS:
+        raise _too_many_addresses(len(groups))
+    addresses = [(g["address"], g["alias"]) for g in groups.values()]
+    job = prefetch.create_job(req.start_address)
+    background_tasks.add_task(prefetch.run_prefetch, job, addresses)
+    return job.status()
+
+
+@router.get("/prefetch/{job_id}", response_model=PrefetchStatus)
+async def validation_prefetch_status(job_id: str):
+    """Progreso de un precalentado (lo ejecute este worker u otro)."""
+    status = await run_cpu(prefetch.get_status, job_id)
+    if status is None:
+        raise HTTPException(404, detail="Precalentado no encontrado o expirado")
+    return status
@@ -0,0 +1,161 @@
+"""
+Índice local de portales extraído del PBF (tags addr:street + addr:housenumber).
+
+posadas_editado.osm.pbf lo editamos nosotros: los portales que metemos en OSM
+son coordenadas de portal exactas que no hace falta pedir a Google.
+
+Generación (start.sh rebuild-map → python -m app.services.address_index):
+  1. osmium tags-filter se queda con los objetos con addr:housenumber
+     (y los nodos que referencian sus vías).
+  2. Nodo con addr:* → su coordenada.
+     Vía con addr:* (edificio, parcela) → centroide de sus nodos.
+  3. Clave = la de la caché de geocoding: normalize(calle)#número, con el
+     número en minúsculas y sin espacios ("12 A" → "12a"); "12;14" se indexa
+     como dos portales. Se escribe en app/data/address_index.json.
+
+Consulta: lookup(calle, número). El índice se carga lazily y se recarga si el
+fichero cambia en disco (mtime), así el backend en marcha ve el índice nuevo
+tras un rebuild sin reiniciar.
+"""
+
+import json
+import re
+import subprocess
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from app.core.config import PBF_PATH
+from app.core.logging import get_logger
+from app.utils.normalization import normalize_text
+
+logger = get_logger(__name__)
+
+GeoResult = tuple[float, float]  # (lat, lon)
+
+_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+_INDEX_FILE = _DATA_DIR / "address_index.json"
+
+# ── Índice en memoria: (mtime del fichero, clave → (lat, lon)) ────────────────
+_index: tuple[float, dict[str, GeoResult]] | None = None
+_lock = threading.Lock()
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _key(street: str, number: str) -> str:
+    """Clave de portal, igual que la de la caché de geocoding ("12 A" → "12a")."""
+    return f"{normalize_text(street)}#{_SPACES_RE.sub('', normalize_text(number))}"
+
+
+# ── Consulta ──────────────────────────────────────────────────────────────────
+
+def _get_index() -> dict[str, GeoResult]:
+    """Índice vigente (recargado si address_index.json ha cambiado)."""
+    global _index
+    try:
+        mtime = _INDEX_FILE.stat().st_mtime
+    except FileNotFoundError:
+        return {}
+    with _lock:
+        if _index is not None and _index[0] == mtime:
+            return _index[1]
+        try:
+            data = json.loads(_INDEX_FILE.read_text("utf-8"))
+            index = {k: (float(v[0]), float(v[1])) for k, v in data["addresses"].items()}
+        except Exception as e:
+            logger.error("Error leyendo %s: %s", _INDEX_FILE.name, e)
+            index = {}
+        _index = (mtime, index)
+        logger.info("Índice de portales OSM: %d portales", len(index))
+        return index
+
+
+def lookup(street: str, number: str) -> GeoResult | None:
+    """Coordenada del portal (calle, número) si existe en OSM.
+
+    Para rangos ("96-98") prueba también el primer número.
+    """
+    if not street or not number or number == "sn":
+        return None
+    index = _get_index()
+    if not index:
+        return None
+    coord = index.get(_key(street, number))
+    if coord is None and "-" in number:
+        coord = index.get(_key(street, number.split("-", 1)[0]))
+    return coord
+
+
+def size() -> int:
+    """Nº de portales del índice vigente."""
+    return len(_get_index())
+
+
+# ── Generación ────────────────────────────────────────────────────────────────
+
+def _parse_osm_xml(xml_path: Path) -> dict[str, GeoResult]:
+    """Portales (clave → coord) de un OSM XML con nodos antes que vías."""
+    nodes: dict[str, GeoResult] = {}
+    index: dict[str, GeoResult] = {}
+    for _, elem in ET.iterparse(xml_path, events=("end",)):
+        if elem.tag not in ("node", "way", "relation"):
+            continue
+        tags = {t.get("k"): t.get("v") for t in elem.findall("tag")}
+        coord: GeoResult | None = None
+        if elem.tag == "node":
+            coord = (float(elem.get("lat", 0)), float(elem.get("lon", 0)))
+            nodes[elem.get("id", "")] = coord
+        elif elem.tag == "way":
+            pts = [nodes[nd.get("ref", "")] for nd in elem.findall("nd") if nd.get("ref") in nodes]
+            if pts:
+                coord = (
+                    round(sum(p[0] for p in pts) / len(pts), 7),
+                    round(sum(p[1] for p in pts) / len(pts), 7),
+                )
+        street = tags.get("addr:street")
+        housenumbers = tags.get("addr:housenumber")
+        if coord is not None and street and housenumbers:
+            for hn in housenumbers.split(";"):
+                if hn.strip():
+                    index.setdefault(_key(street, hn), coord)
+        elem.clear()
+    return index
+
+
+def build_index(pbf_path: Path = PBF_PATH, out_path: Path | None = None) -> int:
+    """Genera address_index.json desde el PBF. Devuelve nº de portales."""
+    out_path = out_path or _INDEX_FILE
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        xml_path = Path(tmpdir) / "addr.osm"
+        result = subprocess.run(
+            ["osmium", "tags-filter", str(pbf_path), "nwr/addr:housenumber",
+             "-o", str(xml_path), "--overwrite"],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"osmium tags-filter failed:\n{result.stderr.strip()}")
+        index = _parse_osm_xml(xml_path)
+
+    tmp_out = out_path.with_suffix(".tmp")
+    tmp_out.write_text(json.dumps({
+        "source": pbf_path.name,
+        "built_at": time.time(),
+        "addresses": {k: [lat, lon] for k, (lat, lon) in index.items()},
+    }, ensure_ascii=False), "utf-8")
+    tmp_out.replace(out_path)  # atómico: el backend nunca lee un fichero a medias
+    logger.info(
+        "Índice de portales OSM: %d portales en %.1f s → %s",
+        len(index), time.perf_counter() - t0, out_path.name,
+    )
+    return len(index)
+
+
+if __name__ == "__main__":
+    import logging
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    build_index()
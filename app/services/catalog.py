@@ -3,6 +3,11 @@ Catálogo de calles de Posadas.
 
 streets.json — archivo gestionado manualmente. El código solo lee.
 Se usa en geocoding.py para el paso de fuzzy matching.
+
+get_catalog() lo lee una vez; geocoding vigila file_mtime() y, si el fichero
+cambia (o se pide por /api/admin/catalog/reload), relee con reload_catalog()
+sin reiniciar el proceso. Una relectura que falla o viene vacía (fichero a
+medio escribir, JSON roto) no sustituye al catálogo vigente.
 """
 
 import json
@@ -15,15 +20,40 @@ logger = get_logger(__name__)
 _DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 _STREETS_FILE = _DATA_DIR / "streets.json"
 
-# Catálogo en memoria (cargado lazily, nunca invalidado en runtime)
+# Catálogo en memoria (cargado lazily; reload_catalog() lo vuelve a leer)
 _catalog: list[str] | None = None
 
 
+def file_mtime() -> float | None:
+    """mtime actual de streets.json (None si no existe)."""
+    try:
+        return _STREETS_FILE.stat().st_mtime
+    except OSError:
+        return None
+
+
+def reload_catalog() -> list[str]:
+    """Vuelve a leer streets.json (devuelve siempre una lista nueva).
+
+    Si no se puede leer o no trae calles, ValueError y se conserva la lista
+    anterior: mejor el catálogo de antes que quedarse sin fuzzy matching.
+    """
+    global _catalog
+    try:
+        streets = json.loads(_STREETS_FILE.read_text("utf-8")).get("streets", [])
+    except Exception as e:
+        raise ValueError(f"No se pudo leer streets.json: {e}") from e
+    if not streets:
+        raise ValueError("streets.json no tiene calles")
+    _catalog = streets
+    logger.info("Catálogo recargado: %d calles", len(streets))
+    return streets
+
+
 def get_catalog() -> list[str]:
     """Devuelve la lista de calles de Posadas desde streets.json.
 
-    Se cachea en memoria al primer acceso. Para recargar tras editar el
-    archivo hay que reiniciar el proceso.
+    Se cachea en memoria al primer acceso; reload_catalog() la relee.
     """
     global _catalog
     if _catalog is not None:
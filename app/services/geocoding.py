@@ -2,36 +2,74 @@
 Servicio de geocodificación multi-fuente.
 
 Caché en disco: clave canónica = normalize(calle)#normalize(número).
+Se guarda en SQLite/WAL (geocode_cache.sqlite3, adapters.kvstore): cada alta es
+una fila, sin reescribir el fichero entero. Se carga en memoria al primer uso
+(_ensure_loaded); el antiguo geocode_cache.json se importa una sola vez.
+Con varios workers, cada alta o borrado se anuncia (adapters.shared_state) y
+los demás releen esa entrada del almacén (_on_remote_change).
 
 Pipeline (en orden de prioridad):
   1. Caché en disco: override permanente, google/places con TTL de GOOGLE_CACHE_TTL_DAYS días.
+     Una entrada caducada se sirve igualmente (stale-while-revalidate) y se
+     encola para refrescarla en segundo plano (_refresher, ritmo propio
+     GEOCODE_REFRESH_QPS): la validación nunca espera a Google por ella.
+  1b. Índice local de portales OSM (address_index, tags addr:* del PBF):
+     portal presente en el mapa → EXACT_ADDRESS sin red. Se vuelve a probar
+     con el nombre corregido por el fuzzy matching.
+  1c. Interpolación local (utils.house_numbers): con portales ROOFTOP/override
+     ya cacheados de la misma calle y acera → INTERPOLATED sin red. Si las
+     reglas de confianza no respaldan la estimación, se sigue hacia Google.
   2. Fuzzy matching contra catálogo estático (streets.json).
      Sin llamada HTTP. Corrige el nombre de la calle antes de consultar APIs.
+     El resultado (corrección o "sin corrección") se memoriza por calle
+     normalizada en la tabla street_corrections: un typo repetido cuesta una
+     búsqueda en un dict. El memo se invalida si cambia el catálogo.
   3. Google Geocoding API — solo ROOFTOP → EXACT_ADDRESS.
      Cualquier otro resultado (RANGE_INTERPOLATED, GEOMETRIC_CENTER, APPROXIMATE)
      no se acepta directamente; se intenta con Places si hay alias.
   4. Google Places API — si hay alias de negocio.
-  5. FAILED → devuelve None. No se cachea para permitir reintentos en futuras llamadas.
-
-Errores transitorios (timeout, red, HTTP 429/5xx) se reintentan con backoff
-exponencial (_GEOCODE_RETRY_DELAYS). Errores permanentes (ZERO_RESULTS, fuera de
-bbox) no se reintentan.
+  5. FAILED → devuelve None. Se recuerda GEOCODE_NEGATIVE_TTL_H horas en una
+     caché negativa aparte (clave + alias) para no repetir la consulta a Google
+     en cada validación; add_override la limpia y use_negative_cache=False la
+     ignora. Un fallo por errores transitorios (Google caído) no se recuerda.
+
+Errores transitorios (timeout, red) se reintentan con backoff exponencial
+(_GEOCODE_RETRY_DELAYS). Errores permanentes (ZERO_RESULTS, fuera de bbox) no
+se reintentan.
+
+Todas las llamadas a Google (síncronas y async, incluidos reintentos) pasan por
+un token bucket común y adaptativo (_google_bucket): arranca a
+GOOGLE_RATE_LIMIT_QPS, se reduce a la mitad cuando Google limita (HTTP 429/5xx,
+OVER_QUERY_LIMIT; respetando Retry-After) y recupera ritmo poco a poco con cada
+respuesta normal. Los reintentos de un 429 no duermen un tiempo fijo: esperan
+su turno en el bucket. Cada llamada queda contada por endpoint en _google_calls
+(resultado y latencia; get_google_stats()).
+
+geocode() usa la sesión requests compartida (keep-alive, app.adapters.http);
+geocode_async() es el mismo pipeline sobre el cliente httpx compartido, para
+los endpoints async. Ambos comparten los
+pasos locales (caché, fuzzy) y la interpretación de respuestas de Google.
 
 Confianza devuelta (str):
-  EXACT_ADDRESS  — portal exacto (Google ROOFTOP)
+  EXACT_ADDRESS  — portal exacto (Google ROOFTOP o portal en OSM)
   EXACT_PLACE    — lugar/negocio encontrado por Places
+  INTERPOLATED   — portal estimado entre portales conocidos de la misma calle
   OVERRIDE       — pin manual
   FAILED         — no geocodificado (requiere pin manual)
 """
 
+import asyncio
 import difflib
-import json
+import hashlib
 import math
 import re
 import threading
 import time
+from collections import deque
 from pathlib import Path
+from typing import Any, Callable, Generator, Iterable, NamedTuple, TypeVar
 
+import httpx
 import requests
 
 from app.core.config import (
@@ -40,34 +78,91 @@ from app.core.config import (
     GOOGLE_GEOCODING_URL,
     GOOGLE_PLACES_URL,
     GOOGLE_CACHE_TTL_DAYS,
+    GEOCODE_NEGATIVE_TTL_H,
+    GEOCODE_REFRESH_QPS,
+    GEOCODE_REFRESH_MAX_PENDING,
     GEOCODE_TIMEOUT,
+    GOOGLE_RATE_LIMIT_QPS,
+    GOOGLE_RATE_BURST,
+    GOOGLE_RATE_MIN_QPS,
+    GOOGLE_RATE_INCREASE_QPS,
+    GEOCODE_MEMORY_MAX,
+    CATALOG_CHECK_S,
 )
+from app.adapters.http import get_async_client, get_sync_session
+from app.adapters.kvstore import SqliteKVStore
+from app.adapters.shared_state import poll, publish, publish_many, subscribe
+from app.core.concurrency import run_cpu
+from app.core.metrics import CallStats
+from app.core.ratelimit import AdaptiveTokenBucket
+from app.core.refresher import BackgroundRefresher
+from app.core.ttlstore import TTLStore, register_cache
+from app.services import address_index
+from app.utils.address_parser import AddressParser, title_street
+from app.utils.house_numbers import HouseNumberIndex
 from app.utils.normalization import normalize_text
+from app.utils.token_index import TokenIndex
 from app.utils.validation import in_work_bbox
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 GeoResult = tuple[float, float]  # (lat, lon)
+_T = TypeVar("_T")
+
+# Cuota de Google compartida por geocode() y geocode_async() (ver docstring)
+_google_bucket = AdaptiveTokenBucket(
+    GOOGLE_RATE_LIMIT_QPS, GOOGLE_RATE_BURST,
+    min_rate=GOOGLE_RATE_MIN_QPS, increase=GOOGLE_RATE_INCREASE_QPS,
+)
+_google_calls = CallStats()  # "geocoding" / "places": resultado y latencia
 
 # ─── Caché en memoria ──────────────────────────────────────────────────────────
-# Solo almacena coordenadas válidas; los FAILED no se cachean.
-_cache: dict[str, GeoResult] = {}
+# Solo almacena coordenadas válidas; los FAILED van a la caché negativa (_failed).
+# Claves "calle#num" y "@alias". LRU acotada: una dirección expulsada se relee
+# del almacén SQLite en la siguiente consulta (_reload_entry); un alias
+# expulsado se resuelve por su dirección.
+_cache: TTLStore[GeoResult] = TTLStore(2 * GEOCODE_MEMORY_MAX, math.inf)
+
+# Caché negativa: clave de dirección → {alias normalizado: expira_en (epoch)}.
+# Persistida en su propia tabla del mismo fichero SQLite; en memoria, acotada
+# como _persisted. Una clave expulsada se relee del almacén (_reload_failed).
+_failed: TTLStore[dict[str, float]] = TTLStore(GEOCODE_MEMORY_MAX, GEOCODE_NEGATIVE_TTL_H * 3600)
 
 _DATA_DIR = Path(__file__).resolve().parent.parent / "data"
-_CACHE_FILE = _DATA_DIR / "geocode_cache.json"
-_persisted: dict[str, dict] = {}
+_CACHE_DB = _DATA_DIR / "geocode_cache.sqlite3"
+_CACHE_FILE = _DATA_DIR / "geocode_cache.json"   # formato antiguo: solo para migrar
+_persisted: TTLStore[dict] = TTLStore(GEOCODE_MEMORY_MAX, math.inf)  # entradas completas
+_store: SqliteKVStore | None = None
+
+# Portales medidos (ROOFTOP / override) por calle, para interpolar (paso 1c).
+# Se construye desde _persisted en la primera interpolación, no al cargar.
+_house_numbers = HouseNumberIndex()
+_house_numbers_ready = False
+_failed_store: SqliteKVStore | None = None
+_loaded = False
 
 # Parámetros de fuzzy matching
 FUZZY_THRESHOLD = 0.80
 
-# Catálogo de calles (cargado lazily desde streets.json vía catalog.py)
-_streets: list[str] | None = None
-_streets_norm: list[str] | None = None
-_streets_norm_set: set[str] | None = None  # búsqueda O(1) de pertenencia
+# Catálogo de calles (streets.json vía catalog.py): versión vigente con sus
+# estructuras de búsqueda, cargada lazily y sustituida entera al recargar
+# (ver _StreetsVersion). Se guardan las últimas versiones para /api/admin/catalog.
+_streets_version: "_StreetsVersion | None" = None
+_streets_history: "deque[_StreetsVersion]" = deque(maxlen=4)
+_catalog_next_check = 0.0                   # próxima comprobación del mtime (monotonic)
+_catalog_reload_lock = threading.Lock()     # una sola recarga a la vez
+
+# Memo persistente del fuzzy matching: calle normalizada → calle del catálogo
+# ("" = sin corrección). Cada entrada guarda la huella del catálogo con el que
+# se calculó; se recarga cuando cambia el catálogo (ver _get_corrections).
+_corrections: dict[str, str] = {}
+_corrections_catalog: list[str] | None = None  # catálogo con el que se cargó _corrections
+_corrections_fp = ""
+_corrections_store: SqliteKVStore | None = None
 
 # ─── Threading ─────────────────────────────────────────────────────────────────
-# RLock protege _cache, _persisted y _save_cache(). No se mantiene durante
+# RLock protege _cache, _persisted, _failed, _house_numbers, _corrections y la carga inicial. No se mantiene durante
 # llamadas a APIs externas (Google) para no serializar peticiones.
 _lock = threading.RLock()
 
@@ -77,129 +172,40 @@ class _GeoTransientError(Exception):
     """Error transitorio en llamada a API de geocodificación (red, timeout, rate-limit).
     Se reintenta con backoff exponencial; a diferencia de devolver None, indica
     que el problema es temporal y merece reintento.
+
+    throttled: Google pide bajar el ritmo (429, 5xx, OVER_QUERY_LIMIT); el
+    reintento lo marca _google_bucket, con la pausa de retry_after si la hay.
     """
 
+    def __init__(self, msg: str, *, throttled: bool = False, retry_after: float | None = None):
+        super().__init__(msg)
+        self.throttled = throttled
+        self.retry_after = retry_after
+
+
 _GEOCODE_RETRY_DELAYS: tuple[float, ...] = (1.0, 2.0)  # segundos entre reintentos
 
+# Estados de Google que indican sobrecarga, no una respuesta sobre la dirección
+_GOOGLE_TRANSIENT_STATUS = frozenset({"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"})
+
+_MAX_RETRY_AFTER_S = 60.0  # Retry-After mayor se recorta: la validación no espera más
+
 # ─── Places: distancias de referencia ──────────────────────────────────────────
 _PLACES_MAX_DIST_M: float = 300.0           # con ref_coord de Geocoding precisa
 _PLACES_MAX_DIST_FALLBACK_M: float = 1000.0  # cuando Google no devuelve ninguna coord
 
-# ─── Title-case para calles españolas ──────────────────────────────────────────
-_LOWERCASE_WORDS: frozenset[str] = frozenset({
-    "de", "del", "la", "el", "los", "las", "y", "a", "al", "e", "con", "sin",
-})
-
-# ─── Abreviaturas de tipo de vía ───────────────────────────────────────────────
-_VIA_ABBREVS = (
-    (r"(?<!\w)C/\s*",          "Calle "),       # C/5 → Calle 5
-    (r"\bCl\.?(?=\s|$)",       "Calle"),        # Cl. / Cl → Calle
-    (r"\bAvda\.?(?=\s|$)",     "Avenida"),      # Avda. / Avda → Avenida
-    (r"\bAv\.",                "Avenida"),      # Av. → Avenida
-    (r"\bPza\.?(?=\s|$)",      "Plaza"),        # Pza. / Pza → Plaza
-    (r"\bCtra\.?(?=\s|$)",     "Carretera"),    # Ctra. / Ctra → Carretera
-    (r"\bUrb\.?(?=\s|$)",      "Urbanización"), # Urb. → Urbanización
-    (r"\bPsje\.?(?=\s|$)",     "Pasaje"),       # Psje. → Pasaje
-    (r"\bPje\.?(?=\s|$)",      "Pasaje"),       # Pje. → Pasaje
-    (r"\bRda\.?(?=\s|$)",      "Ronda"),        # Rda. → Ronda
-    (r"\bTrav\.?(?=\s|$)",     "Travesía"),     # Trav. → Travesía
-)
-
-
 # ─── Normalización ─────────────────────────────────────────────────────────────
 
 # Alias local — la implementación canónica vive en app/utils/normalization.py.
 _normalize = normalize_text
 
 
-def _title_street(s: str) -> str:
-    """Title-case para nombres de calle respetando preposiciones y artículos españoles.
-
-    'CALLE DE LA PAZ'      → 'Calle de la Paz'
-    'avenida blas infante'  → 'Avenida Blas Infante'
-    'calle de los olivos'   → 'Calle de los Olivos'
-    """
-    words = s.split()
-    return " ".join(
-        w.capitalize() if i == 0 or w.lower() not in _LOWERCASE_WORDS else w.lower()
-        for i, w in enumerate(words)
-    )
-
-
-def _parse_address(raw: str) -> tuple[str, str]:
-    """
-    Extrae (nombre_de_calle, número_portal) de una dirección en texto libre.
-
-    Para rangos como "96-98", devuelve "96-98" como número.
-    Usa _portal_display() para obtener solo "96" al consultar APIs externas.
-    """
-    s = raw.strip()
-
-    # 0. Expandir abreviaturas de tipo de vía (C/ → Calle, Av. → Avenida, …)
-    for _pat, _repl in _VIA_ABBREVS:
-        s = re.sub(_pat, _repl, s, flags=re.IGNORECASE)
-    s = re.sub(r"\s+", " ", s).strip()
-
-    # 1. Eliminar sufijo de ciudad/país (precedido por coma)
-    s = re.sub(
-        r",\s*(posadas|14730|c[oó]rdoba|andaluc[ií]a|espa[nñ]a).*$",
-        "", s, flags=re.IGNORECASE,
-    ).strip().rstrip(",").strip()
-
-    # 2. Eliminar contenido entre paréntesis y paréntesis sin cerrar
-    s = re.sub(r"\s*\([^)]*\)\s*", " ", s)
-    s = re.sub(r"\s*\(.*$", "", s)
-    s = s.strip().rstrip(",-").strip()
-
-    # 3. Normalizar prefijos de número
-    s = re.sub(r"\bn[uú]m[eé]ro\b\.?\s*", " ", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bn[uúº°][mn]?\.?(?=[\s\d]|$)", " ", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bN\?\s*(?=\d)", " ", s)
-    s = re.sub(r"\bn\s*(?=\d)", " ", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s+", " ", s).strip()
-
-    # 4. Eliminar indicadores de piso/portal al final
-    _noise = (
-        r"(?:bajo|baja|bj|local|planta|piso|casa|bis|nave|oficina|taller|"
-        r"sotano|s[oó]tano|entreplanta|dcha|izda|izq|der|pta|dup)"
-    )
-    s = re.sub(
-        r"(?<=\d)[\s,]+\d+\s*" + _noise + r"[\s\S]*$",
-        "", s, flags=re.IGNORECASE,
-    )
-    s = re.sub(
-        r"[\s,]+(?:\d+[ºo°]\s*[a-zA-Z]?\s*)?" + _noise + r"[\s\S]*$",
-        "", s, flags=re.IGNORECASE,
-    )
-
-    # 4b. Eliminar detalles de acceso (bloque/portal/escalera/puerta) tras el número
-    #     Lookbehind garantiza que sólo actúa cuando hay un dígito previo,
-    #     preservando calles como "Calle del Portal" o "Pasaje del Bloque".
-    s = re.sub(
-        r"(?<=\d)[\s,;]+(?:bloque|portal|escalera|puerta)\b[\s\S]*$",
-        "", s, flags=re.IGNORECASE,
-    )
-
-    # 5. Eliminar ordinales de piso al final
-    s = re.sub(r"([\s,]+\d+[ºo°]\s*[a-zA-Z]?)+$", "", s, flags=re.IGNORECASE)
-
-    # 6. Limpiar puntuación sobrante
-    s = s.strip().rstrip(",-./").strip()
-
-    # 7. Extraer número de portal (último token numérico + letra/rango opcional)
-    m = re.search(r"[\s,]+(\d+(?:-\d+[a-zA-Z]?|[-\s]?[a-zA-Z])?)\s*$", s)
-    if m:
-        raw_num = m.group(1)
-        number = re.sub(r"\s+", "", raw_num).lower()
-        street = s[: m.start()].rstrip(" ,").strip()
-        if street:
-            return street, number
-
-    if re.search(r"\bs/?n\b", s, re.IGNORECASE):
-        street = re.sub(r"\s*,?\s*s/?n.*$", "", s, flags=re.IGNORECASE).strip()
-        return street, "sn"
-
-    return s, ""
+# Parser de direcciones compartido (patrones precompilados + memo LRU).
+# Todas las rutas (agrupado, clave, forma canónica, street_hint, geocode)
+# pasan por aquí: una dirección repetida se parsea una sola vez.
+_address_parser = AddressParser()
+_parse_address = _address_parser.parse
+_title_street = title_street
 
 
 def address_key(address: str) -> str:
@@ -239,7 +245,8 @@ def get_corrected_street(address: str) -> str:
     Devuelve el nombre de calle más preciso conocido para una dirección.
 
     Si el fuzzy matching corrigió el nombre de calle durante la geocodificación,
-    devuelve el nombre corregido guardado en caché (fuzzy_corrected_to).
+    devuelve el nombre corregido guardado en caché (fuzzy_corrected_to) o, si
+    la dirección no está cacheada, el del memo de correcciones.
     En caso contrario devuelve el nombre de calle extraído del texto original.
 
     Uso: obtener el street_hint para snap_to_street; el nombre corregido
@@ -247,7 +254,10 @@ def get_corrected_street(address: str) -> str:
     """
     street, number = _parse_address(address.strip())
     key = _cache_key(street, number)
-    corrected = _persisted.get(key, {}).get("fuzzy_corrected_to")
+    _ensure_loaded()
+    corrected = (_persisted.get(key) or {}).get("fuzzy_corrected_to")
+    if not corrected:
+        _, corrected = _lookup_correction(street, _streets_version)
     return corrected if corrected else street
 
 
@@ -269,23 +279,164 @@ def _cache_key(street: str, number: str) -> str:
 
 # ─── Catálogo de calles (streets.json — solo lectura) ──────────────────────────
 
-def _get_street_catalog() -> list[str]:
-    """Devuelve el catálogo de calles, cargándolo lazily desde catalog.py."""
-    global _streets, _streets_norm, _streets_norm_set
+class _StreetsVersion:
+    """Una versión del catálogo con sus estructuras de búsqueda precalculadas.
 
-    if _streets is not None:
-        return _streets
+    Inmutable: una recarga construye otra fuera de las peticiones y la instala
+    en una sola asignación, así que quien la lee ve lista, nombres
+    normalizados, conjunto e índice de tokens del mismo catálogo. watched=False
+    (catálogos puestos a mano en tests y benchmarks): no se vigila streets.json.
+    """
+
+    def __init__(
+        self,
+        streets: list[str],
+        number: int = 0,
+        mtime: float | None = None,
+        watched: bool = False,
+    ) -> None:
+        t0 = time.perf_counter()
+        self.streets = streets
+        self.norm = [_normalize(s) for s in streets]
+        self.norm_set = set(self.norm)  # búsqueda O(1) de pertenencia
+        self.index = TokenIndex(self.norm, _TOKEN_CHAR_THRESHOLD, _MAX_EXTRA_TOKENS)
+        self.number = number
+        self.mtime = mtime
+        self.watched = watched
+        self.fingerprint = _catalog_fingerprint(streets)
+        self.loaded_at = time.time()
+        self.build_ms = round((time.perf_counter() - t0) * 1000, 1)
+        # Consultas al memo resueltas, fuzzy matching ejecutados y calles corregidas
+        self.stats = {"memo_hits": 0, "fuzzy": 0, "corrected": 0}
+
+    def describe(self) -> dict:
+        return {
+            "version": self.number,
+            "streets": len(self.streets),
+            "fingerprint": self.fingerprint,
+            "mtime": self.mtime,
+            "loaded_at": self.loaded_at,
+            "build_ms": self.build_ms,
+            **self.stats,
+        }
+
+
+def _load_streets_version() -> _StreetsVersion:
+    """Lee streets.json y construye la versión siguiente (sin instalarla).
+
+    Al recargar, ValueError si el fichero no se puede leer o viene vacío: la
+    versión vigente se queda y, como conserva su mtime, se reintenta en la
+    siguiente comprobación.
+    """
+    from app.services import catalog
+    current = _streets_version
+    mtime = catalog.file_mtime()
+    streets = catalog.get_catalog() if current is None else catalog.reload_catalog()
+    number = current.number + 1 if current is not None else 1
+    return _StreetsVersion(streets, number, mtime, watched=True)
 
-    try:
-        from app.services.catalog import get_catalog
-        streets = get_catalog()
-        _streets = streets
-        _streets_norm = [_normalize(s) for s in streets]
-        _streets_norm_set = set(_streets_norm)
-        return _streets
-    except Exception as e:
-        logger.error("Error cargando catálogo de calles: %s", e)
-        return []
+
+def _install_streets(version: _StreetsVersion) -> None:
+    global _streets_version
+    with _lock:
+        if _streets_version is not None:
+            _streets_history.appendleft(_streets_version)
+        _streets_version = version
+    logger.info(
+        "Catálogo de calles v%d: %d calles (índice en %.0f ms)",
+        version.number, len(version.streets), version.build_ms,
+    )
+
+
+def _current_streets() -> _StreetsVersion:
+    """Versión vigente del catálogo (la primera vez se carga aquí mismo).
+
+    Si streets.json ha cambiado, programa la recarga en segundo plano y sigue
+    respondiendo con la versión actual hasta que la nueva esté lista.
+    """
+    version = _streets_version
+    if version is not None:
+        _check_catalog_file(version)
+        return version
+    with _catalog_reload_lock:
+        version = _streets_version
+        if version is None:
+            try:
+                version = _load_streets_version()
+            except Exception as e:
+                logger.error("Error cargando catálogo de calles: %s", e)
+                return _StreetsVersion([])
+            _install_streets(version)
+    return version
+
+
+def _check_catalog_file(version: _StreetsVersion) -> None:
+    """Como mucho cada CATALOG_CHECK_S: si el mtime de streets.json cambió, recarga."""
+    global _catalog_next_check
+    if not version.watched:
+        return
+    now = time.monotonic()
+    if now < _catalog_next_check:
+        return
+    _catalog_next_check = now + CATALOG_CHECK_S
+    from app.services import catalog
+    if catalog.file_mtime() != version.mtime:
+        _schedule_streets_reload()
+
+
+def _schedule_streets_reload() -> None:
+    """Recarga el catálogo en un hilo aparte (nada si ya hay una en curso)."""
+    if not _catalog_reload_lock.acquire(blocking=False):
+        return
+
+    def run() -> None:
+        try:
+            _reload_streets()
+        except Exception as e:
+            logger.error("Error recargando catálogo de calles: %s", e)
+        finally:
+            _catalog_reload_lock.release()
+
+    threading.Thread(target=run, name="catalog-reload", daemon=True).start()
+
+
+def _reload_streets() -> _StreetsVersion:
+    """Construye, instala y prepara (memo de correcciones) la versión nueva.
+
+    Bajo _catalog_reload_lock.
+    """
+    version = _load_streets_version()
+    _install_streets(version)
+    if version.streets:
+        _get_corrections(version.streets)
+    return version
+
+
+def reload_street_catalog() -> dict:
+    """Relee streets.json ya, en este worker y en los demás (/api/admin/catalog/reload).
+
+    Si el fichero no se puede leer se sigue con la versión vigente y se
+    devuelve con el motivo en "error".
+    """
+    with _catalog_reload_lock:
+        try:
+            version = _reload_streets()
+        except ValueError as e:
+            logger.error("Recarga del catálogo descartada: %s", e)
+            current = _streets_version
+            return {**(current.describe() if current is not None else {}), "error": str(e)}
+    publish("catalog")
+    return version.describe()
+
+
+def get_catalog_stats() -> dict:
+    """Versión vigente del catálogo y las anteriores, con sus contadores."""
+    current = _current_streets()
+    with _lock:
+        return {
+            "current": current.describe(),
+            "previous": [v.describe() for v in _streets_history],
+        }
 
 
 # ─── Fuzzy matching ────────────────────────────────────────────────────────────
@@ -358,45 +509,238 @@ def _find_closest_street(query_street: str) -> str | None:
     Busca en el catálogo el nombre de calle más parecido.
     Devuelve el nombre original (con mayúsculas/acentos) o None si no supera el umbral.
     Devuelve None también si la calle ya está en el catálogo (no hace falta corrección).
+
+    Solo puntúa las calles candidatas del índice de tokens (las únicas que
+    pueden dar score > 0), en orden de catálogo: mismo resultado que recorrer
+    el catálogo entero.
     """
-    streets = _get_street_catalog()
-    if not streets:
+    version = _current_streets()
+    if not version.streets:
         return None
 
     query_norm = _normalize(query_street)
 
     # Si la calle normalizada ya está en el catálogo, no hay nada que corregir
-    if _streets_norm_set and query_norm in _streets_norm_set:
+    if query_norm in version.norm_set:
         return None
 
     best_score = 0.0
     best_street = None
 
-    for osm_name, osm_norm in zip(streets, _streets_norm or []):
-        score = _token_set_ratio(query_norm, osm_norm)
+    for i in version.index.candidates(query_norm):
+        score = _token_set_ratio(query_norm, version.norm[i])
         if score > best_score:
             best_score = score
-            best_street = osm_name
+            best_street = version.streets[i]
 
-    if best_score >= FUZZY_THRESHOLD and best_street and best_street != query_street:
+    corrected = best_score >= FUZZY_THRESHOLD and best_street and best_street != query_street
+    with _lock:
+        version.stats["fuzzy"] += 1
+        version.stats["corrected"] += bool(corrected)
+    if corrected:
         logger.info("Fuzzy match: '%s' → '%s' (score=%.2f)", query_street, best_street, best_score)
         return best_street
 
     return None
 
 
-# ─── Google Geocoding API ──────────────────────────────────────────────────────
+# ─── Memo de correcciones ──────────────────────────────────────────────────────
 
-def _google_geocode(street: str, number: str) -> tuple[GeoResult, str] | None:
+def _catalog_fingerprint(streets: list[str]) -> str:
+    """Huella del catálogo: cambia si se añade, quita o renombra una calle."""
+    return hashlib.sha1("\n".join(streets).encode("utf-8")).hexdigest()[:16]
+
+
+def _get_corrections_store() -> SqliteKVStore:
+    """Almacén del memo de correcciones (misma base, otra tabla)."""
+    global _corrections_store
+    with _lock:
+        if _corrections_store is None:
+            _corrections_store = SqliteKVStore(_CACHE_DB, "street_corrections")
+        return _corrections_store
+
+
+def _get_corrections(streets: list[str]) -> dict[str, str]:
+    """Memo vigente para el catálogo streets (recargado si el catálogo cambió).
+
+    Las entradas calculadas con otro catálogo se borran del almacén: una calle
+    nueva puede convertir un "sin corrección" en corrección y viceversa.
     """
-    Geocodifica con Google Geocoding API.
-    Devuelve ((lat, lon), location_type) o None si la dirección no se encuentra.
-    Lanza _GeoTransientError para errores de red, timeout o rate-limit (429/5xx).
-    location_type: ROOFTOP | RANGE_INTERPOLATED | GEOMETRIC_CENTER | APPROXIMATE
+    global _corrections, _corrections_catalog, _corrections_fp
+    with _lock:
+        if _corrections_catalog is streets:
+            return _corrections
+        fp = _catalog_fingerprint(streets)
+        memo: dict[str, str] = {}
+        outdated: list[str] = []
+        try:
+            store = _get_corrections_store()
+            for raw, value in store.items():
+                if value.get("catalog") == fp:
+                    memo[raw] = value.get("to", "")
+                else:
+                    outdated.append(raw)
+            store.delete_many(outdated)
+        except Exception as e:
+            logger.error("Error cargando el memo de correcciones: %s", e)
+        if outdated:
+            logger.info("Catálogo de calles cambiado: %d correcciones descartadas", len(outdated))
+        _corrections, _corrections_catalog, _corrections_fp = memo, streets, fp
+        return memo
+
+
+def _lookup_correction(street: str, version: _StreetsVersion | None) -> tuple[bool, str | None]:
+    """(True, corrección o None) si el memo de version conoce la calle; (False, None) si no.
+
+    version None (catálogo aún sin cargar: no se carga aquí) → (False, None).
     """
-    if not GOOGLE_API_KEY:
+    if version is None or not version.streets:
+        return False, None
+    corrected = _get_corrections(version.streets).get(_normalize(street))
+    if corrected is None:
+        return False, None
+    with _lock:
+        version.stats["memo_hits"] += 1
+    return True, corrected or None
+
+
+def _remember_correction(street: str, corrected: str | None, version: _StreetsVersion) -> None:
+    """Apunta en el memo (y en el almacén) el resultado del fuzzy matching.
+
+    Si mientras tanto se ha instalado otra versión del catálogo no se apunta:
+    el resultado se calculó con la anterior.
+    """
+    if not version.streets or version is not _streets_version:
+        return
+    key = _normalize(street)
+    with _lock:
+        _get_corrections(version.streets)[key] = corrected or ""
+        fp = _corrections_fp
+    try:
+        _get_corrections_store().put(key, {"to": corrected or "", "catalog": fp})
+    except Exception as e:
+        logger.error("Error guardando la corrección de '%s': %s", street, e)
+
+
+def _correct_street(street: str) -> str | None:
+    """_find_closest_street() con memo persistente (paso 2 del pipeline)."""
+    version = _current_streets()
+    found, corrected = _lookup_correction(street, version)
+    if not found:
+        corrected = _find_closest_street(street)
+        _remember_correction(street, corrected, version)
+    return corrected
+
+
+# ─── Llamada HTTP a Google (común a Geocoding y Places) ─────────────────────────
+
+def _http_get(url: str, params: dict) -> requests.Response:
+    """GET síncrono por la sesión compartida (keep-alive, sin handshake por llamada)."""
+    return get_sync_session().get(url, params=params, timeout=GEOCODE_TIMEOUT)
+
+
+def _retry_after(headers) -> float | None:
+    """Segundos de la cabecera Retry-After (solo formato numérico), recortados."""
+    value = headers.get("Retry-After")
+    if not isinstance(value, str) or not value.strip().isdigit():
         return None
+    return min(float(value), _MAX_RETRY_AFTER_S)
 
+
+def _check_http_status(status_code: int, headers, what: str) -> None:
+    """429/5xx → _GeoTransientError(throttled) con el Retry-After de la respuesta."""
+    if status_code == 429 or status_code >= 500:
+        raise _GeoTransientError(
+            f"HTTP {status_code} para {what}",
+            throttled=True, retry_after=_retry_after(headers),
+        )
+
+
+def _google_get(
+    endpoint: str,
+    url: str,
+    params: dict,
+    what: str,
+    parse: Callable[[dict], _T | None],
+) -> _T | None:
+    """GET a Google con token bucket, conversión de errores y contadores.
+
+    Devuelve parse(json) o None ante errores no transitorios (que se registran).
+    Lanza _GeoTransientError para red, timeout y rate-limit (429/5xx).
+    """
+    _google_bucket.acquire()
+    t0 = time.perf_counter()
+    outcome = "ok"
+    try:
+        r = _http_get(url, params=params)
+        _check_http_status(r.status_code, r.headers, what)
+        r.raise_for_status()
+        return parse(r.json())
+
+    except _GeoTransientError as exc:
+        outcome = "throttled" if exc.throttled else "unavailable"
+        raise
+    except requests.Timeout:
+        outcome = "timeout"
+        raise _GeoTransientError(f"timeout ({GEOCODE_TIMEOUT}s) para {what}")
+    except requests.ConnectionError as exc:
+        outcome = "network"
+        raise _GeoTransientError(f"error de red para {what}: {exc}")
+    except Exception as e:
+        outcome = "error"
+        logger.error("Google %s error: %s", endpoint, e)
+        return None
+    finally:
+        _google_calls.record(endpoint, time.perf_counter() - t0, outcome)
+
+
+async def _google_get_async(
+    endpoint: str,
+    url: str,
+    params: dict,
+    what: str,
+    parse: Callable[[dict], _T | None],
+) -> _T | None:
+    """Versión asíncrona de _google_get() sobre el cliente httpx compartido."""
+    await _google_bucket.acquire_async()
+    t0 = time.perf_counter()
+    outcome = "ok"
+    try:
+        r = await get_async_client().get(url, params=params, timeout=GEOCODE_TIMEOUT)
+        _check_http_status(r.status_code, r.headers, what)
+        r.raise_for_status()
+        return parse(r.json())
+
+    except _GeoTransientError as exc:
+        outcome = "throttled" if exc.throttled else "unavailable"
+        raise
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        raise _GeoTransientError(f"timeout ({GEOCODE_TIMEOUT}s) para {what}")
+    except httpx.TransportError as exc:
+        outcome = "network"
+        raise _GeoTransientError(f"error de red para {what}: {exc}")
+    except Exception as e:
+        outcome = "error"
+        logger.error("Google %s error: %s", endpoint, e)
+        return None
+    finally:
+        _google_calls.record(endpoint, time.perf_counter() - t0, outcome)
+
+
+def get_google_stats() -> dict:
+    """Ritmo actual hacia Google y contadores por endpoint (GET /api/geocoding/stats)."""
+    return {
+        "rate_qps": round(_google_bucket.rate_per_s, 2),
+        "max_rate_qps": _google_bucket.max_rate,
+        "endpoints": _google_calls.snapshot(),
+    }
+
+
+# ─── Google Geocoding API ──────────────────────────────────────────────────────
+
+def _google_geocode_params(street: str, number: str) -> tuple[str, dict]:
+    """Dirección completa y parámetros de la petición a Google Geocoding."""
     num_str = _portal_display(number) if number and number != "sn" else ""
     addr_base = f"{street} {num_str}".strip() if num_str else street
     address = f"{addr_base}, Posadas, Córdoba, España"
@@ -407,44 +751,65 @@ def _google_geocode(street: str, number: str) -> tuple[GeoResult, str] | None:
         "components": "locality:Posadas|country:ES",
         "language": "es",
     }
+    return address, params
 
-    try:
-        r = requests.get(GOOGLE_GEOCODING_URL, params=params, timeout=GEOCODE_TIMEOUT)
-        if r.status_code == 429 or r.status_code >= 500:
-            raise _GeoTransientError(f"HTTP {r.status_code} para '{address}'")
-        r.raise_for_status()
-        data = r.json()
 
-        if data.get("status") != "OK" or not data.get("results"):
-            status = data.get("status", "?")
-            if status not in ("ZERO_RESULTS",):
-                logger.warning("Google status=%s para '%s'", status, address)
-            return None
+def _parse_google_geocode(data: dict, address: str) -> tuple[GeoResult, str] | None:
+    """Interpreta la respuesta JSON de Google Geocoding (ver _google_geocode)."""
+    if data.get("status") in _GOOGLE_TRANSIENT_STATUS:
+        raise _GeoTransientError(
+            f"Google status={data['status']} para '{address}'",
+            throttled=data["status"] == "OVER_QUERY_LIMIT",
+        )
+    if data.get("status") != "OK" or not data.get("results"):
+        status = data.get("status", "?")
+        if status not in ("ZERO_RESULTS",):
+            logger.warning("Google status=%s para '%s'", status, address)
+        return None
+
+    result = data["results"][0]
+    location = result["geometry"]["location"]
+    location_type = result["geometry"].get("location_type", "APPROXIMATE")
 
-        result = data["results"][0]
-        location = result["geometry"]["location"]
-        location_type = result["geometry"].get("location_type", "APPROXIMATE")
+    lat = float(location["lat"])
+    lng = float(location["lng"])
 
-        lat = float(location["lat"])
-        lng = float(location["lng"])
+    if not in_work_bbox(lat, lng):
+        logger.warning("Google fuera de bbox (%.4f, %.4f) para '%s'", lat, lng, address)
+        return None
 
-        if not in_work_bbox(lat, lng):
-            logger.warning("Google fuera de bbox (%.4f, %.4f) para '%s'", lat, lng, address)
-            return None
+    logger.info("Google: '%s' → %s (%.5f, %.5f)", address, location_type, lat, lng)
+    return (lat, lng), location_type
 
-        logger.info("Google: '%s' → %s (%.5f, %.5f)", address, location_type, lat, lng)
-        return (lat, lng), location_type
 
-    except _GeoTransientError:
-        raise
-    except requests.Timeout:
-        raise _GeoTransientError(f"timeout ({GEOCODE_TIMEOUT}s) para '{address}'")
-    except requests.ConnectionError as exc:
-        raise _GeoTransientError(f"error de red para '{address}': {exc}")
-    except Exception as e:
-        logger.error("Google Geocoding error: %s", e)
+def _google_geocode(street: str, number: str) -> tuple[GeoResult, str] | None:
+    """
+    Geocodifica con Google Geocoding API.
+    Devuelve ((lat, lon), location_type) o None si la dirección no se encuentra.
+    Lanza _GeoTransientError para errores de red, timeout o rate-limit (429/5xx).
+    location_type: ROOFTOP | RANGE_INTERPOLATED | GEOMETRIC_CENTER | APPROXIMATE
+    """
+    if not GOOGLE_API_KEY:
         return None
 
+    address, params = _google_geocode_params(street, number)
+    return _google_get(
+        "geocoding", GOOGLE_GEOCODING_URL, params, f"'{address}'",
+        lambda data: _parse_google_geocode(data, address),
+    )
+
+
+async def _google_geocode_async(street: str, number: str) -> tuple[GeoResult, str] | None:
+    """Versión asíncrona de _google_geocode() sobre el cliente httpx compartido."""
+    if not GOOGLE_API_KEY:
+        return None
+
+    address, params = _google_geocode_params(street, number)
+    return await _google_get_async(
+        "geocoding", GOOGLE_GEOCODING_URL, params, f"'{address}'",
+        lambda data: _parse_google_geocode(data, address),
+    )
+
 
 # ─── Distancia haversine ───────────────────────────────────────────────────────
 
@@ -494,6 +859,63 @@ def _places_name_matches(alias: str, name_returned: str) -> bool:
     return True
 
 
+def _google_places_params(alias: str) -> dict:
+    """Parámetros de la petición a Google Places Find Place."""
+    return {
+        "input": f"{alias}, Posadas, Córdoba",
+        "inputtype": "textquery",
+        "fields": "geometry,name",
+        "locationbias": f"circle:1500@{POSADAS_CENTER[0]},{POSADAS_CENTER[1]}",
+        "key": GOOGLE_API_KEY,
+        "language": "es",
+    }
+
+
+def _parse_google_places(
+    data: dict,
+    alias: str,
+    ref_coord: GeoResult,
+    max_dist: float,
+) -> GeoResult | None:
+    """Interpreta y valida la respuesta JSON de Places (ver _google_places)."""
+    if data.get("status") in _GOOGLE_TRANSIENT_STATUS:
+        raise _GeoTransientError(
+            f"Places status={data['status']} para alias '{alias}'",
+            throttled=data["status"] == "OVER_QUERY_LIMIT",
+        )
+    if data.get("status") != "OK" or not data.get("candidates"):
+        return None
+
+    candidate = data["candidates"][0]
+    location = candidate["geometry"]["location"]
+    lat = float(location["lat"])
+    lng = float(location["lng"])
+
+    if not in_work_bbox(lat, lng):
+        logger.warning("Places fuera de bbox para '%s'", alias)
+        return None
+
+    name_returned = candidate.get("name", "")
+    if not _places_name_matches(alias, name_returned):
+        logger.warning(
+            "Places: nombre '%s' no coincide con alias '%s' → rechazado",
+            name_returned, alias,
+        )
+        return None
+
+    coord: GeoResult = (lat, lng)
+    dist_m = _haversine_m(ref_coord, coord)
+    if dist_m > max_dist:
+        logger.warning(
+            "Places: '%s' a %.0f m de la referencia → rechazado (umbral %.0f m)",
+            alias, dist_m, max_dist,
+        )
+        return None
+
+    logger.info("Places: '%s' → '%s' (%.5f, %.5f)", alias, name_returned, lat, lng)
+    return coord
+
+
 def _google_places(
     alias: str,
     ref_coord: GeoResult,
@@ -509,91 +931,92 @@ def _google_places(
       2. Nombre devuelto satisface _places_name_matches (comparación por tokens).
       3. Distancia a ref_coord ≤ max_dist.
          ref_coord puede ser la coord de Geocoding (precisa) o POSADAS_CENTER (fallback
-         cuando Google no devuelve ningún resultado), con max_dist ajustado en cada caso.
+         cuando Google no devuelve ninguna coord), con max_dist ajustado en cada caso.
     """
     if not GOOGLE_API_KEY or not alias:
         return None
 
-    params = {
-        "input": f"{alias}, Posadas, Córdoba",
-        "inputtype": "textquery",
-        "fields": "geometry,name",
-        "locationbias": f"circle:1500@{POSADAS_CENTER[0]},{POSADAS_CENTER[1]}",
-        "key": GOOGLE_API_KEY,
-        "language": "es",
-    }
-
-    try:
-        r = requests.get(GOOGLE_PLACES_URL, params=params, timeout=GEOCODE_TIMEOUT)
-        if r.status_code == 429 or r.status_code >= 500:
-            raise _GeoTransientError(f"HTTP {r.status_code} para alias '{alias}'")
-        r.raise_for_status()
-        data = r.json()
+    return _google_get(
+        "places", GOOGLE_PLACES_URL, _google_places_params(alias), f"alias '{alias}'",
+        lambda data: _parse_google_places(data, alias, ref_coord, max_dist),
+    )
 
-        if data.get("status") != "OK" or not data.get("candidates"):
-            return None
 
-        candidate = data["candidates"][0]
-        location = candidate["geometry"]["location"]
-        lat = float(location["lat"])
-        lng = float(location["lng"])
+async def _google_places_async(
+    alias: str,
+    ref_coord: GeoResult,
+    max_dist: float,
+) -> GeoResult | None:
+    """Versión asíncrona de _google_places() sobre el cliente httpx compartido."""
+    if not GOOGLE_API_KEY or not alias:
+        return None
 
-        if not in_work_bbox(lat, lng):
-            logger.warning("Places fuera de bbox para '%s'", alias)
-            return None
+    return await _google_get_async(
+        "places", GOOGLE_PLACES_URL, _google_places_params(alias), f"alias '{alias}'",
+        lambda data: _parse_google_places(data, alias, ref_coord, max_dist),
+    )
 
-        name_returned = candidate.get("name", "")
-        if not _places_name_matches(alias, name_returned):
-            logger.warning(
-                "Places: nombre '%s' no coincide con alias '%s' → rechazado",
-                name_returned, alias,
-            )
-            return None
-
-        coord: GeoResult = (lat, lng)
-        dist_m = _haversine_m(ref_coord, coord)
-        if dist_m > max_dist:
-            logger.warning(
-                "Places: '%s' a %.0f m de la referencia → rechazado (umbral %.0f m)",
-                alias, dist_m, max_dist,
-            )
-            return None
 
-        logger.info("Places: '%s' → '%s' (%.5f, %.5f)", alias, name_returned, lat, lng)
-        return coord
+# ─── Retry para errores transitorios ──────────────────────────────────────────
 
-    except _GeoTransientError:
-        raise
-    except requests.Timeout:
-        raise _GeoTransientError(f"timeout ({GEOCODE_TIMEOUT}s) para alias '{alias}'")
-    except requests.ConnectionError as exc:
-        raise _GeoTransientError(f"error de red para alias '{alias}': {exc}")
-    except Exception as e:
-        logger.error("Google Places error: %s", e)
-        return None
+def _on_transient(exc: _GeoTransientError, name: str, delay: float | None) -> float:
+    """Reacción a un _GeoTransientError en los bucles de reintento.
 
+    Devuelve los segundos a dormir antes del siguiente intento; relanza exc si
+    no quedan reintentos (delay None). Si Google limita (throttled) informa a
+    _google_bucket, que baja el ritmo y aplica la pausa (Retry-After o, sin él,
+    la del backoff) a todas las llamadas, no solo a esta: devuelve 0 y la
+    espera la impone el siguiente acquire.
+    """
+    if exc.throttled:
+        _google_bucket.on_throttle(exc.retry_after if exc.retry_after is not None else delay)
+    if delay is None:
+        logger.error("%s: agotados reintentos → %s", name, exc)
+        raise exc
+    if exc.throttled:
+        logger.warning(
+            "%s: Google limita (%s), reintentando a %.1f QPS…",
+            name, exc, _google_bucket.rate_per_s,
+        )
+        return 0.0
+    logger.warning("%s: error transitorio (%s), reintentando en %.0fs…", name, exc, delay)
+    return delay
 
-# ─── Retry para errores transitorios ──────────────────────────────────────────
 
 def _call_with_retry(fn, *args, **kwargs):
     """Ejecuta fn(*args, **kwargs) con reintentos exponenciales ante _GeoTransientError.
 
-    Devuelve el resultado de fn si tiene éxito, o None si se agotan los reintentos.
-    fn debe devolver None (fallo permanente) o lanzar _GeoTransientError (transitorio).
+    Devuelve el resultado de fn (None = fallo permanente). Si se agotan los
+    reintentos relanza el último _GeoTransientError: el llamador distingue así
+    "la dirección no existe" de "Google no respondió" (este no va a la caché negativa).
+    Cada respuesta sin limitación sube el ritmo de _google_bucket (AIMD).
     """
     for attempt, delay in enumerate((*_GEOCODE_RETRY_DELAYS, None)):
         try:
-            return fn(*args, **kwargs)
+            result = fn(*args, **kwargs)
         except _GeoTransientError as exc:
-            if delay is None:
-                logger.error("%s: agotados reintentos → %s", fn.__name__, exc)
-                return None
-            logger.warning(
-                "%s: error transitorio (%s), reintentando en %.0fs…",
-                fn.__name__, exc, delay,
-            )
-            time.sleep(delay)
-    return None  # inalcanzable
+            wait = _on_transient(exc, fn.__name__, delay)  # relanza si no quedan reintentos
+            if wait:
+                time.sleep(wait)
+            continue
+        _google_bucket.on_success()
+        return result
+    raise AssertionError("inalcanzable")
+
+
+async def _call_with_retry_async(fn, *args, **kwargs):
+    """Como _call_with_retry() para corrutinas: espera con asyncio.sleep."""
+    for attempt, delay in enumerate((*_GEOCODE_RETRY_DELAYS, None)):
+        try:
+            result = await fn(*args, **kwargs)
+        except _GeoTransientError as exc:
+            wait = _on_transient(exc, fn.__name__, delay)  # relanza si no quedan reintentos
+            if wait:
+                await asyncio.sleep(wait)
+            continue
+        _google_bucket.on_success()
+        return result
+    raise AssertionError("inalcanzable")
 
 
 # ─── TTL de caché Google ───────────────────────────────────────────────────────
@@ -609,44 +1032,97 @@ def _google_cache_expired(entry: dict) -> bool:
 
 # ─── Persistencia ──────────────────────────────────────────────────────────────
 
-def _save_cache() -> None:
-    try:
-        _CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        _CACHE_FILE.write_text(
-            json.dumps(_persisted, ensure_ascii=False, indent=2), "utf-8"
-        )
-    except Exception as e:
-        logger.error("Error guardando caché: %s", e)
+def _get_store() -> SqliteKVStore:
+    """Almacén SQLite de la caché (se abre al primer uso)."""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = SqliteKVStore(_CACHE_DB, "geocode")
+        return _store
 
 
-def _load_cache() -> None:
-    """Carga entradas del JSON en la caché en memoria al arrancar.
-    Descarta entradas google/places expiradas."""
-    global _persisted
-    if not _CACHE_FILE.exists():
-        _persisted = {}
+def _get_failed_store() -> SqliteKVStore:
+    """Almacén de la caché negativa (misma base, otra tabla)."""
+    global _failed_store
+    with _lock:
+        if _failed_store is None:
+            _failed_store = SqliteKVStore(_CACHE_DB, "geocode_failed")
+        return _failed_store
+
+
+def _ensure_loaded() -> None:
+    """Carga la caché persistida en memoria la primera vez que se necesita."""
+    global _loaded
+    if _loaded:
         return
+    poll()  # antes de cargar: fija desde dónde escuchar a los demás workers
+    with _lock:
+        if not _loaded:
+            _load_cache()
+            _loaded = True
+
+
+def _load_cache() -> None:
+    """Vuelca el almacén en la caché en memoria (sin sustituir los dicts).
+
+    Migra geocode_cache.json si es el primer arranque con SQLite. Descarta las
+    entradas de fuentes antiguas y las borra del almacén (compactación al
+    arrancar). Las google/places caducadas se cargan: se sirven y se refrescan
+    al usarse (ver _lookup_cache). El índice de portales se deja para
+    _ensure_house_numbers(). Debe llamarse bajo _lock.
+    """
+    global _house_numbers_ready
+    t0 = time.perf_counter()
+    store = _get_store()
     try:
-        raw = json.loads(_CACHE_FILE.read_text("utf-8"))
-        _persisted = {}
-        for key, entry in raw.items():
+        store.migrate_json(_CACHE_FILE)
+        stale: list[str] = []
+        entries: list[tuple[str, dict]] = []
+        coords: list[tuple[str, GeoResult]] = []
+        for key, entry in store.items():
             try:
                 lat = float(entry["lat"])
                 lon = float(entry["lon"])
                 src = entry.get("source", "")
                 if src == "cartociudad":
-                    continue  # Fuente antigua eliminada: entrada ignorada
-                if src in ("google", "places") and _google_cache_expired(entry):
-                    continue  # Expirada: se re-geocodificará
-                _persisted[key] = entry
-                _cache[key] = (lat, lon)
+                    stale.append(key)  # Fuente antigua eliminada
+                    continue
+                entries.append((key, entry))
+                coords.append((key, (lat, lon)))
                 alias_stored = entry.get("alias", "")
                 if alias_stored:
-                    _cache["@" + _normalize(alias_stored)] = (lat, lon)
+                    coords.append(("@" + _normalize(alias_stored), (lat, lon)))
             except Exception:
                 pass
-    except Exception:
-        _persisted = {}
+        _persisted.update(entries)
+        _cache.update(coords)
+        store.delete_many(stale)
+        _house_numbers.clear()
+        _house_numbers_ready = False
+        _load_failed()
+    except Exception as e:
+        logger.error("Error cargando caché de geocodificación: %s", e)
+        return
+    logger.info(
+        "Caché de geocodificación: %d entradas (%d descartadas), %d fallos recientes en %.0f ms",
+        len(_persisted), len(stale), len(_failed), (time.perf_counter() - t0) * 1000,
+    )
+
+
+def _load_failed() -> None:
+    """Carga la caché negativa vigente y borra del almacén la expirada. Bajo _lock."""
+    store = _get_failed_store()
+    now = time.time()
+    live: list[tuple[str, dict[str, float]]] = []
+    expired: list[str] = []
+    for key, aliases in store.items():
+        current = {a: float(exp) for a, exp in aliases.items() if float(exp) > now}
+        if current:
+            live.append((key, current))
+        else:
+            expired.append(key)
+    _failed.update(live)
+    store.delete_many(expired)
 
 
 def _persist_entry(
@@ -660,7 +1136,30 @@ def _persist_entry(
     corrected_to: str | None = None,
     alias: str | None = None,
 ) -> None:
-    """Guarda una entrada geocodificada en disco. Debe llamarse bajo _lock."""
+    """Guarda una entrada geocodificada en memoria y en disco (una fila, O(1)).
+
+    Debe llamarse bajo _lock.
+    """
+    entry = _remember_entry(key, lat, lon, street, number, source, confidence, corrected_to, alias)
+    try:
+        _get_store().put(key, entry)
+    except Exception as e:
+        logger.error("Error guardando caché: %s", e)
+    publish("geocode", key)
+
+
+def _remember_entry(
+    key: str,
+    lat: float,
+    lon: float,
+    street: str,
+    number: str,
+    source: str,
+    confidence: str,
+    corrected_to: str | None = None,
+    alias: str | None = None,
+) -> dict:
+    """Construye la entrada y la deja en memoria (alias, portal). Bajo _lock; no escribe en disco."""
     entry: dict = {
         "lat": lat,
         "lon": lon,
@@ -677,37 +1176,411 @@ def _persist_entry(
         entry["alias"] = alias
         _cache["@" + _normalize(alias)] = (lat, lon)
     _persisted[key] = entry
-    _save_cache()
+    _index_house_number(key, entry)
+    return entry
+
+
+def _anchor_streets(key: str, entry: dict) -> set[str]:
+    """Nombres normalizados bajo los que se indexa un portal (original y corregido)."""
+    streets = {key.split("#", 1)[0]}
+    if entry.get("fuzzy_corrected_to"):
+        streets.add(_normalize(entry["fuzzy_corrected_to"]))
+    return streets
+
+
+def _index_house_number(key: str, entry: dict) -> None:
+    """Añade una entrada medida (ROOFTOP u override) como anclaje. Bajo _lock."""
+    if entry.get("source") not in ("google", "override"):
+        return
+    coord = (float(entry["lat"]), float(entry["lon"]))
+    for street in _anchor_streets(key, entry):
+        _house_numbers.add(street, entry.get("number") or "", coord)
+
+
+def _ensure_house_numbers() -> None:
+    """Indexa los portales de la caché la primera vez que se interpola. Bajo _lock.
+
+    Desde _persisted si la memoria tiene todas las entradas; si la LRU ha
+    expulsado alguna, desde SQLite.
+    """
+    global _house_numbers_ready
+    if _house_numbers_ready:
+        return
+    try:
+        store = _get_store()
+        source = _persisted.items() if len(_persisted) == len(store) else store.items()
+        for key, entry in source:
+            _index_house_number(key, entry)
+    except Exception as e:
+        logger.error("Error indexando portales de la caché: %s", e)
+    _house_numbers_ready = True
+
+
+def _unindex_house_number(key: str, entry: dict) -> None:
+    for street in _anchor_streets(key, entry):
+        _house_numbers.discard(street, entry.get("number") or "")
 
 
 # ─── API pública ────────────────────────────────────────────────────────────────
 
-def geocode(address: str, alias: str = "") -> tuple[GeoResult | None, str]:
+_COORD_RE = re.compile(r"^\s*([-+]?\d+\.?\d*)\s*,\s*([-+]?\d+\.?\d*)\s*$")
+
+
+def _lookup_cache(key: str, alias: str) -> tuple[GeoResult, str] | None:
+    """Paso 1 del pipeline: caché por clave de dirección o por alias.
+
+    Las entradas google/places caducadas se devuelven igual y se encolan para
+    refresco en segundo plano.
     """
-    Geocodifica una dirección. Devuelve ((lat, lon), confidence).
-    confidence: EXACT_ADDRESS | EXACT_PLACE | OVERRIDE | FAILED
+    _ensure_loaded()
+    poll()
+    with _lock:
+        coord = _cache.get(key)
+        entry = _persisted.get(key)
+        if entry is None:
+            entry = _reload_entry(key)
+            if entry is not None:
+                coord = (float(entry["lat"]), float(entry["lon"]))
+        elif coord is None:
+            # _cache expulsa en otro orden (guarda también los "@alias") o se
+            # vació por /api/admin/caches: la entrada completa manda.
+            coord = _cache[key] = (float(entry["lat"]), float(entry["lon"]))
+        if coord is not None:
+            entry = entry or {}
+            src = entry.get("source", "")
+            if src in ("google", "places") and _google_cache_expired(entry):
+                _refresh_stats["stale_served"] += 1
+                _refresher.submit(key)
+            confidence = entry.get("confidence", "EXACT_ADDRESS")
+            return coord, confidence
+
+        if alias:
+            alias_coord = _cache.get("@" + _normalize(alias))
+            if alias_coord is not None:
+                logger.info("Caché por alias '%s' → EXACT_PLACE", alias)
+                return alias_coord, "EXACT_PLACE"
+    return None
+
+
+def _reload_entry(key: str) -> dict | None:
+    """Entrada expulsada de la memoria (LRU): la relee del almacén y la vuelve
+    a poner en memoria. None si no está. Bajo _lock."""
+    try:
+        entry = _get_store().get(key)
+    except Exception as e:
+        logger.error("Error leyendo la caché de geocodificación: %s", e)
+        return None
+    if not entry or entry.get("source") == "cartociudad":
+        return None
+    lat, lon = float(entry["lat"]), float(entry["lon"])
+    _persisted[key] = entry
+    _cache[key] = (lat, lon)
+    if entry.get("alias"):
+        _cache["@" + _normalize(entry["alias"])] = (lat, lon)
+    return entry
+
+
+def _on_remote_change(key: str) -> None:
+    """Otro worker ha guardado, sustituido o borrado la entrada key: se descarta
+    la copia en memoria (con su alias y su portal) y se relee del almacén.
+
+    key="" (eventos perdidos, ver shared_state.poll): se descarta toda la
+    memoria y la siguiente consulta vuelve a cargar el almacén.
+    """
+    global _loaded, _house_numbers_ready
+    with _lock:
+        if not key:
+            _cache.clear()
+            _persisted.clear()
+            _failed.clear()
+            _house_numbers.clear()
+            _house_numbers_ready = False
+            _loaded = False
+            return
+        old = _persisted.pop(key)
+        _cache.pop(key)
+        _failed.pop(key, None)
+        if old is not None:
+            if old.get("alias"):
+                _cache.pop("@" + _normalize(old["alias"]))
+            if _house_numbers_ready:
+                _unindex_house_number(key, old)
+        new = _reload_entry(key)
+        if new is not None and _house_numbers_ready:
+            _index_house_number(key, new)
+
+
+def _reload_failed(key: str) -> dict[str, float] | None:
+    """Relee del almacén la caché negativa de key (expulsada de memoria). Bajo _lock."""
+    try:
+        aliases = _get_failed_store().get(key)
+    except Exception as e:
+        logger.error("Error leyendo caché negativa: %s", e)
+        return None
+    now = time.time()
+    live = {a: float(exp) for a, exp in (aliases or {}).items() if float(exp) > now}
+    if not live:
+        return None
+    _failed[key] = live
+    return live
+
+
+def _recently_failed(key: str, alias: str) -> bool:
+    """True si key+alias está en la caché negativa y no ha expirado."""
+    with _lock:
+        aliases = _failed.get(key)
+        if aliases is None:
+            aliases = _reload_failed(key) or {}
+        expires_at = aliases.get(_normalize(alias))
+    return expires_at is not None and expires_at > time.time()
+
+
+def _remember_failure(key: str, alias: str) -> None:
+    """Apunta un FAILED en la caché negativa durante GEOCODE_NEGATIVE_TTL_H horas.
+
+    Sin API key no se apunta: no es un fallo de la dirección.
+    """
+    if not GOOGLE_API_KEY or GEOCODE_NEGATIVE_TTL_H <= 0:
+        return
+    now = time.time()
+    with _lock:
+        aliases = {a: exp for a, exp in (_failed.get(key) or _reload_failed(key) or {}).items() if exp > now}
+        aliases[_normalize(alias)] = now + GEOCODE_NEGATIVE_TTL_H * 3600
+        _failed[key] = aliases
+        try:
+            _get_failed_store().put(key, aliases)
+        except Exception as e:
+            logger.error("Error guardando caché negativa: %s", e)
+
+
+def _forget_failure(key: str) -> None:
+    """Quita key (con todos sus alias) de la caché negativa. Bajo _lock.
+
+    Se borra también del almacén aunque no esté en memoria: puede haber sido
+    expulsada de la LRU.
+    """
+    _failed.pop(key, None)
+    try:
+        _get_failed_store().delete(key)
+    except Exception as e:
+        logger.error("Error borrando caché negativa: %s", e)
+
+
+def _store_result(
+    key: str,
+    coord: GeoResult,
+    street: str,
+    number: str,
+    source: str,
+    confidence: str,
+    corrected_to: str | None,
+    alias: str | None,
+) -> None:
+    """Guarda un resultado aceptado en la caché en memoria y en disco."""
+    _ensure_loaded()
+    with _lock:
+        _cache[key] = coord
+        _forget_failure(key)
+        _persist_entry(
+            key, coord[0], coord[1], street, number,
+            source=source, confidence=confidence,
+            corrected_to=corrected_to, alias=alias,
+        )
+
+
+# ─── Refresco en segundo plano (stale-while-revalidate) ─────────────────────────
+
+_REFRESH_MOVED_M = 5.0  # a partir de aquí una entrada refrescada cuenta como "cambiada"
+
+_refresh_stats: dict[str, int] = {
+    "stale_served": 0,  # consultas servidas con una entrada caducada
+    "refreshed": 0,     # entradas re-geocodificadas con éxito
+    "changed": 0,       # … de ellas, con coordenadas desplazadas > _REFRESH_MOVED_M
+    "dropped": 0,       # Google ya no las confirma: se borran (próxima consulta → pipeline)
+    "errors": 0,        # Google no respondió: siguen caducadas, se reintentará al usarse
+}
+
+
+def _refresh_entry(key: str) -> None:
+    """Re-geocodifica una entrada google/places caducada (hilo del _refresher).
+
+    Repite la fuente original: Geocoding con la calle (ya corregida) y el
+    número guardados, o Places con el alias y la coord antigua como
+    referencia. No toca la entrada si mientras tanto la ha sustituido otra
+    (override, refresco) o ya no está caducada.
+    """
+    with _lock:
+        entry = _persisted.get(key)
+    if not entry or entry.get("source") not in ("google", "places"):
+        return
+    if not _google_cache_expired(entry):
+        return
+
+    old: GeoResult = (float(entry["lat"]), float(entry["lon"]))
+    street = entry.get("street", "")
+    number = entry.get("number") or ""
+    alias = entry.get("alias") or ""
+    coord: GeoResult | None = None
+    try:
+        if entry["source"] == "google":
+            result = _call_with_retry(
+                _google_geocode, entry.get("fuzzy_corrected_to") or street, number,
+            )
+            if result and result[1] == "ROOFTOP":
+                coord = result[0]
+        elif alias:
+            coord = _call_with_retry(_google_places, alias, old, _PLACES_MAX_DIST_M)
+    except _GeoTransientError:
+        with _lock:
+            _refresh_stats["errors"] += 1
+        return
+
+    with _lock:
+        if _persisted.get(key) is not entry:
+            return  # sustituida mientras se consultaba a Google
+        if coord is None:
+            logger.warning("Refresco: Google ya no confirma '%s' → entrada borrada", key)
+            _refresh_stats["dropped"] += 1
+            _unindex_house_number(key, entry)
+            _cache.pop(key, None)
+            if alias:
+                _cache.pop("@" + _normalize(alias), None)
+            _persisted.pop(key, None)
+            try:
+                _get_store().delete(key)
+            except Exception as e:
+                logger.error("Error borrando entrada caducada: %s", e)
+            publish("geocode", key)
+            return
+        moved = _haversine_m(old, coord)
+        _refresh_stats["refreshed"] += 1
+        if moved > _REFRESH_MOVED_M:
+            _refresh_stats["changed"] += 1
+            logger.info("Refresco: '%s' se desplaza %.0f m", key, moved)
+        _store_result(
+            key, coord, street, number, entry["source"],
+            entry.get("confidence", "EXACT_ADDRESS"),
+            entry.get("fuzzy_corrected_to"), alias or None,
+        )
+
+
+_refresher = BackgroundRefresher(
+    "geocode", _refresh_entry, GEOCODE_REFRESH_QPS, GEOCODE_REFRESH_MAX_PENDING,
+)
+
+
+def stop_background_refresh() -> None:
+    """Detiene el hilo de refresco (apagado de la app)."""
+    _refresher.stop()
+
+
+def warm_up() -> dict[str, int]:
+    """Calentamiento del arranque (lifespan): caché, índice de portales,
+    catálogo de calles, su índice de tokens y el memo de correcciones.
+
+    Todo se cargaría igualmente en la primera petición que lo necesite; aquí
+    se adelanta en segundo plano para que esa petición no pague la carga.
+    """
+    _ensure_loaded()
+    with _lock:
+        _ensure_house_numbers()
+        entries = len(_get_store())
+    streets = _current_streets().streets
+    if streets:
+        _get_corrections(streets)
+    return {"entries": entries, "streets": len(streets)}
+
+
+def get_cache_stats() -> dict[str, int]:
+    """Tamaño de la caché, entradas caducadas, portales OSM y contadores del refresco."""
+    _ensure_loaded()
+    with _lock:
+        _ensure_house_numbers()
+        stale = sum(
+            1 for e in _persisted.values()
+            if e.get("source") in ("google", "places") and _google_cache_expired(e)
+        )
+        return {
+            "entries": len(_get_store()),
+            "stale": stale,
+            "negative": len(_failed),
+            "osm_addresses": address_index.size(),
+            "house_number_anchors": len(_house_numbers),
+            "street_corrections": len(_corrections),
+            "refresh_pending": _refresher.pending(),
+            **_refresh_stats,
+        }
+
+
+def _lookup_local(street: str, number: str) -> tuple[GeoResult, str] | None:
+    """Pasos 1b y 1c: portal en el índice OSM o interpolado de la caché (sin red)."""
+    coord = address_index.lookup(street, number)
+    if coord is not None:
+        logger.info("OSM: '%s %s' → portal local (%.5f, %.5f)", street, number, *coord)
+        return coord, "EXACT_ADDRESS"
+    with _lock:
+        _ensure_house_numbers()
+        estimate = _house_numbers.estimate(_normalize(street), number)
+    if estimate is None:
+        return None
+    logger.info(
+        "Interpolación: '%s %s' → %s entre %d y %d (%.5f, %.5f)",
+        street, number, estimate.kind, *estimate.anchors, estimate.lat, estimate.lon,
+    )
+    return (estimate.lat, estimate.lon), "INTERPOLATED"
+
+
+def _places_reference(ref_coord: GeoResult | None) -> tuple[GeoResult, float]:
+    """Referencia y radio para validar Places.
+
+    Si Geocoding no devolvió ninguna coord, usa POSADAS_CENTER con radio más amplio.
+    """
+    if ref_coord is not None:
+        return ref_coord, _PLACES_MAX_DIST_M
+    return POSADAS_CENTER, _PLACES_MAX_DIST_FALLBACK_M
+
+
+class _GoogleCall(NamedTuple):
+    """Llamada a Google que el pipeline pide a quien lo ejecuta (con reintentos)."""
+    endpoint: str   # "geocoding" (calle, número) | "places" (alias, referencia, radio)
+    args: tuple
+
+
+_Pipeline = Generator[_GoogleCall, Any, tuple[GeoResult | None, str]]
+
+
+def _pipeline(address: str, alias: str, use_negative_cache: bool) -> _Pipeline:
+    """
+    Pasos de geocode()/geocode_async(), sin E/S de red: cada llamada a Google
+    se cede (yield _GoogleCall) y quien ejecuta el pipeline devuelve su
+    resultado con send() o lanza dentro el _GeoTransientError de reintentos
+    agotados. Todo lo demás (caché, SQLite, índice OSM, memo y fuzzy) corre
+    aquí, en el hilo que avanza el generador.
 
     Pipeline:
       0. Formato "lat,lon" directo → OVERRIDE.
       1. Caché (_cache): clave de dirección ("calle#num") o clave de alias ("@nombre").
-         Los FAILED nunca se cachean: siempre se reintenta en la próxima llamada.
-      2. Fuzzy matching en catálogo (corrección de nombre sin API).
+         Después, caché negativa (_failed): si la dirección con ese alias falló
+         hace menos de GEOCODE_NEGATIVE_TTL_H horas → FAILED sin llamar a Google.
+         use_negative_cache=False la ignora (reintento explícito del usuario).
+      1b. Índice local de portales OSM → EXACT_ADDRESS sin red.
+      1c. Interpolación entre portales cacheados de la calle → INTERPOLATED.
+      2. Fuzzy matching en catálogo (corrección de nombre sin API); con el
+         nombre corregido se vuelven a probar 1b y 1c.
       3. Google Geocoding: solo ROOFTOP → EXACT_ADDRESS.
          Resto de resultados (RANGE_INTERPOLATED, GEOMETRIC_CENTER, APPROXIMATE)
          se usan solo como referencia de distancia para validar Places.
       4. Google Places (solo si alias): valida tokens del nombre y distancia.
          Si Google no devolvió ninguna coord, usa POSADAS_CENTER como referencia
          con radio ampliado (_PLACES_MAX_DIST_FALLBACK_M).
-      5. FAILED — no se cachea para permitir reintentos en futuras llamadas.
+      5. FAILED — se apunta en la caché negativa, salvo que Google no
+         respondiera (reintentos agotados): eso no dice nada de la dirección.
     """
     if not address or not address.strip():
         return None, "FAILED"
 
     # 0. Formato "lat,lon" directo
-    coord_match = re.match(
-        r"^\s*([-+]?\d+\.?\d*)\s*,\s*([-+]?\d+\.?\d*)\s*$",
-        address.strip(),
-    )
+    coord_match = _COORD_RE.match(address.strip())
     if coord_match:
         return (float(coord_match.group(1)), float(coord_match.group(2))), "OVERRIDE"
 
@@ -715,50 +1588,41 @@ def geocode(address: str, alias: str = "") -> tuple[GeoResult | None, str]:
     key = _cache_key(street, number)
 
     # 1. Caché — protegida por _lock
-    with _lock:
-        if key in _cache:
-            coord = _cache[key]
-            entry = _persisted.get(key, {})
-            src = entry.get("source", "")
-            if src in ("google", "places") and _google_cache_expired(entry):
-                # Expirada: limpiar memoria y disco, y re-geocodificar
-                del _cache[key]
-                if entry.get("alias"):
-                    _cache.pop("@" + _normalize(entry["alias"]), None)
-                _persisted.pop(key, None)
-                _save_cache()
-            else:
-                confidence = entry.get("confidence", "EXACT_ADDRESS")
-                return coord, confidence
+    cached = _lookup_cache(key, alias)
+    if cached is not None:
+        return cached
 
-        if alias:
-            alias_coord = _cache.get("@" + _normalize(alias))
-            if alias_coord is not None:
-                logger.info("Caché por alias '%s' → EXACT_PLACE", alias)
-                return alias_coord, "EXACT_PLACE"
+    # 1b/1c. Portal en el índice OSM o interpolado entre portales cacheados
+    local = _lookup_local(street, number)
+    if local is not None:
+        return local
 
-    # 2. Fuzzy matching (sin API — solo corrige el nombre de calle)
-    corrected_to: str | None = None
-    corrected_street = street
-    closest = _find_closest_street(street)
-    if closest:
-        corrected_to = closest
-        corrected_street = closest
+    if use_negative_cache and _recently_failed(key, alias):
+        logger.info("Caché negativa: '%s' falló hace poco → FAILED", address)
+        return None, "FAILED"
+
+    # 2. Fuzzy matching (sin API — solo corrige el nombre de calle; memorizado)
+    corrected_to = _correct_street(street)
+    corrected_street = corrected_to or street
+    if corrected_to:
+        local = _lookup_local(corrected_to, number)
+        if local is not None:
+            return local
 
     # 3. Google Geocoding — solo ROOFTOP es aceptado directamente
     ref_coord: GeoResult | None = None
-    google_result = _call_with_retry(_google_geocode, corrected_street, number)
+    unanswered = False  # Google no respondió (reintentos agotados)
+    try:
+        google_result = yield _GoogleCall("geocoding", (corrected_street, number))
+    except _GeoTransientError:
+        google_result, unanswered = None, True
     if google_result:
         coord, location_type = google_result
         if location_type == "ROOFTOP":
-            with _lock:
-                _cache[key] = coord
-                _persist_entry(
-                    key, coord[0], coord[1], street, number,
-                    source="google", confidence="EXACT_ADDRESS",
-                    corrected_to=corrected_to,
-                    alias=alias if alias else None,
-                )
+            _store_result(
+                key, coord, street, number, "google", "EXACT_ADDRESS",
+                corrected_to, alias if alias else None,
+            )
             return coord, "EXACT_ADDRESS"
         # RANGE_INTERPOLATED / GEOMETRIC_CENTER / APPROXIMATE — no aceptado:
         # guardar como referencia de distancia para validar Places
@@ -766,39 +1630,126 @@ def geocode(address: str, alias: str = "") -> tuple[GeoResult | None, str]:
 
     # 4. Google Places (solo si hay alias de negocio)
     if alias:
-        # Si Geocoding no devolvió ninguna coord, usar POSADAS_CENTER con radio más amplio
-        places_ref = ref_coord if ref_coord is not None else POSADAS_CENTER
-        places_max_dist = _PLACES_MAX_DIST_M if ref_coord is not None else _PLACES_MAX_DIST_FALLBACK_M
-        places_coord = _call_with_retry(_google_places, alias, places_ref, places_max_dist)
+        places_ref, places_max_dist = _places_reference(ref_coord)
+        try:
+            places_coord = yield _GoogleCall("places", (alias, places_ref, places_max_dist))
+        except _GeoTransientError:
+            places_coord, unanswered = None, True
         if places_coord:
-            with _lock:
-                _cache[key] = places_coord
-                _persist_entry(
-                    key, places_coord[0], places_coord[1], street, number,
-                    source="places", confidence="EXACT_PLACE",
-                    corrected_to=corrected_to, alias=alias,
-                )
+            _store_result(
+                key, places_coord, street, number, "places", "EXACT_PLACE",
+                corrected_to, alias,
+            )
             return places_coord, "EXACT_PLACE"
 
-    # 5. FAILED — no se cachea para permitir reintentos en futuras llamadas
+    # 5. FAILED — a la caché negativa si Google llegó a responder
+    if not unanswered:
+        _remember_failure(key, alias)
     return None, "FAILED"
 
 
+def _advance(
+    steps: _Pipeline, value: Any, error: _GeoTransientError | None,
+) -> tuple[bool, Any]:
+    """Avanza el pipeline hasta la siguiente llamada a Google.
+
+    Devuelve (False, _GoogleCall) o (True, resultado final). No deja salir
+    StopIteration: así se puede ejecutar en el pool de CPU desde una corrutina.
+    """
+    try:
+        step = steps.throw(error) if error is not None else steps.send(value)
+    except StopIteration as stop:
+        return True, stop.value
+    return False, step
+
+
+def geocode(
+    address: str, alias: str = "", *, use_negative_cache: bool = True,
+) -> tuple[GeoResult | None, str]:
+    """
+    Geocodifica una dirección. Devuelve ((lat, lon), confidence).
+    confidence: EXACT_ADDRESS | EXACT_PLACE | INTERPOLATED | OVERRIDE | FAILED
+
+    Pasos en _pipeline(). Aquí las llamadas a Google son síncronas (sesión
+    requests compartida) y los reintentos esperan con time.sleep.
+    """
+    steps = _pipeline(address, alias, use_negative_cache)
+    value: Any = None
+    error: _GeoTransientError | None = None
+    while True:
+        done, step = _advance(steps, value, error)
+        if done:
+            return step
+        fn = _google_geocode if step.endpoint == "geocoding" else _google_places
+        try:
+            value, error = _call_with_retry(fn, *step.args), None
+        except _GeoTransientError as exc:
+            value, error = None, exc
+
+
+async def geocode_async(
+    address: str, alias: str = "", *, use_negative_cache: bool = True,
+) -> tuple[GeoResult | None, str]:
+    """Versión asíncrona de geocode(): mismo pipeline y misma caché.
+
+    Los pasos locales (caché y SQLite, índice OSM, memo y fuzzy matching)
+    avanzan en el pool de CPU, fuera del event loop; las llamadas a Google
+    usan el cliente httpx compartido y los reintentos esperan con asyncio.sleep.
+    """
+    steps = _pipeline(address, alias, use_negative_cache)
+    value: Any = None
+    error: _GeoTransientError | None = None
+    while True:
+        done, step = await run_cpu(_advance, steps, value, error)
+        if done:
+            return step
+        fn = _google_geocode_async if step.endpoint == "geocoding" else _google_places_async
+        try:
+            value, error = await _call_with_retry_async(fn, *step.args), None
+        except _GeoTransientError as exc:
+            value, error = None, exc
+
+
 def add_override(address: str, lat: float, lon: float) -> None:
     """
     Registra coordenadas manuales para una dirección (override permanente).
-    Tiene prioridad sobre cualquier resultado automático.
+    Tiene prioridad sobre cualquier resultado automático y borra la dirección
+    de la caché negativa.
     Las coordenadas deben ser válidas (verificadas por el router antes de llamar).
     """
-    street, number = _parse_address(address.strip())
-    key = _cache_key(street, number)
-    with _lock:
-        _cache[key] = (lat, lon)
-        _persist_entry(
-            key, lat, lon, street, number,
-            source="override", confidence="OVERRIDE",
-        )
+    add_overrides([(address, lat, lon)])
 
 
-# Cargar caché al importar el módulo
-_load_cache()
+def add_overrides(overrides: Iterable[tuple[str, float, float]]) -> int:
+    """
+    add_override() para varias direcciones (address, lat, lon) de una vez:
+    un solo paso por _lock, una transacción en la caché, otra en la caché
+    negativa y una en el registro de invalidaciones, en vez de tres por pin.
+    Si una dirección se repite gana la última. Devuelve nº de claves escritas.
+    """
+    _ensure_loaded()
+    entries: dict[str, dict] = {}
+    with _lock:
+        for address, lat, lon in overrides:
+            street, number = _parse_address(address.strip())
+            key = _cache_key(street, number)
+            _cache[key] = (lat, lon)
+            entries[key] = _remember_entry(
+                key, lat, lon, street, number, source="override", confidence="OVERRIDE",
+            )
+        for key in entries:
+            _failed.pop(key, None)
+        try:
+            _get_store().put_many(entries.items())
+            _get_failed_store().delete_many(entries)
+        except Exception as e:
+            logger.error("Error guardando overrides: %s", e)
+        publish_many("geocode", entries)
+    return len(entries)
+
+
+register_cache("geocode.coords", lambda: _cache)
+register_cache("geocode.entries", lambda: _persisted)
+register_cache("geocode.failed", lambda: _failed)
+subscribe("geocode", _on_remote_change)
+subscribe("catalog", lambda _prefix: _schedule_streets_reload())
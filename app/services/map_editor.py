@@ -14,6 +14,7 @@ Conceptos clave:
   - Cambio de vía completa: editar una vía como unidad.
 """
 
+import math
 import shutil
 import subprocess
 import tempfile
@@ -24,6 +25,7 @@ from typing import Any
 
 from app.core.config import PBF_PATH
 from app.core.logging import get_logger
+from app.core.ttlstore import TTLStore, register_cache
 
 logger = get_logger(__name__)
 
@@ -41,8 +43,9 @@ PED_TYPES: frozenset[str] = frozenset({
     "cycleway", "track", "bridleway",
 })
 
-# ── Caché en memoria: (mtime, geojson_dict) ───────────────────────────────────
-_cache: tuple[float, dict[str, Any]] | None = None
+# ── Caché en memoria: mtime del PBF → geojson_dict (solo el vigente) ──────────
+_cache: TTLStore[dict[str, Any]] = TTLStore(1, math.inf)
+register_cache("map_geojson", lambda: _cache)
 
 
 # ── API pública ───────────────────────────────────────────────────────────────
@@ -53,15 +56,14 @@ def get_geojson() -> dict[str, Any]:
     El resultado se cachea en memoria y se invalida cuando el PBF cambia en
     disco (comprobación de mtime) o tras apply_and_save().
     """
-    global _cache
-
-    mtime = PBF_PATH.stat().st_mtime
-    if _cache is not None and _cache[0] == mtime:
-        return _cache[1]
+    key = repr(PBF_PATH.stat().st_mtime)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
 
     logger.info("Parsing PBF → GeoJSON (cache miss)")
     data = _parse_pbf_to_geojson()
-    _cache = (mtime, data)
+    _cache[key] = data
     return data
 
 
@@ -86,8 +88,6 @@ def apply_and_save(
         barrier  (str|None) — "bollard" | None (elimina el tag)
         access   (str|None) — "no"      | None (elimina el tag)
     """
-    global _cache
-
     if not changes and not node_changes and not restriction_changes:
         return
 
@@ -136,7 +136,7 @@ def apply_and_save(
         _run_osmium(["cat", str(xml_path), "-o", str(new_pbf), "--overwrite"])
         shutil.move(str(new_pbf), str(PBF_PATH))
 
-    _cache = None
+    _cache.clear()
     logger.info("PBF guardado: %s", PBF_PATH)
 
 
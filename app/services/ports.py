@@ -3,6 +3,7 @@ Contratos (Protocol) para los componentes intercambiables de routing.
 
 MatrixProvider — calcula la matriz de duraciones/distancias entre coords.
 RouteSolver    — ordena las paradas resolviendo el TSP.
+ProgressSink   — recibe eventos de progreso de un cálculo largo.
 
 Usar Protocol (structural typing) significa que cualquier callable con la
 firma correcta satisface el contrato sin herencia ni registro explícito.
@@ -46,3 +47,15 @@ class RouteSolver(Protocol):
             o None si el solver falla.
         """
         ...
+
+
+class ProgressSink(Protocol):
+    """Receptor de eventos de progreso (p. ej. el stream NDJSON de /optimize)."""
+
+    def __call__(self, event: str, **fields: object) -> None:
+        """
+        Args:
+            event:  Nombre del evento (snap, matrix, solver_start, solver_end…).
+            fields: Datos del evento; deben ser serializables a JSON.
+        """
+        ...
@@ -0,0 +1,216 @@
+"""
+Precalentado de cachés para el reparto del día siguiente (/validation/prefetch).
+
+La lista de entregas llega la tarde anterior. Un job en segundo plano, a baja
+prioridad (poca concurrencia; el ritmo hacia Google lo sigue marcando el
+bucket compartido de geocoding), recorre lo que por la mañana estaría en el
+camino crítico:
+  1. Geocodificación de cada dirección única → caché de geocoding (SQLite).
+  2. Snap a la red viaria del origen y de cada parada → caché de snaps.
+  3. Matriz OSRM origen + paradas → sesión precalentada (route_sessions), que
+     /optimize reutiliza sin route_id si conoce todas sus coords.
+
+Por la mañana /validation/start responde desde la caché y /optimize no llama
+a OSRM ni para los snaps ni para la matriz. Si la lista cambia (una parada
+nueva), /optimize pide la matriz entera, pero los snaps siguen en caché.
+
+El progreso de cada job se consulta por job_id (get_status). Como los jobs
+de validación, el job corre en el worker que lo creó y su estado se copia a
+shared_state.sqlite3 (tabla prefetch_jobs) como mucho cada _SNAPSHOT_S y al
+terminar, para que la consulta llegue a cualquier worker.
+
+Las direcciones llegan ya agrupadas por quien crea el job, con el mismo
+agrupado que /validation/start (routers.validation).
+"""
+
+import asyncio
+import time
+import uuid
+
+from app.adapters.shared_state import get_store
+from app.core.config import DEPOT_LAT, DEPOT_LON, START_ADDRESS
+from app.core.logging import get_logger
+from app.core.ttlstore import TTLStore, register_cache
+from app.models.validation import PrefetchStatus
+from app.services.geocoding import GeoResult, geocode_async, get_corrected_street
+from app.services.route_sessions import add_prefetched_session
+from app.services.routing import get_osrm_matrix_async, snap_to_street_async
+
+logger = get_logger(__name__)
+
+# Baja prioridad: la validación interactiva usa 8 y el snap de /optimize 16
+_GEOCODE_CONCURRENCY = 2
+_SNAP_CONCURRENCY = 4
+
+# Jobs recientes: se consultan durante la tarde y, como mucho, a la mañana siguiente
+_JOBS_MAX = 20
+_JOBS_TTL_S = 24 * 3600.0
+_SNAPSHOT_S = 0.5   # copia del estado al almacén compartido, como mucho
+
+
+class PrefetchJob:
+    """Estado y contadores de progreso de un precalentado."""
+
+    def __init__(self, start_address: str) -> None:
+        self.job_id = uuid.uuid4().hex
+        self.start_address = start_address
+        self.state = "pending"
+        self.total = 0
+        self.geocoded = 0
+        self.failed = 0
+        self.snapped = 0
+        self.matrix_ready = False
+        self.error = ""
+        self._t0 = time.perf_counter()
+        self._elapsed: float | None = None
+        self._next_snapshot = 0.0
+
+    def _finish(self, state: str, error: str = "") -> None:
+        self.state = state
+        self.error = error
+        self._elapsed = time.perf_counter() - self._t0
+        _save_snapshot(self, force=True)
+
+    def status(self) -> PrefetchStatus:
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._t0
+        return PrefetchStatus(
+            job_id=self.job_id,
+            status=self.state,
+            total=self.total,
+            geocoded=self.geocoded,
+            failed=self.failed,
+            snapped=self.snapped,
+            matrix_ready=self.matrix_ready,
+            elapsed_ms=round(elapsed * 1000, 1),
+            error=self.error,
+        )
+
+
+_jobs: TTLStore[PrefetchJob] = TTLStore(_JOBS_MAX, _JOBS_TTL_S)
+register_cache("prefetch_jobs", lambda: _jobs)
+
+
+def _save_snapshot(job: PrefetchJob, force: bool = False) -> None:
+    """Copia el estado del job al almacén compartido (como mucho cada _SNAPSHOT_S)."""
+    now = time.monotonic()
+    if not force and now < job._next_snapshot:
+        return
+    job._next_snapshot = now + _SNAPSHOT_S
+    try:
+        store = get_store("prefetch_jobs")
+        store.put(job.job_id, {
+            "status": job.status().model_dump(),
+            "expires_at": time.time() + _JOBS_TTL_S,
+        })
+        if job.state in ("done", "error"):
+            store.delete_expired("expires_at", time.time())
+    except Exception as e:
+        logger.error("Error guardando el estado del precalentado %s: %s", job.job_id, e)
+
+
+def create_job(start_address: str = "") -> PrefetchJob:
+    """Registra un job pendiente (consultable por job_id desde cualquier worker)."""
+    job = PrefetchJob(start_address.strip())
+    _jobs[job.job_id] = job
+    _save_snapshot(job, force=True)
+    return job
+
+
+def get_job(job_id: str) -> PrefetchJob | None:
+    """Job vivo de este proceso (None si corre en otro worker o no existe)."""
+    return _jobs.get(job_id)
+
+
+def get_status(job_id: str) -> PrefetchStatus | None:
+    """Estado del job: el vivo si corre en este proceso, si no la última copia compartida."""
+    job = _jobs.get(job_id)
+    if job is not None:
+        return job.status()
+    try:
+        data = get_store("prefetch_jobs").get(job_id)
+    except Exception as e:
+        logger.error("Error leyendo el precalentado %s: %s", job_id, e)
+        return None
+    if data is None or data["expires_at"] <= time.time():
+        return None
+    return PrefetchStatus(**data["status"])
+
+
+def clear_jobs() -> None:
+    _jobs.clear()
+
+
+async def _resolve_origin(start_address: str) -> tuple[GeoResult, str] | None:
+    """Coord sin snap y pista de calle del origen, como en /optimize."""
+    if not start_address:
+        return (DEPOT_LAT, DEPOT_LON), START_ADDRESS
+    coord, _ = await geocode_async(start_address)
+    if coord is None:
+        return None
+    return coord, get_corrected_street(start_address)
+
+
+async def run_prefetch(job: PrefetchJob, addresses: list[tuple[str, str]]) -> None:
+    """Geocodifica, snapea y pide la matriz del reparto, actualizando job."""
+    job.state = "running"
+    job.total = len(addresses)
+    _save_snapshot(job, force=True)
+    try:
+        # 1. Geocodificación
+        geo_sem = asyncio.Semaphore(_GEOCODE_CONCURRENCY)
+
+        async def _geocode(addr: str, alias: str) -> GeoResult | None:
+            async with geo_sem:
+                coord, _ = await geocode_async(addr, alias=alias)
+            if coord is None:
+                job.failed += 1
+            else:
+                job.geocoded += 1
+            _save_snapshot(job)
+            return coord
+
+        coords = await asyncio.gather(*(_geocode(addr, alias) for addr, alias in addresses))
+
+        origin = await _resolve_origin(job.start_address)
+        if origin is None:
+            job._finish("error", f"No se pudo geocodificar el origen: {job.start_address}")
+            return
+
+        # 2. Snap (si el origen no se puede snapear se usa tal cual, como en /optimize)
+        origin_raw, origin_hint = origin
+        origin_snapped = await snap_to_street_async(origin_raw[0], origin_raw[1], origin_hint)
+        snap_sem = asyncio.Semaphore(_SNAP_CONCURRENCY)
+
+        async def _snap(addr: str, coord: GeoResult) -> GeoResult | None:
+            async with snap_sem:
+                snapped = await snap_to_street_async(coord[0], coord[1], get_corrected_street(addr))
+            if snapped is not None:
+                job.snapped += 1
+            _save_snapshot(job)
+            return snapped
+
+        stops = [(addr, c) for (addr, _), c in zip(addresses, coords) if c is not None]
+        stops_snapped = await asyncio.gather(*(_snap(addr, c) for addr, c in stops))
+
+        # 3. Matriz origen + paradas rutables
+        raw_coords = [origin_raw]
+        snapped_coords = [origin_snapped or origin_raw]
+        for (_, raw), snapped in zip(stops, stops_snapped):
+            if snapped is not None:
+                raw_coords.append(raw)
+                snapped_coords.append(snapped)
+        if len(snapped_coords) >= 2:
+            matrix = await get_osrm_matrix_async(snapped_coords)
+            if matrix is not None:
+                add_prefetched_session(raw_coords, snapped_coords, *matrix)
+                job.matrix_ready = True
+
+        job._finish("done")
+        logger.info(
+            "Precalentado %s: %d/%d geocodificadas, %d snaps, matriz %s",
+            job.job_id, job.geocoded, job.total, job.snapped,
+            "lista" if job.matrix_ready else "no disponible",
+        )
+    except Exception as exc:
+        logger.exception("Error en el precalentado %s", job.job_id)
+        job._finish("error", str(exc))
@@ -0,0 +1,285 @@
+"""
+Sesiones de ruta: estado de un /optimize exacto reutilizable por route_id.
+
+/optimize guarda, por cada ruta calculada con OSRM + LKH3:
+  - coords originales (las que envió el cliente) → coords snapeadas
+  - matrices NxN de duración y distancia (int32, índice 0 = origen)
+  - orden de visita y geometrías de tramo ya pedidas a OSRM (legs)
+
+Las llamadas de seguimiento que envían route_id reutilizan ese estado:
+  /optimize (re-optimizar)  → snaps conocidos y submatriz sin OSRM
+  /route-evaluate           → suma de tramos de la matriz guardada
+  /api/route-segment        → geometría de tramo parada→parada memorizada
+
+Las coordenadas se comparan por igualdad exacta: el cliente devuelve las
+lat/lon que recibió en la respuesta de /optimize (ida y vuelta JSON sin
+pérdida). Cualquier coord desconocida hace caer al camino normal con OSRM.
+
+Almacén acotado (ROUTE_SESSION_MAX) con caducidad deslizante
+(ROUTE_SESSION_TTL_S): una jornada de reparto sin uso la expulsa.
+
+Sesiones precalentadas (/validation/prefetch): la tarde anterior se snapean
+las paradas y se pide la matriz origen + paradas. El cliente no conoce su id:
+/optimize sin route_id busca con find_prefetched_session() una que conozca
+todas sus coords originales. Almacén aparte, con PREFETCH_SESSION_TTL_S fijo
+(de la tarde a la mañana) y PREFETCH_SESSION_MAX entradas.
+
+Con varios workers las sesiones se escriben también en shared_state.sqlite3
+(tablas route_sessions y prefetched_sessions, matrices en base64): un
+route_id creado por un worker se encuentra desde cualquier otro, que la lee
+de SQLite la primera vez y la guarda en su memoria. La caducidad de SQLite
+se renueva como mucho cada _TOUCH_S. Las geometrías de tramo (legs) se
+memorizan solo en el proceso que las pide.
+"""
+
+import base64
+import math
+import time
+import uuid
+
+import numpy as np
+
+from app.core.config import (
+    PREFETCH_SESSION_MAX,
+    PREFETCH_SESSION_TTL_S,
+    ROUTE_SESSION_MAX,
+    ROUTE_SESSION_TTL_S,
+)
+from app.adapters.shared_state import get_store, poll, publish, subscribe
+from app.core.logging import get_logger
+from app.core.ttlstore import TTLStore, register_cache
+
+logger = get_logger(__name__)
+
+Coord = tuple[float, float]
+
+
+class RouteSession:
+    """Coords, matrices y orden de una ruta optimizada."""
+
+    def __init__(
+        self,
+        raw_coords: list[Coord],
+        coords: list[Coord],
+        dur_matrix: list[list[int]],
+        dist_matrix: list[list[int]],
+        order: list[int],
+    ) -> None:
+        self.raw_coords = raw_coords
+        self.coords = coords
+        self.order = order
+        self.expires_at = math.inf  # epoch de caducidad en el almacén compartido
+        self.dur = np.asarray(dur_matrix, dtype=np.int32)
+        self.dist = np.asarray(dist_matrix, dtype=np.int32)
+        # Tramos parada→parada ya pedidos a OSRM: (i, j) → {"geometry", "distance_m"}
+        self.legs: dict[tuple[int, int], dict] = {}
+        self._index = {c: i for i, c in enumerate(coords)}
+        self._snapped = dict(zip(raw_coords, coords))
+
+    def snapped(self, raw: Coord) -> Coord | None:
+        """Coord snapeada de una coord original ya vista (o None)."""
+        return self._snapped.get(raw)
+
+    def knows(self, raw_coords: list[Coord]) -> bool:
+        """True si todas las coords originales tienen snap en la sesión."""
+        return all(c in self._snapped for c in raw_coords)
+
+    def indices(self, coords: list[Coord]) -> list[int] | None:
+        """Índices en la sesión de coords snapeadas; None si alguna es desconocida."""
+        try:
+            return [self._index[c] for c in coords]
+        except KeyError:
+            return None
+
+    def submatrix(self, coords: list[Coord]) -> tuple[list[list[int]], list[list[int]]] | None:
+        """Matrices (dur, dist) restringidas a coords, en ese orden; None si falta alguna."""
+        idx = self.indices(coords)
+        if idx is None:
+            return None
+        sel = np.ix_(idx, idx)
+        return self.dur[sel].tolist(), self.dist[sel].tolist()
+
+    def path_distance(self, coords: list[Coord]) -> float | None:
+        """Distancia (m) recorriendo coords en orden; None si falta alguna."""
+        idx = self.indices(coords)
+        if idx is None:
+            return None
+        return float(self.dist[idx[:-1], idx[1:]].sum())
+
+    def to_json(self) -> dict:
+        """Forma serializable (sin legs) para el almacén compartido."""
+        return {
+            "raw": self.raw_coords,
+            "coords": self.coords,
+            "n": len(self.coords),
+            "dur": base64.b64encode(self.dur.tobytes()).decode("ascii"),
+            "dist": base64.b64encode(self.dist.tobytes()).decode("ascii"),
+            "order": self.order,
+            "expires_at": self.expires_at,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "RouteSession":
+        n = data["n"]
+        session = cls(
+            [(c[0], c[1]) for c in data["raw"]],
+            [(c[0], c[1]) for c in data["coords"]],
+            [], [], data["order"],
+        )
+        session.dur = np.frombuffer(base64.b64decode(data["dur"]), dtype=np.int32).reshape(n, n)
+        session.dist = np.frombuffer(base64.b64decode(data["dist"]), dtype=np.int32).reshape(n, n)
+        session.expires_at = data["expires_at"]
+        return session
+
+
+_sessions: TTLStore[RouteSession] = TTLStore(
+    ROUTE_SESSION_MAX, ROUTE_SESSION_TTL_S, sliding=True,
+)
+_prefetched: TTLStore[RouteSession] = TTLStore(PREFETCH_SESSION_MAX, PREFETCH_SESSION_TTL_S)
+register_cache("route_sessions", lambda: _sessions)
+register_cache("route_sessions.prefetched", lambda: _prefetched)
+
+_TOUCH_S = 600.0   # renovación de la caducidad deslizante en SQLite, como mucho
+_PURGE_S = 600.0   # borrado de caducadas en SQLite, como mucho
+_next_purge = 0.0
+_prefetched_seen: set[str] = set()  # ids precalentados ya leídos de SQLite
+
+
+def _write(table: str, key: str, session: RouteSession) -> None:
+    """Escribe la sesión en el almacén compartido y, de vez en cuando, purga las caducadas."""
+    global _next_purge
+    try:
+        store = get_store(table)
+        store.put(key, session.to_json())
+        now = time.monotonic()
+        if now >= _next_purge:
+            _next_purge = now + _PURGE_S
+            for name in ("route_sessions", "prefetched_sessions"):
+                get_store(name).delete_expired("expires_at", time.time())
+    except Exception as e:
+        logger.error("Error guardando sesión de ruta %s: %s", key, e)
+
+
+def _read(table: str, key: str) -> RouteSession | None:
+    """Sesión vigente del almacén compartido (o None)."""
+    try:
+        data = get_store(table).get(key)
+    except Exception as e:
+        logger.error("Error leyendo sesión de ruta %s: %s", key, e)
+        return None
+    if data is None or data["expires_at"] <= time.time():
+        return None
+    return RouteSession.from_json(data)
+
+
+def _touch(route_id: str, session: RouteSession) -> None:
+    """Renueva la caducidad en SQLite si han pasado más de _TOUCH_S desde la última."""
+    expires_at = time.time() + ROUTE_SESSION_TTL_S
+    if expires_at - session.expires_at < _TOUCH_S:
+        return
+    session.expires_at = expires_at
+
+    def renew(data: dict | None) -> dict | None:
+        if data is None:
+            return None
+        return {**data, "expires_at": max(data["expires_at"], expires_at)}
+
+    try:
+        get_store("route_sessions").transform(route_id, renew)
+    except Exception as e:
+        logger.error("Error renovando sesión de ruta %s: %s", route_id, e)
+
+
+def create_session(
+    raw_coords: list[Coord],
+    coords: list[Coord],
+    dur_matrix: list[list[int]],
+    dist_matrix: list[list[int]],
+    order: list[int],
+) -> str:
+    """Guarda una sesión de ruta y devuelve su route_id."""
+    route_id = uuid.uuid4().hex
+    session = RouteSession(raw_coords, coords, dur_matrix, dist_matrix, order)
+    session.expires_at = time.time() + ROUTE_SESSION_TTL_S
+    _sessions[route_id] = session
+    _write("route_sessions", route_id, session)
+    return route_id
+
+
+def get_session(route_id: str | None) -> RouteSession | None:
+    """Sesión viva de route_id (renueva su caducidad) o None.
+
+    Si no está en la memoria de este proceso se busca en el almacén
+    compartido (la creó otro worker o la LRU la expulsó).
+    """
+    if not route_id:
+        return None
+    poll()
+    session = _sessions.get(route_id)
+    if session is None:
+        session = _read("route_sessions", route_id)
+        if session is None:
+            return None
+        _sessions[route_id] = session
+    _touch(route_id, session)
+    return session
+
+
+def add_prefetched_session(
+    raw_coords: list[Coord],
+    coords: list[Coord],
+    dur_matrix: list[list[int]],
+    dist_matrix: list[list[int]],
+) -> None:
+    """Guarda la sesión precalentada de un reparto (sin orden: no se ha resuelto)."""
+    key = uuid.uuid4().hex
+    session = RouteSession(raw_coords, coords, dur_matrix, dist_matrix, list(range(len(coords))))
+    session.expires_at = time.time() + PREFETCH_SESSION_TTL_S
+    _prefetched[key] = session
+    _prefetched_seen.add(key)
+    _write("prefetched_sessions", key, session)
+
+
+def _load_new_prefetched() -> None:
+    """Sube a memoria las sesiones precalentadas por otros workers que aún no se han leído."""
+    try:
+        keys = set(get_store("prefetched_sessions").keys())
+    except Exception as e:
+        logger.error("Error listando sesiones precalentadas: %s", e)
+        return
+    _prefetched_seen.intersection_update(keys)
+    for key in keys - _prefetched_seen:
+        _prefetched_seen.add(key)
+        session = _read("prefetched_sessions", key)
+        if session is not None:
+            _prefetched[key] = session
+
+
+def find_prefetched_session(raw_coords: list[Coord]) -> RouteSession | None:
+    """Sesión precalentada que conoce todas las coords originales (la más reciente) o None."""
+    poll()
+    _load_new_prefetched()
+    for session in sorted(_prefetched.values(), key=lambda s: s.expires_at, reverse=True):
+        if session.knows(raw_coords):
+            return session
+    return None
+
+
+def _forget_all(_prefix: str = "") -> None:
+    _sessions.clear()
+    _prefetched.clear()
+    _prefetched_seen.clear()
+
+
+def clear_sessions() -> None:
+    """Descarta todas las sesiones, en este y en los demás workers (tras rebuild-map o en tests)."""
+    _forget_all()
+    try:
+        get_store("route_sessions").clear()
+        get_store("prefetched_sessions").clear()
+    except Exception as e:
+        logger.error("Error borrando sesiones de ruta: %s", e)
+    publish("route_sessions")
+
+
+subscribe("route_sessions", _forget_all)
@@ -7,21 +7,34 @@ Flujo:
   get_osrm_matrix() — calcula matriz NxN de duración/distancia (OSRM /table)
   optimize_route()  — ordena paradas con LKH3
 
+Versiones async (optimize_route_async, snap_to_street_async) para los
+endpoints async: red sin bloquear el event loop, solver en el pool de CPU.
+
 Solver: LKH3 — determinista, óptimo para el tamaño de problema típico (~50 paradas).
+
+Vista previa:
+  preview_route()   — matriz geométrica (haversine × rodeo aprendido) +
+                      vecino más cercano. Sin red ni subprocess: decenas de ms.
 """
 
 import time
 
+import numpy as np
+
+from app.core.concurrency import run_cpu
 from app.core.logging import get_logger
-from app.services.ports import MatrixProvider, RouteSolver
+from app.services.ports import MatrixProvider, ProgressSink, RouteSolver
 from app.adapters.osrm import (
     snap_to_street,
+    snap_to_street_async,
     get_osrm_matrix,
+    get_osrm_matrix_async,
     _snap_cache,
     _snap_key,
     _save_snap_cache,
 )
 from app.adapters.lkh3 import _solve_with_lkh
+from app.adapters.geometric import get_geometric_matrix, learn_from_matrix
 
 logger = get_logger(__name__)
 
@@ -126,6 +139,7 @@ def optimize_route(
     *,
     matrix_fn: MatrixProvider | None = None,
     solver_fn: RouteSolver | None = None,
+    progress: ProgressSink | None = None,
 ) -> dict | None:
     """Optimiza el orden de visita con LKH3.
 
@@ -139,10 +153,11 @@ def optimize_route(
                     Todas las coords deben estar ya snapeadas a la red viaria.
         matrix_fn:  Proveedor de matriz (MatrixProvider). Por defecto: OSRM.
         solver_fn:  Solver TSP (RouteSolver). Por defecto: LKH3.
+        progress:   Receptor opcional de eventos (matrix, solver_start, solver_end).
 
     Returns:
         dict con waypoint_order, stop_details, total_distance, total_duration,
-        computing_time_ms; o None si falla.
+        computing_time_ms, dur_matrix, dist_matrix; o None si falla.
     """
     if len(coords) < 2:
         return None
@@ -153,21 +168,84 @@ def optimize_route(
     _solver_fn = solver_fn if solver_fn is not None else _solve_with_lkh
 
     # 1. Matriz de distancias
+    t_matrix = time.perf_counter()
     matrix = _matrix_fn(coords)
+    matrix_ms = (time.perf_counter() - t_matrix) * 1000
+    if progress is not None:
+        progress("matrix", n=len(coords), ms=round(matrix_ms, 1), ok=matrix is not None)
     if matrix is None:
         logger.error("No se pudo obtener la matriz OSRM — abortando optimización")
         return None
-    dur_matrix, dist_matrix = matrix
 
+    # La matriz real de OSRM calibra el proveedor geométrico de la vista previa
+    if matrix_fn is None:
+        learn_from_matrix(coords, *matrix)
+
+    return _solve_matrix(matrix, _solver_fn, progress)
+
+
+async def optimize_route_async(
+    coords: list[tuple[float, float]],
+    *,
+    matrix: tuple[list[list[int]], list[list[int]]] | None = None,
+    progress: ProgressSink | None = None,
+) -> dict | None:
+    """Versión asíncrona de optimize_route() con OSRM + LKH3.
+
+    La matriz se pide a OSRM sin bloquear el event loop; el solver (subprocess
+    LKH3) y el post-proceso se ejecutan en el pool de CPU (run_cpu).
+    Con matrix (p. ej. de una sesión de ruta) no se llama a OSRM.
+    """
+    if len(coords) < 2:
+        return None
+
+    reused = matrix is not None
+    t_matrix = time.perf_counter()
+    if matrix is None:
+        matrix = await get_osrm_matrix_async(coords)
+    matrix_ms = (time.perf_counter() - t_matrix) * 1000
+    if progress is not None:
+        progress("matrix", n=len(coords), ms=round(matrix_ms, 1), ok=matrix is not None, reused=reused)
+    if matrix is None:
+        logger.error("No se pudo obtener la matriz OSRM — abortando optimización")
+        return None
+    osrm_matrix = matrix
+
+    def _learn_and_solve() -> dict | None:
+        if not reused:
+            learn_from_matrix(coords, *osrm_matrix)
+        return _solve_matrix(osrm_matrix, _solve_with_lkh, progress)
+
+    return await run_cpu(_learn_and_solve)
+
+
+def _solve_matrix(
+    matrix: tuple[list[list[int]], list[list[int]]],
+    solver_fn: RouteSolver,
+    progress: ProgressSink | None,
+) -> dict | None:
+    """Resuelve el TSP sobre una matriz ya calculada y arma el resultado."""
+    dur_matrix, dist_matrix = matrix
     t_start = time.perf_counter()
 
     # 2. Orden óptimo
     # dist_matrix se pasa como coste (parámetro dur_matrix): produce rutas
     # geográficamente coherentes minimizando metros, no segundos.
-    ordered_ids = _solver_fn(dist_matrix, dur_matrix)
+    if progress is not None:
+        progress("solver_start", n=len(dur_matrix))
+    ordered_ids = solver_fn(dist_matrix, dur_matrix)
     if ordered_ids is None:
         logger.error("LKH3 no pudo calcular la ruta")
+        if progress is not None:
+            progress("solver_end", ok=False, ms=round((time.perf_counter() - t_start) * 1000, 1))
         return None
+    if progress is not None:
+        progress(
+            "solver_end",
+            ok=True,
+            ms=round((time.perf_counter() - t_start) * 1000, 1),
+            tour_length_m=sum(dist_matrix[a][b] for a, b in zip(ordered_ids, ordered_ids[1:])),
+        )
 
     # 3. Post-proceso: reagrupar paradas de paso (evita dobles pasadas por la misma calle)
     ordered_ids, n_reordered = _reorder_no_backtrack(ordered_ids, dist_matrix)
@@ -197,4 +275,49 @@ def optimize_route(
         "total_distance": cumulative_dist,
         "total_duration": cumulative_dur,
         "computing_time_ms": computing_ms,
+        "dur_matrix": dur_matrix,
+        "dist_matrix": dist_matrix,
     }
+
+
+# ═══════════════════════════════════════════
+#  Vista previa: heurística sobre matriz geométrica
+# ═══════════════════════════════════════════
+
+def _solve_nearest_neighbor(
+    dur_matrix: list[list[int]],
+    dist_matrix: list[list[int]],
+) -> list[int] | None:
+    """Heurística del vecino más cercano para el TSP abierto (RouteSolver).
+
+    Parte del depósito (índice 0) y visita siempre la parada no visitada más
+    próxima según dur_matrix (el coste que recibe el solver). O(N²) vectorizado.
+    """
+    n = len(dur_matrix)
+    if n == 0:
+        return None
+
+    cost = np.asarray(dur_matrix, dtype=np.float64)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    ordered = [0]
+    current = 0
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, cost[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        ordered.append(current)
+    return ordered
+
+
+def preview_route(coords: list[tuple[float, float]]) -> dict | None:
+    """Orden aproximado instantáneo: matriz geométrica + vecino más cercano.
+
+    Mismo formato de retorno que optimize_route(); las distancias son
+    estimaciones (haversine × factor de rodeo aprendido de OSRM).
+    """
+    return optimize_route(
+        coords,
+        matrix_fn=get_geometric_matrix,
+        solver_fn=_solve_nearest_neighbor,
+    )
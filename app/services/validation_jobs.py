@@ -0,0 +1,213 @@
+"""
+Validación en segundo plano (/validation/jobs).
+
+/validation/start geocodifica todo dentro de la petición: con muchas
+direcciones nuevas tarda minutos y choca con el proxy_read_timeout de nginx,
+y la app no puede mostrar "Geocodificando X/N". Un job recibe los grupos ya
+deduplicados y los resuelve con un pool de workers (corrutinas que se
+reparten los grupos; el ritmo hacia Google lo sigue marcando el bucket
+compartido de geocoding). Cada grupo resuelto se guarda en su posición:
+status() devuelve en cualquier momento el progreso y las listas parciales
+geocoded/failed en el orden del CSV.
+
+El trabajo por grupo (geocodificar y construir la parada) lo aporta quien
+crea el job (routers.validation); aquí solo se reparte, se cuenta y se cancela.
+
+Jobs en un TTLStore acotado (_JOBS_MAX, _JOBS_TTL_S). Con varios workers de
+uvicorn el job corre en el que lo creó; su estado se copia a
+shared_state.sqlite3 (tabla validation_jobs) como mucho cada _SNAPSHOT_S y
+al terminar, para que la consulta llegue a cualquier worker. Una cancelación
+recibida en otro worker se anuncia en el canal "validation_jobs" y la aplica
+el que lo ejecuta en su siguiente poll(). poll() puede correr en un hilo del
+pool de CPU: la cancelación se pasa al event loop del job.
+"""
+
+import asyncio
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+
+from app.adapters.shared_state import get_store, poll, publish, subscribe
+from app.core.logging import get_logger
+from app.core.ttlstore import TTLStore, register_cache
+from app.models.validation import FailedStop, GeocodedStop, ValidationJobStatus
+
+logger = get_logger(__name__)
+
+Stop = GeocodedStop | FailedStop
+
+# Un reparto se valida y se consulta en minutos; la app no vuelve a por él al día siguiente
+_JOBS_MAX = 20
+_JOBS_TTL_S = 3600.0
+_SNAPSHOT_S = 0.5   # copia del estado al almacén compartido, como mucho
+
+
+class ValidationJob:
+    """Grupos a resolver, resultados por posición y estado de un job."""
+
+    def __init__(self, groups: list[dict], total_packages: int) -> None:
+        self.job_id = uuid.uuid4().hex
+        self.groups = groups
+        self.total_packages = total_packages
+        self.state = "pending"
+        self.results: list[Stop | None] = [None] * len(groups)
+        self.processed = 0
+        self.error = ""
+        self._workers: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None   # donde corren _workers
+        self._t0 = time.perf_counter()
+        self._elapsed: float | None = None
+        self._next_snapshot = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "cancelled", "error")
+
+    def _finish(self, state: str, error: str = "") -> None:
+        self.state = state
+        self.error = error
+        self._elapsed = time.perf_counter() - self._t0
+
+    def cancel(self) -> bool:
+        """Detiene el job si no ha terminado; False si ya había terminado."""
+        if self.finished:
+            return False
+        self._finish("cancelled")
+        for task in self._workers:
+            task.cancel()
+        _save_snapshot(self, force=True)
+        return True
+
+    def status(self) -> ValidationJobStatus:
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._t0
+        return ValidationJobStatus(
+            job_id=self.job_id,
+            status=self.state,
+            total=len(self.groups),
+            processed=self.processed,
+            total_packages=self.total_packages,
+            geocoded=[r for r in self.results if isinstance(r, GeocodedStop)],
+            failed=[r for r in self.results if isinstance(r, FailedStop)],
+            elapsed_ms=round(elapsed * 1000, 1),
+            error=self.error,
+        )
+
+
+_jobs: TTLStore[ValidationJob] = TTLStore(_JOBS_MAX, _JOBS_TTL_S)
+register_cache("validation_jobs", lambda: _jobs)
+
+
+def _save_snapshot(job: ValidationJob, force: bool = False) -> None:
+    """Copia el estado del job al almacén compartido (como mucho cada _SNAPSHOT_S)."""
+    now = time.monotonic()
+    if not force and now < job._next_snapshot:
+        return
+    job._next_snapshot = now + _SNAPSHOT_S
+    try:
+        store = get_store("validation_jobs")
+        store.put(job.job_id, {
+            "status": job.status().model_dump(),
+            "expires_at": time.time() + _JOBS_TTL_S,
+        })
+        if job.finished:
+            store.delete_expired("expires_at", time.time())
+    except Exception as e:
+        logger.error("Error guardando el estado del job de validación %s: %s", job.job_id, e)
+
+
+def create_job(groups: list[dict], total_packages: int) -> ValidationJob:
+    """Registra un job pendiente (consultable por job_id desde cualquier worker)."""
+    job = ValidationJob(groups, total_packages)
+    try:
+        job._loop = asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    _jobs[job.job_id] = job
+    _save_snapshot(job, force=True)
+    return job
+
+
+def get_status(job_id: str) -> ValidationJobStatus | None:
+    """Estado del job: el vivo si corre en este proceso, si no la última copia compartida."""
+    poll()
+    job = _jobs.get(job_id)
+    if job is not None:
+        return job.status()
+    try:
+        data = get_store("validation_jobs").get(job_id)
+    except Exception as e:
+        logger.error("Error leyendo el job de validación %s: %s", job_id, e)
+        return None
+    if data is None or data["expires_at"] <= time.time():
+        return None
+    return ValidationJobStatus(**data["status"])
+
+
+def cancel_job(job_id: str) -> ValidationJobStatus | None:
+    """Cancela el job; si corre en otro worker, se lo pide por el canal compartido."""
+    job = _jobs.get(job_id)
+    if job is not None:
+        job.cancel()
+        return job.status()
+    status = get_status(job_id)
+    if status is not None and status.status in ("pending", "running"):
+        publish("validation_jobs", job_id)
+    return status
+
+
+def _on_remote_cancel(job_id: str) -> None:
+    """Corre en el hilo que hizo poll(): las Tasks del job se cancelan en su loop."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return
+    if job._loop is None:
+        job.cancel()
+        return
+    try:
+        job._loop.call_soon_threadsafe(job.cancel)
+    except RuntimeError:   # loop ya cerrado: no quedan Tasks vivas
+        job.cancel()
+
+
+subscribe("validation_jobs", _on_remote_cancel)
+
+
+def clear_jobs() -> None:
+    _jobs.clear()
+
+
+async def run_job(
+    job: ValidationJob,
+    process: Callable[[dict], Awaitable[Stop]],
+    workers: int,
+) -> None:
+    """Resuelve los grupos del job con `workers` corrutinas en paralelo."""
+    if job.finished:  # cancelado antes de arrancar
+        return
+    job.state = "running"
+    job._loop = asyncio.get_running_loop()
+    pending = iter(enumerate(job.groups))
+
+    async def _worker() -> None:
+        for i, group in pending:
+            job.results[i] = await process(group)
+            job.processed += 1
+            poll()   # cancelaciones pedidas desde otro worker
+            _save_snapshot(job)
+
+    job._workers = [asyncio.ensure_future(_worker()) for _ in range(max(1, workers))]
+    outcomes = await asyncio.gather(*job._workers, return_exceptions=True)
+    if job.state == "cancelled":
+        logger.info("Validación %s cancelada: %d/%d", job.job_id, job.processed, len(job.groups))
+        return
+    errors = [o for o in outcomes if isinstance(o, BaseException)]
+    if errors:
+        logger.error("Error en la validación %s: %s", job.job_id, errors[0])
+        job._finish("error", str(errors[0]))
+    else:
+        job._finish("done")
+        logger.info(
+            "Validación %s: %d direcciones en %.1f s",
+            job.job_id, len(job.groups), job._elapsed or 0.0,
+        )
+    _save_snapshot(job, force=True)
@@ -0,0 +1,219 @@
+"""
+Sesiones de validación: el estado de un /validation/start corregible por partes.
+
+Tras /start la app corrige unas pocas filas (una errata, un alias, una fila
+de más) y antes tenía que reenviar el CSV entero: parseo, agrupado, caché y
+los fallos que quedaran en Google, otra vez para todas las filas. /start
+guarda ahora, bajo un validation_id:
+  - las filas, por id (su posición en la petición; las añadidas después
+    reciben ids nuevos) y la clave canónica de cada una
+  - el resultado de cada dirección única (coords o fallo, confianza y el
+    alias con el que se geocodificó)
+
+PATCH /validation/sessions/{id} aplica altas, cambios y bajas de filas: solo
+se reagrupan las direcciones que tocan y solo se geocodifican las nuevas (o
+las que cambian de alias). La respuesta es un diff: paradas nuevas o
+cambiadas y direcciones que desaparecen (routers.validation).
+
+Almacén acotado (VALIDATION_SESSION_MAX) con caducidad deslizante
+(VALIDATION_SESSION_TTL_S). Como las sesiones de ruta, se copian a
+shared_state.sqlite3 (tabla validation_sessions) para que cualquier worker
+las encuentre; quien las cambia lo anuncia en el canal "validation_sessions"
+y los demás olvidan su copia en memoria. Leerla también renueva la caducidad
+en SQLite (como mucho cada _TOUCH_S), no solo guardarla.
+
+Cada sesión lleva un número de versión. save_session solo escribe si la
+versión guardada es la que se leyó (comprobación y escritura en una
+transacción de SQLite): si otro worker guardó antes, no pisa su cambio y
+quien llama vuelve a aplicar el suyo sobre el estado nuevo.
+"""
+
+import asyncio
+import time
+import uuid
+
+from app.adapters.kvstore import SqliteKVStore
+from app.adapters.shared_state import get_store, poll, publish, subscribe
+from app.core.config import VALIDATION_SESSION_MAX, VALIDATION_SESSION_TTL_S
+from app.core.logging import get_logger
+from app.core.ttlstore import TTLStore, register_cache
+from app.models.validation import CsvRow
+
+logger = get_logger(__name__)
+
+_PURGE_S = 600.0   # borrado de caducadas en SQLite, como mucho
+_TOUCH_S = 600.0   # renovación de la caducidad deslizante en SQLite, como mucho
+_next_purge = 0.0
+
+
+class ValidationSession:
+    """Filas (id → fila, clave) y resultado por dirección de una validación."""
+
+    def __init__(
+        self,
+        rows: dict[int, CsvRow],
+        keys: dict[int, str],
+        results: dict[str, dict],
+        next_id: int,
+    ) -> None:
+        self.rows = rows
+        self.keys = keys
+        # clave → {"address", "alias", "lat", "lon", "confidence"} (lat/lon None si falló)
+        self.results = results
+        self.next_id = next_id
+        self.version = 0              # se incrementa en cada save_session
+        self.expires_at = 0.0
+        self.lock = asyncio.Lock()   # un PATCH a la vez por sesión (en este proceso)
+
+    def to_json(self) -> dict:
+        return {
+            "rows": [[rid, row.model_dump(), self.keys[rid]] for rid, row in self.rows.items()],
+            "results": self.results,
+            "next_id": self.next_id,
+            "version": self.version,
+            "expires_at": self.expires_at,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ValidationSession":
+        session = cls(
+            {rid: CsvRow(**row) for rid, row, _ in data["rows"]},
+            {rid: key for rid, _, key in data["rows"]},
+            data["results"],
+            data["next_id"],
+        )
+        session.version = data.get("version", 0)
+        session.expires_at = data["expires_at"]
+        return session
+
+
+_sessions: TTLStore[ValidationSession] = TTLStore(
+    VALIDATION_SESSION_MAX, VALIDATION_SESSION_TTL_S, sliding=True,
+)
+register_cache("validation_sessions", lambda: _sessions)
+
+
+def _purge(store: SqliteKVStore) -> None:
+    """Borra del almacén compartido las sesiones caducadas (como mucho cada _PURGE_S)."""
+    global _next_purge
+    now = time.monotonic()
+    if now >= _next_purge:
+        _next_purge = now + _PURGE_S
+        store.delete_expired("expires_at", time.time())
+
+
+def create_session(rows: list[CsvRow], keys: list[str], results: dict[str, dict]) -> str:
+    """Guarda la validación de rows (keys[i] = clave de rows[i]) y devuelve su id."""
+    validation_id = uuid.uuid4().hex
+    session = ValidationSession(
+        dict(enumerate(rows)), dict(enumerate(keys)), results, len(rows),
+    )
+    session.expires_at = time.time() + VALIDATION_SESSION_TTL_S
+    _sessions[validation_id] = session
+    try:
+        store = get_store("validation_sessions")
+        store.put(validation_id, session.to_json())
+        _purge(store)
+    except Exception as e:
+        logger.error("Error guardando sesión de validación %s: %s", validation_id, e)
+    return validation_id
+
+
+def get_session(validation_id: str) -> ValidationSession | None:
+    """Sesión viva (de memoria o del almacén compartido) o None."""
+    poll()
+    session = _sessions.get(validation_id)
+    if session is not None:
+        _touch(validation_id, session)
+        return session
+    try:
+        data = get_store("validation_sessions").get(validation_id)
+    except Exception as e:
+        logger.error("Error leyendo sesión de validación %s: %s", validation_id, e)
+        return None
+    if data is None or data["expires_at"] <= time.time():
+        return None
+    session = ValidationSession.from_json(data)
+    _sessions[validation_id] = session
+    _touch(validation_id, session)
+    return session
+
+
+def _touch(validation_id: str, session: ValidationSession) -> None:
+    """Renueva la caducidad en SQLite si han pasado más de _TOUCH_S desde la
+    última: una sesión que solo se lee (GET) no caduca para los demás workers.
+    No cambia la versión."""
+    expires_at = time.time() + VALIDATION_SESSION_TTL_S
+    if expires_at - session.expires_at < _TOUCH_S:
+        return
+    session.expires_at = expires_at
+
+    def renew(data: dict | None) -> dict | None:
+        if data is None:
+            return None
+        return {**data, "expires_at": max(data["expires_at"], expires_at)}
+
+    try:
+        get_store("validation_sessions").transform(validation_id, renew)
+    except Exception as e:
+        logger.error("Error renovando sesión de validación %s: %s", validation_id, e)
+
+
+def save_session(validation_id: str, session: ValidationSession) -> bool:
+    """Persiste una sesión modificada y avisa a los demás workers.
+
+    session.version debe ser la de la sesión leída con get_session. Si otro
+    worker ha guardado desde entonces no se escribe nada, se olvida la copia
+    en memoria (la siguiente get_session lee la nueva) y devuelve False.
+    Si el almacén falla se olvida también la copia y se propaga el error:
+    no se sabe si la escritura llegó.
+    """
+    conflict = False
+
+    def _check_and_set(current: dict | None) -> dict | None:
+        nonlocal conflict
+        if current is not None and current.get("version", 0) != session.version:
+            conflict = True
+            return None
+        return {**session.to_json(), "version": session.version + 1, "expires_at": expires_at}
+
+    expires_at = time.time() + VALIDATION_SESSION_TTL_S
+    try:
+        store = get_store("validation_sessions")
+        store.transform(validation_id, _check_and_set)
+    except Exception as e:
+        logger.error("Error guardando sesión de validación %s: %s", validation_id, e)
+        _sessions.pop(validation_id, None)
+        raise
+    try:
+        _purge(store)
+    except Exception as e:
+        logger.error("Error purgando sesiones de validación: %s", e)
+    if conflict:
+        _sessions.pop(validation_id, None)
+        return False
+    session.version += 1
+    session.expires_at = expires_at
+    _sessions[validation_id] = session
+    publish("validation_sessions", validation_id)
+    return True
+
+
+def _forget(validation_id: str) -> None:
+    if validation_id:
+        _sessions.pop(validation_id, None)
+    else:
+        _sessions.clear()
+
+
+subscribe("validation_sessions", _forget)
+
+
+def clear_sessions() -> None:
+    """Descarta todas las sesiones de validación, en este y en los demás workers."""
+    _sessions.clear()
+    try:
+        get_store("validation_sessions").clear()
+    except Exception as e:
+        logger.error("Error borrando sesiones de validación: %s", e)
+    publish("validation_sessions")
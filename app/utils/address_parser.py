@@ -0,0 +1,148 @@
+"""
+Parser de direcciones en texto libre → (nombre_de_calle, número_portal).
+
+AddressParser compila todas las expresiones regulares una sola vez y memoiza
+el resultado por dirección en bruto (LRU acotado): en un reparto la misma
+dirección se parsea varias veces (agrupado en validación, clave y forma
+canónica, street_hint de /optimize, geocode), y entre repartos se repiten
+los mismos clientes.
+
+El resultado es una tupla inmutable: seguro compartirlo entre llamadas e hilos.
+"""
+
+import functools
+import re
+
+# ─── Title-case para calles españolas ──────────────────────────────────────────
+_LOWERCASE_WORDS: frozenset[str] = frozenset({
+    "de", "del", "la", "el", "los", "las", "y", "a", "al", "e", "con", "sin",
+})
+
+# ─── Abreviaturas de tipo de vía ───────────────────────────────────────────────
+_VIA_ABBREVS = (
+    (r"(?<!\w)C/\s*",          "Calle "),       # C/5 → Calle 5
+    (r"\bCl\.?(?=\s|$)",       "Calle"),        # Cl. / Cl → Calle
+    (r"\bAvda\.?(?=\s|$)",     "Avenida"),      # Avda. / Avda → Avenida
+    (r"\bAv\.",                "Avenida"),      # Av. → Avenida
+    (r"\bPza\.?(?=\s|$)",      "Plaza"),        # Pza. / Pza → Plaza
+    (r"\bCtra\.?(?=\s|$)",     "Carretera"),    # Ctra. / Ctra → Carretera
+    (r"\bUrb\.?(?=\s|$)",      "Urbanización"), # Urb. → Urbanización
+    (r"\bPsje\.?(?=\s|$)",     "Pasaje"),       # Psje. → Pasaje
+    (r"\bPje\.?(?=\s|$)",      "Pasaje"),       # Pje. → Pasaje
+    (r"\bRda\.?(?=\s|$)",      "Ronda"),        # Rda. → Ronda
+    (r"\bTrav\.?(?=\s|$)",     "Travesía"),     # Trav. → Travesía
+)
+
+# Indicadores de piso/portal al final de la dirección
+_NOISE = (
+    r"(?:bajo|baja|bj|local|planta|piso|casa|bis|nave|oficina|taller|"
+    r"sotano|s[oó]tano|entreplanta|dcha|izda|izq|der|pta|dup)"
+)
+
+_PARSE_MEMO_SIZE = 16_384  # direcciones distintas memoizadas (~2-3 MB)
+
+
+def title_street(s: str) -> str:
+    """Title-case para nombres de calle respetando preposiciones y artículos españoles.
+
+    'CALLE DE LA PAZ'      → 'Calle de la Paz'
+    'avenida blas infante'  → 'Avenida Blas Infante'
+    'calle de los olivos'   → 'Calle de los Olivos'
+    """
+    words = s.split()
+    return " ".join(
+        w.capitalize() if i == 0 or w.lower() not in _LOWERCASE_WORDS else w.lower()
+        for i, w in enumerate(words)
+    )
+
+
+class AddressParser:
+    """Parser con patrones precompilados y memo LRU por dirección en bruto."""
+
+    def __init__(self, memo_size: int = _PARSE_MEMO_SIZE) -> None:
+        i = re.IGNORECASE
+        self._via = [(re.compile(p, i), repl) for p, repl in _VIA_ABBREVS]
+        self._spaces = re.compile(r"\s+")
+        self._city_suffix = re.compile(
+            r",\s*(posadas|14730|c[oó]rdoba|andaluc[ií]a|espa[nñ]a).*$", i,
+        )
+        self._parens = re.compile(r"\s*\([^)]*\)\s*")
+        self._open_paren = re.compile(r"\s*\(.*$")
+        self._number_prefixes = (
+            re.compile(r"\bn[uú]m[eé]ro\b\.?\s*", i),
+            re.compile(r"\bn[uúº°][mn]?\.?(?=[\s\d]|$)", i),
+            re.compile(r"\bN\?\s*(?=\d)"),
+            re.compile(r"\bn\s*(?=\d)", i),
+        )
+        self._noise_after_number = re.compile(r"(?<=\d)[\s,]+\d+\s*" + _NOISE + r"[\s\S]*$", i)
+        self._noise_tail = re.compile(r"[\s,]+(?:\d+[ºo°]\s*[a-zA-Z]?\s*)?" + _NOISE + r"[\s\S]*$", i)
+        self._access = re.compile(r"(?<=\d)[\s,;]+(?:bloque|portal|escalera|puerta)\b[\s\S]*$", i)
+        self._floor_ordinals = re.compile(r"([\s,]+\d+[ºo°]\s*[a-zA-Z]?)+$", i)
+        self._portal = re.compile(r"[\s,]+(\d+(?:-\d+[a-zA-Z]?|[-\s]?[a-zA-Z])?)\s*$")
+        self._sn = re.compile(r"\bs/?n\b", i)
+        self._sn_tail = re.compile(r"\s*,?\s*s/?n.*$", i)
+        self._memo = functools.lru_cache(maxsize=memo_size)(self.parse_uncached)
+
+    def parse(self, raw: str) -> tuple[str, str]:
+        """(calle, número) de raw; memoizado."""
+        return self._memo(raw)
+
+    def cache_info(self) -> functools._CacheInfo:
+        return self._memo.cache_info()
+
+    def cache_clear(self) -> None:
+        self._memo.cache_clear()
+
+    def parse_uncached(self, raw: str) -> tuple[str, str]:
+        """
+        Extrae (nombre_de_calle, número_portal) de una dirección en texto libre.
+
+        Para rangos como "96-98", devuelve "96-98" como número.
+        """
+        s = raw.strip()
+
+        # 0. Expandir abreviaturas de tipo de vía (C/ → Calle, Av. → Avenida, …)
+        for pattern, repl in self._via:
+            s = pattern.sub(repl, s)
+        s = self._spaces.sub(" ", s).strip()
+
+        # 1. Eliminar sufijo de ciudad/país (precedido por coma)
+        s = self._city_suffix.sub("", s).strip().rstrip(",").strip()
+
+        # 2. Eliminar contenido entre paréntesis y paréntesis sin cerrar
+        s = self._parens.sub(" ", s)
+        s = self._open_paren.sub("", s)
+        s = s.strip().rstrip(",-").strip()
+
+        # 3. Normalizar prefijos de número
+        for pattern in self._number_prefixes:
+            s = pattern.sub(" ", s)
+        s = self._spaces.sub(" ", s).strip()
+
+        # 4. Eliminar indicadores de piso/portal al final
+        s = self._noise_after_number.sub("", s)
+        s = self._noise_tail.sub("", s)
+
+        # 4b. Eliminar detalles de acceso (bloque/portal/escalera/puerta) tras el número
+        #     Lookbehind garantiza que sólo actúa cuando hay un dígito previo,
+        #     preservando calles como "Calle del Portal" o "Pasaje del Bloque".
+        s = self._access.sub("", s)
+
+        # 5. Eliminar ordinales de piso al final
+        s = self._floor_ordinals.sub("", s)
+
+        # 6. Limpiar puntuación sobrante
+        s = s.strip().rstrip(",-./").strip()
+
+        # 7. Extraer número de portal (último token numérico + letra/rango opcional)
+        m = self._portal.search(s)
+        if m:
+            number = self._spaces.sub("", m.group(1)).lower()
+            street = s[: m.start()].rstrip(" ,").strip()
+            if street:
+                return street, number
+
+        if self._sn.search(s):
+            return self._sn_tail.sub("", s).strip(), "sn"
+
+        return s, ""
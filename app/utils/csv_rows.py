@@ -0,0 +1,129 @@
+"""
+Lectura incremental del CSV de entregas (/validation/upload).
+
+Mismo formato que parsea la app (flutter_app/lib/services/csv_service.dart):
+cabecera con columnas detectadas por nombre (cliente, direccion, ciudad,
+nota, agencia, alias, tipo, en cualquier orden y con sinónimos) y una fila
+por paquete. Las filas sin dirección se descartan.
+
+CsvRowParser recibe el fichero a trozos de bytes tal como llegan por la red
+y devuelve las filas completas de cada trozo. Solo retiene la línea o el
+registro a medias (un campo entre comillas puede ocupar varias líneas), así
+que la memoria del parser no depende del tamaño del fichero (las filas que
+devuelve las retiene, o no, quien las consume).
+
+Separador "," como la app; si la cabecera trae más ";" que "," (exportación
+de Excel en español) se usa ";".
+"""
+
+import codecs
+import csv
+from typing import Callable
+
+# columna → ¿esta cabecera (en minúsculas) es esa columna?
+_HEADER_MATCHERS: dict[str, Callable[[str], bool]] = {
+    "cliente": lambda h: h in ("cliente", "nombre", "name") or "client" in h or "nombre" in h,
+    "direccion": lambda h: (
+        h in ("direccion", "dirección", "address")
+        or any(t in h for t in ("direcc", "calle", "domicilio"))
+    ),
+    "ciudad": lambda h: h in ("ciudad", "localidad", "city") or any(t in h for t in ("ciudad", "localidad", "poblac")),
+    "nota": lambda h: h in ("nota", "notas", "note", "notes", "obs") or "observac" in h,
+    "agencia": lambda h: (
+        h in ("agencia", "transportista", "empresa", "carrier")
+        or "agencia" in h or "transport" in h
+    ),
+    "alias": lambda h: h in ("alias", "negocio", "local", "establecimiento") or "alias" in h,
+    "tipo": lambda h: h in ("tipo", "type", "prioridad"),
+}
+
+
+def detect_columns(headers: list[str]) -> dict[str, int]:
+    """Índice de cada columna conocida en la cabecera (-1 si no está)."""
+    columns = dict.fromkeys(_HEADER_MATCHERS, -1)
+    for i, header in enumerate(headers):
+        h = header.strip().lower()
+        for name, matches in _HEADER_MATCHERS.items():
+            if columns[name] < 0 and matches(h):
+                columns[name] = i
+    return columns
+
+
+class CsvRowParser:
+    """Parser incremental: feed(trozo) → filas completas; close() al final.
+
+    Cada fila es un dict con las columnas de CsvRow (valores sin espacios a
+    los lados; las columnas ausentes, ""). Lanza ValueError si la cabecera no
+    tiene columna de dirección.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._tail = ""                   # última línea, aún sin salto de línea
+        self._record: str | None = None   # registro con comillas abiertas
+        self._columns: dict[str, int] | None = None
+        self._delimiter = ","
+        self.rows = 0       # filas devueltas
+        self.skipped = 0    # filas con contenido pero sin dirección
+
+    def feed(self, data: bytes) -> list[dict[str, str]]:
+        lines = (self._tail + self._decoder.decode(data)).split("\n")
+        self._tail = lines.pop()
+        return self._parse_lines(lines)
+
+    def close(self) -> list[dict[str, str]]:
+        """Procesa lo pendiente (última línea sin salto, comillas sin cerrar)."""
+        text = self._tail + self._decoder.decode(b"", final=True)
+        self._tail = ""
+        rows = self._parse_lines([text] if text else [])
+        if self._record is not None:
+            record, self._record = self._record, None
+            rows.extend(self._parse_records([record]))
+        return rows
+
+    def _parse_lines(self, lines: list[str]) -> list[dict[str, str]]:
+        records: list[str] = []
+        for line in lines:
+            line = line.rstrip("\r")
+            record = line if self._record is None else f"{self._record}\n{line}"
+            if record.count('"') % 2:
+                self._record = record
+                continue
+            self._record = None
+            if record.strip():
+                records.append(record)
+        return self._parse_records(records)
+
+    def _parse_records(self, records: list[str]) -> list[dict[str, str]]:
+        if self._columns is None:
+            if not records:
+                return []
+            self._read_header(records[0])
+            records = records[1:]
+        columns = self._columns
+        assert columns is not None
+        rows: list[dict[str, str]] = []
+        for fields in csv.reader(records, delimiter=self._delimiter):
+            row = {
+                name: fields[i].strip() if 0 <= i < len(fields) else ""
+                for name, i in columns.items()
+            }
+            if not row["direccion"]:
+                self.skipped += 1
+                continue
+            rows.append(row)
+        self.rows += len(rows)
+        return rows
+
+    def _read_header(self, record: str) -> None:
+        record = record.lstrip("\ufeff")
+        if record.count(";") > record.count(","):
+            self._delimiter = ";"
+        headers = next(csv.reader([record], delimiter=self._delimiter))
+        columns = detect_columns(headers)
+        if columns["direccion"] < 0:
+            raise ValueError(
+                'No se encontró la columna "direccion" en la cabecera. '
+                f"Cabeceras detectadas: {', '.join(h.strip() for h in headers)}"
+            )
+        self._columns = columns
@@ -0,0 +1,121 @@
+"""
+Estimación local de portales a partir de portales conocidos de la misma calle.
+
+La caché de geocoding acumula muchos ROOFTOP por calle (Gaitán 2, 8, 24…).
+HouseNumberIndex los agrupa por calle y paridad (pares e impares van en
+aceras distintas) y estima un número nuevo:
+
+  - Interpolación: entre el anterior y el siguiente conocidos de su misma
+    paridad, proporcional al número. Solo si el hueco es de como mucho
+    _MAX_GAP números y los dos portales están a ≤ _MAX_ANCHOR_DIST_M.
+  - Extrapolación: más allá del último conocido, siguiendo la dirección de
+    los dos últimos, como mucho _MAX_EXTRAPOLATE números.
+
+Fuera de esas reglas la estimación se considera pobre y devuelve None (el
+pipeline sigue hacia Google). Los anclajes son portales medidos: la recta
+entre dos cercanos se aparta poco de la calle real.
+
+Solo números puros ("12") o rangos ("96-98" → 96); "12a" no se usa.
+"""
+
+import bisect
+import math
+import re
+from typing import NamedTuple
+
+_MAX_GAP = 20                # números entre los dos anclajes de una interpolación
+_MAX_EXTRAPOLATE = 6         # números más allá del último anclaje
+_MAX_ANCHOR_DIST_M = 400.0   # distancia máxima entre anclajes usados
+
+_NUMBER_RE = re.compile(r"^(\d+)(?:-\d+)?$")
+_M_PER_DEG_LAT = 111_320.0
+
+
+class Estimate(NamedTuple):
+    lat: float
+    lon: float
+    kind: str          # "known" | "interpolated" | "extrapolated"
+    anchors: tuple[int, int]
+
+
+def house_number(number: str) -> int | None:
+    """Número entero de un portal ("12" → 12, "96-98" → 96); None si no es numérico."""
+    m = _NUMBER_RE.match(number.strip())
+    return int(m.group(1)) if m else None
+
+
+def _dist_m(a: tuple[float, float], b: tuple[float, float]) -> float:
+    """Distancia equirectangular (suficiente a escala de calle)."""
+    dy = (a[0] - b[0]) * _M_PER_DEG_LAT
+    dx = (a[1] - b[1]) * _M_PER_DEG_LAT * math.cos(math.radians((a[0] + b[0]) / 2))
+    return math.hypot(dx, dy)
+
+
+class HouseNumberIndex:
+    """calle normalizada → paridad → portales conocidos ordenados por número."""
+
+    def __init__(self) -> None:
+        self._by_street: dict[str, dict[int, tuple[float, float]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(nums) for nums in self._by_street.values())
+
+    def add(self, street: str, number: str, coord: tuple[float, float]) -> None:
+        """Registra (o reemplaza) el portal street/number."""
+        n = house_number(number)
+        if n is None or not street:
+            return
+        self._by_street.setdefault(street, {})[n] = coord
+
+    def discard(self, street: str, number: str) -> None:
+        n = house_number(number)
+        if n is None:
+            return
+        nums = self._by_street.get(street)
+        if nums is not None:
+            nums.pop(n, None)
+            if not nums:
+                del self._by_street[street]
+
+    def clear(self) -> None:
+        self._by_street.clear()
+
+    def _side(self, street: str, parity: int) -> list[tuple[int, tuple[float, float]]]:
+        nums = self._by_street.get(street, {})
+        return sorted((n, c) for n, c in nums.items() if n % 2 == parity)
+
+    def estimate(self, street: str, number: str) -> Estimate | None:
+        """Estimación de street/number o None si las reglas no la respaldan."""
+        n = house_number(number)
+        if n is None or street not in self._by_street:
+            return None
+        side = self._side(street, n % 2)
+        nums = [num for num, _ in side]
+        i = bisect.bisect_left(nums, n)
+        if i < len(nums) and nums[i] == n:
+            lat, lon = side[i][1]
+            return Estimate(lat, lon, "known", (n, n))  # p. ej. conocido como rango "12-14"
+
+        if 0 < i < len(nums):
+            (n0, c0), (n1, c1) = side[i - 1], side[i]
+            if n1 - n0 > _MAX_GAP or _dist_m(c0, c1) > _MAX_ANCHOR_DIST_M:
+                return None
+            t = (n - n0) / (n1 - n0)
+            return Estimate(
+                c0[0] + t * (c1[0] - c0[0]), c0[1] + t * (c1[1] - c0[1]),
+                "interpolated", (n0, n1),
+            )
+
+        # Extrapolación: los dos anclajes más cercanos del lado existente
+        if len(side) < 2:
+            return None
+        (n0, c0), (n1, c1) = (side[0], side[1]) if i == 0 else (side[-1], side[-2])
+        if abs(n - n0) > _MAX_EXTRAPOLATE or abs(n0 - n1) > _MAX_GAP:
+            return None
+        if _dist_m(c0, c1) > _MAX_ANCHOR_DIST_M:
+            return None
+        t = (n - n0) / (n0 - n1)
+        return Estimate(
+            c0[0] + t * (c0[0] - c1[0]), c0[1] + t * (c0[1] - c1[1]),
+            "extrapolated", (n1, n0),
+        )
@@ -0,0 +1,92 @@
+"""
+Índice de tokens para acotar el fuzzy matching de calles.
+
+El matcher de geocoding (_token_set_ratio) solo da score > 0 a una calle del
+catálogo si:
+  1. tiene entre 0 y max_extra tokens más que la query, y
+  2. cada token de la query coincide con alguno de la calle, exacto o con
+     SequenceMatcher.ratio() ≥ threshold.
+
+TokenIndex precalcula, sobre los nombres normalizados del catálogo:
+  - vocabulario de tokens agrupado por longitud
+  - token → índices de las calles que lo contienen (postings)
+  - nº de tokens de cada calle
+
+y devuelve como candidatas exactamente las calles que cumplen 1 y 2, para que
+el scoring completo solo se ejecute sobre ellas. Los tokens compatibles con
+uno de la query se buscan con cotas superiores de ratio() que no descartan
+ningún positivo (real_quick_ratio por longitud, quick_ratio por multiconjunto
+de caracteres) antes de calcular ratio(); el resultado se memoiza por token.
+
+El orden de las candidatas es el del catálogo, así el desempate del matcher
+(primera calle con el mejor score) no cambia.
+"""
+
+import difflib
+from collections import defaultdict
+
+_MEMO_MAX = 4096  # tokens de query distintos memoizados por índice
+
+
+class TokenIndex:
+    """Índice invertido token → calles, con búsqueda de tokens similares."""
+
+    def __init__(self, texts: list[str], threshold: float, max_extra: int) -> None:
+        self.texts = texts
+        self.threshold = threshold
+        self.max_extra = max_extra
+        self._n_tokens: list[int] = []
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        for i, text in enumerate(texts):
+            tokens = text.split()
+            self._n_tokens.append(len(tokens))
+            for token in tokens:
+                self._postings[token].add(i)
+        self._vocab_by_len: dict[int, list[str]] = defaultdict(list)
+        for token in self._postings:
+            self._vocab_by_len[len(token)].append(token)
+        self._memo: dict[str, set[int]] = {}
+
+    def _streets_covering(self, query_token: str) -> set[int]:
+        """Calles con algún token igual o similar (ratio ≥ threshold) a query_token."""
+        cached = self._memo.get(query_token)
+        if cached is not None:
+            return cached
+
+        covering: set[int] = set(self._postings.get(query_token, ()))
+        qlen = len(query_token)
+        matcher = difflib.SequenceMatcher(None, query_token, "")
+        for length, tokens in self._vocab_by_len.items():
+            # Cota por longitud (real_quick_ratio): 2·min / (la + lb)
+            if 2 * min(qlen, length) / (qlen + length) < self.threshold:
+                continue
+            for token in tokens:
+                if token == query_token:
+                    continue
+                matcher.set_seq2(token)
+                if matcher.quick_ratio() >= self.threshold and matcher.ratio() >= self.threshold:
+                    covering |= self._postings[token]
+
+        if len(self._memo) >= _MEMO_MAX:
+            self._memo.clear()
+        self._memo[query_token] = covering
+        return covering
+
+    def candidates(self, query: str) -> list[int]:
+        """Índices (en orden de catálogo) de las calles que pueden puntuar > 0."""
+        q_tokens = query.split()
+        if not q_tokens:
+            return []
+
+        result: set[int] | None = None
+        for token in sorted(set(q_tokens), key=len, reverse=True):
+            covering = self._streets_covering(token)
+            result = covering.copy() if result is None else result & covering
+            if not result:
+                return []
+
+        n = len(q_tokens)
+        return sorted(
+            i for i in result or ()
+            if 0 <= self._n_tokens[i] - n <= self.max_extra
+        )
@@ -0,0 +1,103 @@
+"""
+Benchmark — agrupado de filas de CSV (address_key + canonical_address por fila).
+
+Compara, sobre un CSV sintético de 10k filas con direcciones repetidas y
+variantes de escritura:
+  - anterior:     re.sub/re.search con el patrón en texto en cada llamada
+  - precompilado: AddressParser sin memo (parse_uncached)
+  - memo:         AddressParser.parse (patrones precompilados + LRU)
+
+Uso:
+    python -m benchmarks.bench_address_parser [n_filas]
+"""
+
+import random
+import re
+import sys
+import time
+
+from app.services import geocoding as geo
+from app.utils.address_parser import AddressParser
+
+_STREETS = [
+    "Calle Gaitán", "Avenida de Andalucía", "Calle Santiago", "Plaza de la Constitución",
+    "Calle Hornos", "Avenida Blas Infante", "Calle Mayor", "Calle de la Paz",
+    "Carretera de Palma", "Calle Virgen de la Salud", "Ronda de los Olivos",
+]
+_ABBREV = {"Calle": ["C/", "Cl.", "CALLE"], "Avenida": ["Avda.", "Av.", "AVDA"],
+           "Plaza": ["Pza.", "Pza"], "Carretera": ["Ctra."], "Ronda": ["Rda."]}
+_TAILS = ["", ", Posadas", ", 14730 Posadas (Córdoba)", " 2º B", " bajo", ", portal 3", " (junto al bar)"]
+
+
+def _synthetic_rows(n: int, rng: random.Random) -> list[str]:
+    """n direcciones: ~1/5 distintas, con abreviaturas, mayúsculas y sufijos variados."""
+    base = [(rng.choice(_STREETS), rng.randint(1, 120)) for _ in range(n // 5)]
+    rows = []
+    for _ in range(n):
+        street, number = rng.choice(base)
+        via, rest = street.split(" ", 1)
+        via = rng.choice([via] + _ABBREV.get(via, []))
+        rows.append(f"{via} {rest} {number}{rng.choice(_TAILS)}")
+    return rows
+
+
+class _PerCallPatterns:
+    """Envuelve un patrón compilado para resolverlo en cada llamada, como antes."""
+
+    def __init__(self, compiled: re.Pattern) -> None:
+        self.pattern, self.flags = compiled.pattern, compiled.flags
+
+    def sub(self, repl: str, s: str) -> str:
+        return re.sub(self.pattern, repl, s, flags=self.flags)
+
+    def search(self, s: str) -> re.Match | None:
+        return re.search(self.pattern, s, self.flags)
+
+
+def _legacy_parser() -> AddressParser:
+    parser = AddressParser()
+    for name, value in vars(parser).items():
+        if isinstance(value, re.Pattern):
+            setattr(parser, name, _PerCallPatterns(value))
+        elif isinstance(value, (list, tuple)) and value and isinstance(value[0], re.Pattern):
+            setattr(parser, name, type(value)(_PerCallPatterns(p) for p in value))
+        elif isinstance(value, list) and value and isinstance(value[0], tuple):
+            setattr(parser, name, [(_PerCallPatterns(p), r) for p, r in value])
+    return parser
+
+
+def _rows_per_s(parse, rows: list[str]) -> float:
+    with_parser = geo._parse_address
+    geo._parse_address = parse
+    try:
+        t0 = time.perf_counter()
+        for raw in rows:
+            geo.address_key(raw)
+            geo.canonical_address(raw)
+        return len(rows) / (time.perf_counter() - t0)
+    finally:
+        geo._parse_address = with_parser
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rows = _synthetic_rows(n, random.Random(7))
+    memo = AddressParser()
+
+    variants = {
+        "anterior (re.sub por llamada)": _legacy_parser().parse_uncached,
+        "precompilado, sin memo": AddressParser().parse_uncached,
+        "precompilado + memo LRU": memo.parse,
+    }
+    print(f"{n} filas ({len(set(rows))} direcciones distintas)\n")
+    base = None
+    for name, parse in variants.items():
+        rate = _rows_per_s(parse, rows)
+        base = base or rate
+        print(f"{name:<32} {rate:>10,.0f} filas/s  {rate / base:5.1f}x")
+    info = memo.cache_info()
+    print(f"\nmemo: {info.hits} aciertos, {info.misses} fallos, {info.currsize} entradas")
+
+
+if __name__ == "__main__":
+    main()
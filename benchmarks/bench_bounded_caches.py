@@ -0,0 +1,69 @@
+"""
+Benchmark — cachés en memoria acotadas (TTLStore) frente a dicts sin límite.
+
+Simula un proceso de larga vida que geocodifica direcciones nuevas sin parar
+(N altas con un 20 % de relecturas de direcciones recientes) y compara:
+
+  antes:  dict sin límite → la memoria crece con cada dirección nueva.
+  ahora:  TTLStore LRU de `limite` entradas → memoria plana; mide el coste
+          por operación de la contabilidad LRU y los contadores.
+
+Uso:
+    python -m benchmarks.bench_bounded_caches [n_altas] [limite]
+"""
+
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+from app.core.ttlstore import TTLStore
+
+
+def _entry(i: int) -> dict:
+    return {
+        "lat": 37.80 + i * 1e-6, "lon": -5.10, "street": f"Calle Número {i // 100}",
+        "number": str(i % 100), "source": "google", "confidence": "EXACT_ADDRESS",
+        "cached_at": time.time(),
+    }
+
+
+def _run(cache, n: int) -> tuple[float, int]:
+    rng = random.Random(1)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for i in range(n):
+        cache[f"calle numero {i // 100}#{i % 100}"] = _entry(i)
+        if i and rng.random() < 0.2:
+            j = max(0, i - rng.randrange(1000))
+            cache.get(f"calle numero {j // 100}#{j % 100}")
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+
+    dict_s, dict_peak = _run({}, n)
+    store: TTLStore[dict] = TTLStore(limit, math.inf)
+    lru_s, lru_peak = _run(store, n)
+    stats = store.stats()
+
+    print(f"{n} altas, límite LRU {limit}")
+    print(f"dict:     {dict_s / n * 1e6:5.2f} µs/op, pico {dict_peak / 1e6:6.1f} MB, {n} entradas")
+    print(
+        f"TTLStore: {lru_s / n * 1e6:5.2f} µs/op, pico {lru_peak / 1e6:6.1f} MB, "
+        f"{stats['items']} entradas (estimado {stats['bytes'] / 1e6:.1f} MB)"
+    )
+    print(
+        f"          aciertos {stats['hits']}, fallos {stats['misses']}, "
+        f"expulsiones {stats['evictions']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
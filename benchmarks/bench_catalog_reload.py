@@ -0,0 +1,103 @@
+"""
+Benchmark — recarga en caliente del catálogo de calles.
+
+Catálogo sintético (el de bench_fuzzy_matcher) en un streets.json temporal.
+Mientras un hilo consulta sin parar el fuzzy matching (_correct_street con
+erratas), se modifica el fichero y se espera a que el proceso instale la
+versión nueva por su cuenta (cambio de mtime → recarga en segundo plano).
+
+Mide:
+  - construcción de una versión (lista normalizada, conjunto, índice de tokens)
+  - latencia de las consultas antes y durante la recarga (p50 / máx.)
+  - tiempo desde que cambia el fichero hasta que la versión nueva está activa
+
+Antes, cambiar el catálogo exigía reiniciar el proceso: arranque en frío y
+cachés en memoria vacías (ver bench_cold_start).
+
+Uso:
+    python -m benchmarks.bench_catalog_reload [n_calles]
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import app.services.geocoding as geo
+from app.services import catalog
+from benchmarks.bench_fuzzy_matcher import _catalog, _typo
+
+
+def _write(path: Path, streets: list[str], mtime: float) -> None:
+    path.write_text(json.dumps({"streets": streets}, ensure_ascii=False), "utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def _query_loop(queries: list[str], stop: threading.Event, out: list[tuple[float, int]]) -> None:
+    """Consulta hasta stop; apunta (latencia, versión del catálogo) de cada una."""
+    i = 0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        geo._correct_street(queries[i % len(queries)])
+        out.append((time.perf_counter() - t0, geo._streets_version.number))
+        i += 1
+
+
+def _summary(lat: list[float]) -> str:
+    return f"p50 {statistics.median(lat) * 1000:6.2f} ms  máx. {max(lat) * 1000:6.1f} ms  ({len(lat)} consultas)"
+
+
+def main() -> None:
+    n_streets = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rng = random.Random(7)
+    streets = _catalog(n_streets, rng)
+    # Erratas nuevas cada vez: el memo no las conoce y se mide el fuzzy matching
+    queries = [f"{_typo(rng.choice(streets), rng)} {i}" for i in range(20_000)]
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(catalog, "_STREETS_FILE", Path(tmp) / "streets.json"), \
+         patch.object(catalog, "_catalog", None), \
+         patch.object(geo, "_CACHE_DB", Path(tmp) / "cache.sqlite3"), \
+         patch.object(geo, "_corrections_store", None), \
+         patch.object(geo, "_corrections_catalog", None), \
+         patch.object(geo, "_streets_version", None), \
+         patch.object(geo, "CATALOG_CHECK_S", 0.05):
+        path = catalog._STREETS_FILE
+        _write(path, streets, mtime=1000)
+        v1 = geo._current_streets()
+
+        samples: list[tuple[float, int]] = []
+        stop = threading.Event()
+        worker = threading.Thread(target=_query_loop, args=(queries, stop, samples))
+        worker.start()
+        time.sleep(1.0)
+        n_before = len(samples)
+        t_change = time.perf_counter()
+        _write(path, streets + ["Calle Nueva del Benchmark"], mtime=2000)
+        while geo._streets_version is v1:
+            time.sleep(0.001)
+        swap_ms = (time.perf_counter() - t_change) * 1000
+        time.sleep(0.5)
+        stop.set()
+        worker.join()
+        v2 = geo._streets_version
+        geo._get_corrections_store().close()
+
+    before = [lat for lat, _ in samples[:n_before]]
+    during = [lat for lat, _ in samples[n_before:]]
+    print(f"{n_streets} calles")
+    print(f"construcción de una versión: {v2.build_ms:.0f} ms (fuera de las consultas)")
+    print(f"cambio de fichero → versión {v2.number} activa: {swap_ms:.0f} ms")
+    print(f"consultas antes:            {_summary(before)}")
+    print(f"consultas durante/después:  {_summary(during)}")
+    print(f"consultas con v1 / v2: {sum(v == 1 for _, v in samples)} / {sum(v == 2 for _, v in samples)}")
+
+
+if __name__ == "__main__":
+    main()
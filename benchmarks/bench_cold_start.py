@@ -0,0 +1,96 @@
+"""
+Benchmark — arranque en frío con una caché de geocodificación de N entradas.
+
+Cada medida es un proceso nuevo (imports en frío) contra una base SQLite
+temporal con N entradas (un tercio con alias):
+
+  antes:  importar app.main y cargar caché, snap y LKH antes de aceptar
+          peticiones (lo que hacía la carga al importar / en la primera petición).
+  ahora:  importar app.main y entrar en el lifespan: acepta peticiones en
+          cuanto arranca y el calentamiento sigue en un hilo (/ready).
+
+Uso:
+    python -m benchmarks.bench_cold_start [n_entradas]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.adapters.kvstore import SqliteKVStore
+
+RUNS = 3
+
+_CHILD = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from pathlib import Path
+import app.main as main
+from app.services import geocoding
+t_import = time.perf_counter()
+geocoding._CACHE_DB = Path(sys.argv[1])
+geocoding._CACHE_FILE = Path(sys.argv[1]).with_suffix(".json")
+
+async def run(mode):
+    if mode == "antes":
+        for step in main._WARM_UP_STEPS.values():
+            step()
+        t_accept = time.perf_counter()
+        return t_accept, t_accept
+    async with main.lifespan(main.app):
+        t_accept = time.perf_counter()
+        await asyncio.to_thread(main.startup.wait)
+        return t_accept, time.perf_counter()
+
+t_accept, t_ready = asyncio.run(run(sys.argv[2]))
+print(json.dumps({
+    "import_ms": (t_import - t0) * 1000,
+    "accept_ms": (t_accept - t0) * 1000,
+    "ready_ms": (t_ready - t0) * 1000,
+}))
+"""
+
+
+def _seed(db: Path, n: int) -> None:
+    store = SqliteKVStore(db, "geocode")
+    now = time.time()
+    store.put_many(
+        (f"calle numero {i // 100}#{i % 100}", {
+            "lat": 37.80 + i * 1e-6, "lon": -5.10, "street": f"Calle Número {i // 100}",
+            "number": str(i % 100), "source": "google", "confidence": "EXACT_ADDRESS",
+            "cached_at": now, "alias": f"Calle Número {i // 100}, {i % 100}" if i % 3 == 0 else "",
+        })
+        for i in range(n)
+    )
+    store.close()
+
+
+def _measure(db: Path, mode: str) -> dict[str, float]:
+    runs = []
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD, str(db), mode],
+            capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Path(tmp) / "geocode_cache.sqlite3"
+        _seed(db, n)
+        print(f"caché de {n} entradas, mediana de {RUNS} procesos en frío")
+        print(f"{'':6} {'import':>8} {'acepta':>8} {'listo':>8}")
+        for mode in ("antes", "ahora"):
+            m = _measure(db, mode)
+            print(f"{mode:6} {m['import_ms']:7.0f}ms {m['accept_ms']:7.0f}ms {m['ready_ms']:7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark — lectura del reparto: JSON de /validation/start frente al CSV en
+streaming de /validation/upload.
+
+Mismas filas en los dos formatos (N_ROWS paquetes sobre N_ADDRESSES
+direcciones). Se mide el trabajo del servidor hasta tener los grupos listos
+para geocodificar, sin red ni Google:
+
+  start   json.loads del cuerpo → StartRequest (pydantic) → _group_rows
+  upload  CsvRowParser a trozos de CHUNK bytes → _add_row fila a fila (_feed_upload)
+
+y el pico de memoria (tracemalloc) de cada uno, sin contar el cuerpo.
+En /start además el móvil ya ha parseado el CSV y serializado el JSON.
+
+Uso:
+    python -m benchmarks.bench_csv_upload [filas]
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from app.models.validation import StartRequest
+from app.routers.validation import _feed_upload, _group_rows
+from app.utils.csv_rows import CsvRowParser
+
+N_ADDRESSES = 200
+CHUNK = 64 * 1024   # trozo típico de request.stream()
+
+
+def _rows(n: int) -> list[dict[str, str]]:
+    return [
+        {"cliente": f"Cliente {i}", "direccion": f"Calle Gaitán {i % N_ADDRESSES + 1}",
+         "ciudad": "Posadas", "nota": "Dejar en portería" if i % 7 == 0 else "",
+         "agencia": "MRW", "alias": "", "tipo": "Express" if i % 10 == 0 else "Normal"}
+        for i in range(n)
+    ]
+
+
+def _to_csv(rows: list[dict[str, str]]) -> bytes:
+    header = ",".join(rows[0])
+    return (header + "\n" + "".join(",".join(r.values()) + "\n" for r in rows)).encode("utf-8")
+
+
+def _start(body: bytes) -> int:
+    req = StartRequest(**json.loads(body))
+    return len(_group_rows(req.rows))
+
+
+def _upload(body: bytes) -> int:
+    parser = CsvRowParser()
+    groups: OrderedDict[str, dict] = OrderedDict()
+    for i in range(0, len(body), CHUNK):
+        _feed_upload(parser, groups, body[i:i + CHUNK])
+    _feed_upload(parser, groups, None)
+    return len(groups)
+
+
+def _measure(fn, body: bytes) -> tuple[float, float]:
+    """(segundos, pico de memoria en MB); la memoria en una pasada aparte."""
+    fn(body)  # calentamiento: memo del parser de direcciones
+    t0 = time.perf_counter()
+    fn(body)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rows = _rows(n_rows)
+    bodies = {
+        "start (JSON)": json.dumps({"rows": rows}).encode("utf-8"),
+        "upload (CSV)": _to_csv(rows),
+    }
+    print(f"{n_rows} filas, {N_ADDRESSES} direcciones únicas\n")
+    print(f"{'formato':<14} {'cuerpo':>9} {'tiempo':>9} {'filas/s':>10} {'pico mem':>9}")
+    for name, fn in (("start (JSON)", _start), ("upload (CSV)", _upload)):
+        body = bodies[name]
+        elapsed, peak_mb = _measure(fn, body)
+        print(f"{name:<14} {len(body) / 1e6:7.2f}MB {elapsed * 1000:7.0f}ms "
+              f"{n_rows / elapsed:10.0f} {peak_mb:7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
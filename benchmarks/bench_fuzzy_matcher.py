@@ -0,0 +1,109 @@
+"""
+Benchmark — fuzzy matching de calles: recorrido lineal vs índice de tokens,
+y errata repetida servida por el memo persistente de correcciones.
+
+Catálogo sintético de varios pueblos (combinando tipos de vía y nombres de
+osm_streets.json) y consultas con erratas. Comprueba que los tres caminos dan
+exactamente el mismo resultado para todas las consultas.
+
+Uso:
+    python -m benchmarks.bench_fuzzy_matcher [n_calles] [n_consultas]
+"""
+
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import app.services.geocoding as geo
+
+_OSM_STREETS = Path(geo.__file__).resolve().parent.parent / "data" / "osm_streets.json"
+_VIAS = ["Calle", "Avenida", "Plaza", "Paseo", "Camino", "Travesía", "Ronda", "Callejón"]
+
+
+def _catalog(n: int, rng: random.Random) -> list[str]:
+    base = json.loads(_OSM_STREETS.read_text("utf-8"))["streets"]
+    names = sorted({" ".join(s.split()[1:]) for s in base if len(s.split()) > 1})
+    words = sorted({w for name in names for w in name.split() if len(w) > 3})
+    streets: set[str] = set(base)
+    while len(streets) < n:
+        name = rng.choice(names) if rng.random() < 0.5 else " ".join(rng.sample(words, rng.randint(1, 3)))
+        streets.add(f"{rng.choice(_VIAS)} {name}")
+    return sorted(streets)
+
+
+def _typo(text: str, rng: random.Random) -> str:
+    i = rng.randrange(len(text))
+    op = rng.randrange(3)
+    if op == 0:
+        return text[:i] + text[i + 1:]
+    if op == 1:
+        return text[:i] + text[i] + text[i:]
+    return text[:i] + rng.choice("aeiolnrst") + text[i + 1:]
+
+
+def _linear(query: str, streets: list[str], norms: list[str]) -> str | None:
+    """El matcher anterior: _token_set_ratio contra todas las calles."""
+    query_norm = geo._normalize(query)
+    if query_norm in set(norms):
+        return None
+    best_score, best = 0.0, None
+    for name, norm in zip(streets, norms):
+        score = geo._token_set_ratio(query_norm, norm)
+        if score > best_score:
+            best_score, best = score, name
+    if best_score >= geo.FUZZY_THRESHOLD and best and best != query:
+        return best
+    return None
+
+
+def main() -> None:
+    n_streets = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    rng = random.Random(42)
+    streets = _catalog(n_streets, rng)
+    norms = [geo._normalize(s) for s in streets]
+    queries = [_typo(rng.choice(streets), rng) for _ in range(n_queries)]
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(geo, "_CACHE_DB", Path(tmp) / "cache.sqlite3"), \
+         patch.object(geo, "_corrections_store", None), \
+         patch.object(geo, "_corrections_catalog", None), \
+         patch.object(geo, "_streets_version", None):
+        t0 = time.perf_counter()
+        expected = [_linear(q, streets, norms) for q in queries]
+        linear_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        geo._streets_version = geo._StreetsVersion(streets)
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        got = [geo._find_closest_street(q) for q in queries]
+        indexed_s = time.perf_counter() - t0
+
+        for q in queries:   # 1ª vez: fuzzy matching + escritura en SQLite
+            geo._correct_street(q)
+        t0 = time.perf_counter()
+        memo = [geo._correct_street(q) for q in queries]
+        memo_s = time.perf_counter() - t0
+        geo._get_corrections_store().close()
+
+    mismatches = sum(a != b or a != m for a, b, m in zip(expected, got, memo))
+    print(f"{len(streets)} calles, {n_queries} consultas con errata "
+          f"({sum(e is not None for e in expected)} corregidas)\n")
+    print(f"lineal:  {linear_s / n_queries * 1000:8.2f} ms/consulta")
+    print(f"índice:  {indexed_s / n_queries * 1000:8.2f} ms/consulta "
+          f"(construcción {build_ms:.0f} ms, una vez)")
+    print(f"memo:    {memo_s / n_queries * 1000:8.4f} ms/consulta (errata ya vista)")
+    print(f"speed-up índice {linear_s / indexed_s:.0f}x, memo {indexed_s / memo_s:.0f}x "
+          f"sobre el índice — discrepancias: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
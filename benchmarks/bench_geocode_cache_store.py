@@ -0,0 +1,69 @@
+"""
+Benchmark — coste de guardar una entrada nueva en la caché de geocodificación.
+
+Antes: reescribir todo geocode_cache.json (indent=2) en cada alta.
+Ahora: una fila INSERT OR REPLACE en SQLite/WAL (adapters.kvstore).
+Además mide la carga completa al arrancar con N entradas.
+
+Uso:
+    python -m benchmarks.bench_geocode_cache_store [n_entradas]
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.adapters.kvstore import SqliteKVStore
+
+WRITES = 50
+
+
+def _entry(i: int) -> dict:
+    return {
+        "lat": 37.80 + i * 1e-6, "lon": -5.10 - i * 1e-6,
+        "street": f"Calle Número {i}", "number": str(i % 200),
+        "source": "google", "confidence": "EXACT_ADDRESS", "cached_at": time.time(),
+    }
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    data = {f"calle numero {i}#{i % 200}": _entry(i) for i in range(n)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_file = Path(tmp) / "geocode_cache.json"
+        t0 = time.perf_counter()
+        for i in range(WRITES):
+            data[f"nueva#{i}"] = _entry(i)
+            json_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), "utf-8")
+        json_ms = (time.perf_counter() - t0) / WRITES * 1000
+        size_mb = json_file.stat().st_size / 1e6
+
+        store = SqliteKVStore(Path(tmp) / "geocode_cache.sqlite3", "geocode")
+        t0 = time.perf_counter()
+        store.migrate_json(json_file)
+        migrate_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        for i in range(WRITES):
+            store.put(f"otra#{i}", _entry(i))
+        sqlite_ms = (time.perf_counter() - t0) / WRITES * 1000
+
+        t0 = time.perf_counter()
+        json.loads(json_file.read_text("utf-8"))
+        load_json_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        dict(store.items())
+        load_sqlite_ms = (time.perf_counter() - t0) * 1000
+        store.close()
+
+    print(f"Caché con {n} entradas (JSON {size_mb:.1f} MB)\n")
+    print(f"{'':<26} {'JSON':>10} {'SQLite':>10}")
+    print(f"{'alta de 1 entrada (ms)':<26} {json_ms:>10.2f} {sqlite_ms:>10.3f}")
+    print(f"{'carga completa (ms)':<26} {load_json_ms:>10.1f} {load_sqlite_ms:>10.1f}")
+    print(f"\nmigración JSON → SQLite: {migrate_ms:.0f} ms (una sola vez)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark — validación contra un Google que limita a menos QPS de los configurados.
+
+El 'Google' simulado (httpx.MockTransport) admite QUOTA_QPS peticiones por
+segundo y responde 429 al resto. Se valida el mismo lote con el ritmo fijo en
+GOOGLE_RATE_LIMIT_QPS (min_rate = max) y con el bucket adaptativo (AIMD):
+nº de 429 recibidos, direcciones sin respuesta y tiempo total. Sin índice
+OSM ni interpolación: todas las direcciones van a Google.
+
+Uso:
+    python -m benchmarks.bench_google_throttle [n_direcciones] [quota_qps]
+"""
+
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+import app.services.geocoding as geo
+from app.adapters import shared_state
+from app.core.metrics import CallStats
+from app.core.ratelimit import AdaptiveTokenBucket
+from app.models.validation import CsvRow, StartRequest
+from app.routers import validation
+from benchmarks.bench_validation_geocoding import _validate_rows
+
+
+def _quota_google(quota_qps: float) -> httpx.AsyncClient:
+    """Cliente httpx cuyo 'Google' responde 429 por encima de quota_qps."""
+    state = {"tokens": quota_qps, "t": time.monotonic()}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        now = time.monotonic()
+        state["tokens"] = min(quota_qps, state["tokens"] + (now - state["t"]) * quota_qps)
+        state["t"] = now
+        await asyncio.sleep(0.03)
+        if state["tokens"] < 1:
+            return httpx.Response(429)
+        state["tokens"] -= 1
+        n = sum(map(ord, request.url.params.get("address", ""))) % 1000
+        return httpx.Response(200, json={"status": "OK", "results": [{
+            "geometry": {
+                "location": {"lat": 37.80 + n * 1e-5, "lng": -5.10 + n * 1e-5},
+                "location_type": "ROOFTOP",
+            },
+        }]})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def _run(req: StartRequest, bucket: AdaptiveTokenBucket, quota_qps: float) -> tuple[float, int, int]:
+    geo._cache.clear()
+    geo._persisted.clear()
+    geo._failed.clear()
+    client = _quota_google(quota_qps)
+    stats = CallStats()
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(geo, "_CACHE_DB", Path(tmp) / "cache.sqlite3"), \
+         patch.object(geo, "_store", None), \
+         patch.object(geo, "_failed_store", None), \
+         patch.object(geo, "get_async_client", return_value=client), \
+         patch.object(geo, "_google_bucket", bucket), \
+         patch.object(geo, "_google_calls", stats):
+        t0 = time.perf_counter()
+        resp = await _validate_rows(req)
+        elapsed = time.perf_counter() - t0
+    await client.aclose()
+    throttled = stats.snapshot().get("geocoding", {}).get("outcomes", {}).get("throttled", 0)
+    return elapsed, throttled, len(resp.failed)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    quota_qps = float(sys.argv[2]) if len(sys.argv) > 2 else 8.0
+    req = StartRequest(rows=[
+        CsvRow(cliente=f"Cliente {i}", direccion=f"Calle Gaitán {i}") for i in range(1, n + 1)
+    ])
+    qps, burst = geo.GOOGLE_RATE_LIMIT_QPS, geo.GOOGLE_RATE_BURST
+
+    logging.getLogger("app").setLevel(logging.ERROR)  # un warning por cada 429
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(geo, "_CACHE_FILE", Path(tmp) / "cache.json"), \
+         patch.object(shared_state, "_DB", Path(tmp) / "shared_state.sqlite3"), \
+         patch.object(geo, "GOOGLE_API_KEY", "BENCH"), \
+         patch.object(geo, "_lookup_local", lambda street, number: None), \
+         patch.object(geo, "_streets_version", geo._StreetsVersion([])):
+        print(f"{n} direcciones, cuota Google {quota_qps:.0f} QPS, configurado {qps:.0f} QPS\n")
+        print(f"{'ritmo':>10} {'tiempo':>9} {'429':>6} {'sin geocodificar':>17}")
+        for label, bucket in (
+            ("fijo", AdaptiveTokenBucket(qps, burst, min_rate=qps)),
+            ("AIMD", AdaptiveTokenBucket(
+                qps, burst, min_rate=geo.GOOGLE_RATE_MIN_QPS, increase=geo.GOOGLE_RATE_INCREASE_QPS,
+            )),
+        ):
+            elapsed, throttled, failed = asyncio.run(_run(req, bucket, quota_qps))
+            print(f"{label:>10} {elapsed:>8.2f}s {throttled:>6} {failed:>17}")
+
+
+if __name__ == "__main__":
+    main()
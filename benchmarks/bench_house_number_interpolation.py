@@ -0,0 +1,74 @@
+"""
+Benchmark — portal nuevo en calle conocida: interpolación local vs Google.
+
+Siembra la caché con portales ROOFTOP de varias calles (uno de cada cuatro
+números, en las dos aceras) y geocodifica los números intermedios. Mide la
+latencia del pipeline real de geocode() resolviendo por interpolación y el
+error frente a la posición real (calles rectas sintéticas con ruido de ±3 m).
+
+Uso:
+    python -m benchmarks.bench_house_number_interpolation [n_calles]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import app.services.geocoding as geo
+from app.utils.house_numbers import HouseNumberIndex, _dist_m
+
+_M_PER_DEG = 111_320
+
+
+def _true_coord(street: int, n: int) -> tuple[float, float]:
+    side = 8 if n % 2 else -8  # aceras a ±8 m del eje
+    return 37.79 + street * 0.001 + n * 4 / _M_PER_DEG, -5.11 + side / (_M_PER_DEG * 0.79)
+
+
+def main() -> None:
+    n_streets = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(geo, "_CACHE_FILE", Path(tmp) / "cache.json"), \
+         patch.object(geo, "_CACHE_DB", Path(tmp) / "cache.sqlite3"), \
+         patch.object(geo, "_store", None), \
+         patch.object(geo, "_failed_store", None), \
+         patch.object(geo, "_loaded", False), \
+         patch.object(geo, "_house_numbers", HouseNumberIndex()), \
+         patch.object(geo, "_streets_version", geo._StreetsVersion([])):
+        geo._ensure_loaded()
+        for s in range(n_streets):
+            for n in range(1, 81):
+                if n % 8 in (1, 2):
+                    lat, lon = _true_coord(s, n)
+                    noise = (rng.uniform(-3, 3) / _M_PER_DEG, rng.uniform(-3, 3) / _M_PER_DEG)
+                    geo.add_override(f"Calle Prueba {s} {n}", lat + noise[0], lon + noise[1])
+
+        queries = [(s, n) for s in range(n_streets) for n in range(1, 81) if n % 8 not in (1, 2)]
+        errors: list[float] = []
+        confidences: dict[str, int] = {}
+        with patch.object(geo, "GOOGLE_API_KEY", ""):
+            t0 = time.perf_counter()
+            for s, n in queries:
+                coord, conf = geo.geocode(f"Calle Prueba {s} {n}", use_negative_cache=False)
+                confidences[conf] = confidences.get(conf, 0) + 1
+                if coord is not None:
+                    errors.append(_dist_m(coord, _true_coord(s, n)))
+            elapsed = time.perf_counter() - t0
+
+    errors.sort()
+    print(f"{len(queries)} portales nuevos en {n_streets} calles")
+    print(f"resultado: {confidences}")
+    print(f"latencia media geocode(): {elapsed / len(queries) * 1e6:.0f} µs")
+    if errors:
+        print(
+            f"error vs posición real: mediana {errors[len(errors) // 2]:.1f} m, "
+            f"p95 {errors[int(len(errors) * 0.95)]:.1f} m, máx {errors[-1]:.1f} m"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark — fijar N pins: N llamadas a /validation/override frente a una a
+/validation/override/batch.
+
+Cada dirección estaba en la caché negativa (falló antes), como las que la
+app fija a mano tras /start. Por pin, add_override escribe la caché, borra
+la caché negativa y publica la invalidación: tres transacciones SQLite. El
+lote hace una de cada. Se mide solo el servidor (sin la ida y vuelta HTTP
+de cada pin, que el lote también se ahorra), con SQLite real en un tempdir.
+
+Uso:
+    python -m benchmarks.bench_override_batch [pins]
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import app.services.geocoding as geo
+from app.adapters import shared_state
+
+REPEAT = 15
+
+
+def _pins(n: int, run: int) -> list[tuple[str, float, float]]:
+    pins = [(f"Calle Gaitán {run * n + i}", 37.80 + i * 1e-4, -5.10) for i in range(1, n + 1)]
+    for address, _, _ in pins:
+        street, number = geo._parse_address(address)
+        key = geo._cache_key(street, number)
+        geo._failed[key] = {"": time.time() + 3600}
+        geo._get_failed_store().put(key, {"": time.time() + 3600})
+    return pins
+
+
+def _one_by_one(pins: list[tuple[str, float, float]]) -> float:
+    t0 = time.perf_counter()
+    for address, lat, lon in pins:
+        geo.add_override(address, lat, lon)
+    return time.perf_counter() - t0
+
+
+def _batch(pins: list[tuple[str, float, float]]) -> float:
+    t0 = time.perf_counter()
+    geo.add_overrides(pins)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(geo, "_CACHE_FILE", Path(tmp) / "cache.json"), \
+         patch.object(shared_state, "_DB", Path(tmp) / "shared_state.sqlite3"), \
+         patch.object(geo, "_CACHE_DB", Path(tmp) / "cache.sqlite3"), \
+         patch.object(geo, "_store", None), \
+         patch.object(geo, "_failed_store", None), \
+         patch.object(geo, "_loaded", False), \
+         patch.object(geo, "_streets_version", geo._StreetsVersion([])):
+        geo._ensure_loaded()
+        single = [_one_by_one(_pins(n, 2 * r)) for r in range(REPEAT)]
+        batch = [_batch(_pins(n, 2 * r + 1)) for r in range(REPEAT)]
+        assert not geo._failed
+        shared_state.reset()
+
+    t_single, t_batch = statistics.median(single), statistics.median(batch)
+    print(f"{n} pins sobre direcciones fallidas (mediana de {REPEAT})\n")
+    print(f"uno a uno  {t_single * 1000:7.2f} ms   ({3 * n} transacciones, {n} peticiones)")
+    print(f"lote       {t_batch * 1000:7.2f} ms   (3 transacciones, 1 petición)   "
+          f"{t_single / t_batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark — serialización de la respuesta de /optimize para 200 paradas.
+
+Compara el camino por defecto de FastAPI (jsonable_encoder + json.dumps) con
+los serializadores de app.core.responses, y el tamaño en bytes con y sin
+compresión.
+
+Uso:
+    python -m benchmarks.bench_response_encoding
+"""
+
+import gzip
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import compress_body, encode_body
+from app.models import OptimizeResponse, Package, RouteSummary, StopInfo
+
+N_STOPS = 200
+REPEAT = 200
+
+
+def _route(n: int) -> OptimizeResponse:
+    stops = [
+        StopInfo(
+            order=i,
+            address=f"Calle Gregorio Marañón {i}",
+            label=f"Calle Gregorio Marañón {i}, Posadas",
+            client_name=f"Cliente {i}",
+            client_names=[f"Cliente {i}"],
+            packages=[Package(client_name=f"Cliente {i}", nota="Dejar en portería")],
+            type="stop" if i else "origin",
+            lat=37.80 + i * 1.37e-4,
+            lon=-5.10 + i * 0.91e-4,
+            distance_meters=float(i * 137),
+        )
+        for i in range(n + 1)
+    ]
+    summary = RouteSummary(
+        total_stops=n, total_packages=n,
+        total_distance_m=float(n * 137), total_distance_display="27.4 km",
+    )
+    return OptimizeResponse(summary=summary, stops=stops)
+
+
+def main() -> None:
+    resp = _route(N_STOPS)
+
+    def fastapi_default() -> bytes:
+        return json.dumps(jsonable_encoder(resp), ensure_ascii=False).encode("utf-8")
+
+    candidates = {
+        "fastapi (jsonable_encoder)": fastapi_default,
+        "json (core.responses)": lambda: encode_body(resp, "application/json"),
+        "msgpack (core.responses)": lambda: encode_body(resp, "application/msgpack"),
+    }
+
+    print(f"Respuesta /optimize con {N_STOPS} paradas ({REPEAT} repeticiones)\n")
+    print(f"{'serializador':<28} {'ms/op':>8} {'bytes':>8} {'gzip':>8} {'br':>8}")
+    for name, fn in candidates.items():
+        ms = timeit.timeit(fn, number=REPEAT) / REPEAT * 1000
+        body = fn()
+        gz = len(gzip.compress(body, compresslevel=6))
+        br, enc = compress_body(body, "br")
+        br_len = len(br) if enc == "br" else float("nan")
+        print(f"{name:<28} {ms:>8.3f} {len(body):>8} {gz:>8} {br_len:>8}")
+
+    raw = encode_body(resp, "application/json")
+    print()
+    for accept in ("gzip", "br"):
+        ms = timeit.timeit(lambda: compress_body(raw, accept), number=REPEAT) / REPEAT * 1000
+        print(f"compresión {accept:<4} del JSON: {ms:.3f} ms/op")
+
+
+if __name__ == "__main__":
+    main()
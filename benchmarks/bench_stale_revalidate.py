@@ -0,0 +1,96 @@
+"""
+Benchmark — validación cuando caduca de golpe un lote de entradas de Google.
+
+Antes, una entrada caducada se borraba y se re-geocodificaba dentro de la
+petición: un lote de N entradas de hace 30 días costaba lo mismo que una
+validación con caché fría. Ahora se sirven caducadas y se encolan para el
+refresco en segundo plano.
+
+Google se simula en proceso (httpx.MockTransport, latencia fija, ROOFTOP).
+El refresco queda encolado (no se ejecuta): se mide solo la petición.
+
+Uso:
+    python -m benchmarks.bench_stale_revalidate [n_direcciones] [latencia_ms]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+import app.services.geocoding as geo
+from app.adapters import shared_state
+from app.core.ratelimit import AdaptiveTokenBucket
+from app.core.refresher import BackgroundRefresher
+from app.models.validation import CsvRow, StartRequest
+from app.routers import validation
+from benchmarks.bench_validation_geocoding import _validate_rows
+
+
+def _fake_google(latency_s: float) -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency_s)
+        return httpx.Response(200, json={"status": "OK", "results": [{
+            "geometry": {"location": {"lat": 37.80, "lng": -5.10}, "location_type": "ROOFTOP"},
+        }]})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def _validate(req: StartRequest, latency_s: float) -> float:
+    client = _fake_google(latency_s)
+    with patch.object(geo, "get_async_client", return_value=client):
+        t0 = time.perf_counter()
+        resp = await _validate_rows(req)
+        elapsed = time.perf_counter() - t0
+    await client.aclose()
+    assert len(resp.geocoded) == resp.unique_addresses
+    return elapsed
+
+
+def _expire_all() -> None:
+    old = time.time() - (geo.GOOGLE_CACHE_TTL_DAYS + 1) * 86400
+    with geo._lock:
+        for key, entry in list(geo._persisted.items()):
+            geo._persisted[key] = {**entry, "cached_at": old}
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    latency_s = (float(sys.argv[2]) if len(sys.argv) > 2 else 120.0) / 1000
+    req = StartRequest(rows=[
+        CsvRow(cliente=f"Cliente {i}", direccion=f"Calle Gaitán {i}") for i in range(1, n + 1)
+    ])
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(geo, "_CACHE_FILE", Path(tmp) / "cache.json"), \
+         patch.object(shared_state, "_DB", Path(tmp) / "shared_state.sqlite3"), \
+         patch.object(geo, "_CACHE_DB", Path(tmp) / "cache.sqlite3"), \
+         patch.object(geo, "_store", None), \
+         patch.object(geo, "_failed_store", None), \
+         patch.object(geo, "_loaded", False), \
+         patch.object(geo, "GOOGLE_API_KEY", "BENCH"), \
+         patch.object(geo, "_google_bucket", AdaptiveTokenBucket(geo.GOOGLE_RATE_LIMIT_QPS, geo.GOOGLE_RATE_BURST)), \
+         patch.object(geo, "_refresher", BackgroundRefresher(
+             "bench", geo._refresh_entry, geo.GEOCODE_REFRESH_QPS, autostart=False,
+         )), \
+         patch.object(geo, "_streets_version", geo._StreetsVersion([])):
+        print(f"{n} direcciones, latencia Google {latency_s * 1000:.0f} ms\n")
+        cold = asyncio.run(_validate(req, latency_s))
+        print(f"caché fría (= caducadas, antes):      {cold:7.2f}s")
+        _expire_all()
+        stale = asyncio.run(_validate(req, latency_s))
+        print(f"caducadas, stale-while-revalidate:   {stale:7.3f}s  ({cold / stale:.0f}x)")
+        stats = geo.get_cache_stats()
+        print(
+            f"\nencoladas para refresco: {stats['refresh_pending']} "
+            f"(~{stats['refresh_pending'] / geo.GEOCODE_REFRESH_QPS:.0f}s en segundo plano "
+            f"a {geo.GEOCODE_REFRESH_QPS:g} QPS)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark — /api/validation/start con caché fría: secuencial vs concurrente.
+
+Sustituye a Google por un servidor simulado en proceso (httpx.MockTransport)
+con latencia fija y respuestas ROOFTOP, y ejecuta el pipeline real de
+validación (agrupado, geocode_async, token bucket) sobre N direcciones únicas.
+
+Uso:
+    python -m benchmarks.bench_validation_geocoding [n_direcciones] [latencia_ms]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+import app.services.geocoding as geo
+from app.adapters import shared_state
+from app.core.ratelimit import AdaptiveTokenBucket
+from app.models.validation import CsvRow, StartRequest, StartResponse
+from app.routers import validation
+
+
+async def _validate_rows(req: StartRequest) -> StartResponse:
+    """Lo que hace /start sin single-flight (cada llamada geocodifica de verdad)."""
+    groups, results, response = await validation._geocode_rows(req)
+    response.validation_id = validation._create_validation_session(req.rows, groups, results)
+    return response
+
+
+def _fake_google(latency_s: float) -> httpx.AsyncClient:
+    """Cliente httpx cuyo 'Google' responde ROOFTOP tras latency_s segundos."""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency_s)
+        n = sum(map(ord, request.url.params.get("address", ""))) % 1000
+        return httpx.Response(200, json={"status": "OK", "results": [{
+            "geometry": {
+                "location": {"lat": 37.80 + n * 1e-5, "lng": -5.10 + n * 1e-5},
+                "location_type": "ROOFTOP",
+            },
+        }]})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def _run(req: StartRequest, concurrency: int, latency_s: float) -> float:
+    geo._cache.clear()
+    geo._persisted.clear()
+    client = _fake_google(latency_s)
+    with patch.object(validation, "_GEOCODE_CONCURRENCY", concurrency), \
+         patch.object(geo, "get_async_client", return_value=client):
+        t0 = time.perf_counter()
+        resp = await _validate_rows(req)
+        elapsed = time.perf_counter() - t0
+    await client.aclose()
+    assert len(resp.geocoded) == resp.unique_addresses
+    return elapsed
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    latency_s = (float(sys.argv[2]) if len(sys.argv) > 2 else 120.0) / 1000
+    req = StartRequest(rows=[
+        CsvRow(cliente=f"Cliente {i}", direccion=f"Calle Gaitán {i}") for i in range(1, n + 1)
+    ])
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(geo, "_CACHE_FILE", Path(tmp) / "cache.json"), \
+         patch.object(shared_state, "_DB", Path(tmp) / "shared_state.sqlite3"), \
+         patch.object(geo, "_CACHE_DB", Path(tmp) / "cache.sqlite3"), \
+         patch.object(geo, "_store", None), \
+         patch.object(geo, "_failed_store", None), \
+         patch.object(geo, "GOOGLE_API_KEY", "BENCH"), \
+         patch.object(geo, "_streets_version", geo._StreetsVersion([])):
+        print(f"{n} direcciones únicas, latencia Google {latency_s * 1000:.0f} ms\n")
+        print(f"{'concurrencia':>12} {'límite QPS':>11} {'tiempo':>9} {'speed-up':>9}")
+        base = None
+        for concurrency, qps in ((1, geo.GOOGLE_RATE_LIMIT_QPS), (8, geo.GOOGLE_RATE_LIMIT_QPS), (16, 1e6)):
+            with patch.object(geo, "_google_bucket", AdaptiveTokenBucket(qps, geo.GOOGLE_RATE_BURST)):
+                elapsed = asyncio.run(_run(req, concurrency, latency_s))
+            base = base or elapsed
+            qps_label = f"{qps:.0f}" if qps < 1e6 else "—"
+            print(f"{concurrency:>12} {qps_label:>11} {elapsed:>8.2f}s {base / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark — /validation/start (bloqueante) frente a /validation/jobs.
+
+Direcciones nuevas con Google simulado (LATENCY_S por llamada, sin red).
+Se mide, para el cliente:
+
+  start  cuánto tarda la única respuesta (con todo geocodificado)
+  jobs   cuánto tarda la respuesta 202, cuándo ve la primera parada resuelta
+         y cuándo ve el job terminado sondeando cada POLL_S
+
+El trabajo total es el mismo; lo que cambia es que la petición HTTP ya no
+dura lo que dura la geocodificación (proxy_read_timeout de nginx) y que la
+app puede mostrar el progreso.
+
+Uso:
+    python -m benchmarks.bench_validation_jobs [direcciones]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from fastapi import BackgroundTasks
+
+from app.adapters import shared_state
+from app.models.validation import CsvRow, StartRequest
+from app.routers import validation
+from app.services import validation_jobs
+from benchmarks.bench_validation_geocoding import _validate_rows
+
+LATENCY_S = 0.15   # llamada a Google (Geocoding) típica
+POLL_S = 0.5       # sondeo de la app
+
+
+async def _fake_geocode(address, alias="", **_):
+    await asyncio.sleep(LATENCY_S)
+    return (37.80, -5.10), "EXACT_ADDRESS"
+
+
+async def _start(req: StartRequest) -> float:
+    t0 = time.perf_counter()
+    await _validate_rows(req)
+    return time.perf_counter() - t0
+
+
+async def _jobs(req: StartRequest) -> tuple[float, float, float]:
+    t0 = time.perf_counter()
+    tasks = BackgroundTasks()
+    created = await validation.validation_job_create(req, tasks)
+    t_accepted = time.perf_counter() - t0
+    runner = asyncio.ensure_future(tasks())   # lo que uvicorn hace tras enviar el 202
+    t_first = None
+    while True:
+        await asyncio.sleep(POLL_S)
+        status = validation_jobs.get_status(created.job_id)
+        assert status is not None
+        if t_first is None and status.processed:
+            t_first = time.perf_counter() - t0
+        if status.status == "done":
+            break
+    await runner
+    return t_accepted, t_first or 0.0, time.perf_counter() - t0
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rows = [CsvRow(cliente=f"Cliente {i}", direccion=f"Calle Gaitán {i}") for i in range(1, n + 1)]
+    req = StartRequest(rows=rows)
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(shared_state, "_DB", Path(tmp) / "shared_state.sqlite3"), \
+         patch.object(validation, "geocode_async", _fake_geocode):
+        t_start = asyncio.run(_start(req))
+        t_accepted, t_first, t_done = asyncio.run(_jobs(req))
+        shared_state.reset()
+
+    print(f"{n} direcciones nuevas, Google simulado a {LATENCY_S * 1000:.0f} ms/llamada, "
+          f"{validation._GEOCODE_CONCURRENCY} en paralelo\n")
+    print(f"start  respuesta:            {t_start:6.2f} s")
+    print(f"jobs   202 con job_id:       {t_accepted * 1000:6.1f} ms")
+    print(f"jobs   primera parada vista: {t_first:6.2f} s   (sondeo cada {POLL_S} s)")
+    print(f"jobs   terminado visto:      {t_done:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
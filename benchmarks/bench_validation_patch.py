@@ -0,0 +1,94 @@
+"""
+Benchmark — corregir una fila: reenviar el CSV a /validation/start frente a
+PATCH /validation/sessions/{id}.
+
+Reparto de [filas] filas sobre N_ADDRESSES direcciones, todas ya en caché
+(geocode_async simulado con la latencia de una consulta a la caché) salvo la
+corregida, que es nueva (Google simulado a LATENCY_S). Se mide lo que hace
+el servidor por corrección:
+
+  start  agrupar todas las filas, consultar la caché de todas las direcciones
+         y geocodificar la nueva; respuesta completa
+  patch  reagrupar solo las direcciones afectadas y geocodificar la nueva;
+         respuesta con el diff
+
+Uso:
+    python -m benchmarks.bench_validation_patch [filas]
+"""
+
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from app.adapters import shared_state
+from app.core.responses import encode_body
+from app.models.validation import CsvRow, RowEdit, StartRequest, ValidationPatch
+from app.routers import validation
+from app.services import validation_sessions
+from benchmarks.bench_validation_geocoding import _validate_rows
+
+N_ADDRESSES = 150
+CACHE_S = 0.0002   # acierto en la caché de geocoding
+LATENCY_S = 0.15   # llamada a Google
+REPEAT = 10
+
+
+async def _fake_geocode(address, alias="", **_):
+    await asyncio.sleep(LATENCY_S if "Corregida" in address else CACHE_S)
+    return (37.80, -5.10), "EXACT_ADDRESS"
+
+
+def _rows(n: int) -> list[CsvRow]:
+    return [
+        CsvRow(cliente=f"Cliente {i}", direccion=f"Calle Gaitán {i % N_ADDRESSES + 1}")
+        for i in range(n)
+    ]
+
+
+async def _measure(n_rows: int) -> tuple[list[float], list[float], int, int]:
+    rows = _rows(n_rows)
+    start = await _validate_rows(StartRequest(rows=rows))
+    t_start, t_patch = [], []
+    start_bytes = patch_bytes = 0
+    for k in range(REPEAT):
+        fixed = CsvRow(cliente="Cliente 0", direccion=f"Calle Corregida {k}")
+
+        t0 = time.perf_counter()
+        resp = await _validate_rows(StartRequest(rows=[fixed, *rows[1:]]))
+        start_bytes = len(encode_body(resp, "application/json"))
+        t_start.append(time.perf_counter() - t0)
+
+        session = validation_sessions.get_session(start.validation_id)
+        assert session is not None
+        t0 = time.perf_counter()
+        diff = await validation._apply_patch(
+            start.validation_id, session, ValidationPatch(update=[RowEdit(id=0, row=fixed)]),
+        )
+        patch_bytes = len(encode_body(diff, "application/json"))
+        t_patch.append(time.perf_counter() - t0)
+    return t_start, t_patch, start_bytes, patch_bytes
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch.object(shared_state, "_DB", Path(tmp) / "shared_state.sqlite3"), \
+         patch.object(validation, "geocode_async", _fake_geocode):
+        t_start, t_patch, start_bytes, patch_bytes = asyncio.run(_measure(n_rows))
+        shared_state.reset()
+
+    # La latencia de Google es la misma en los dos: se muestra aparte
+    print(f"{n_rows} filas, {N_ADDRESSES} direcciones; 1 fila corregida a una dirección nueva "
+          f"(Google simulado a {LATENCY_S * 1000:.0f} ms)\n")
+    print(f"{'':6} {'mediana':>9} {'sin Google':>11} {'respuesta':>10}")
+    for name, times, size in (("start", t_start, start_bytes), ("patch", t_patch, patch_bytes)):
+        med = statistics.median(times)
+        print(f"{name:6} {med * 1000:7.0f}ms {(med - LATENCY_S) * 1000:9.1f}ms {size / 1024:8.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark — rendimiento de /validation/start con 1 y con N workers de uvicorn.
+
+Cada medida arranca `uvicorn --workers N` contra un directorio de datos
+temporal (caché de geocodificación con las direcciones ya resueltas, estado
+compartido y snap en SQLite) y lanza C clientes HTTP en paralelo durante
+DURATION_S segundos. Todas las direcciones están en caché: la petición es
+CPU pura (parseo, deduplicación, búsqueda en caché, serialización), que es
+lo que un solo proceso no puede repartir entre núcleos.
+
+Las peticiones varían el nombre del cliente para que el single-flight no
+las coalezca. Con varios workers todos leen y escriben el mismo SQLite: lo
+que geocodifica uno lo ven los demás (adapters/shared_state.py).
+
+Uso:
+    python -m benchmarks.bench_workers [workers] [clientes]
+
+La ganancia está acotada por os.cpu_count(): en una máquina de un núcleo
+N workers rinden como uno.
+"""
+
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from app.adapters.kvstore import SqliteKVStore
+
+DURATION_S = 10.0
+N_ADDRESSES = 150
+_ENV_DIR = "BENCH_DATA_DIR"
+
+
+def create_app():
+    """Fábrica para uvicorn --factory: la app con los datos en BENCH_DATA_DIR."""
+    from app.adapters import osrm, shared_state
+    from app.main import app
+    from app.services import geocoding
+
+    data = Path(os.environ[_ENV_DIR])
+    geocoding._CACHE_DB = data / "geocode_cache.sqlite3"
+    geocoding._CACHE_FILE = data / "geocode_cache.json"
+    osrm._SNAP_DB = data / "snap_cache.sqlite3"
+    osrm._SNAP_CACHE_FILE = data / "snap_cache.json"
+    shared_state._DB = data / "shared_state.sqlite3"
+    return app
+
+
+def _seed(data: Path) -> None:
+    store = SqliteKVStore(data / "geocode_cache.sqlite3", "geocode")
+    store.put_many(
+        (f"calle gaitan#{i}", {
+            "lat": 37.80 + i * 1e-5, "lon": -5.10, "street": "Calle Gaitán",
+            "number": str(i), "source": "override", "confidence": "OVERRIDE",
+        })
+        for i in range(1, N_ADDRESSES + 1)
+    )
+    store.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(base: str, timeout_s: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base}/ready", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn no arrancó")
+
+
+def _load(base: str, clients: int) -> tuple[float, float]:
+    """(peticiones/s, latencia p50 en ms) con `clients` clientes en paralelo."""
+    latencies: list[float] = []
+    lock = threading.Lock()
+    stop = time.monotonic() + DURATION_S
+
+    def client(c: int) -> None:
+        n = 0
+        with httpx.Client(base_url=base, timeout=30) as http:
+            while time.monotonic() < stop:
+                n += 1
+                rows = [
+                    {"cliente": f"Cliente {c}-{n}-{i}", "direccion": f"Calle Gaitán {i}"}
+                    for i in range(1, N_ADDRESSES + 1)
+                ]
+                t0 = time.perf_counter()
+                r = http.post("/api/validation/start", json={"rows": rows})
+                r.raise_for_status()
+                with lock:
+                    latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(latencies) / DURATION_S, statistics.median(latencies) * 1000
+
+
+def _measure(workers: int, clients: int) -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        data = Path(tmp)
+        _seed(data)
+        port = _free_port()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "--factory", "benchmarks.bench_workers:create_app",
+             "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+            env={**os.environ, _ENV_DIR: tmp},
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            _wait_ready(base)
+            _load(base, clients)  # calentamiento: cada worker carga su memoria
+            return _load(base, clients)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(2, cpus)
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 2 * workers
+    print(f"{N_ADDRESSES} direcciones en caché por petición, {clients} clientes, "
+          f"{DURATION_S:.0f} s por medida, {cpus} CPU")
+    print(f"{'workers':>8} {'req/s':>8} {'p50':>9}")
+    for n in sorted({1, workers}):
+        rps, p50 = _measure(n, clients)
+        print(f"{n:>8} {rps:8.1f} {p50:7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
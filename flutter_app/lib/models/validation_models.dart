@@ -8,6 +8,7 @@ import 'route_models.dart';
 enum GeoConfidence {
   exactAddress, // EXACT_ADDRESS — portal exacto (Google ROOFTOP)
   exactPlace,   // EXACT_PLACE — lugar/negocio encontrado por Places
+  interpolated, // INTERPOLATED — portal estimado entre portales conocidos de la calle
   override,     // OVERRIDE — pin manual del usuario
   failed,       // FAILED — no geocodificado
 
@@ -19,6 +20,8 @@ enum GeoConfidence {
         return GeoConfidence.exactAddress;
       case 'EXACT_PLACE':
         return GeoConfidence.exactPlace;
+      case 'INTERPOLATED':
+        return GeoConfidence.interpolated;
       case 'OVERRIDE':
         return GeoConfidence.override;
       default:
@@ -28,7 +31,7 @@ enum GeoConfidence {
 
   /// True si la confianza es suficiente para mostrar en verde (no requiere revisión).
   bool get isAccepted =>
-      this == exactAddress || this == exactPlace || this == override;
+      this == exactAddress || this == exactPlace || this == interpolated || this == override;
 }
 
 /// Parada geocodificada correctamente.
@@ -40,6 +40,10 @@ void main() {
       expect(GeoConfidence.fromString('EXACT_PLACE'), GeoConfidence.exactPlace);
     });
 
+    test('INTERPOLATED → interpolated', () {
+      expect(GeoConfidence.fromString('INTERPOLATED'), GeoConfidence.interpolated);
+    });
+
     test('OVERRIDE → override', () {
       expect(GeoConfidence.fromString('OVERRIDE'), GeoConfidence.override);
     });
@@ -60,9 +64,10 @@ void main() {
   // ══════════════════════════════════════════════════════════════════
 
   group('GeoConfidence.isAccepted', () {
-    test('exactAddress, exactPlace y override son aceptados', () {
+    test('exactAddress, exactPlace, interpolated y override son aceptados', () {
       expect(GeoConfidence.exactAddress.isAccepted, isTrue);
       expect(GeoConfidence.exactPlace.isAccepted, isTrue);
+      expect(GeoConfidence.interpolated.isAccepted, isTrue);
       expect(GeoConfidence.override.isAccepted, isTrue);
     });
 
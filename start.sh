@@ -30,6 +30,7 @@ VENV_PATH="$PROJECT_DIR/venv/bin/activate"
 BACKEND_LOG="$PROJECT_DIR/backend.log"
 NGROK_LOG="/tmp/ngrok.log"
 BACKEND_PORT=8000
+BACKEND_WORKERS="${BACKEND_WORKERS:-1}"   # >1: varios procesos uvicorn (sin --reload)
 OSRM_PORT=5000
 NGROK_API_PORT=4040
 OSRM_PBF="$PROJECT_DIR/osrm/posadas_editado.osm.pbf"
@@ -166,9 +167,15 @@ start_backend() {
         print_info "PID: $(lsof -Pi :$BACKEND_PORT -sTCP:LISTEN -t)"
     else
         source "$VENV_PATH"
-        nohup uvicorn app.main:app --host 0.0.0.0 --port $BACKEND_PORT --reload \
+        # Las cachés y sesiones se comparten entre workers vía SQLite
+        # (app/adapters/shared_state.py); --reload solo admite un proceso.
+        local uvicorn_mode="--reload"
+        if [ "$BACKEND_WORKERS" -gt 1 ]; then
+            uvicorn_mode="--workers $BACKEND_WORKERS"
+        fi
+        nohup uvicorn app.main:app --host 0.0.0.0 --port $BACKEND_PORT $uvicorn_mode \
             > "$BACKEND_LOG" 2>&1 &
-        print_info "Backend iniciado con PID: $!"
+        print_info "Backend iniciado con PID: $! ($BACKEND_WORKERS worker(s))"
     fi
     echo ""
 
@@ -282,9 +289,21 @@ rebuild_map() {
     fi
     echo ""
 
-    # Limpiar snap cache (los snaps cambian con el nuevo mapa)
-    rm -f "$PROJECT_DIR/app/data/snap_cache.json"
-    print_success "Snap cache eliminado"
+    # Limpiar snap cache (los snaps cambian con el nuevo mapa); los workers
+    # en marcha reciben la invalidación y vacían su memoria
+    if ( source "$VENV_PATH" && python -c "from app.adapters.osrm import clear_snap_cache; clear_snap_cache()" ); then
+        print_success "Snap cache eliminado"
+    else
+        rm -f "$PROJECT_DIR/app/data/snap_cache.json" "$PROJECT_DIR/app/data/snap_cache.sqlite3"
+        print_warning "Snap cache eliminado a mano (los workers en marcha conservan su memoria)"
+    fi
+
+    # Índice local de portales (addr:*) para geocodificar sin Google
+    if ( source "$VENV_PATH" && python -m app.services.address_index ); then
+        print_success "Índice de portales OSM regenerado"
+    else
+        print_warning "No se pudo regenerar el índice de portales (se usa el anterior)"
+    fi
 
     # Limpiar archivos procesados anteriores
     print_section "Eliminando procesado anterior..."
@@ -1,8 +1,90 @@
+import math
+
 import pytest
 from fastapi.testclient import TestClient
+from app.adapters import osrm, shared_state
+from app.core.config import GEOCODE_MEMORY_MAX, GEOCODE_NEGATIVE_TTL_H
+from app.core.metrics import CallStats
+from app.core.refresher import BackgroundRefresher
+from app.core.ttlstore import TTLStore
 from app.main import app
+from app.routers import optimize, validation
+from app.services import address_index, geocoding, prefetch, validation_jobs, validation_sessions
+from app.services.route_sessions import clear_sessions
+from app.utils.house_numbers import HouseNumberIndex
 
 
 @pytest.fixture
 def client():
     return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def reset_single_flight():
+    """Cada test parte sin resultados recientes coalescidos (single-flight)."""
+    optimize._optimize_flights.clear()
+    validation._start_flights.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_shared_state(tmp_path, monkeypatch):
+    """El estado compartido entre workers (sesiones, rebuild, invalidaciones)
+    vive en tmp_path; cada test parte sin conexiones ni eventos vistos."""
+    shared_state.reset()
+    monkeypatch.setattr(shared_state, "_DB", tmp_path / "shared_state.sqlite3")
+    yield
+    shared_state.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_route_sessions(isolated_shared_state):
+    """Cada test parte sin sesiones de ruta (route_id) ni de validación, precalentados ni jobs."""
+    clear_sessions()
+    prefetch.clear_jobs()
+    validation_jobs.clear_jobs()
+    validation_sessions.clear_sessions()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_geocode_store(tmp_path, monkeypatch):
+    """La caché de geocodificación (SQLite, también la negativa) y el índice de
+    portales OSM viven en tmp_path y se cargan vacíos."""
+    monkeypatch.setattr(geocoding, "_CACHE_DB", tmp_path / "geocode_cache.sqlite3")
+    monkeypatch.setattr(geocoding, "_CACHE_FILE", tmp_path / "geocode_cache.json")
+    monkeypatch.setattr(geocoding, "_store", None)
+    monkeypatch.setattr(geocoding, "_failed_store", None)
+    monkeypatch.setattr(geocoding, "_corrections_store", None)
+    monkeypatch.setattr(geocoding, "_corrections", {})
+    monkeypatch.setattr(geocoding, "_corrections_catalog", None)
+    monkeypatch.setattr(address_index, "_INDEX_FILE", tmp_path / "address_index.json")
+    monkeypatch.setattr(address_index, "_index", None)
+    monkeypatch.setattr(geocoding, "_cache", TTLStore(2 * GEOCODE_MEMORY_MAX, math.inf))
+    monkeypatch.setattr(geocoding, "_persisted", TTLStore(GEOCODE_MEMORY_MAX, math.inf))
+    monkeypatch.setattr(geocoding, "_failed", TTLStore(GEOCODE_MEMORY_MAX, GEOCODE_NEGATIVE_TTL_H * 3600))
+    monkeypatch.setattr(geocoding, "_house_numbers", HouseNumberIndex())
+    monkeypatch.setattr(geocoding, "_house_numbers_ready", False)
+    # Refresco stale-while-revalidate sin hilo: los tests lo ejecutan con run_pending()
+    monkeypatch.setattr(geocoding, "_refresher", BackgroundRefresher(
+        "geocode-test", geocoding._refresh_entry, rate_per_s=1e6, autostart=False,
+    ))
+    monkeypatch.setattr(geocoding, "_refresh_stats", dict.fromkeys(geocoding._refresh_stats, 0))
+    monkeypatch.setattr(geocoding, "_google_calls", CallStats())
+    monkeypatch.setattr(geocoding, "_loaded", False)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def isolated_snap_cache(tmp_path, monkeypatch):
+    """La caché de snap vive en tmp_path y arranca vacía y sin cargar.
+
+    Se vacía en su sitio: routing.py importa _snap_cache por nombre.
+    """
+    osrm._snap_cache.clear()
+    monkeypatch.setattr(osrm, "_SNAP_CACHE_FILE", tmp_path / "snap_cache.json")
+    monkeypatch.setattr(osrm, "_SNAP_DB", tmp_path / "snap_cache.sqlite3")
+    monkeypatch.setattr(osrm, "_snap_store", None)
+    monkeypatch.setattr(osrm, "_snap_loaded", False)
+    yield
+    osrm._snap_cache.clear()
@@ -0,0 +1,117 @@
+"""
+Tests del índice local de portales — app/services/address_index.py.
+
+Cubre (sin osmium real: el XML filtrado se escribe a mano):
+  - _parse_osm_xml → nodos y vías (centroide) con addr:*, claves normalizadas,
+                     varios números separados por ';'
+  - lookup         → número exacto, rangos, sin número, recarga por mtime
+  - build_index    → invoca osmium tags-filter y escribe address_index.json
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.services import address_index
+
+_OSM_XML = """<?xml version='1.0' encoding='UTF-8'?>
+<osm version="0.6">
+  <node id="1" lat="37.8050000" lon="-5.0990000">
+    <tag k="addr:street" v="Calle Gaitán"/>
+    <tag k="addr:housenumber" v="12 A"/>
+  </node>
+  <node id="2" lat="37.8000000" lon="-5.1000000"/>
+  <node id="3" lat="37.8002000" lon="-5.1002000"/>
+  <node id="4" lat="37.8060000" lon="-5.1010000">
+    <tag k="addr:housenumber" v="7"/>
+  </node>
+  <way id="10">
+    <nd ref="2"/>
+    <nd ref="3"/>
+    <tag k="building" v="yes"/>
+    <tag k="addr:street" v="Avenida de Andalucía"/>
+    <tag k="addr:housenumber" v="4;6"/>
+  </way>
+</osm>
+"""
+
+
+@pytest.fixture
+def osm_xml(tmp_path):
+    path = tmp_path / "addr.osm"
+    path.write_text(_OSM_XML, "utf-8")
+    return path
+
+
+def _write_index(addresses: dict) -> None:
+    address_index._INDEX_FILE.write_text(json.dumps({"addresses": addresses}), "utf-8")
+
+
+class TestParseOsmXml:
+
+    def test_nodo_con_portal(self, osm_xml):
+        index = address_index._parse_osm_xml(osm_xml)
+        assert index["calle gaitan#12a"] == (37.805, -5.099)
+
+    def test_via_usa_centroide_y_separa_numeros(self, osm_xml):
+        index = address_index._parse_osm_xml(osm_xml)
+        assert index["avenida de andalucia#4"] == (37.8001, -5.1001)
+        assert index["avenida de andalucia#6"] == (37.8001, -5.1001)
+
+    def test_sin_calle_no_se_indexa(self, osm_xml):
+        index = address_index._parse_osm_xml(osm_xml)
+        assert len(index) == 3
+
+
+class TestLookup:
+
+    def test_sin_indice_devuelve_none(self):
+        assert address_index.lookup("Calle Gaitán", "12a") is None
+
+    def test_portal_exacto_normalizado(self):
+        _write_index({"calle gaitan#12a": [37.805, -5.099]})
+        assert address_index.lookup("CALLE GAITÁN", "12A") == (37.805, -5.099)
+
+    def test_rango_prueba_el_primer_numero(self):
+        _write_index({"calle gaitan#96": [37.805, -5.099]})
+        assert address_index.lookup("Calle Gaitán", "96-98") == (37.805, -5.099)
+
+    def test_sin_numero_no_busca(self):
+        _write_index({"calle gaitan#": [37.805, -5.099]})
+        assert address_index.lookup("Calle Gaitán", "") is None
+        assert address_index.lookup("Calle Gaitán", "sn") is None
+
+    def test_recarga_si_cambia_el_fichero(self):
+        _write_index({"calle gaitan#1": [37.805, -5.099]})
+        assert address_index.lookup("Calle Gaitán", "2") is None
+        _write_index({"calle gaitan#2": [37.806, -5.100]})
+        mtime = address_index._INDEX_FILE.stat().st_mtime + 1
+        os.utime(address_index._INDEX_FILE, (mtime, mtime))
+        assert address_index.lookup("Calle Gaitán", "2") == (37.806, -5.100)
+
+
+class TestBuildIndex:
+
+    def test_filtra_con_osmium_y_escribe_json(self, tmp_path):
+        def fake_osmium(cmd, **kwargs):
+            assert cmd[:2] == ["osmium", "tags-filter"]
+            assert "nwr/addr:housenumber" in cmd
+            out = cmd[cmd.index("-o") + 1]
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(_OSM_XML)
+            return type("R", (), {"returncode": 0, "stderr": ""})()
+
+        with patch("app.services.address_index.subprocess.run", side_effect=fake_osmium):
+            n = address_index.build_index(tmp_path / "posadas.osm.pbf")
+        assert n == 3
+        assert address_index.lookup("Avenida de Andalucía", "6") == (37.8001, -5.1001)
+
+    def test_error_de_osmium_no_toca_el_indice(self, tmp_path):
+        _write_index({"calle gaitan#1": [37.805, -5.099]})
+        failed = type("R", (), {"returncode": 1, "stderr": "boom"})()
+        with patch("app.services.address_index.subprocess.run", return_value=failed), \
+             pytest.raises(RuntimeError):
+            address_index.build_index(tmp_path / "posadas.osm.pbf")
+        assert address_index.lookup("Calle Gaitán", "1") == (37.805, -5.099)
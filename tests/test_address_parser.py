@@ -0,0 +1,35 @@
+"""
+Tests unitarios — app/utils/address_parser.py.
+
+El comportamiento del parseo se cubre en test_geocoding_pure.py (vía
+_parse_address); aquí solo la memoización del AddressParser.
+"""
+
+from app.utils.address_parser import AddressParser
+
+
+class TestAddressParserMemo:
+
+    def test_resultado_igual_con_y_sin_memo(self):
+        parser = AddressParser()
+        for raw in ("C/ Gaitán 24, Posadas", "Avda. Blas Infante s/n", "Calle Mayor 3 2º B"):
+            assert parser.parse(raw) == parser.parse_uncached(raw)
+
+    def test_direccion_repetida_se_parsea_una_vez(self):
+        parser = AddressParser()
+        parser.parse("Calle Mayor 1")
+        parser.parse("Calle Mayor 1")
+        info = parser.cache_info()
+        assert (info.hits, info.misses) == (1, 1)
+
+    def test_memo_acotado(self):
+        parser = AddressParser(memo_size=2)
+        for raw in ("Calle A 1", "Calle B 2", "Calle C 3"):
+            parser.parse(raw)
+        assert parser.cache_info().currsize == 2
+
+    def test_cache_clear(self):
+        parser = AddressParser()
+        parser.parse("Calle Mayor 1")
+        parser.cache_clear()
+        assert parser.cache_info().currsize == 0
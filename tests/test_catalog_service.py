@@ -1,5 +1,5 @@
 """
-Tests del servicio catalog.py: get_catalog().
+Tests del servicio catalog.py: get_catalog() y reload_catalog().
 Los ficheros de datos se redirigen a tmp_path para no tocar el disco real.
 """
 
@@ -58,3 +58,25 @@ def test_catalogo_fichero_malformado_devuelve_vacio(tmp_path):
     (tmp_path / "streets.json").write_text("no es json válido", "utf-8")
     result = cat.get_catalog()
     assert result == []
+
+
+# ── reload_catalog ────────────────────────────────────────────────────────────
+
+def test_recarga_lee_la_version_nueva(tmp_path):
+    _write_streets(tmp_path / "streets.json", ["Calle X"])
+    cat.get_catalog()
+    _write_streets(tmp_path / "streets.json", ["Calle X", "Calle Y"])
+    assert cat.reload_catalog() == ["Calle X", "Calle Y"]
+    assert cat.get_catalog() == ["Calle X", "Calle Y"]
+
+
+def test_recarga_fallida_conserva_el_catalogo(tmp_path):
+    _write_streets(tmp_path / "streets.json", ["Calle X"])
+    cat.get_catalog()
+    (tmp_path / "streets.json").write_text("no es json válido", "utf-8")
+    with pytest.raises(ValueError):
+        cat.reload_catalog()
+    _write_streets(tmp_path / "streets.json", [])
+    with pytest.raises(ValueError):
+        cat.reload_catalog()
+    assert cat.get_catalog() == ["Calle X"]
@@ -0,0 +1,93 @@
+"""
+Tests unitarios — app/utils/csv_rows.py.
+
+Cubre:
+  - detect_columns → nombres y sinónimos de la app, columnas ausentes
+  - CsvRowParser   → trozos arbitrarios (líneas y UTF-8 partidos), comillas
+                     con comas y saltos de línea, BOM, separador ";",
+                     filas vacías o sin dirección, cabecera sin dirección
+"""
+
+import pytest
+
+from app.utils.csv_rows import CsvRowParser, detect_columns
+
+CSV = (
+    "cliente,direccion,ciudad,nota,agencia,alias,tipo\n"
+    "Ana,Calle Mayor 1,Posadas,,MRW,,Normal\n"
+    '"Pérez, Luis","Calle Gaitán 8",Posadas,"Dejar en\nportería",SEUR,Bar Pepe,express\n'
+    "\n"
+    "Sin dirección,,Posadas,,,,\n"
+    "Eva,Av. de Andalucía 3,Posadas,,,,\n"
+)
+
+
+def _parse(data: bytes, chunk: int) -> tuple[list[dict], CsvRowParser]:
+    parser = CsvRowParser()
+    rows = []
+    for i in range(0, len(data), chunk):
+        rows.extend(parser.feed(data[i:i + chunk]))
+    rows.extend(parser.close())
+    return rows, parser
+
+
+class TestDetectColumns:
+
+    def test_nombres_de_la_app(self):
+        cols = detect_columns(["cliente", "direccion", "ciudad", "nota", "agencia", "alias", "tipo"])
+        assert cols == {
+            "cliente": 0, "direccion": 1, "ciudad": 2, "nota": 3,
+            "agencia": 4, "alias": 5, "tipo": 6,
+        }
+
+    def test_sinonimos_y_columnas_ausentes(self):
+        cols = detect_columns([" Nombre ", "Domicilio", "Transportista"])
+        assert cols["cliente"] == 0
+        assert cols["direccion"] == 1
+        assert cols["agencia"] == 2
+        assert cols["alias"] == -1
+
+
+class TestCsvRowParser:
+
+    @pytest.mark.parametrize("chunk", [1, 3, 7, 64, 10_000])
+    def test_mismas_filas_sea_cual_sea_el_trozo(self, chunk):
+        rows, parser = _parse(CSV.encode("utf-8"), chunk)
+        assert [r["direccion"] for r in rows] == ["Calle Mayor 1", "Calle Gaitán 8", "Av. de Andalucía 3"]
+        assert rows[1]["cliente"] == "Pérez, Luis"
+        assert rows[1]["nota"] == "Dejar en\nportería"
+        assert rows[1]["alias"] == "Bar Pepe"
+        assert rows[1]["tipo"] == "express"
+        assert parser.rows == 3
+        assert parser.skipped == 1
+
+    def test_bom_crlf_y_punto_y_coma(self):
+        data = "\ufeffDirección;Cliente\r\nCalle Real 2;Ana\r\nCalle Real 4;Luis".encode("utf-8")
+        rows, _ = _parse(data, 5)
+        assert rows == [
+            {"cliente": "Ana", "direccion": "Calle Real 2", "ciudad": "", "nota": "",
+             "agencia": "", "alias": "", "tipo": ""},
+            {"cliente": "Luis", "direccion": "Calle Real 4", "ciudad": "", "nota": "",
+             "agencia": "", "alias": "", "tipo": ""},
+        ]
+
+    def test_filas_cortas_rellenan_con_vacio(self):
+        rows, _ = _parse(b"direccion,cliente,alias\nCalle Mayor 1\n", 100)
+        assert rows[0]["cliente"] == "" and rows[0]["alias"] == ""
+
+    def test_solo_retiene_la_linea_a_medias(self):
+        parser = CsvRowParser()
+        parser.feed(b"direccion\n")
+        for i in range(1000):
+            parser.feed(f"Calle Mayor {i}\n".encode())
+        parser.feed(b"Calle Ma")
+        assert parser._tail == "Calle Ma"
+        assert parser.rows == 1000
+
+    def test_cabecera_sin_direccion(self):
+        with pytest.raises(ValueError, match="direccion"):
+            _parse(b"cliente,ciudad\nAna,Posadas\n", 100)
+
+    def test_fichero_vacio(self):
+        rows, parser = _parse(b"", 10)
+        assert rows == [] and parser.rows == 0
@@ -1,17 +1,31 @@
 """
-Tests del servicio geocoding.py: pipeline geocode(), add_override().
+Tests del servicio geocoding.py: pipeline geocode(), add_override(), add_overrides().
 
 Se mockean las llamadas HTTP a Google y se aísla el estado global entre tests:
-  - _cache y _persisted se limpian en cada test
-  - _CACHE_FILE se redirige a tmp_path (no toca el disco real)
+  - _cache y _persisted se limpian en cada test (_failed, en conftest.py)
+  - _CACHE_FILE se redirige a tmp_path y _CACHE_DB también (conftest.py):
+    no se toca el disco real
   - _osm_streets = [] para evitar carga del catálogo de calles
   - GOOGLE_API_KEY se fija a "TEST_KEY" para que las llamadas Google no se salten
+  - _google_bucket sin límite efectivo (el ritmo se prueba en test_ratelimit.py;
+    los tests de 429 instalan uno adaptativo real)
 """
 
+import asyncio
+import json
+import math
+import os
+import time
+
+import httpx
+import requests
 import pytest
 from unittest.mock import patch, Mock
 
 import app.services.geocoding as geo
+from app.services import address_index
+from app.core.ratelimit import AdaptiveTokenBucket
+from app.core.ttlstore import TTLStore, registered_caches
 
 
 # ── Fixture: estado limpio en cada test ───────────────────────────────────────
@@ -21,13 +35,12 @@ def reset_geo(tmp_path, monkeypatch):
     geo._cache.clear()
     geo._persisted.clear()
     # Catálogo vacío → _find_closest_street devuelve None sin llamadas HTTP
-    monkeypatch.setattr(geo, "_streets", [])
-    monkeypatch.setattr(geo, "_streets_norm", [])
-    monkeypatch.setattr(geo, "_streets_norm_set", set())
+    monkeypatch.setattr(geo, "_streets_version", geo._StreetsVersion([]))
     # Fichero de caché en directorio temporal
     monkeypatch.setattr(geo, "_CACHE_FILE", tmp_path / "cache.json")
     # API key válida por defecto (tests individuales pueden sobrescribirla)
     monkeypatch.setattr(geo, "GOOGLE_API_KEY", "TEST_KEY")
+    monkeypatch.setattr(geo, "_google_bucket", AdaptiveTokenBucket(1e6, 1000, min_rate=1e6))
     yield
     geo._cache.clear()
     geo._persisted.clear()
@@ -71,6 +84,13 @@ def _zero_results():
     return m
 
 
+def _over_query_limit():
+    """Mock de Google con cuota agotada (HTTP 200, status OVER_QUERY_LIMIT)."""
+    m = _zero_results()
+    m.json.return_value = {"status": "OVER_QUERY_LIMIT", "results": []}
+    return m
+
+
 # ── Casos básicos ─────────────────────────────────────────────────────────────
 
 def test_direccion_vacia_devuelve_failed():
@@ -108,7 +128,7 @@ def test_add_override_persiste_en_cache():
 
 def test_override_no_llama_google():
     geo.add_override("Calle Mayor 1", 37.805, -5.099)
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         geo.geocode("Calle Mayor 1")
         mock_get.assert_not_called()
 
@@ -123,7 +143,7 @@ def test_cache_hit_no_llama_google():
         "source": "google", "confidence": "EXACT_ADDRESS",
         "cached_at": time.time(),
     }
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         coord, conf = geo.geocode("Calle Gaitán 5")
         mock_get.assert_not_called()
     assert coord == (37.806, -5.100)
@@ -133,17 +153,345 @@ def test_cache_hit_no_llama_google():
 def test_cache_alias_devuelve_exact_place():
     """Si el alias está en caché, lo devuelve sin Google."""
     geo._cache["@bar el sol"] = (37.806, -5.100)
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         coord, conf = geo.geocode("Calle Mayor 1", alias="Bar El Sol")
         mock_get.assert_not_called()
     assert coord == (37.806, -5.100)
     assert conf == "EXACT_PLACE"
 
 
+# ── Persistencia (SQLite) ─────────────────────────────────────────────────────
+
+def _simular_reinicio():
+    """Vacía la memoria del proceso: la siguiente llamada recarga del almacén."""
+    geo._cache.clear()
+    geo._persisted.clear()
+    geo._loaded = False
+
+
+def test_cache_sobrevive_a_un_reinicio():
+    geo.add_override("Calle Mayor 1", 37.805, -5.099)
+    _simular_reinicio()
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, conf = geo.geocode("Calle Mayor 1")
+        mock_get.assert_not_called()
+    assert coord == (37.805, -5.099)
+    assert conf == "OVERRIDE"
+
+
+def test_entrada_expulsada_de_memoria_se_relee_de_sqlite(monkeypatch):
+    monkeypatch.setattr(geo, "_persisted", TTLStore(1, math.inf))
+    monkeypatch.setattr(geo, "_cache", TTLStore(2, math.inf))
+    geo.add_override("Calle Mayor 1", 37.805, -5.099)
+    geo.add_override("Calle Mayor 2", 37.806, -5.099)   # expulsa Calle Mayor 1
+    assert "calle mayor#1" not in geo._persisted
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, conf = geo.geocode("Calle Mayor 1")
+        mock_get.assert_not_called()
+    assert (coord, conf) == ((37.805, -5.099), "OVERRIDE")
+    assert "calle mayor#1" in geo._persisted
+
+
+def test_coords_vaciadas_se_reconstruyen_de_la_entrada():
+    """geocode.coords vaciada (admin o LRU) con la entrada aún en memoria: no se
+    vuelve a llamar a Google ni se apunta un FAILED."""
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")):
+        geo.geocode("Calle Mayor 1")
+    registered_caches()["geocode.coords"].evict_prefix("")
+    assert "calle mayor#1" in geo._persisted
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()) as mock_get:
+        coord, conf = geo.geocode("Calle Mayor 1")
+        mock_get.assert_not_called()
+    assert (coord, conf) == ((37.805, -5.099), "EXACT_ADDRESS")
+    assert "calle mayor#1" in geo._cache
+    assert len(geo._failed) == 0
+
+
+def test_cambio_de_otro_worker_se_relee_del_almacen(monkeypatch):
+    """Otro worker sustituye la entrada en SQLite y lo anuncia: esta memoria la relee."""
+    from app.adapters import shared_state
+    from app.adapters.kvstore import InvalidationLog
+
+    geo.add_override("Calle Mayor 1", 37.805, -5.099)
+    geo._get_store().put("calle mayor#1", {
+        "lat": 37.811, "lon": -5.101, "street": "Calle Mayor", "number": "1",
+        "source": "override", "confidence": "OVERRIDE",
+    })
+    InvalidationLog(shared_state._DB).publish("otro", "geocode", "calle mayor#1")
+    monkeypatch.setattr(shared_state, "_next_poll", 0.0)
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, _ = geo.geocode("Calle Mayor 1")
+        mock_get.assert_not_called()
+    assert coord == (37.811, -5.101)
+
+
+def test_eventos_perdidos_vacian_la_memoria_y_se_recarga(monkeypatch):
+    """Otro worker cambió la entrada y su evento se borró sin leerlo: se vacía
+    todo y la siguiente consulta recarga del almacén."""
+    from app.adapters import shared_state
+    from app.adapters.kvstore import InvalidationLog
+
+    geo.add_override("Calle Mayor 1", 37.805, -5.099)
+    shared_state.poll(force=True)
+    geo._get_store().put("calle mayor#1", {
+        "lat": 37.811, "lon": -5.101, "street": "Calle Mayor", "number": "1",
+        "source": "override", "confidence": "OVERRIDE",
+    })
+    log = InvalidationLog(shared_state._DB)
+    log.publish("otro", "geocode", "calle mayor#1")
+    log.trim(older_than=float("inf"))
+    monkeypatch.setattr(shared_state, "_next_poll", 0.0)
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, _ = geo.geocode("Calle Mayor 1")
+        mock_get.assert_not_called()
+    assert coord == (37.811, -5.101)
+
+
+def test_borrado_de_otro_worker_se_olvida(monkeypatch):
+    from app.adapters import shared_state
+    from app.adapters.kvstore import InvalidationLog
+
+    geo._store_result(
+        "calle mayor#1", (37.805, -5.099), "Calle Mayor", "1",
+        "google", "EXACT_ADDRESS", None, "Bar El Sol",
+    )
+    geo._get_store().delete("calle mayor#1")
+    InvalidationLog(shared_state._DB).publish("otro", "geocode", "calle mayor#1")
+    shared_state.poll(force=True)
+    assert "calle mayor#1" not in geo._persisted
+    assert "calle mayor#1" not in geo._cache
+    assert "@bar el sol" not in geo._cache
+
+
+def test_migra_el_json_antiguo_al_primer_uso():
+    street, number = geo._parse_address("Calle Gaitán 5")
+    key = geo._cache_key(street, number)
+    geo._CACHE_FILE.write_text(json.dumps({key: {
+        "lat": 37.806, "lon": -5.100, "source": "override", "confidence": "OVERRIDE",
+    }}), "utf-8")
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, _ = geo.geocode("Calle Gaitán 5")
+        mock_get.assert_not_called()
+    assert coord == (37.806, -5.100)
+    assert geo._get_store().get(key)["lat"] == 37.806
+
+
+def _entrada_caducada(key: str, lat: float = 37.805, lon: float = -5.099, **extra) -> None:
+    """Mete en el almacén una entrada de Google con el TTL superado."""
+    geo._get_store().put(key, {
+        "lat": lat, "lon": lon, "street": "Calle Mayor", "number": "1",
+        "source": "google", "confidence": "EXACT_ADDRESS",
+        "cached_at": time.time() - (geo.GOOGLE_CACHE_TTL_DAYS + 1) * 86400,
+        **extra,
+    })
+
+
+# ── Stale-while-revalidate ────────────────────────────────────────────────────
+
+def test_entrada_caducada_se_sirve_sin_google_y_se_encola():
+    _entrada_caducada("calle mayor#1")
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, conf = geo.geocode("Calle Mayor 1")
+        mock_get.assert_not_called()
+    assert coord == (37.805, -5.099)
+    assert conf == "EXACT_ADDRESS"
+    assert geo._refresher.pending() == 1
+    assert geo._refresh_stats["stale_served"] == 1
+
+
+def test_entrada_caducada_se_encola_una_sola_vez():
+    _entrada_caducada("calle mayor#1")
+    for _ in range(3):
+        geo.geocode("Calle Mayor 1")
+    assert geo._refresher.pending() == 1
+
+
+def test_refresco_actualiza_coords_y_ttl():
+    _entrada_caducada("calle mayor#1")
+    geo.geocode("Calle Mayor 1")
+    with patch("app.services.geocoding._http_get",
+               return_value=_google_resp("ROOFTOP", lat=37.806, lng=-5.100)) as mock_get:
+        assert geo._refresher.run_pending() == 1
+        mock_get.assert_called_once()
+    entry = geo._get_store().get("calle mayor#1")
+    assert entry["lat"] == 37.806
+    assert not geo._google_cache_expired(entry)
+    assert geo.geocode("Calle Mayor 1")[0] == (37.806, -5.100)
+    stats = geo.get_cache_stats()
+    assert stats["refreshed"] == 1
+    assert stats["changed"] == 1
+    assert stats["stale"] == 0
+
+
+def test_refresco_sin_cambios_no_cuenta_como_cambiada():
+    _entrada_caducada("calle mayor#1")
+    geo.geocode("Calle Mayor 1")
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")):
+        geo._refresher.run_pending()
+    assert geo._refresh_stats["refreshed"] == 1
+    assert geo._refresh_stats["changed"] == 0
+
+
+def test_refresco_sin_rooftop_borra_la_entrada():
+    _entrada_caducada("calle mayor#1")
+    geo.geocode("Calle Mayor 1")
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo._refresher.run_pending()
+    assert geo._get_store().get("calle mayor#1") is None
+    assert geo._refresh_stats["dropped"] == 1
+
+
+def test_refresco_con_google_caido_conserva_la_entrada(monkeypatch):
+    monkeypatch.setattr(geo.time, "sleep", lambda s: None)
+    _entrada_caducada("calle mayor#1")
+    geo.geocode("Calle Mayor 1")
+    with patch("app.services.geocoding._http_get",
+               side_effect=requests.ConnectionError("caído")):
+        geo._refresher.run_pending()
+    assert geo.geocode("Calle Mayor 1")[0] == (37.805, -5.099)
+    assert geo._refresh_stats["errors"] == 1
+
+
+def test_refresco_no_pisa_un_override_posterior():
+    _entrada_caducada("calle mayor#1")
+    geo.geocode("Calle Mayor 1")
+    geo.add_override("Calle Mayor 1", 37.807, -5.101)
+    with patch("app.services.geocoding._http_get") as mock_get:
+        geo._refresher.run_pending()
+        mock_get.assert_not_called()
+    assert geo.geocode("Calle Mayor 1") == ((37.807, -5.101), "OVERRIDE")
+
+
+def test_refresco_places_usa_alias_y_coord_antigua():
+    _entrada_caducada(
+        "calle mayor#1", source="places", confidence="EXACT_PLACE", alias="Bar El Sol",
+    )
+    geo.geocode("Calle Mayor 1")
+    with patch("app.services.geocoding._http_get",
+               return_value=_places_resp(name="Bar El Sol")) as mock_get:
+        geo._refresher.run_pending()
+        params = mock_get.call_args.kwargs["params"]
+    assert params["input"].startswith("Bar El Sol")
+    assert geo._refresh_stats["refreshed"] == 1
+
+
+# ── Índice local de portales OSM ──────────────────────────────────────────────
+
+def _indice_osm(addresses: dict) -> None:
+    address_index._INDEX_FILE.write_text(json.dumps({"addresses": addresses}), "utf-8")
+
+
+def test_portal_en_osm_devuelve_exact_address_sin_google():
+    _indice_osm({"calle mayor#1": [37.8051, -5.0991]})
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, conf = geo.geocode("Calle Mayor 1")
+        mock_get.assert_not_called()
+    assert coord == (37.8051, -5.0991)
+    assert conf == "EXACT_ADDRESS"
+
+
+def test_portal_en_osm_con_nombre_corregido(monkeypatch):
+    _indice_osm({"calle gaitan#5": [37.8051, -5.0991]})
+    monkeypatch.setattr(geo, "_find_closest_street", lambda street: "Calle Gaitán")
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, conf = geo.geocode("Calle Gaitn 5")
+        mock_get.assert_not_called()
+    assert coord == (37.8051, -5.0991)
+    assert conf == "EXACT_ADDRESS"
+
+
+def test_override_tiene_prioridad_sobre_osm():
+    _indice_osm({"calle mayor#1": [37.8051, -5.0991]})
+    geo.add_override("Calle Mayor 1", 37.805, -5.099)
+    assert geo.geocode("Calle Mayor 1") == ((37.805, -5.099), "OVERRIDE")
+
+
+def test_geocode_async_usa_indice_osm():
+    _indice_osm({"calle mayor#1": [37.8051, -5.0991]})
+    coord, conf = asyncio.run(geo.geocode_async("Calle Mayor 1"))
+    assert coord == (37.8051, -5.0991)
+    assert conf == "EXACT_ADDRESS"
+
+
+# ── Interpolación local de portales ───────────────────────────────────────────
+
+def _rooftops_cacheados(*numeros: int) -> None:
+    """Portales ROOFTOP de Calle Gaitán cacheados (10 m cada 2 números)."""
+    for n in numeros:
+        lat = 37.80 + n * 5 / 111_320
+        with patch("app.services.geocoding._http_get",
+                   return_value=_google_resp("ROOFTOP", lat=lat, lng=-5.10)):
+            geo.geocode(f"Calle Gaitán {n}")
+
+
+def test_numero_entre_rooftops_cacheados_se_interpola_sin_google():
+    _rooftops_cacheados(2, 8, 24)
+    with patch("app.services.geocoding._http_get") as mock_get:
+        coord, conf = geo.geocode("Calle Gaitán 12")
+        mock_get.assert_not_called()
+    assert conf == "INTERPOLATED"
+    assert coord == pytest.approx((37.80 + 12 * 5 / 111_320, -5.10))
+
+
+def test_interpolacion_pobre_va_a_google():
+    _rooftops_cacheados(2, 40)
+    with patch("app.services.geocoding._http_get",
+               return_value=_google_resp("ROOFTOP")) as mock_get:
+        _, conf = geo.geocode("Calle Gaitán 20")
+        mock_get.assert_called_once()
+    assert conf == "EXACT_ADDRESS"
+
+
+def test_interpolado_no_se_cachea_ni_sirve_de_anclaje():
+    _rooftops_cacheados(2, 8)
+    geo.geocode("Calle Gaitán 4")
+    assert "calle gaitan#4" not in geo._persisted
+    assert len(geo._house_numbers) == 2
+
+
+def test_override_sirve_de_anclaje():
+    geo.add_override("Calle Gaitán 2", 37.8001, -5.1)
+    geo.add_override("Calle Gaitán 10", 37.8005, -5.1)
+    coord, conf = geo.geocode("Calle Gaitán 6")
+    assert conf == "INTERPOLATED"
+    assert coord == pytest.approx((37.8003, -5.1))
+
+
+def test_carga_no_indexa_anclajes_hasta_interpolar():
+    _rooftops_cacheados(2, 8)
+    _simular_reinicio()
+    geo._ensure_loaded()
+    assert len(geo._house_numbers) == 0
+    _, conf = geo.geocode("Calle Gaitán 4")
+    assert conf == "INTERPOLATED"
+    assert len(geo._house_numbers) == 2
+
+
+def test_warm_up_carga_cache_anclajes_y_catalogo(monkeypatch):
+    _rooftops_cacheados(2, 8)
+    _simular_reinicio()
+    monkeypatch.setattr(geo, "_streets_version", None)
+    with patch("app.services.catalog.get_catalog", return_value=["Calle Gaitán"]):
+        assert geo.warm_up() == {"entries": 2, "streets": 1}
+        assert geo._loaded is True
+        assert len(geo._house_numbers) == 2
+        assert geo._corrections_catalog is geo._streets_version.streets
+
+
+def test_anclajes_se_cargan_del_almacen():
+    _rooftops_cacheados(2, 8)
+    _simular_reinicio()
+    geo._house_numbers.clear()
+    with patch("app.services.geocoding._http_get") as mock_get:
+        _, conf = geo.geocode("Calle Gaitán 4")
+        mock_get.assert_not_called()
+    assert conf == "INTERPOLATED"
+
+
 # ── Google Geocoding ──────────────────────────────────────────────────────────
 
 def test_google_rooftop_devuelve_exact_address():
-    with patch("app.services.geocoding.requests.get", return_value=_google_resp("ROOFTOP")):
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")):
         coord, conf = geo.geocode("Calle Mayor 1")
     assert coord is not None
     assert conf == "EXACT_ADDRESS"
@@ -151,7 +499,7 @@ def test_google_rooftop_devuelve_exact_address():
 
 def test_google_range_interpolated_sin_alias_devuelve_failed():
     """RANGE_INTERPOLATED sin alias → no se acepta, requiere pin manual."""
-    with patch("app.services.geocoding.requests.get", return_value=_google_resp("RANGE_INTERPOLATED")):
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("RANGE_INTERPOLATED")):
         coord, conf = geo.geocode("Calle Mayor 1")
     assert coord is None
     assert conf == "FAILED"
@@ -159,7 +507,7 @@ def test_google_range_interpolated_sin_alias_devuelve_failed():
 
 def test_google_geometric_center_sin_alias_devuelve_failed():
     """GEOMETRIC_CENTER sin alias → no se acepta, requiere pin manual."""
-    with patch("app.services.geocoding.requests.get", return_value=_google_resp("GEOMETRIC_CENTER")):
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("GEOMETRIC_CENTER")):
         coord, conf = geo.geocode("Calle Mayor 1")
     assert coord is None
     assert conf == "FAILED"
@@ -167,7 +515,7 @@ def test_google_geometric_center_sin_alias_devuelve_failed():
 
 def test_google_fuera_de_bbox_devuelve_failed():
     # Madrid: fuera del bbox de Posadas
-    with patch("app.services.geocoding.requests.get",
+    with patch("app.services.geocoding._http_get",
                return_value=_google_resp("ROOFTOP", lat=40.4, lng=-3.7)):
         coord, conf = geo.geocode("Calle Mayor 1")
     assert coord is None
@@ -175,29 +523,231 @@ def test_google_fuera_de_bbox_devuelve_failed():
 
 
 def test_google_zero_results_devuelve_failed():
-    with patch("app.services.geocoding.requests.get", return_value=_zero_results()):
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
         coord, conf = geo.geocode("Calle Inexistente 999")
     assert coord is None
     assert conf == "FAILED"
 
 
-def test_failed_no_cachea_y_reintenta_google():
-    """FAILED no se cachea: la segunda llamada reintenta Google y puede tener éxito."""
-    with patch("app.services.geocoding.requests.get", return_value=_zero_results()):
-        coord1, conf1 = geo.geocode("Calle Inexistente 999")  # FAILED, no se cachea
+def test_failed_va_a_cache_negativa_y_no_repite_google():
+    """FAILED se recuerda: la segunda llamada no vuelve a consultar Google."""
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        coord1, conf1 = geo.geocode("Calle Inexistente 999")
     assert coord1 is None
     assert conf1 == "FAILED"
 
-    with patch("app.services.geocoding.requests.get", return_value=_google_resp("ROOFTOP")) as mock_get:
-        coord2, conf2 = geo.geocode("Calle Inexistente 999")  # segunda llamada → reintenta
-        mock_get.assert_called_once()  # sí llama a Google (no estaba en caché)
-    assert coord2 is not None
-    assert conf2 == "EXACT_ADDRESS"
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")) as mock_get:
+        coord2, conf2 = geo.geocode("Calle Inexistente 999")
+        mock_get.assert_not_called()
+    assert coord2 is None
+    assert conf2 == "FAILED"
+
+
+def test_cache_negativa_se_ignora_con_use_negative_cache_false():
+    """Reintento explícito: vuelve a Google y, si acierta, limpia la caché negativa."""
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo.geocode("Calle Inexistente 999")
+
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")) as mock_get:
+        coord, conf = geo.geocode("Calle Inexistente 999", use_negative_cache=False)
+        mock_get.assert_called_once()
+    assert conf == "EXACT_ADDRESS"
+    assert len(geo._failed) == 0
+
+
+def test_cache_negativa_distingue_alias():
+    """La clave negativa es dirección + alias: con otro alias se consulta de nuevo."""
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo.geocode("Calle Mayor 1")
+
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()) as mock_get:
+        geo.geocode("Calle Mayor 1", alias="Bar El Sol")
+        assert mock_get.call_count == 2  # Geocoding + Places
+
+
+def test_cache_negativa_expira(monkeypatch):
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo.geocode("Calle Inexistente 999")
+
+    futuro = time.time() + (geo.GEOCODE_NEGATIVE_TTL_H + 1) * 3600
+    monkeypatch.setattr(geo.time, "time", lambda: futuro)
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")) as mock_get:
+        _, conf = geo.geocode("Calle Inexistente 999")
+        mock_get.assert_called_once()
+    assert conf == "EXACT_ADDRESS"
+
+
+def test_cache_negativa_acotada_en_memoria(monkeypatch):
+    """La caché negativa en memoria es una LRU registrada: una clave expulsada
+    se relee del almacén y sigue evitando la llamada a Google."""
+    monkeypatch.setattr(geo, "_failed", TTLStore(2, geo.GEOCODE_NEGATIVE_TTL_H * 3600))
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        for n in (1, 2, 3):
+            geo.geocode(f"Calle Inexistente {n}")
+    assert len(geo._failed) == 2
+    assert "calle inexistente#1" not in geo._failed
+
+    with patch("app.services.geocoding._http_get") as mock_get:
+        _, conf = geo.geocode("Calle Inexistente 1")
+        mock_get.assert_not_called()
+    assert conf == "FAILED"
+    assert "calle inexistente#1" in geo._failed
+    assert registered_caches()["geocode.failed"] is geo._failed
+
+
+def test_override_limpia_cache_negativa_expulsada_de_memoria():
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo.geocode("Calle Mayor 1")
+    geo._failed.clear()
+
+    geo.add_override("Calle Mayor 1", 37.805, -5.099)
+    assert geo._get_failed_store().get("calle mayor#1") is None
+
+
+def test_override_limpia_cache_negativa():
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo.geocode("Calle Mayor 1", alias="Bar El Sol")
+    assert geo._failed
+
+    geo.add_override("Calle Mayor 1", 37.805, -5.099)
+    assert len(geo._failed) == 0
+    coord, conf = geo.geocode("Calle Mayor 1", alias="Bar El Sol")
+    assert coord == (37.805, -5.099)
+    assert conf == "OVERRIDE"
+
+
+def test_add_overrides_en_lote():
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo.geocode("Calle Mayor 1")
+    assert "calle mayor#1" in geo._failed
+
+    saved = geo.add_overrides([
+        ("Calle Mayor 1", 37.805, -5.099),
+        ("Calle Gaitán 3", 37.806, -5.100),
+        ("C/ Mayor, 1", 37.807, -5.098),   # misma dirección: gana la última
+    ])
+    assert saved == 2
+    assert len(geo._failed) == 0
+    assert geo._get_failed_store().get("calle mayor#1") is None
+    with patch("app.services.geocoding._http_get") as mock_get:
+        assert geo.geocode("Calle Mayor 1") == ((37.807, -5.098), "OVERRIDE")
+        assert geo.geocode("Calle Gaitán 3") == ((37.806, -5.100), "OVERRIDE")
+        mock_get.assert_not_called()
+    assert geo._get_store().get("calle mayor#1")["lat"] == 37.807
+
+
+def test_add_overrides_una_escritura(monkeypatch):
+    """Un lote entero: un put_many en la caché y un publish_many."""
+    puts, published = [], []
+    store = geo._get_store()
+    monkeypatch.setattr(store, "put_many", lambda items: puts.append(list(items)))
+    monkeypatch.setattr(geo, "publish_many", lambda channel, keys: published.append(list(keys)))
+    geo.add_overrides([(f"Calle Mayor {i}", 37.805, -5.099) for i in range(1, 21)])
+    assert len(puts) == 1 and len(puts[0]) == 20
+    assert len(published) == 1 and len(published[0]) == 20
+
+
+def test_fallo_transitorio_no_va_a_cache_negativa(monkeypatch):
+    """Si Google no responde (reintentos agotados) el FAILED no se recuerda."""
+    monkeypatch.setattr(geo.time, "sleep", lambda s: None)
+    with patch("app.services.geocoding._http_get",
+               side_effect=requests.ConnectionError("caído")):
+        _, conf = geo.geocode("Calle Mayor 1")
+    assert conf == "FAILED"
+    assert len(geo._failed) == 0
+
+
+def test_over_query_limit_es_transitorio(monkeypatch):
+    """OVER_QUERY_LIMIT se reintenta y no se toma como 'dirección inexistente'."""
+    monkeypatch.setattr(geo.time, "sleep", lambda s: None)
+    with patch("app.services.geocoding._http_get",
+               side_effect=[_over_query_limit(), _google_resp("ROOFTOP")]):
+        _, conf = geo.geocode("Calle Mayor 1")
+    assert conf == "EXACT_ADDRESS"
+
+
+def _throttled_resp(retry_after: str | None = None):
+    """Mock de Google con HTTP 429 (y Retry-After opcional)."""
+    m = Mock()
+    m.status_code = 429
+    m.headers = {"Retry-After": retry_after} if retry_after else {}
+    return m
+
+
+def test_429_reduce_el_ritmo_y_reintenta_sin_sleep_fijo(monkeypatch):
+    """Un 429 baja el ritmo del bucket compartido; el reintento lo espera el bucket."""
+    bucket = AdaptiveTokenBucket(20, 10, min_rate=1.0)
+    monkeypatch.setattr(geo, "_google_bucket", bucket)
+    with patch("app.services.geocoding._http_get",
+               side_effect=[_throttled_resp(), _google_resp("ROOFTOP")]), \
+         patch("app.services.geocoding.time.sleep") as geo_sleep, \
+         patch("app.core.ratelimit.time.sleep"):
+        _, conf = geo.geocode("Calle Mayor 1")
+    assert conf == "EXACT_ADDRESS"
+    geo_sleep.assert_not_called()
+    assert bucket.rate_per_s == pytest.approx(10.25)   # 20 / 2 + un éxito
+
+
+def test_429_respeta_retry_after(monkeypatch):
+    bucket = AdaptiveTokenBucket(20, 10, min_rate=1.0)
+    monkeypatch.setattr(geo, "_google_bucket", bucket)
+    with patch("app.services.geocoding._http_get",
+               side_effect=[_throttled_resp("3"), _google_resp("ROOFTOP")]), \
+         patch("app.core.ratelimit.time.sleep") as bucket_sleep:
+        geo.geocode("Calle Mayor 1")
+    waits = [c.args[0] for c in bucket_sleep.call_args_list]
+    assert len(waits) == 1 and waits[0] == pytest.approx(3.1, abs=0.05)
+
+
+def test_retry_after_solo_segundos_y_recortado():
+    assert geo._retry_after({"Retry-After": "5"}) == 5.0
+    assert geo._retry_after({"Retry-After": "3600"}) == geo._MAX_RETRY_AFTER_S
+    assert geo._retry_after({"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"}) is None
+    assert geo._retry_after({}) is None
+
+
+def test_llamadas_a_google_se_cuentan_por_endpoint(monkeypatch):
+    monkeypatch.setattr(geo.time, "sleep", lambda s: None)
+    with patch("app.services.geocoding._http_get",
+               side_effect=[_throttled_resp(), _google_resp("GEOMETRIC_CENTER"),
+                            _places_resp(name="Bar El Sol")]):
+        geo.geocode("Calle Mayor 1", alias="Bar El Sol")
+    endpoints = geo.get_google_stats()["endpoints"]
+    assert endpoints["geocoding"]["calls"] == 2
+    assert endpoints["geocoding"]["outcomes"] == {"throttled": 1, "ok": 1}
+    assert endpoints["places"]["outcomes"] == {"ok": 1}
+
+
+def test_http_get_usa_la_sesion_compartida():
+    session = Mock()
+    with patch("app.services.geocoding.get_sync_session", return_value=session):
+        geo._http_get(geo.GOOGLE_GEOCODING_URL, params={"address": "x"})
+    session.get.assert_called_once_with(
+        geo.GOOGLE_GEOCODING_URL, params={"address": "x"}, timeout=geo.GEOCODE_TIMEOUT,
+    )
+
+
+def test_sin_api_key_no_va_a_cache_negativa(monkeypatch):
+    monkeypatch.setattr(geo, "GOOGLE_API_KEY", "")
+    geo.geocode("Calle Mayor 1")
+    assert len(geo._failed) == 0
+
+
+def test_cache_negativa_sobrevive_a_un_reinicio():
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo.geocode("Calle Inexistente 999")
+    _simular_reinicio()
+    geo._failed.clear()
+
+    with patch("app.services.geocoding._http_get") as mock_get:
+        _, conf = geo.geocode("Calle Inexistente 999")
+        mock_get.assert_not_called()
+    assert conf == "FAILED"
 
 
 def test_places_error_de_red_devuelve_failed():
     """Si Places lanza excepción de red, sin fallback → FAILED."""
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         mock_get.side_effect = [
             _google_resp("GEOMETRIC_CENTER"),   # Geocoding: no exacto
             Exception("timeout"),               # Places: error de red
@@ -209,7 +759,7 @@ def test_places_error_de_red_devuelve_failed():
 
 def test_google_sin_api_key_no_llama_y_devuelve_failed(monkeypatch):
     monkeypatch.setattr(geo, "GOOGLE_API_KEY", "")
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         coord, conf = geo.geocode("Calle Mayor 1")
         mock_get.assert_not_called()
     assert coord is None
@@ -217,7 +767,7 @@ def test_google_sin_api_key_no_llama_y_devuelve_failed(monkeypatch):
 
 
 def test_google_error_de_red_devuelve_failed():
-    with patch("app.services.geocoding.requests.get", side_effect=Exception("timeout")):
+    with patch("app.services.geocoding._http_get", side_effect=Exception("timeout")):
         coord, conf = geo.geocode("Calle Mayor 1")
     assert coord is None
     assert conf == "FAILED"
@@ -244,7 +794,7 @@ def test_google_timeout_reintenta_y_devuelve_resultado():
         }
         return m
 
-    with patch("app.services.geocoding.requests.get", side_effect=mock_get):
+    with patch("app.services.geocoding._http_get", side_effect=mock_get):
         with patch("app.services.geocoding.time.sleep"):  # evitar espera real
             coord, conf = geo.geocode("Calle Mayor 1")
 
@@ -255,10 +805,10 @@ def test_google_timeout_reintenta_y_devuelve_resultado():
 
 def test_resultado_exitoso_se_guarda_en_cache():
     """Después de geocodificar con éxito, la siguiente llamada no va a Google."""
-    with patch("app.services.geocoding.requests.get", return_value=_google_resp("ROOFTOP")):
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")):
         geo.geocode("Calle Mayor 1")
 
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         geo.geocode("Calle Mayor 1")
         mock_get.assert_not_called()
 
@@ -267,7 +817,7 @@ def test_resultado_exitoso_se_guarda_en_cache():
 
 def test_places_con_alias_cuando_google_impreciso():
     """Con alias y Google GEOMETRIC_CENTER (impreciso), debe usar Places si nombre coincide."""
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         mock_get.side_effect = [
             _google_resp("GEOMETRIC_CENTER"),             # 1ª llamada: Geocoding
             _places_resp(name="Bar El Sol"),              # 2ª llamada: Places (nombre coincide)
@@ -279,7 +829,7 @@ def test_places_con_alias_cuando_google_impreciso():
 
 def test_places_solo_se_llama_con_alias():
     """Sin alias, Places NO debe invocarse aunque Google falle."""
-    with patch("app.services.geocoding.requests.get", return_value=_zero_results()) as mock_get:
+    with patch("app.services.geocoding._http_get", return_value=_zero_results()) as mock_get:
         geo.geocode("Calle Inexistente 999")  # sin alias
     # Solo una llamada: Google Geocoding; Places no se invoca
     assert mock_get.call_count == 1
@@ -287,7 +837,7 @@ def test_places_solo_se_llama_con_alias():
 
 def test_places_fuera_de_bbox_devuelve_failed():
     """Places fuera de bbox → rechazado, sin fallback → FAILED."""
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         mock_get.side_effect = [
             _google_resp("GEOMETRIC_CENTER"),
             _places_resp(lat=40.4, lng=-3.7, name="Lugar Lejano"),  # Madrid → fuera de bbox
@@ -299,7 +849,7 @@ def test_places_fuera_de_bbox_devuelve_failed():
 
 def test_places_nombre_no_coincide_devuelve_failed():
     """Places devuelve nombre muy distinto → rechazado, sin fallback → FAILED."""
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         mock_get.side_effect = [
             _google_resp("GEOMETRIC_CENTER"),
             _places_resp(name="Ferretería García"),  # nada que ver con "Supermercado Los Olivos"
@@ -311,7 +861,7 @@ def test_places_nombre_no_coincide_devuelve_failed():
 
 def test_places_demasiado_lejos_devuelve_failed():
     """Places a > 300 m de la coord de Geocoding → rechazado, sin fallback → FAILED."""
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         # ref_coord: (37.805, -5.099). Places a ~3 km → rechazado
         mock_get.side_effect = [
             _google_resp("GEOMETRIC_CENTER", lat=37.805, lng=-5.099),
@@ -324,7 +874,7 @@ def test_places_demasiado_lejos_devuelve_failed():
 
 def test_places_sin_geocoding_y_nombre_no_coincide_devuelve_failed():
     """Places con nombre incorrecto y sin Geocoding de referencia → FAILED."""
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         mock_get.side_effect = [
             _zero_results(),                         # Geocoding: nada
             _places_resp(name="Ferretería García"),  # nombre no coincide
@@ -337,7 +887,7 @@ def test_places_sin_geocoding_y_nombre_no_coincide_devuelve_failed():
 def test_places_usa_posadas_center_cuando_google_devuelve_nada():
     """Cuando Google Geocoding no devuelve coord, Places usa POSADAS_CENTER como referencia
     con radio ampliado (_PLACES_MAX_DIST_FALLBACK_M = 1000 m)."""
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         mock_get.side_effect = [
             _zero_results(),                                          # Geocoding: sin coord
             _places_resp(lat=37.805, lng=-5.099, name="Bar El Sol"),  # Places: cerca de POSADAS_CENTER
@@ -349,7 +899,7 @@ def test_places_usa_posadas_center_cuando_google_devuelve_nada():
 
 def test_places_sin_api_key_no_se_llama(monkeypatch):
     monkeypatch.setattr(geo, "GOOGLE_API_KEY", "")
-    with patch("app.services.geocoding.requests.get") as mock_get:
+    with patch("app.services.geocoding._http_get") as mock_get:
         geo.geocode("Calle Mayor 1", alias="Bar El Sol")
         mock_get.assert_not_called()
 
@@ -358,11 +908,9 @@ def test_places_sin_api_key_no_se_llama(monkeypatch):
 
 def test_fuzzy_matching_corrige_typo(monkeypatch):
     """Un typo en el nombre de calle se corrige antes de llamar a Google."""
-    monkeypatch.setattr(geo, "_streets", ["Calle Hornos"])
-    monkeypatch.setattr(geo, "_streets_norm", ["calle hornos"])
-    monkeypatch.setattr(geo, "_streets_norm_set", {"calle hornos"})
+    monkeypatch.setattr(geo, "_streets_version", geo._StreetsVersion(["Calle Hornos"]))
 
-    with patch("app.services.geocoding.requests.get",
+    with patch("app.services.geocoding._http_get",
                return_value=_google_resp("ROOFTOP")) as mock_get:
         geo.geocode("Calle Hornoss 5")  # typo: doble 's'
 
@@ -374,11 +922,9 @@ def test_fuzzy_matching_corrige_typo(monkeypatch):
 
 def test_fuzzy_matching_no_actua_si_calle_ya_esta_en_catalogo(monkeypatch):
     """Si la calle ya está normalizada en el catálogo, no hay corrección."""
-    monkeypatch.setattr(geo, "_streets", ["Calle Mayor"])
-    monkeypatch.setattr(geo, "_streets_norm", ["calle mayor"])
-    monkeypatch.setattr(geo, "_streets_norm_set", {"calle mayor"})
+    monkeypatch.setattr(geo, "_streets_version", geo._StreetsVersion(["Calle Mayor"]))
 
-    with patch("app.services.geocoding.requests.get",
+    with patch("app.services.geocoding._http_get",
                return_value=_google_resp("ROOFTOP")) as mock_get:
         geo.geocode("Calle Mayor 5")
 
@@ -387,6 +933,193 @@ def test_fuzzy_matching_no_actua_si_calle_ya_esta_en_catalogo(monkeypatch):
     assert "Calle Mayor" in call_params["address"]
 
 
+# ── Memo de correcciones del fuzzy matching ───────────────────────────────────
+
+def _catalogo(monkeypatch, *streets: str) -> None:
+    monkeypatch.setattr(geo, "_streets_version", geo._StreetsVersion(list(streets)))
+
+
+def _reinicio_del_memo(monkeypatch) -> None:
+    """Simula un reinicio: memo en memoria vacío, mismo fichero SQLite."""
+    geo._get_corrections_store().close()
+    monkeypatch.setattr(geo, "_corrections_store", None)
+    monkeypatch.setattr(geo, "_corrections", {})
+    monkeypatch.setattr(geo, "_corrections_catalog", None)
+
+
+def test_typo_repetido_no_repite_el_fuzzy_matching(monkeypatch):
+    _catalogo(monkeypatch, "Calle Hornos")
+    with patch("app.services.geocoding._find_closest_street",
+               wraps=geo._find_closest_street) as mock_fuzzy, \
+         patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")) as mock_get:
+        geo.geocode("Calle Hornoss 5")
+        geo.geocode("calle HORNOSS 7")
+    assert mock_fuzzy.call_count == 1
+    assert "Calle Hornos 7" in mock_get.call_args.kwargs["params"]["address"]
+
+
+def test_sin_correccion_tambien_se_memoriza(monkeypatch):
+    _catalogo(monkeypatch, "Calle Hornos")
+    with patch("app.services.geocoding._find_closest_street", return_value=None) as mock_fuzzy, \
+         patch("app.services.geocoding._http_get", return_value=_zero_results()):
+        geo.geocode("Calle Desconocida 1")
+        geo.geocode("Calle Desconocida 2")
+    assert mock_fuzzy.call_count == 1
+    assert geo._corrections == {"calle desconocida": ""}
+
+
+def test_memo_sobrevive_a_un_reinicio(monkeypatch):
+    _catalogo(monkeypatch, "Calle Hornos")
+    with patch("app.services.geocoding._http_get", return_value=_google_resp("ROOFTOP")):
+        geo.geocode("Calle Hornoss 5")
+    _reinicio_del_memo(monkeypatch)
+    _catalogo(monkeypatch, "Calle Hornos")   # mismo contenido, otra lista
+    with patch("app.services.geocoding._find_closest_street") as mock_fuzzy:
+        assert geo._correct_street("Calle Hornoss") == "Calle Hornos"
+    mock_fuzzy.assert_not_called()
+
+
+def test_cambio_de_catalogo_invalida_el_memo(monkeypatch):
+    _catalogo(monkeypatch, "Calle Hornos")
+    assert geo._correct_street("Calle Hornoss") == "Calle Hornos"
+    _catalogo(monkeypatch, "Calle Hornos", "Calle Hornoss")   # ahora existe tal cual
+    assert geo._correct_street("Calle Hornoss") is None
+    _reinicio_del_memo(monkeypatch)
+    _catalogo(monkeypatch, "Calle Hornos")
+    with patch("app.services.geocoding._find_closest_street", return_value="Calle Hornos") as mock_fuzzy:
+        geo._correct_street("Calle Hornoss")
+    mock_fuzzy.assert_called_once()   # la entrada del otro catálogo se descartó
+
+
+def test_geocode_async_usa_el_memo(monkeypatch):
+    _catalogo(monkeypatch, "Calle Hornos")
+    geo._correct_street("Calle Hornoss")
+    client = _async_client_for((200, _rooftop_json()))
+    with patch("app.services.geocoding.get_async_client", return_value=client), \
+         patch("app.services.geocoding._find_closest_street") as mock_fuzzy:
+        _, conf = asyncio.run(geo.geocode_async("Calle Hornoss 5"))
+    assert conf == "EXACT_ADDRESS"
+    mock_fuzzy.assert_not_called()
+
+
+# ── Recarga del catálogo de calles ────────────────────────────────────────────
+
+@pytest.fixture
+def streets_file(tmp_path, monkeypatch):
+    """streets.json en tmp_path, catálogo sin cargar y comprobación de mtime inmediata."""
+    from app.services import catalog
+
+    path = tmp_path / "streets.json"
+    monkeypatch.setattr(catalog, "_STREETS_FILE", path)
+    monkeypatch.setattr(catalog, "_catalog", None)
+    monkeypatch.setattr(geo, "_streets_version", None)
+    monkeypatch.setattr(geo, "_streets_history", geo.deque(maxlen=4))
+    monkeypatch.setattr(geo, "CATALOG_CHECK_S", 0.0)
+    return path
+
+
+def _escribir_catalogo(path, *streets: str, mtime: float) -> None:
+    path.write_text(json.dumps({"streets": list(streets)}), "utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def _esperar_recarga() -> None:
+    with geo._catalog_reload_lock:   # la recarga en segundo plano lo suelta al terminar
+        pass
+
+
+def test_catalogo_se_recarga_si_cambia_el_mtime(streets_file):
+    _escribir_catalogo(streets_file, "Calle Hornos", mtime=1000)
+    v1 = geo._current_streets()
+    assert v1.number == 1 and v1.streets == ["Calle Hornos"]
+    _escribir_catalogo(streets_file, "Calle Hornos", "Calle Hornoss", mtime=2000)
+    assert geo._current_streets() is v1   # sigue respondiendo con la anterior
+    _esperar_recarga()
+    v2 = geo._streets_version
+    assert v2.number == 2 and v2.streets == ["Calle Hornos", "Calle Hornoss"]
+    assert v2.index.texts is v2.norm and "calle hornoss" in v2.norm_set
+    assert geo._corrections_catalog is v2.streets   # memo cargado para la versión nueva
+    assert geo._correct_street("Calle Hornoss") is None
+    assert list(geo._streets_history) == [v1]
+
+
+def test_catalogo_sin_cambios_no_se_recarga(streets_file):
+    _escribir_catalogo(streets_file, "Calle Hornos", mtime=1000)
+    v1 = geo._current_streets()
+    geo._current_streets()
+    _esperar_recarga()
+    assert geo._streets_version is v1
+
+
+def test_catalogo_puesto_a_mano_no_se_vigila(streets_file, monkeypatch):
+    _escribir_catalogo(streets_file, "Calle Hornos", mtime=1000)
+    manual = geo._StreetsVersion(["Calle Mayor"])
+    monkeypatch.setattr(geo, "_streets_version", manual)
+    geo._current_streets()
+    _esperar_recarga()
+    assert geo._streets_version is manual
+
+
+def test_recarga_manual_avisa_a_los_demas_workers(streets_file):
+    from app.adapters import shared_state
+    from app.adapters.kvstore import InvalidationLog
+
+    _escribir_catalogo(streets_file, "Calle Hornos", mtime=1000)
+    geo._current_streets()
+    info = geo.reload_street_catalog()
+    assert info["version"] == 2 and info["streets"] == 1
+    events = InvalidationLog(shared_state._DB).since(0)
+    assert ("catalog", "") in [(c, p) for _, _, c, p in events]
+
+
+def test_recarga_pedida_por_otro_worker(streets_file):
+    from app.adapters import shared_state
+    from app.adapters.kvstore import InvalidationLog
+
+    _escribir_catalogo(streets_file, "Calle Hornos", mtime=1000)
+    geo._current_streets()
+    shared_state.poll(force=True)
+    InvalidationLog(shared_state._DB).publish("otro", "catalog", "")
+    shared_state.poll(force=True)
+    _esperar_recarga()
+    assert geo._streets_version.number == 2
+
+
+def test_catalogo_ilegible_conserva_la_version_vigente(streets_file):
+    _escribir_catalogo(streets_file, "Calle Hornos", mtime=1000)
+    v1 = geo._current_streets()
+    geo._correct_street("Calle Hornoss")
+    streets_file.write_text('{"streets": ["Calle Hor', "utf-8")   # a medio escribir
+    os.utime(streets_file, (2000, 2000))
+    geo._current_streets()
+    _esperar_recarga()
+    assert geo._streets_version is v1
+    assert geo._correct_street("Calle Hornoss") == "Calle Hornos"   # fuzzy y memo siguen
+
+    _escribir_catalogo(streets_file, mtime=3000)   # vacío: tampoco sustituye
+    info = geo.reload_street_catalog()
+    assert geo._streets_version is v1
+    assert info["version"] == 1 and "error" in info
+
+    _escribir_catalogo(streets_file, "Calle Hornos", "Calle Real", mtime=3000)   # mismo mtime
+    geo._current_streets()
+    _esperar_recarga()
+    assert geo._streets_version.number == 2   # se reintenta: v1 conserva su mtime
+
+
+def test_estadisticas_por_version(streets_file):
+    _escribir_catalogo(streets_file, "Calle Hornos", mtime=1000)
+    geo._correct_street("Calle Hornoss")   # fuzzy → corrige
+    geo._correct_street("Calle Hornoss")   # memo
+    geo._correct_street("Calle Inventada")  # fuzzy → sin corrección
+    stats = geo.get_catalog_stats()
+    assert stats["current"]["version"] == 1
+    assert {k: stats["current"][k] for k in ("fuzzy", "corrected", "memo_hits")} == {
+        "fuzzy": 2, "corrected": 1, "memo_hits": 1,
+    }
+    assert stats["previous"] == []
+
+
 # ── get_corrected_street ──────────────────────────────────────────────────────
 
 def test_get_corrected_street_sin_cache_devuelve_calle_parseada():
@@ -403,6 +1136,12 @@ def test_get_corrected_street_con_fuzzy_correccion_en_cache():
     assert geo.get_corrected_street("Calle Hornoss 5") == "Calle Hornos"
 
 
+def test_get_corrected_street_usa_el_memo_sin_entrada_en_cache(monkeypatch):
+    _catalogo(monkeypatch, "Calle Hornos")
+    geo._correct_street("Calle Hornoss")
+    assert geo.get_corrected_street("Calle Hornoss 9") == "Calle Hornos"
+
+
 def test_get_corrected_street_override_sin_fuzzy_devuelve_calle_parseada():
     """Override manual sin fuzzy_corrected_to → calle parseada del original."""
     geo.add_override("Calle Mayor 5", 37.805, -5.099)
@@ -413,3 +1152,108 @@ def test_get_corrected_street_override_sin_fuzzy_devuelve_calle_parseada():
 def test_get_corrected_street_expande_abreviatura():
     """C/ se expande a Calle antes de parsear."""
     assert geo.get_corrected_street("C/ Mayor 5") == "Calle Mayor"
+
+
+# ── geocode_async (cliente httpx compartido) ──────────────────────────────────
+
+def _async_client_for(*payloads):
+    """AsyncClient simulado que devuelve los payloads JSON en orden."""
+    responses = iter(payloads)
+
+    def handler(request):
+        status, body = next(responses)
+        return httpx.Response(status, json=body)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _rooftop_json(lat: float = 37.805, lng: float = -5.099) -> dict:
+    return {"status": "OK", "results": [{"geometry": {
+        "location": {"lat": lat, "lng": lng}, "location_type": "ROOFTOP",
+    }}]}
+
+
+def test_geocode_async_rooftop_se_acepta_y_cachea():
+    client = _async_client_for((200, _rooftop_json()))
+    with patch("app.services.geocoding.get_async_client", return_value=client):
+        coord, conf = asyncio.run(geo.geocode_async("Calle Mayor 1"))
+    assert coord == (37.805, -5.099)
+    assert conf == "EXACT_ADDRESS"
+    # La caché es compartida con la versión síncrona
+    assert geo.geocode("Calle Mayor 1") == ((37.805, -5.099), "EXACT_ADDRESS")
+
+
+def test_geocode_async_reintenta_errores_transitorios(monkeypatch):
+    monkeypatch.setattr(geo, "_GEOCODE_RETRY_DELAYS", (0.0,))
+    client = _async_client_for((503, {}), (200, _rooftop_json()))
+    with patch("app.services.geocoding.get_async_client", return_value=client):
+        coord, conf = asyncio.run(geo.geocode_async("Calle Mayor 1"))
+    assert conf == "EXACT_ADDRESS"
+
+
+def test_geocode_async_429_con_retry_after(monkeypatch):
+    bucket = AdaptiveTokenBucket(20, 10, min_rate=1.0)
+    monkeypatch.setattr(geo, "_google_bucket", bucket)
+
+    responses = iter([
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(200, json=_rooftop_json()),
+    ])
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: next(responses)))
+    with patch("app.services.geocoding.get_async_client", return_value=client), \
+         patch("app.core.ratelimit.asyncio.sleep") as bucket_sleep:
+        _, conf = asyncio.run(geo.geocode_async("Calle Mayor 1"))
+    assert conf == "EXACT_ADDRESS"
+    assert bucket_sleep.call_args.args[0] == pytest.approx(2.1, abs=0.05)
+
+
+def test_geocode_async_places_con_alias():
+    zero = {"status": "ZERO_RESULTS", "results": []}
+    places = {"status": "OK", "candidates": [{
+        "geometry": {"location": {"lat": 37.805, "lng": -5.099}}, "name": "Bar El Sol",
+    }]}
+    client = _async_client_for((200, zero), (200, places))
+    with patch("app.services.geocoding.get_async_client", return_value=client):
+        coord, conf = asyncio.run(geo.geocode_async("Calle Mayor 1", alias="Bar El Sol"))
+    assert conf == "EXACT_PLACE"
+    assert coord == (37.805, -5.099)
+
+
+def test_geocode_async_sin_resultados_devuelve_failed():
+    client = _async_client_for((200, {"status": "ZERO_RESULTS", "results": []}))
+    with patch("app.services.geocoding.get_async_client", return_value=client):
+        coord, conf = asyncio.run(geo.geocode_async("Calle Inexistente 999"))
+    assert coord is None
+    assert conf == "FAILED"
+
+
+def test_geocode_async_sin_respuesta_no_va_a_cache_negativa(monkeypatch):
+    monkeypatch.setattr(geo, "_GEOCODE_RETRY_DELAYS", ())
+    client = _async_client_for((503, {}))
+    with patch("app.services.geocoding.get_async_client", return_value=client):
+        coord, conf = asyncio.run(geo.geocode_async("Calle Mayor 1"))
+    assert (coord, conf) == (None, "FAILED")
+    assert len(geo._failed) == 0
+
+
+def test_geocode_async_pasos_locales_fuera_del_event_loop():
+    """Caché (con su relectura de SQLite) y memo no bloquean el event loop."""
+    import threading
+
+    geo.add_override("Calle Mayor 1", 37.805, -5.099)
+    geo._cache.clear()
+    geo._persisted.clear()   # expulsada de memoria: se relee de SQLite
+    threads = []
+    real_lookup = geo._lookup_cache
+
+    def _lookup(key, alias):
+        threads.append(threading.current_thread())
+        return real_lookup(key, alias)
+
+    async def _main():
+        return threading.current_thread(), await geo.geocode_async("Calle Mayor 1")
+
+    with patch.object(geo, "_lookup_cache", _lookup):
+        loop_thread, result = asyncio.run(_main())
+    assert result == ((37.805, -5.099), "OVERRIDE")
+    assert threads and loop_thread not in threads
@@ -0,0 +1,99 @@
+"""
+Tests unitarios — app/adapters/geometric.py y heurística de vista previa.
+
+Cubre (sin red, sin Docker, sin LKH3):
+  - get_geometric_matrix    → matriz haversine × factor de rodeo
+  - learn_from_matrix       → calibración con matrices reales de OSRM
+  - _solve_nearest_neighbor → orden heurístico (vecino más cercano)
+  - preview_route           → pipeline completo de vista previa
+"""
+
+import pytest
+
+import app.adapters.geometric as geometric
+from app.adapters.geometric import get_geometric_matrix, learn_from_matrix
+from app.services.routing import _solve_nearest_neighbor, preview_route
+
+# ~111 m por milésima de grado de latitud
+COORDS_LINE = [(37.800, -5.100), (37.801, -5.100), (37.802, -5.100), (37.803, -5.100)]
+
+
+@pytest.fixture(autouse=True)
+def reset_params():
+    geometric.reset_learned_params()
+    yield
+    geometric.reset_learned_params()
+
+
+class TestGeometricMatrix:
+
+    def test_menos_de_dos_coords_devuelve_none(self):
+        assert get_geometric_matrix([(37.8, -5.1)]) is None
+
+    def test_diagonal_cero_y_simetrica(self):
+        dur, dist = get_geometric_matrix(COORDS_LINE)
+        for i in range(len(COORDS_LINE)):
+            assert dist[i][i] == 0
+            assert dur[i][i] == 0
+            for j in range(len(COORDS_LINE)):
+                assert dist[i][j] == dist[j][i]
+
+    def test_distancia_aplica_factor_de_rodeo(self):
+        _, dist = get_geometric_matrix(COORDS_LINE[:2])
+        expected = 111.2 * geometric._DEFAULT_DETOUR_FACTOR
+        assert dist[0][1] == pytest.approx(expected, abs=2)
+
+    def test_valores_enteros(self):
+        dur, dist = get_geometric_matrix(COORDS_LINE)
+        assert all(isinstance(v, int) for row in dur + dist for v in row)
+
+
+class TestLearnFromMatrix:
+
+    def test_converge_hacia_ratio_observado(self):
+        _, hav = get_geometric_matrix(COORDS_LINE)
+        factor0 = geometric._DEFAULT_DETOUR_FACTOR
+        # OSRM "real": el doble de la haversine pura
+        real_dist = [[round(v / factor0 * 2.0) for v in row] for row in hav]
+        real_dur = [[round(v / 10.0) for v in row] for row in real_dist]
+        for _ in range(30):
+            learn_from_matrix(COORDS_LINE, real_dur, real_dist)
+        params = geometric.get_learned_params()
+        assert params["detour_factor"] == pytest.approx(2.0, abs=0.02)
+        assert params["speed_mps"] == pytest.approx(10.0, abs=0.3)
+
+    def test_pares_demasiado_cercanos_se_ignoran(self):
+        coords = [(37.8000, -5.1000), (37.8001, -5.1000)]  # ~11 m
+        learn_from_matrix(coords, [[0, 100], [100, 0]], [[0, 5000], [5000, 0]])
+        assert geometric.get_learned_params()["detour_factor"] == geometric._DEFAULT_DETOUR_FACTOR
+
+    def test_matriz_de_tamano_distinto_se_ignora(self):
+        learn_from_matrix(COORDS_LINE, [[0]], [[0]])
+        assert geometric.get_learned_params()["detour_factor"] == geometric._DEFAULT_DETOUR_FACTOR
+
+    def test_factor_acotado(self):
+        coords = COORDS_LINE[:2]
+        for _ in range(50):
+            learn_from_matrix(coords, [[0, 10], [10, 0]], [[0, 100_000], [100_000, 0]])
+        assert geometric.get_learned_params()["detour_factor"] <= geometric._DETOUR_BOUNDS[1]
+
+
+class TestNearestNeighbor:
+
+    def test_empieza_en_deposito_y_visita_todos(self):
+        cost = [[0, 5, 1], [5, 0, 2], [1, 2, 0]]
+        order = _solve_nearest_neighbor(cost, cost)
+        assert order == [0, 2, 1]
+
+    def test_matriz_vacia_devuelve_none(self):
+        assert _solve_nearest_neighbor([], []) is None
+
+
+class TestPreviewRoute:
+
+    def test_orden_sigue_la_linea(self):
+        shuffled = [COORDS_LINE[0], COORDS_LINE[3], COORDS_LINE[1], COORDS_LINE[2]]
+        result = preview_route(shuffled)
+        assert result is not None
+        assert result["waypoint_order"] == [0, 2, 3, 1]
+        assert result["total_distance"] > 0
@@ -1,8 +1,28 @@
 """
-Tests de endpoints de sistema: /health, /api/services/status, /api/route-segment
+Tests de endpoints de sistema: /health, /ready, /api/services/status,
+/api/geocoding/stats, /api/admin/caches, /api/route-segment
 """
 
-from unittest.mock import patch, Mock
+from unittest.mock import patch, AsyncMock, Mock
+
+from fastapi.testclient import TestClient
+
+from app.adapters import shared_state
+from app.adapters.kvstore import InvalidationLog
+from app.core.readiness import Readiness
+from app.main import app
+from app.services import geocoding
+from app.services.route_sessions import create_session
+
+
+def _patch_client(**get_kwargs):
+    """Parchea el cliente httpx compartido (router y adaptador OSRM) con un
+    get() asíncrono mockeado."""
+    client = Mock(get=AsyncMock(**get_kwargs))
+    return (
+        patch("app.routers.system.get_async_client", return_value=client),
+        patch("app.adapters.osrm.get_async_client", return_value=client),
+    )
 
 
 def test_health_devuelve_ok(client):
@@ -16,10 +36,45 @@ def test_health_incluye_version(client):
     assert "version" in r.json()
 
 
+# ── /ready ────────────────────────────────────────────────────────────────────
+
+def test_ready_503_mientras_arranca(client):
+    with patch("app.routers.system.startup", Readiness()):
+        r = client.get("/ready")
+    assert r.status_code == 503
+    assert r.json()["status"] == "starting"
+
+
+def test_ready_200_con_pasos_al_terminar(client):
+    startup = Readiness()
+    startup.run_sync({"geocode_cache": lambda: {"entries": 3}})
+    with patch("app.routers.system.startup", startup):
+        r = client.get("/ready")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["status"] == "ready"
+    assert data["steps"]["geocode_cache"]["detail"] == {"entries": 3}
+    assert data["startup_ms"] is not None
+
+
+def test_lifespan_calienta_en_segundo_plano():
+    startup = Readiness()
+    steps = {"a": lambda: 1, "b": lambda: None}
+    with patch("app.main.startup", startup), \
+         patch("app.main._WARM_UP_STEPS", steps), \
+         patch("app.routers.system.startup", startup), \
+         TestClient(app) as c:
+        assert startup.wait(timeout=5)
+        r = c.get("/ready")
+    assert r.status_code == 200
+    assert set(r.json()["steps"]) == {"a", "b"}
+
+
 # ── /api/services/status ──────────────────────────────────────────────────────
 
 def test_services_status_osrm_caido(client):
-    with patch("requests.get", side_effect=ConnectionError("down")):
+    p1, p2 = _patch_client(side_effect=ConnectionError("down"))
+    with p1, p2:
         r = client.get("/api/services/status")
     assert r.status_code == 200
     data = r.json()
@@ -29,19 +84,112 @@ def test_services_status_osrm_caido(client):
 
 def test_services_status_osrm_ok(client):
     mock_resp = Mock(status_code=200)
-    with patch("requests.get", return_value=mock_resp):
+    p1, p2 = _patch_client(return_value=mock_resp)
+    with p1, p2:
         r = client.get("/api/services/status")
     assert r.status_code == 200
     assert r.json()["all_ok"] is True
 
 
 def test_services_status_incluye_url_osrm(client):
-    with patch("requests.get", side_effect=ConnectionError("down")):
+    p1, p2 = _patch_client(side_effect=ConnectionError("down"))
+    with p1, p2:
         r = client.get("/api/services/status")
     data = r.json()
     assert "url" in data["osrm"]
 
 
+# ── /api/geocoding/stats ──────────────────────────────────────────────────────
+
+def test_geocoding_stats_cuenta_caducadas_y_servidas(client):
+    geocoding._get_store().put("calle mayor#1", {
+        "lat": 37.805, "lon": -5.099, "street": "Calle Mayor", "number": "1",
+        "source": "google", "confidence": "EXACT_ADDRESS", "cached_at": 0,
+    })
+    geocoding.geocode("Calle Mayor 1")
+    r = client.get("/api/geocoding/stats")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["entries"] == 1
+    assert data["stale"] == 1
+    assert data["stale_served"] == 1
+    assert data["refresh_pending"] == 1
+    assert data["refreshed"] == 0
+    assert data["google"]["endpoints"] == {}   # servida caducada: sin llamadas a Google
+
+
+# ── /api/admin/caches ─────────────────────────────────────────────────────────
+
+def test_admin_caches_lista_las_registradas(client):
+    geocoding.add_override("Calle Mayor 1", 37.805, -5.099)
+    r = client.get("/api/admin/caches")
+    assert r.status_code == 200
+    data = r.json()
+    assert {"geocode.coords", "geocode.entries", "snap", "map_geojson",
+            "route_sessions"} <= set(data)
+    entries = data["geocode.entries"]
+    assert entries["items"] == 1
+    assert entries["bytes"] > 0
+    assert {"hits", "misses", "evictions", "expirations", "max_items"} <= set(entries)
+
+
+def test_admin_caches_expulsa_por_prefijo(client):
+    geocoding.add_override("Calle Mayor 1", 37.805, -5.099)
+    geocoding.add_override("Calle Gaitán 2", 37.806, -5.100)
+    r = client.post("/api/admin/caches/geocode.entries/evict", params={"prefix": "calle mayor#"})
+    assert r.status_code == 200
+    assert r.json() == {"cache": "geocode.entries", "evicted": 1, "items": 1}
+    assert geocoding.geocode("Calle Mayor 1")[1] == "OVERRIDE"  # se relee de SQLite
+
+
+def test_admin_caches_expulsion_se_anuncia_a_los_demas_workers(client):
+    r = client.post("/api/admin/caches/snap/evict", params={"prefix": "37.80"})
+    assert r.status_code == 200
+    events = InvalidationLog(shared_state._DB).since(0)
+    assert [p for _, _, c, p in events if c == "admin.evict"] == ["snap|37.80"]
+
+
+def test_admin_caches_expulsion_de_otro_worker(client):
+    geocoding.add_override("Calle Mayor 1", 37.805, -5.099)
+    shared_state.poll(force=True)
+    InvalidationLog(shared_state._DB).publish("otro", "admin.evict", "geocode.entries|calle mayor#")
+    shared_state.poll(force=True)
+    assert "calle mayor#1" not in geocoding._persisted
+
+
+def test_admin_caches_desconocida_404(client):
+    r = client.post("/api/admin/caches/nada/evict")
+    assert r.status_code == 404
+
+
+# ── /api/admin/catalog ────────────────────────────────────────────────────────
+
+def test_admin_catalog_describe_la_version_vigente(client, monkeypatch):
+    monkeypatch.setattr(geocoding, "_streets_version", geocoding._StreetsVersion(["Calle Mayor"], 3))
+    r = client.get("/api/admin/catalog")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["current"]["version"] == 3
+    assert data["current"]["streets"] == 1
+    assert {"fingerprint", "build_ms", "fuzzy", "corrected", "memo_hits"} <= set(data["current"])
+
+
+def test_admin_catalog_reload(client, tmp_path, monkeypatch):
+    from app.services import catalog
+
+    path = tmp_path / "streets.json"
+    path.write_text('{"streets": ["Calle Mayor", "Calle Gaitán"]}', "utf-8")
+    monkeypatch.setattr(catalog, "_STREETS_FILE", path)
+    monkeypatch.setattr(catalog, "_catalog", None)
+    monkeypatch.setattr(geocoding, "_streets_version", geocoding._StreetsVersion([], 1))
+    monkeypatch.setattr(geocoding, "_streets_history", geocoding.deque(maxlen=4))
+    r = client.post("/api/admin/catalog/reload")
+    assert r.status_code == 200
+    assert r.json()["version"] == 2
+    assert r.json()["streets"] == 2
+    assert geocoding._streets_version.streets == ["Calle Mayor", "Calle Gaitán"]
+
+
 # ── /api/route-segment ────────────────────────────────────────────────────────
 
 def test_route_segment_devuelve_geometria(client):
@@ -51,7 +199,8 @@ def test_route_segment_devuelve_geometria(client):
         "code": "Ok",
         "routes": [{"geometry": {"type": "LineString", "coordinates": []}, "distance": 800}],
     }
-    with patch("requests.get", return_value=mock_resp):
+    p1, p2 = _patch_client(return_value=mock_resp)
+    with p1, p2:
         r = client.get("/api/route-segment", params={
             "origin_lat": 37.805, "origin_lon": -5.099,
             "dest_lat": 37.806, "dest_lon": -5.100,
@@ -61,10 +210,34 @@ def test_route_segment_devuelve_geometria(client):
 
 
 def test_route_segment_osrm_caido_devuelve_none(client):
-    with patch("requests.get", side_effect=Exception("timeout")):
+    p1, p2 = _patch_client(side_effect=Exception("timeout"))
+    with p1, p2:
         r = client.get("/api/route-segment", params={
             "origin_lat": 37.805, "origin_lon": -5.099,
             "dest_lat": 37.806, "dest_lon": -5.100,
         })
     assert r.status_code == 200
     assert r.json()["geometry"] is None
+
+
+def test_route_segment_con_route_id_memoriza_el_tramo(client):
+    route_id = create_session(
+        [(37.805, -5.099), (37.806, -5.100)], [(37.805, -5.099), (37.806, -5.100)],
+        [[0, 60], [60, 0]], [[0, 800], [800, 0]], [0, 1],
+    )
+    mock_resp = Mock()
+    mock_resp.raise_for_status.return_value = None
+    mock_resp.json.return_value = {
+        "code": "Ok",
+        "routes": [{"geometry": {"type": "LineString", "coordinates": []}, "distance": 800}],
+    }
+    params = {
+        "origin_lat": 37.805, "origin_lon": -5.099,
+        "dest_lat": 37.806, "dest_lon": -5.100, "route_id": route_id,
+    }
+    p1, p2 = _patch_client(return_value=mock_resp)
+    with p1, p2 as mock_client:
+        r1 = client.get("/api/route-segment", params=params)
+        r2 = client.get("/api/route-segment", params=params)
+    assert r1.json() == r2.json()
+    assert mock_client.return_value.get.await_count == 1
@@ -0,0 +1,93 @@
+"""
+Tests unitarios — app/utils/house_numbers.py.
+
+Cubre:
+  - house_number     → números puros, rangos, letras y s/n
+  - HouseNumberIndex → interpolación por acera, extrapolación acotada,
+                       reglas de confianza (hueco, distancia), add/discard
+"""
+
+import pytest
+
+from app.utils.house_numbers import HouseNumberIndex, house_number
+
+# Acera par de una calle recta N-S: 10 m por cada 2 números
+_LAT0, _LON0 = 37.8000, -5.1000
+_DLAT_PER_NUM = 5 / 111_320
+
+
+def _coord(n: int) -> tuple[float, float]:
+    return _LAT0 + n * _DLAT_PER_NUM, _LON0
+
+
+@pytest.fixture
+def index() -> HouseNumberIndex:
+    idx = HouseNumberIndex()
+    for n in (2, 8, 24):
+        idx.add("calle gaitan", str(n), _coord(n))
+    return idx
+
+
+class TestHouseNumber:
+
+    def test_numero_puro(self):
+        assert house_number("12") == 12
+
+    def test_rango_usa_el_primero(self):
+        assert house_number("96-98") == 96
+
+    def test_letra_o_sn_no_son_numericos(self):
+        assert house_number("12a") is None
+        assert house_number("sn") is None
+        assert house_number("") is None
+
+
+class TestHouseNumberIndex:
+
+    def test_interpola_entre_anclajes(self, index):
+        est = index.estimate("calle gaitan", "12")
+        assert est is not None
+        assert est.kind == "interpolated"
+        assert est.anchors == (8, 24)
+        assert est.lat == pytest.approx(_coord(12)[0])
+        assert est.lon == pytest.approx(_LON0)
+
+    def test_otra_acera_no_usa_anclajes_pares(self, index):
+        assert index.estimate("calle gaitan", "11") is None
+
+    def test_extrapola_pocos_numeros(self, index):
+        est = index.estimate("calle gaitan", "28")
+        assert est is not None
+        assert est.kind == "extrapolated"
+        assert est.lat == pytest.approx(_coord(28)[0])
+
+    def test_no_extrapola_lejos(self, index):
+        assert index.estimate("calle gaitan", "40") is None
+
+    def test_hueco_grande_no_interpola(self):
+        idx = HouseNumberIndex()
+        idx.add("calle mayor", "2", _coord(2))
+        idx.add("calle mayor", "40", _coord(40))
+        assert idx.estimate("calle mayor", "20") is None
+
+    def test_anclajes_muy_separados_no_interpolan(self):
+        idx = HouseNumberIndex()
+        idx.add("calle mayor", "2", (37.800, -5.100))
+        idx.add("calle mayor", "10", (37.810, -5.100))  # ~1,1 km
+        assert idx.estimate("calle mayor", "6") is None
+
+    def test_calle_desconocida(self, index):
+        assert index.estimate("calle mayor", "12") is None
+
+    def test_rango_conocido_resuelve_su_numero(self):
+        idx = HouseNumberIndex()
+        idx.add("calle mayor", "12-14", _coord(12))
+        est = idx.estimate("calle mayor", "12")
+        assert est is not None and est.kind == "known"
+
+    def test_discard_quita_el_anclaje(self, index):
+        index.discard("calle gaitan", "24")
+        assert len(index) == 2
+        assert index.estimate("calle gaitan", "12") is not None  # extrapolado desde 2 y 8
+        index.discard("calle gaitan", "2")
+        assert index.estimate("calle gaitan", "12") is None
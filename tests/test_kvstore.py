@@ -0,0 +1,153 @@
+"""
+Tests unitarios — app/adapters/kvstore.py.
+
+Cubre (SQLite en tmp_path):
+  - put/get/delete y reemplazo de valores
+  - put_many/delete_many en una transacción, items, len, clear
+  - visibilidad entre conexiones distintas (como dos procesos)
+  - migrate_json → importa una sola vez
+  - transform (lectura-modificación-escritura atómica), delete_expired, keys
+  - InvalidationLog: publish / publish_many / since / last_seq / trim / trimmed_through
+"""
+
+import json
+
+import pytest
+
+from app.adapters.kvstore import InvalidationLog, SqliteKVStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SqliteKVStore(tmp_path / "kv.sqlite3", "t")
+    yield s
+    s.close()
+
+
+class TestSqliteKVStore:
+
+    def test_put_get(self, store):
+        store.put("a", {"lat": 37.8, "txt": "Córdoba"})
+        assert store.get("a") == {"lat": 37.8, "txt": "Córdoba"}
+        assert store.get("b") is None
+
+    def test_put_reemplaza(self, store):
+        store.put("a", 1)
+        store.put("a", 2)
+        assert store.get("a") == 2
+        assert len(store) == 1
+
+    def test_delete(self, store):
+        store.put_many([("a", 1), ("b", 2), ("c", 3)])
+        store.delete("a")
+        store.delete_many(["b", "no-existe"])
+        assert dict(store.items()) == {"c": 3}
+
+    def test_clear(self, store):
+        store.put_many([("a", 1), ("b", 2)])
+        store.clear()
+        assert len(store) == 0
+
+    def test_nombre_de_tabla_invalido(self, tmp_path):
+        with pytest.raises(ValueError):
+            SqliteKVStore(tmp_path / "kv.sqlite3", "t; DROP TABLE x")
+
+    def test_otra_conexion_ve_las_escrituras(self, store, tmp_path):
+        store.put("a", 1)
+        other = SqliteKVStore(tmp_path / "kv.sqlite3", "t")
+        assert other.get("a") == 1
+        other.put("b", 2)
+        assert store.get("b") == 2
+        other.close()
+
+    def test_migrate_json_una_sola_vez(self, store, tmp_path):
+        legacy = tmp_path / "old.json"
+        legacy.write_text(json.dumps({"a": {"lat": 1}, "b": {"lat": 2}}), "utf-8")
+        assert store.migrate_json(legacy) == 2
+        store.delete("a")
+        assert store.migrate_json(legacy) == 0
+        assert dict(store.items()) == {"b": {"lat": 2}}
+
+    def test_migrate_json_sin_fichero(self, store, tmp_path):
+        assert store.migrate_json(tmp_path / "no-existe.json") == 0
+        assert len(store) == 0
+
+
+class TestTransform:
+
+    def test_escribe_lo_que_devuelve_fn(self, store):
+        store.put("n", 1)
+        assert store.transform("n", lambda v: v + 1) == 2
+        assert store.get("n") == 2
+
+    def test_recibe_none_si_no_existe(self, store):
+        store.transform("n", lambda v: {"visto": v})
+        assert store.get("n") == {"visto": None}
+
+    def test_none_no_escribe(self, store):
+        store.put("n", 1)
+        assert store.transform("n", lambda v: None) is None
+        assert store.get("n") == 1
+
+    def test_error_en_fn_no_deja_la_transaccion_abierta(self, store):
+        with pytest.raises(ZeroDivisionError):
+            store.transform("n", lambda v: 1 / 0)
+        store.put("n", 1)
+        assert store.get("n") == 1
+
+    def test_delete_expired_por_campo(self, store):
+        store.put_many([("a", {"exp": 10}), ("b", {"exp": 30}), ("c", {"otro": 1})])
+        assert store.delete_expired("exp", 20) == 1
+        assert sorted(store.keys()) == ["b", "c"]
+
+    def test_delete_expired_campo_invalido(self, store):
+        with pytest.raises(ValueError):
+            store.delete_expired("exp') OR 1=1 --", 0)
+
+
+class TestInvalidationLog:
+
+    def test_since_devuelve_eventos_en_orden(self, tmp_path):
+        log = InvalidationLog(tmp_path / "kv.sqlite3")
+        start = log.last_seq()
+        log.publish("p1", "geocode", "calle mayor#1")
+        log.publish("p2", "snap", "")
+        events = log.since(start)
+        assert [(o, c, p) for _, o, c, p in events] == [
+            ("p1", "geocode", "calle mayor#1"), ("p2", "snap", ""),
+        ]
+        assert log.since(events[-1][0]) == []
+        assert log.last_seq() == events[-1][0]
+        log.close()
+
+    def test_publish_many_en_orden(self, tmp_path):
+        log = InvalidationLog(tmp_path / "kv.sqlite3")
+        log.publish_many("p1", "geocode", ["a#1", "b#2"])
+        log.publish_many("p1", "geocode", [])
+        assert [(c, p) for _, _, c, p in log.since(0)] == [("geocode", "a#1"), ("geocode", "b#2")]
+        log.close()
+
+    def test_otra_conexion_ve_los_eventos(self, tmp_path):
+        a = InvalidationLog(tmp_path / "kv.sqlite3")
+        b = InvalidationLog(tmp_path / "kv.sqlite3")
+        a.publish("p1", "snap", "")
+        assert len(b.since(0)) == 1
+        a.close()
+        b.close()
+
+    def test_trim_borra_los_viejos(self, tmp_path):
+        log = InvalidationLog(tmp_path / "kv.sqlite3")
+        log.publish("p1", "snap", "")
+        log.trim(older_than=float("inf"))
+        assert log.since(0) == []
+        log.close()
+
+    def test_trim_apunta_hasta_donde_borro(self, tmp_path):
+        log = InvalidationLog(tmp_path / "kv.sqlite3")
+        assert log.trimmed_through() == 0
+        log.publish_many("p1", "snap", ["", ""])
+        upto = log.last_seq()
+        log.trim(older_than=float("inf"))
+        log.trim(older_than=float("inf"))   # nada que borrar: no retrocede
+        assert log.trimmed_through() == upto
+        log.close()
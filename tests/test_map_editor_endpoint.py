@@ -5,6 +5,7 @@ Se mockean: get_geojson, apply_and_save (en app.routers.map_editor).
 No se necesita osmium, OSRM ni fichero PBF para ejecutar estos tests.
 """
 
+import time
 from unittest.mock import patch
 
 import pytest
@@ -37,11 +38,9 @@ _GEOJSON_OK = {
 # ── Fixture: resetea el estado del rebuild antes de cada test ─────────────────
 
 @pytest.fixture(autouse=True)
-def _reset_rebuild(monkeypatch: pytest.MonkeyPatch) -> None:
-    """Devuelve el dict _rebuild a su estado inicial para evitar contaminación entre tests."""
-    monkeypatch.setitem(router_mod._rebuild, "running", False)
-    monkeypatch.setitem(router_mod._rebuild, "status",  "idle")
-    monkeypatch.setitem(router_mod._rebuild, "message", "")
+def _reset_rebuild() -> None:
+    """Devuelve el estado del rebuild a idle para evitar contaminación entre tests."""
+    router_mod._set_rebuild(running=False, status="idle", message="")
 
 
 # ═══════════════════════════════════════════
@@ -180,10 +179,32 @@ class TestRebuildEndpoint:
         assert r.json()["status"] == "started"
 
     def test_devuelve_409_si_ya_hay_rebuild_en_curso(self, client, monkeypatch) -> None:
-        monkeypatch.setitem(router_mod._rebuild, "running", True)
+        router_mod._set_rebuild(running=True, started_at=time.time())
         r = client.post(URL_REBUILD)
         assert r.status_code == 409
 
+    def test_segundo_rebuild_devuelve_409(self, client, tmp_path, monkeypatch) -> None:
+        """El primero queda marcado en el estado compartido: lo ve cualquier worker."""
+        fake_pbf = tmp_path / "posadas_editado.osm.pbf"
+        fake_pbf.write_bytes(b"")
+        monkeypatch.setattr(router_mod, "PBF_PATH", fake_pbf)
+        with patch("app.routers.map_editor.asyncio.create_task", side_effect=lambda coro: coro.close()):
+            assert client.post(URL_REBUILD).status_code == 200
+            assert client.post(URL_REBUILD).status_code == 409
+        assert client.get(URL_REBUILD_STATUS).json()["status"] == "running"
+
+    def test_rebuild_colgado_no_bloquea(self, client, tmp_path, monkeypatch) -> None:
+        """Un worker que murió a mitad de rebuild no lo bloquea para siempre."""
+        fake_pbf = tmp_path / "posadas_editado.osm.pbf"
+        fake_pbf.write_bytes(b"")
+        monkeypatch.setattr(router_mod, "PBF_PATH", fake_pbf)
+        router_mod._set_rebuild(
+            running=True, status="running", started_at=time.time() - router_mod._REBUILD_STALE_S - 1,
+        )
+        with patch("app.routers.map_editor.asyncio.create_task", side_effect=lambda coro: coro.close()):
+            r = client.post(URL_REBUILD)
+        assert r.status_code == 200
+
     def test_devuelve_404_si_pbf_no_existe(self, client, tmp_path, monkeypatch) -> None:
         monkeypatch.setattr(router_mod, "PBF_PATH", tmp_path / "no_existe.osm.pbf")
         r = client.post(URL_REBUILD)
@@ -207,26 +228,22 @@ class TestRebuildStatusEndpoint:
         assert body["message"] == ""
 
     def test_refleja_estado_running(self, client, monkeypatch) -> None:
-        monkeypatch.setitem(router_mod._rebuild, "running", True)
-        monkeypatch.setitem(router_mod._rebuild, "status",  "running")
-        monkeypatch.setitem(router_mod._rebuild, "message", "Iniciando rebuild…")
+        router_mod._set_rebuild(
+            running=True, status="running", message="Iniciando rebuild…", started_at=time.time(),
+        )
         r = client.get(URL_REBUILD_STATUS)
         body = r.json()
         assert body["running"] is True
         assert body["status"] == "running"
 
     def test_refleja_estado_ok(self, client, monkeypatch) -> None:
-        monkeypatch.setitem(router_mod._rebuild, "running", False)
-        monkeypatch.setitem(router_mod._rebuild, "status",  "ok")
-        monkeypatch.setitem(router_mod._rebuild, "message", "Rebuild completado.")
+        router_mod._set_rebuild(running=False, status="ok", message="Rebuild completado.")
         r = client.get(URL_REBUILD_STATUS)
         body = r.json()
         assert body["status"] == "ok"
         assert "completado" in body["message"]
 
     def test_refleja_estado_error(self, client, monkeypatch) -> None:
-        monkeypatch.setitem(router_mod._rebuild, "running", False)
-        monkeypatch.setitem(router_mod._rebuild, "status",  "error")
-        monkeypatch.setitem(router_mod._rebuild, "message", "código 1")
+        router_mod._set_rebuild(running=False, status="error", message="código 1")
         r = client.get(URL_REBUILD_STATUS)
         assert r.json()["status"] == "error"
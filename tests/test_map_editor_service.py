@@ -5,6 +5,7 @@ La estrategia: se usa un XML OSM mínimo como "PBF" de prueba;
 el mock de _run_osmium simplemente copia el archivo origen al destino.
 """
 
+import math
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from unittest.mock import patch
@@ -12,6 +13,7 @@ from unittest.mock import patch
 import pytest
 
 import app.services.map_editor as svc
+from app.core.ttlstore import TTLStore
 
 # ── XML OSM mínimo de prueba ──────────────────────────────────────────────────
 # Nodo 2 es compartido por las dos vías → es intersección de way 1000.
@@ -52,7 +54,7 @@ def _reset_svc_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     pbf = tmp_path / "posadas_editado.osm.pbf"
     pbf.write_text(_OSM_XML, encoding="utf-8")
     monkeypatch.setattr(svc, "PBF_PATH", pbf)
-    monkeypatch.setattr(svc, "_cache", None)
+    monkeypatch.setattr(svc, "_cache", TTLStore(1, math.inf))
 
 
 def _osmium_copy(args: list[str]) -> None:
@@ -182,9 +184,9 @@ class TestApplyAndSaveWholeWay:
     def test_invalida_cache(self) -> None:
         with patch.object(svc, "_run_osmium", side_effect=_osmium_copy):
             svc.get_geojson()
-            assert svc._cache is not None
+            assert len(svc._cache) == 1
             svc.apply_and_save([{"id": 1000, "highway": "tertiary", "oneway": None, "name": None}])
-        assert svc._cache is None
+        assert len(svc._cache) == 0
 
     def test_sin_cambios_no_llama_osmium(self) -> None:
         call_count = [0]
@@ -0,0 +1,35 @@
+"""
+Tests unitarios — app/core/metrics.py.
+
+Cubre:
+  - CallStats → llamadas y resultados por endpoint, latencia media / máxima,
+                reset
+"""
+
+from app.core.metrics import CallStats
+
+
+class TestCallStats:
+
+    def test_snapshot_por_endpoint(self):
+        stats = CallStats()
+        stats.record("geocoding", 0.010, "ok")
+        stats.record("geocoding", 0.030, "throttled")
+        stats.record("places", 0.020, "ok")
+        snap = stats.snapshot()
+        assert snap["geocoding"] == {
+            "calls": 2,
+            "outcomes": {"ok": 1, "throttled": 1},
+            "avg_ms": 20.0,
+            "max_ms": 30.0,
+        }
+        assert snap["places"]["calls"] == 1
+
+    def test_sin_llamadas_snapshot_vacio(self):
+        assert CallStats().snapshot() == {}
+
+    def test_reset(self):
+        stats = CallStats()
+        stats.record("geocoding", 0.010, "ok")
+        stats.reset()
+        assert stats.snapshot() == {}
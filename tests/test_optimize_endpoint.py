@@ -1,13 +1,16 @@
 """
 Tests del endpoint POST /api/optimize.
 
-Se mockean: snap_to_street, optimize_route.
+Se mockean: snap_to_street_async, optimize_route_async.
 No se necesitan Docker ni clave de Google para ejecutar estos tests.
 """
 
 from unittest.mock import patch
 
+import msgpack
+
 from app.core.config import DEPOT_LAT, DEPOT_LON
+from app.services.route_sessions import add_prefetched_session
 
 URL = "/api/optimize"
 
@@ -41,18 +44,18 @@ def _req_con_coords(addresses=None, coords=None, clientes=None):
 def _mocks_ok():
     """Contexto con todos los mocks externos devolviendo éxito.
 
-    snap_to_street se llama ahora también para el origen: devuelve las coords
+    snap_to_street_async se llama también para el origen: devuelve las coords
     del depósito cuando recibe las coords del depósito, y (37.806, -5.100) para
     las paradas, para que los tests que comprueban stops[0]["lat"] sigan pasando.
     """
-    def _snap(lat: float, lon: float, hint: str = "") -> tuple[float, float]:
+    def _snap(lat: float, lon: float, hint: str = "", **_kw) -> tuple[float, float]:
         if lat == DEPOT_LAT and lon == DEPOT_LON:
             return (DEPOT_LAT, DEPOT_LON)
         return (37.806, -5.100)
 
     return [
-        patch("app.routers.optimize.snap_to_street", side_effect=_snap),
-        patch("app.routers.optimize.optimize_route", return_value=SOLVER_OK),
+        patch("app.routers.optimize.snap_to_street_async", side_effect=_snap),
+        patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK),
     ]
 
 
@@ -79,14 +82,14 @@ def test_demasiadas_paradas_devuelve_400(client):
 # ── Errores de servicios externos ─────────────────────────────────────────────
 
 def test_solver_falla_devuelve_503(client):
-    with patch("app.routers.optimize.snap_to_street", return_value=(37.806, -5.100)), \
-         patch("app.routers.optimize.optimize_route", return_value=None):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=None):
         r = client.post(URL, json=_req_con_coords())
     assert r.status_code == 503
 
 
 def test_todas_las_coords_fuera_de_mapa_devuelve_400(client):
-    with patch("app.routers.optimize.snap_to_street", return_value=None):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=None):
         r = client.post(URL, json=_req_con_coords())
     assert r.status_code == 400
 
@@ -94,8 +97,8 @@ def test_todas_las_coords_fuera_de_mapa_devuelve_400(client):
 # ── Ruta exitosa con coords pre-resueltas ─────────────────────────────────────
 
 def test_ruta_simple_devuelve_200(client):
-    with patch("app.routers.optimize.snap_to_street", return_value=(37.806, -5.100)), \
-         patch("app.routers.optimize.optimize_route", return_value=SOLVER_OK):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK):
         r = client.post(URL, json=_req_con_coords())
     assert r.status_code == 200
     assert r.json()["success"] is True
@@ -114,8 +117,8 @@ def test_ruta_simple_contiene_origen_y_parada(client):
 
 
 def test_ruta_simple_summary_correcto(client):
-    with patch("app.routers.optimize.snap_to_street", return_value=(37.806, -5.100)), \
-         patch("app.routers.optimize.optimize_route", return_value=SOLVER_OK):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK):
         r = client.post(URL, json=_req_con_coords())
     summary = r.json()["summary"]
     assert summary["total_stops"] == 1
@@ -189,7 +192,7 @@ def test_coord_lat_invalida_devuelve_400(client):
         "package_counts": [1, 1],
         "client_names": ["Ana", "Luis"],
     }
-    with patch("app.routers.optimize.snap_to_street", return_value=(37.806, -5.100)):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)):
         r = client.post(URL, json=req)
     assert r.status_code == 400
 
@@ -202,7 +205,7 @@ def test_coord_lon_positiva_devuelve_400(client):
         "package_counts": [1, 1],
         "client_names": ["Ana", "Luis"],
     }
-    with patch("app.routers.optimize.snap_to_street", return_value=(37.806, -5.100)):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)):
         r = client.post(URL, json=req)
     assert r.status_code == 400
 
@@ -215,7 +218,7 @@ def test_coord_fuera_bbox_madrid_devuelve_400(client):
         "package_counts": [1, 1],
         "client_names": ["Externo", "Local"],
     }
-    with patch("app.routers.optimize.snap_to_street", return_value=(37.806, -5.100)):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)):
         r = client.post(URL, json=req)
     assert r.status_code == 400
 
@@ -228,6 +231,257 @@ def test_todas_coords_invalidas_devuelve_400(client):
         "package_counts": [1, 1],
         "client_names": ["Ana", "Luis"],
     }
-    with patch("app.routers.optimize.snap_to_street", return_value=(37.806, -5.100)):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)):
         r = client.post(URL, json=req)
     assert r.status_code == 400
+
+
+# ── Vista previa (preview=true) ───────────────────────────────────────────────
+
+def test_preview_devuelve_orden_aproximado_sin_snap(client):
+    req = {**_req_con_coords(), "preview": True}
+    with patch("app.routers.optimize.snap_to_street_async") as mock_snap, \
+         patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK):
+        r = client.post(URL, json=req)
+        # Solo el cálculo exacto en segundo plano snapea (origen + 1 parada)
+        assert mock_snap.call_count == 2
+    assert r.status_code == 200
+    data = r.json()
+    assert data["preview"] is True
+    assert data["result_id"]
+    assert [s["type"] for s in data["stops"]] == ["origin", "stop"]
+
+
+def test_preview_resultado_exacto_disponible_tras_background(client):
+    req = {**_req_con_coords(), "preview": True}
+    mocks = _mocks_ok()
+    with mocks[0], mocks[1]:
+        r = client.post(URL, json=req)
+    result_id = r.json()["result_id"]
+
+    r2 = client.get(f"{URL}/result/{result_id}")
+    assert r2.status_code == 200
+    data = r2.json()
+    assert data["preview"] is False
+    assert data["result_id"] == result_id
+    assert data["summary"]["total_distance_m"] == 1500
+
+
+def test_preview_resultado_pendiente_devuelve_202(client):
+    import app.routers.optimize as opt
+    opt._store_exact_result("pendiente", None)
+    r = client.get(f"{URL}/result/pendiente")
+    assert r.status_code == 202
+    assert r.json()["status"] == "pending"
+
+
+def test_preview_fallo_exacto_propaga_error(client):
+    req = {**_req_con_coords(), "preview": True}
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=None):
+        r = client.post(URL, json=req)
+    assert r.status_code == 200
+    r2 = client.get(f"{URL}/result/{r.json()['result_id']}")
+    assert r2.status_code == 503
+
+
+def test_resultado_desconocido_devuelve_404(client):
+    r = client.get(f"{URL}/result/no-existe")
+    assert r.status_code == 404
+
+
+def test_sin_preview_no_devuelve_result_id(client):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK):
+        r = client.post(URL, json=_req_con_coords())
+    data = r.json()
+    assert data["preview"] is False
+    assert data["result_id"] is None
+
+
+# ── Stream NDJSON (/optimize/stream) ──────────────────────────────────────────
+
+def _ndjson(r):
+    import json
+    return [json.loads(line) for line in r.text.splitlines() if line.strip()]
+
+
+def test_stream_emite_snap_y_resultado(client):
+    mocks = _mocks_ok()
+    with mocks[0], mocks[1]:
+        r = client.post(f"{URL}/stream", json=_req_con_coords())
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    events = _ndjson(r)
+    snaps = [e for e in events if e["event"] == "snap"]
+    assert len(snaps) == 1
+    assert snaps[0]["i"] == 1 and snaps[0]["n"] == 1
+    assert "cache_hits" in snaps[0]
+    assert events[-1]["event"] == "result"
+    assert events[-1]["response"]["summary"]["total_distance_m"] == 1500
+    assert all("t_ms" in e for e in events)
+
+
+def test_stream_cache_hits_los_da_el_snap(client):
+    """El acierto de caché lo informa snap_to_street_async, sin consultar la caché aparte."""
+    async def _snap(lat, lon, hint="", *, on_cache_hit=None):
+        if on_cache_hit is not None:   # el origen no lo pide
+            on_cache_hit()
+        return (37.806, -5.100)
+
+    with patch("app.routers.optimize.snap_to_street_async", side_effect=_snap), \
+         patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK):
+        r = client.post(f"{URL}/stream", json=_req_con_coords())
+    snaps = [e for e in _ndjson(r) if e["event"] == "snap"]
+    assert snaps[0]["cached"] is True and snaps[0]["cache_hits"] == 1
+
+
+def test_stream_error_se_emite_como_evento(client):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=None):
+        r = client.post(f"{URL}/stream", json=_req_con_coords())
+    assert r.status_code == 200
+    last = _ndjson(r)[-1]
+    assert last["event"] == "error"
+    assert last["status_code"] == 503
+
+
+def test_stream_preview_emite_orden_aproximado_primero(client):
+    mocks = _mocks_ok()
+    with mocks[0], mocks[1]:
+        r = client.post(f"{URL}/stream", json={**_req_con_coords(), "preview": True})
+    events = _ndjson(r)
+    assert events[0]["event"] == "preview"
+    assert events[0]["response"]["preview"] is True
+    assert events[-1]["event"] == "result"
+
+
+# ── Coalescencia de peticiones duplicadas (single-flight) ─────────────────────
+
+def test_optimize_duplicado_reutiliza_resultado_reciente(client):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK) as mock_opt:
+        r1 = client.post(URL, json=_req_con_coords())
+        r2 = client.post(URL, json=_req_con_coords())
+    assert r1.status_code == r2.status_code == 200
+    assert mock_opt.call_count == 1
+
+
+def test_optimize_error_no_se_reutiliza(client):
+    with patch("app.routers.optimize.snap_to_street_async", return_value=(37.806, -5.100)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=None) as mock_opt:
+        client.post(URL, json=_req_con_coords())
+        r = client.post(URL, json=_req_con_coords())
+    assert r.status_code == 503
+    assert mock_opt.call_count == 2
+
+
+# ── Codificación de la respuesta (Accept / Accept-Encoding) ───────────────────
+
+def test_optimize_msgpack_si_se_pide(client):
+    mocks = _mocks_ok()
+    with mocks[0], mocks[1]:
+        r = client.post(URL, json=_req_con_coords(), headers={"Accept": "application/msgpack"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(r.content)["summary"]["total_stops"] == 1
+
+
+def test_optimize_respuesta_comprimida_con_gzip(client):
+    names = [f"Calle {i}" for i in range(1, 21)]
+    coords = [[37.806 + i * 1e-4, -5.100] for i in range(20)]
+    solver = {**SOLVER_OK, "waypoint_order": list(range(21)), "stop_details": [
+        {"original_index": i, "arrival_distance": 100.0 * i, "arrival_duration": 10.0 * i}
+        for i in range(1, 21)
+    ]}
+    with patch("app.routers.optimize.snap_to_street_async", side_effect=lambda lat, lon, hint="", **_kw: (lat, lon)), \
+         patch("app.routers.optimize.optimize_route_async", return_value=solver):
+        r = client.post(
+            URL,
+            json=_req_con_coords(names, coords, [f"C{i}" for i in range(20)]),
+            headers={"Accept-Encoding": "gzip"},
+        )
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert len(r.json()["stops"]) == 21
+
+
+# ── Sesiones de ruta (route_id) ───────────────────────────────────────────────
+
+SOLVER_OK_CON_MATRIZ = {
+    **SOLVER_OK,
+    "dur_matrix": [[0, 300], [310, 0]],
+    "dist_matrix": [[0, 1500], [1450, 0]],
+}
+
+
+def _optimize_con_sesion(client):
+    mocks = _mocks_ok()
+    with mocks[0], patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK_CON_MATRIZ):
+        return client.post(URL, json=_req_con_coords()).json()
+
+
+def test_optimize_devuelve_route_id(client):
+    assert _optimize_con_sesion(client)["route_id"]
+
+
+def test_sin_matrices_no_hay_route_id(client):
+    mocks = _mocks_ok()
+    with mocks[0], mocks[1]:
+        r = client.post(URL, json=_req_con_coords())
+    assert r.json()["route_id"] is None
+
+
+def test_reoptimizar_con_route_id_reutiliza_snaps_y_matriz(client):
+    route_id = _optimize_con_sesion(client)["route_id"]
+    with patch("app.routers.optimize.snap_to_street_async") as mock_snap, \
+         patch("app.routers.optimize.optimize_route_async", return_value=SOLVER_OK_CON_MATRIZ) as mock_opt:
+        r = client.post(URL, json={**_req_con_coords(), "route_id": route_id})
+    assert r.status_code == 200
+    mock_snap.assert_not_called()
+    assert mock_opt.call_args.kwargs["matrix"] == ([[0, 300], [310, 0]], [[0, 1500], [1450, 0]])
+    assert r.json()["route_id"] not in (None, route_id)
+
+
+def test_route_id_desconocido_calcula_normalmente(client):
+    mocks = _mocks_ok()
+    with mocks[0] as mock_snap, mocks[1] as mock_opt:
+        r = client.post(URL, json={**_req_con_coords(), "route_id": "caducado"})
+    assert r.status_code == 200
+    assert mock_snap.call_count == 2
+    assert mock_opt.call_args.kwargs["matrix"] is None
+
+
+def test_reparto_precalentado_reutiliza_snaps_y_matriz_sin_route_id(client):
+    depot = (DEPOT_LAT, DEPOT_LON)
+    add_prefetched_session(
+        [depot, tuple(STOP_COORD)], [depot, (37.806, -5.100)],
+        [[0, 300], [310, 0]], [[0, 1500], [1450, 0]],
+    )
+    mocks = _mocks_ok()
+    with mocks[0] as mock_snap, mocks[1] as mock_opt:
+        r = client.post(URL, json=_req_con_coords())
+    assert r.status_code == 200
+    assert mock_snap.call_count == 1   # solo el origen (de la caché de snaps)
+    assert mock_opt.call_args.kwargs["matrix"] == ([[0, 300], [310, 0]], [[0, 1500], [1450, 0]])
+
+
+def test_route_evaluate_con_route_id_no_llama_a_osrm(client):
+    data = _optimize_con_sesion(client)
+    coords = [[s["lat"], s["lon"]] for s in reversed(data["stops"])]
+    with patch("app.routers.optimize.get_osrm_matrix_async") as mock_matrix:
+        r = client.post("/api/route-evaluate", json={"coords": coords, "route_id": data["route_id"]})
+    assert r.status_code == 200
+    assert r.json()["total_distance_m"] == 1450
+    mock_matrix.assert_not_called()
+
+
+def test_route_evaluate_coords_ajenas_a_la_sesion_usan_osrm(client):
+    data = _optimize_con_sesion(client)
+    with patch("app.routers.optimize.get_osrm_matrix_async",
+               return_value=([[0, 1], [1, 0]], [[0, 999], [999, 0]])) as mock_matrix:
+        r = client.post("/api/route-evaluate", json={
+            "coords": [[37.80, -5.10], [37.81, -5.11]], "route_id": data["route_id"],
+        })
+    assert r.json()["total_distance_m"] == 999
+    mock_matrix.assert_called_once()
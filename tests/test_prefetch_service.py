@@ -0,0 +1,85 @@
+"""
+Tests del servicio de precalentado — app/services/prefetch.py.
+
+Se mockean geocode_async, snap_to_street_async y get_osrm_matrix_async.
+
+Cubre:
+  - run_prefetch     → contadores de progreso, sesión precalentada con las
+                       coords originales, paradas fuera del mapa excluidas,
+                       origen no geocodificable, fallo de la matriz
+  - get_status       → otro worker consulta la copia compartida
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from app.core.config import DEPOT_LAT, DEPOT_LON
+from app.services import prefetch
+from app.services.route_sessions import find_prefetched_session
+
+DEPOT = (DEPOT_LAT, DEPOT_LON)
+COORDS = {"Calle Mayor 1": (37.805, -5.099), "Calle Real 2": (37.806, -5.100)}
+
+
+async def _fake_geocode(address, alias="", **_):
+    coord = COORDS.get(address)
+    return coord, "EXACT_ADDRESS" if coord else "FAILED"
+
+
+async def _fake_snap(lat, lon, hint=""):
+    return (round(lat + 0.0001, 6), lon)
+
+
+def _run(addresses, start_address="", matrix=([[0]], [[0]]), snap=_fake_snap):
+    job = prefetch.create_job(start_address)
+    with patch("app.services.prefetch.geocode_async", side_effect=_fake_geocode), \
+         patch("app.services.prefetch.snap_to_street_async", side_effect=snap), \
+         patch("app.services.prefetch.get_osrm_matrix_async", return_value=matrix) as mock_matrix:
+        asyncio.run(prefetch.run_prefetch(job, addresses))
+    return job, mock_matrix
+
+
+def test_run_prefetch_cuenta_progreso_y_guarda_sesion():
+    job, mock_matrix = _run([("Calle Mayor 1", ""), ("Calle Real 2", ""), ("Calle Nada 9", "")])
+    status = job.status()
+    assert (status.status, status.total, status.geocoded, status.failed) == ("done", 3, 2, 1)
+    assert status.snapped == 2
+    assert status.matrix_ready is True
+    assert len(mock_matrix.call_args.args[0]) == 3   # origen + 2 paradas
+    assert find_prefetched_session([DEPOT, COORDS["Calle Mayor 1"], COORDS["Calle Real 2"]]) is not None
+    assert prefetch.get_job(job.job_id) is job
+
+
+def test_parada_fuera_del_mapa_queda_fuera_de_la_matriz():
+    async def snap(lat, lon, hint=""):
+        return None if (lat, lon) == COORDS["Calle Real 2"] else (lat, lon)
+
+    job, mock_matrix = _run([("Calle Mayor 1", ""), ("Calle Real 2", "")], snap=snap)
+    assert job.status().snapped == 1
+    assert mock_matrix.call_args.args[0] == [DEPOT, COORDS["Calle Mayor 1"]]
+
+
+def test_origen_no_geocodificable_termina_con_error():
+    job, mock_matrix = _run([("Calle Mayor 1", "")], start_address="Calle Nada 9")
+    status = job.status()
+    assert status.status == "error"
+    assert "origen" in status.error
+    mock_matrix.assert_not_called()
+
+
+def test_fallo_de_la_matriz_no_es_error():
+    job, _ = _run([("Calle Mayor 1", "")], matrix=None)
+    status = job.status()
+    assert status.status == "done"
+    assert status.matrix_ready is False
+    assert find_prefetched_session([DEPOT, COORDS["Calle Mayor 1"]]) is None
+
+
+def test_otro_worker_consulta_la_copia_compartida():
+    job, _ = _run([("Calle Mayor 1", ""), ("Calle Real 2", "")])
+    prefetch.clear_jobs()   # otro worker: sin el job en memoria
+    assert prefetch.get_job(job.job_id) is None
+    status = prefetch.get_status(job.job_id)
+    assert status is not None
+    assert (status.status, status.geocoded, status.snapped, status.matrix_ready) == ("done", 2, 2, True)
+    assert prefetch.get_status("no-existe") is None
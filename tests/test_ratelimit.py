@@ -0,0 +1,94 @@
+"""
+Tests unitarios — app/core/ratelimit.py.
+
+Cubre (sin red):
+  - TokenBucket → ráfaga inicial sin espera, espera proporcional al déficit,
+                  reposición con el tiempo, camino async
+  - AdaptiveTokenBucket → subida aditiva hasta el máximo, bajada a la mitad
+                          una vez por cooldown, suelo min_rate, pausa de
+                          Retry-After que no se acumula
+"""
+
+import asyncio
+from unittest.mock import patch
+
+from app.core.ratelimit import AdaptiveTokenBucket, TokenBucket
+
+
+class TestTokenBucket:
+
+    def test_rafaga_inicial_no_espera(self):
+        bucket = TokenBucket(rate_per_s=10, burst=3)
+        with patch("app.core.ratelimit.time.sleep") as mock_sleep:
+            for _ in range(3):
+                bucket.acquire()
+        mock_sleep.assert_not_called()
+
+    def test_superada_la_rafaga_espera_el_deficit(self):
+        with patch("app.core.ratelimit.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate_per_s=10, burst=1)
+            with patch("app.core.ratelimit.time.sleep") as mock_sleep:
+                bucket.acquire()
+                bucket.acquire()
+                bucket.acquire()
+        waits = [c.args[0] for c in mock_sleep.call_args_list]
+        assert waits == [0.1, 0.2]   # las reservas quedan encoladas en orden
+
+    def test_tokens_se_reponen_con_el_tiempo(self):
+        with patch("app.core.ratelimit.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate_per_s=10, burst=1)
+            bucket.acquire()
+        with patch("app.core.ratelimit.time.monotonic", return_value=100.5), \
+             patch("app.core.ratelimit.time.sleep") as mock_sleep:
+            bucket.acquire()
+        mock_sleep.assert_not_called()
+
+    def test_acquire_async_espera_sin_bloquear(self):
+        with patch("app.core.ratelimit.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate_per_s=4, burst=1)
+            with patch("app.core.ratelimit.asyncio.sleep") as mock_sleep:
+                asyncio.run(bucket.acquire_async())
+                asyncio.run(bucket.acquire_async())
+        mock_sleep.assert_called_once_with(0.25)
+
+
+class TestAdaptiveTokenBucket:
+
+    def _bucket(self, **kwargs) -> AdaptiveTokenBucket:
+        kwargs.setdefault("min_rate", 1.0)
+        kwargs.setdefault("increase", 1.0)
+        return AdaptiveTokenBucket(rate_per_s=20, burst=1, **kwargs)
+
+    def test_throttle_reduce_a_la_mitad_y_exitos_recuperan(self):
+        with patch("app.core.ratelimit.time.monotonic", return_value=100.0):
+            bucket = self._bucket()
+            bucket.on_throttle()
+            assert bucket.rate_per_s == 10
+            for _ in range(15):
+                bucket.on_success()
+        assert bucket.rate_per_s == 20   # no pasa del máximo
+
+    def test_rafaga_de_throttles_reduce_una_vez_por_cooldown(self):
+        with patch("app.core.ratelimit.time.monotonic", return_value=100.0):
+            bucket = self._bucket()
+            for _ in range(5):
+                bucket.on_throttle()
+        assert bucket.rate_per_s == 10
+        with patch("app.core.ratelimit.time.monotonic", return_value=101.5):
+            bucket.on_throttle()
+        assert bucket.rate_per_s == 5
+
+    def test_no_baja_del_minimo(self):
+        bucket = self._bucket(min_rate=4.0, cooldown_s=0.0)
+        for _ in range(10):
+            bucket.on_throttle()
+        assert bucket.rate_per_s == 4.0
+
+    def test_retry_after_pausa_la_siguiente_llamada(self):
+        with patch("app.core.ratelimit.time.monotonic", return_value=100.0):
+            bucket = self._bucket()
+            bucket.on_throttle(retry_after=2.0)
+            bucket.on_throttle(retry_after=2.0)   # simultáneo: no suma otra pausa
+            with patch("app.core.ratelimit.time.sleep") as mock_sleep:
+                bucket.acquire()
+        mock_sleep.assert_called_once_with(2.1)   # 2 s + 1 token a 10 QPS
@@ -0,0 +1,54 @@
+"""
+Tests unitarios — app/core/readiness.py.
+
+Cubre:
+  - Readiness → no listo hasta terminar, pasos en orden con ms y detalle,
+                un paso con error no para el resto, run() en un hilo
+"""
+
+import asyncio
+
+from app.core.readiness import Readiness
+
+
+class TestReadiness:
+
+    def test_no_listo_antes_de_arrancar(self):
+        r = Readiness()
+        assert r.is_ready() is False
+        assert r.snapshot() == {"ready": False, "startup_ms": None, "steps": {}}
+
+    def test_pasos_en_orden_con_detalle_y_duracion(self):
+        seen: list[str] = []
+        r = Readiness()
+        r.run_sync({
+            "uno": lambda: seen.append("uno") or 10,
+            "dos": lambda: seen.append("dos"),
+        })
+        snap = r.snapshot()
+        assert seen == ["uno", "dos"]
+        assert snap["ready"] is True
+        assert snap["steps"]["uno"]["detail"] == 10
+        assert "detail" not in snap["steps"]["dos"]
+        assert all(s["ms"] >= 0 for s in snap["steps"].values())
+        assert snap["startup_ms"] >= 0
+
+    def test_error_en_un_paso_no_para_el_resto(self):
+        def boom() -> None:
+            raise RuntimeError("sin disco")
+
+        r = Readiness()
+        r.run_sync({"malo": boom, "bueno": lambda: "ok"})
+        snap = r.snapshot()
+        assert r.is_ready()
+        assert snap["steps"]["malo"]["status"] == "error"
+        assert snap["steps"]["malo"]["error"] == "sin disco"
+        assert snap["steps"]["bueno"]["status"] == "ok"
+
+    def test_run_asincrono_y_reset(self):
+        r = Readiness()
+        asyncio.run(r.run({"a": lambda: None}))
+        assert r.wait(timeout=1)
+        r.reset()
+        assert r.is_ready() is False
+        assert r.snapshot()["steps"] == {}
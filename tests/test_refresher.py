@@ -0,0 +1,73 @@
+"""
+Tests unitarios — app/core/refresher.py.
+
+Cubre:
+  - BackgroundRefresher → dedup de claves pendientes, límite de cola,
+                          run_pending sin hilo, hilo daemon, errores aislados,
+                          stop descarta lo pendiente
+"""
+
+from app.core.refresher import BackgroundRefresher
+
+
+class TestBackgroundRefresher:
+
+    def test_submit_deduplica_claves_pendientes(self):
+        seen: list[str] = []
+        r = BackgroundRefresher("t", seen.append, rate_per_s=1e6, autostart=False)
+        assert r.submit("a") is True
+        assert r.submit("a") is False
+        assert r.submit("b") is True
+        assert r.pending() == 2
+        assert r.run_pending() == 2
+        assert seen == ["a", "b"]
+        assert r.pending() == 0
+
+    def test_procesada_se_puede_volver_a_encolar(self):
+        seen: list[str] = []
+        r = BackgroundRefresher("t", seen.append, rate_per_s=1e6, autostart=False)
+        r.submit("a")
+        r.run_pending()
+        assert r.submit("a") is True
+
+    def test_cola_llena_descarta_nuevas(self):
+        r = BackgroundRefresher("t", lambda k: None, rate_per_s=1e6, max_pending=2, autostart=False)
+        r.submit("a")
+        r.submit("b")
+        assert r.submit("c") is False
+        assert r.pending() == 2
+
+    def test_error_en_fn_no_detiene_el_resto(self):
+        seen: list[str] = []
+
+        def fn(key: str) -> None:
+            if key == "mala":
+                raise RuntimeError("boom")
+            seen.append(key)
+
+        r = BackgroundRefresher("t", fn, rate_per_s=1e6, autostart=False)
+        r.submit("mala")
+        r.submit("buena")
+        r.run_pending()
+        assert seen == ["buena"]
+        assert r.pending() == 0
+
+    def test_hilo_procesa_en_segundo_plano(self):
+        seen: list[str] = []
+        r = BackgroundRefresher("t", seen.append, rate_per_s=1e6)
+        try:
+            r.submit("a")
+            r.submit("b")
+            assert r.wait_idle(timeout=2)
+        finally:
+            r.stop()
+        assert sorted(seen) == ["a", "b"]
+
+    def test_stop_descarta_lo_pendiente(self):
+        seen: list[str] = []
+        r = BackgroundRefresher("t", seen.append, rate_per_s=1e6, autostart=False)
+        r.submit("a")
+        r.stop()
+        assert r.pending() == 0
+        assert r.run_pending() == 0
+        assert seen == []
@@ -0,0 +1,96 @@
+"""
+Tests unitarios — app/core/responses.py.
+
+Cubre (sin red):
+  - encode_body           → JSON / MessagePack de un modelo Pydantic
+  - compress_body         → umbral de tamaño, preferencia br > gzip, q=0
+  - negotiated_response   → Content-Type, Content-Encoding y Vary
+"""
+
+import gzip
+import json
+
+import brotli
+import msgpack
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from app.core.responses import (
+    COMPRESS_MIN_BYTES,
+    compress_body,
+    encode_body,
+    negotiated_response,
+)
+
+
+class _Payload(BaseModel):
+    name: str
+    values: list[float]
+
+
+def _request(**headers: str) -> Request:
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": raw})
+
+
+_BIG = _Payload(name="ruta", values=[37.8 + i * 1.234567e-4 for i in range(500)])
+
+
+class TestEncodeBody:
+
+    def test_json_equivale_a_model_dump(self):
+        body = encode_body(_BIG, "application/json")
+        assert json.loads(body) == _BIG.model_dump()
+
+    def test_msgpack_equivale_a_model_dump(self):
+        body = encode_body(_BIG, "application/msgpack")
+        assert msgpack.unpackb(body) == _BIG.model_dump()
+
+    def test_msgpack_mas_compacto_que_json(self):
+        assert len(encode_body(_BIG, "application/msgpack")) < len(encode_body(_BIG, "application/json"))
+
+    def test_json_conserva_acentos(self):
+        body = encode_body(_Payload(name="Córdoba", values=[]), "application/json")
+        assert json.loads(body)["name"] == "Córdoba"
+
+
+class TestCompressBody:
+
+    def test_cuerpo_pequeno_no_se_comprime(self):
+        body = b"x" * (COMPRESS_MIN_BYTES - 1)
+        assert compress_body(body, "gzip, br") == (body, None)
+
+    def test_prefiere_brotli(self):
+        body = b"abc" * COMPRESS_MIN_BYTES
+        out, enc = compress_body(body, "gzip, br")
+        assert enc == "br"
+        assert brotli.decompress(out) == body
+
+    def test_gzip_si_no_acepta_brotli(self):
+        body = b"abc" * COMPRESS_MIN_BYTES
+        out, enc = compress_body(body, "gzip, deflate")
+        assert enc == "gzip"
+        assert gzip.decompress(out) == body
+
+    def test_q_cero_desactiva_codificacion(self):
+        body = b"abc" * COMPRESS_MIN_BYTES
+        assert compress_body(body, "br;q=0, identity") == (body, None)
+
+
+class TestNegotiatedResponse:
+
+    def test_json_por_defecto(self):
+        resp = negotiated_response(_request(), _BIG)
+        assert resp.media_type == "application/json"
+        assert "content-encoding" not in resp.headers
+        assert resp.headers["vary"] == "Accept, Accept-Encoding"
+
+    def test_msgpack_si_se_pide(self):
+        resp = negotiated_response(_request(accept="application/x-msgpack"), _BIG)
+        assert resp.media_type == "application/x-msgpack"
+        assert msgpack.unpackb(resp.body) == _BIG.model_dump()
+
+    def test_comprime_segun_accept_encoding(self):
+        resp = negotiated_response(_request(accept_encoding="gzip"), _BIG)
+        assert resp.headers["content-encoding"] == "gzip"
+        assert json.loads(gzip.decompress(resp.body)) == _BIG.model_dump()
@@ -0,0 +1,138 @@
+"""
+Tests unitarios — app/services/route_sessions.py.
+
+Cubre (sin red):
+  - RouteSession.snapped / indices / submatrix / path_distance
+  - create_session / get_session / clear_sessions
+  - add_prefetched_session / find_prefetched_session (por coords originales)
+  - almacén compartido entre workers (otro worker = memoria vacía)
+"""
+
+import time
+
+from app.adapters import shared_state
+from app.adapters.kvstore import InvalidationLog
+from app.services import route_sessions
+from app.services.route_sessions import (
+    RouteSession,
+    add_prefetched_session,
+    clear_sessions,
+    create_session,
+    find_prefetched_session,
+    get_session,
+)
+
+RAW = [(37.8000, -5.1000), (37.8010, -5.1010), (37.8020, -5.1020)]
+SNAPPED = [(37.8001, -5.1001), (37.8011, -5.1011), (37.8021, -5.1021)]
+DUR = [[0, 10, 20], [10, 0, 15], [20, 15, 0]]
+DIST = [[0, 100, 200], [110, 0, 150], [210, 160, 0]]
+
+
+def _session() -> RouteSession:
+    return RouteSession(RAW, SNAPPED, DUR, DIST, [0, 1, 2])
+
+
+class TestRouteSession:
+
+    def test_snapped_de_coord_original(self):
+        assert _session().snapped(RAW[1]) == SNAPPED[1]
+        assert _session().snapped((1.0, 2.0)) is None
+
+    def test_submatrix_respeta_el_orden_pedido(self):
+        dur, dist = _session().submatrix([SNAPPED[0], SNAPPED[2], SNAPPED[1]])
+        assert dist == [[0, 200, 100], [210, 0, 160], [110, 150, 0]]
+        assert dur == [[0, 20, 10], [20, 0, 15], [10, 15, 0]]
+
+    def test_submatrix_con_coord_desconocida_devuelve_none(self):
+        assert _session().submatrix([SNAPPED[0], (1.0, 2.0)]) is None
+
+    def test_path_distance_suma_tramos_dirigidos(self):
+        assert _session().path_distance([SNAPPED[0], SNAPPED[2], SNAPPED[1]]) == 200 + 160
+
+    def test_path_distance_con_coord_desconocida_devuelve_none(self):
+        assert _session().path_distance([SNAPPED[0], (1.0, 2.0)]) is None
+
+
+class TestStore:
+
+    def test_crear_y_recuperar(self):
+        route_id = create_session(RAW, SNAPPED, DUR, DIST, [0, 2, 1])
+        session = get_session(route_id)
+        assert session is not None
+        assert session.order == [0, 2, 1]
+
+    def test_id_desconocido_o_vacio(self):
+        assert get_session("no-existe") is None
+        assert get_session(None) is None
+
+    def test_clear_sessions(self):
+        route_id = create_session(RAW, SNAPPED, DUR, DIST, [0, 1, 2])
+        clear_sessions()
+        assert get_session(route_id) is None
+
+
+class TestPrefetched:
+
+    def test_encuentra_la_que_conoce_todas_las_coords(self):
+        add_prefetched_session(RAW, SNAPPED, DUR, DIST)
+        session = find_prefetched_session([RAW[0], RAW[2]])
+        assert session is not None
+        assert session.submatrix([SNAPPED[0], SNAPPED[2]]) == ([[0, 20], [20, 0]], [[0, 200], [210, 0]])
+
+    def test_coord_desconocida_no_encuentra(self):
+        add_prefetched_session(RAW, SNAPPED, DUR, DIST)
+        assert find_prefetched_session([RAW[0], (1.0, 2.0)]) is None
+
+    def test_clear_sessions_incluye_precalentadas(self):
+        add_prefetched_session(RAW, SNAPPED, DUR, DIST)
+        clear_sessions()
+        assert find_prefetched_session([RAW[0]]) is None
+
+
+def _otro_worker() -> None:
+    """Memoria de sesiones vacía, mismo almacén SQLite."""
+    route_sessions._sessions.clear()
+    route_sessions._prefetched.clear()
+    route_sessions._prefetched_seen.clear()
+
+
+class TestAlmacenCompartido:
+
+    def test_sesion_creada_en_otro_worker(self):
+        route_id = create_session(RAW, SNAPPED, DUR, DIST, [0, 2, 1])
+        _otro_worker()
+        session = get_session(route_id)
+        assert session is not None
+        assert session.order == [0, 2, 1]
+        assert session.snapped(RAW[1]) == SNAPPED[1]
+        assert session.submatrix(SNAPPED) == (DUR, DIST)
+
+    def test_caducada_en_sqlite_no_se_devuelve(self):
+        route_id = create_session(RAW, SNAPPED, DUR, DIST, [0, 1, 2])
+        shared_state.get_store("route_sessions").transform(
+            route_id, lambda data: {**data, "expires_at": time.time() - 1},
+        )
+        _otro_worker()
+        assert get_session(route_id) is None
+
+    def test_uso_renueva_la_caducidad_en_sqlite(self):
+        route_id = create_session(RAW, SNAPPED, DUR, DIST, [0, 1, 2])
+        store = shared_state.get_store("route_sessions")
+        store.transform(route_id, lambda data: {**data, "expires_at": time.time() + 60})
+        _otro_worker()
+        get_session(route_id)
+        assert store.get(route_id)["expires_at"] > time.time() + 3600
+
+    def test_precalentada_en_otro_worker(self):
+        add_prefetched_session(RAW, SNAPPED, DUR, DIST)
+        _otro_worker()
+        session = find_prefetched_session([RAW[0], RAW[2]])
+        assert session is not None
+        assert session.submatrix([SNAPPED[0], SNAPPED[2]]) == ([[0, 20], [20, 0]], [[0, 200], [210, 0]])
+
+    def test_clear_sessions_de_otro_worker_vacia_esta_memoria(self):
+        shared_state.poll(force=True)
+        create_session(RAW, SNAPPED, DUR, DIST, [0, 1, 2])
+        InvalidationLog(shared_state._DB).publish("otro", "route_sessions", "")
+        shared_state.poll(force=True)
+        assert len(route_sessions._sessions) == 0
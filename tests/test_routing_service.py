@@ -4,12 +4,19 @@ optimize_route, _reorder_no_backtrack.
 Se mockean las llamadas HTTP a OSRM; LKH3 resuelve con matrices reales pequeñas.
 """
 
-from unittest.mock import patch, Mock
+import asyncio
+import json
+from unittest.mock import patch, AsyncMock, Mock
+
+import httpx
 
 import app.services.routing as routing_module
+from app.adapters.kvstore import InvalidationLog, SqliteKVStore
 from app.services.routing import (
     snap_to_street,
+    snap_to_street_async,
     get_osrm_matrix,
+    get_osrm_matrix_async,
     optimize_route,
     _reorder_no_backtrack,
     _snap_key,
@@ -173,6 +180,74 @@ def test_snap_cache_none_no_se_guarda():
     assert len(routing_module._snap_cache) == 0
 
 
+def test_snap_cache_se_lee_de_disco_en_la_primera_consulta():
+    """El fichero no se lee al importar: lo carga la primera consulta."""
+    from app.adapters import osrm
+
+    key = _snap_key(37.806, -5.100, "Calle Gaitán")
+    osrm._SNAP_CACHE_FILE.write_text(json.dumps({key: [37.8061, -5.1001]}), "utf-8")
+    assert key not in routing_module._snap_cache
+    with patch("app.adapters.osrm.requests.get") as mock_get:
+        result = snap_to_street(37.806, -5.100, "Calle Gaitán")
+    mock_get.assert_not_called()
+    assert result == (37.8061, -5.1001)
+    assert osrm.load_snap_cache() == 1
+
+
+def test_snap_guardado_por_otro_worker_no_llama_osrm():
+    """Tras cargar, un fallo en memoria se busca en SQLite antes que en OSRM."""
+    from app.adapters import osrm
+
+    assert osrm.load_snap_cache() == 0
+    key = _snap_key(37.806, -5.100, "Calle Gaitán")
+    SqliteKVStore(osrm._SNAP_DB, "snap").put(key, [37.8061, -5.1001])
+    with patch("app.adapters.osrm.requests.get") as mock_get:
+        result = snap_to_street(37.806, -5.100, "Calle Gaitán")
+    mock_get.assert_not_called()
+    assert result == (37.8061, -5.1001)
+
+
+def test_snap_nuevo_se_guarda_en_sqlite():
+    from app.adapters import osrm
+
+    candidates = [_candidate("Calle Gaitán", 37.806, -5.100, 30)]
+    with patch("app.adapters.osrm.requests.get", return_value=_mock_nearest(candidates)):
+        snap_to_street(37.806, -5.100, "")
+    assert osrm._get_snap_store().get(_snap_key(37.806, -5.100, "")) == [37.806, -5.100]
+
+
+def test_clear_snap_cache_de_otro_worker_vacia_esta_memoria():
+    from app.adapters import osrm, shared_state
+
+    osrm.load_snap_cache()
+    shared_state.poll(force=True)
+    routing_module._snap_cache[_snap_key(37.806, -5.100, "")] = [37.806, -5.100]
+    InvalidationLog(shared_state._DB).publish("otro", "snap", "")
+    shared_state.poll(force=True)
+    assert len(routing_module._snap_cache) == 0
+
+
+def test_clear_snap_cache_vacia_la_cache_que_usa_routing():
+    """routing.py importa _snap_cache por nombre: se vacía en su sitio."""
+    from app.adapters import osrm
+
+    routing_module._snap_cache[_snap_key(37.806, -5.100, "")] = [37.806, -5.100]
+    osrm.clear_snap_cache()
+    assert len(routing_module._snap_cache) == 0
+    assert routing_module._snap_cache is osrm._snap_cache
+
+
+def test_lkh_se_busca_una_sola_vez_y_no_al_importar():
+    from app.adapters import lkh3
+
+    with patch.object(lkh3, "_lkh_searched", False), \
+         patch.object(lkh3, "_LKH_BIN", None), \
+         patch.object(lkh3, "_find_lkh", return_value=None) as mock_find:
+        assert lkh3._solve_with_lkh([[0]], [[0]]) is None
+        assert lkh3.lkh_binary() is None
+    mock_find.assert_called_once()
+
+
 def test_snap_cache_clave_distingue_hint():
     """Mismas coords con hints distintos producen claves distintas."""
     key1 = _snap_key(37.806, -5.100, "Calle Gaitán")
@@ -418,3 +493,100 @@ def test_optimize_aplica_reagrupacion(monkeypatch):
         result = optimize_route([(37.8, -5.1)] * 4)
     assert result is not None
     assert result["waypoint_order"] == [0, 1, 2, 3]
+
+
+# ── Eventos de progreso ───────────────────────────────────────────────────────
+
+def test_optimize_emite_eventos_de_progreso():
+    events: list[tuple[str, dict]] = []
+    matrix = ([[0, 300], [300, 0]], [[0, 1500], [1500, 0]])
+    optimize_route(
+        [(37.805, -5.099), (37.806, -5.100)],
+        matrix_fn=lambda coords: matrix,
+        solver_fn=lambda dur, dist: [0, 1],
+        progress=lambda event, **f: events.append((event, f)),
+    )
+    names = [e for e, _ in events]
+    assert names == ["matrix", "solver_start", "solver_end"]
+    assert events[2][1]["tour_length_m"] == 1500
+
+
+# ── Versiones async (cliente httpx compartido) ────────────────────────────────
+
+def _mock_async_client(handler):
+    """AsyncClient de httpx con transporte simulado (sin red)."""
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_snap_async_encuentra_candidato_por_nombre():
+    _clear_snap_cache()
+    candidates = [
+        _candidate("Calle Mayor", 37.805, -5.099, 50),
+        _candidate("Calle Gaitán", 37.806, -5.100, 80),
+    ]
+    client = _mock_async_client(
+        lambda request: httpx.Response(200, json={"code": "Ok", "waypoints": candidates})
+    )
+    with patch("app.adapters.osrm.get_async_client", return_value=client), \
+         patch("app.adapters.osrm._save_snap_cache"):
+        result = asyncio.run(snap_to_street_async(37.806, -5.100, "Calle Gaitán"))
+    assert result == (37.806, -5.100)
+    assert routing_module._snap_cache[_snap_key(37.806, -5.100, "Calle Gaitán")] == [37.806, -5.100]
+
+
+def test_snap_async_avisa_de_acierto_de_cache():
+    _clear_snap_cache()
+    candidates = [_candidate("Calle Gaitán", 37.806, -5.100, 80)]
+    client = _mock_async_client(
+        lambda request: httpx.Response(200, json={"code": "Ok", "waypoints": candidates})
+    )
+    hits: list[bool] = []
+    with patch("app.adapters.osrm.get_async_client", return_value=client), \
+         patch("app.adapters.osrm._save_snap_cache"):
+        asyncio.run(snap_to_street_async(37.806, -5.100, "Calle Gaitán", on_cache_hit=lambda: hits.append(True)))
+        assert hits == []   # primera vez: OSRM
+        asyncio.run(snap_to_street_async(37.806, -5.100, "Calle Gaitán", on_cache_hit=lambda: hits.append(True)))
+    assert hits == [True]
+
+
+def test_snap_async_osrm_caido_devuelve_none():
+    _clear_snap_cache()
+
+    def handler(request):
+        raise httpx.ConnectError("down")
+
+    with patch("app.adapters.osrm.get_async_client", return_value=_mock_async_client(handler)):
+        result = asyncio.run(snap_to_street_async(37.805, -5.099, "Calle Mayor"))
+    assert result is None
+
+
+def test_matrix_async_devuelve_enteros():
+    payload = {
+        "code": "Ok",
+        "durations": [[0, 100.4], [99.6, 0]],
+        "distances": [[0, 800.7], [801.2, 0]],
+    }
+    client = _mock_async_client(lambda request: httpx.Response(200, json=payload))
+    with patch("app.adapters.osrm.get_async_client", return_value=client):
+        result = asyncio.run(get_osrm_matrix_async(COORDS_2))
+    assert result == ([[0, 100], [100, 0]], [[0, 801], [801, 0]])
+
+
+def test_optimize_async_resuelve_en_pool_de_cpu():
+    with patch("app.services.routing.get_osrm_matrix_async", new=AsyncMock(return_value=_MATRIX_2)), \
+         patch("app.services.routing._solve_with_lkh", return_value=[0, 1]):
+        result = asyncio.run(routing_module.optimize_route_async(COORDS_2))
+    assert result is not None
+    assert result["waypoint_order"] == [0, 1]
+    assert result["total_distance"] == 1500
+
+
+def test_optimize_async_con_matriz_dada_no_llama_a_osrm():
+    with patch("app.services.routing.get_osrm_matrix_async", new=AsyncMock()) as mock_matrix, \
+         patch("app.services.routing.learn_from_matrix") as mock_learn, \
+         patch("app.services.routing._solve_with_lkh", return_value=[0, 1]):
+        result = asyncio.run(routing_module.optimize_route_async(COORDS_2, matrix=_MATRIX_2))
+    assert result is not None
+    assert result["dist_matrix"] == _MATRIX_2[1]
+    mock_matrix.assert_not_called()
+    mock_learn.assert_not_called()
@@ -0,0 +1,144 @@
+"""
+Tests unitarios — app/adapters/shared_state.py.
+
+Cubre (SQLite en tmp_path, ver conftest.isolated_shared_state). Otro worker
+se simula escribiendo en el registro de invalidaciones con otro origen:
+  - la primera consulta solo fija el punto de partida
+  - poll aplica los eventos de otros procesos e ignora los propios
+  - publish_many: varios prefijos en una escritura
+  - poll limitado a uno cada SHARED_STATE_POLL_S (salvo force)
+  - un manejador que falla no impide aplicar el resto
+  - polls concurrentes: cada evento se aplica una vez y el cursor no retrocede
+  - eventos borrados antes de leerlos (worker inactivo) → se vacía todo (prefijo "")
+  - get_store: tablas del fichero compartido
+"""
+
+import threading
+
+from app.adapters import shared_state
+from app.adapters.kvstore import InvalidationLog
+
+
+def _other_worker() -> InvalidationLog:
+    return InvalidationLog(shared_state._DB)
+
+
+class TestPoll:
+
+    def test_primera_consulta_no_aplica_lo_anterior(self, monkeypatch):
+        seen: list[str] = []
+        monkeypatch.setitem(shared_state._handlers, "prueba", [seen.append])
+        _other_worker().publish("otro", "prueba", "viejo")
+        assert shared_state.poll(force=True) == 0
+        assert seen == []
+
+    def test_aplica_eventos_de_otros_procesos(self, monkeypatch):
+        seen: list[str] = []
+        monkeypatch.setitem(shared_state._handlers, "prueba", [seen.append])
+        shared_state.poll(force=True)
+        _other_worker().publish("otro", "prueba", "a#1")
+        _other_worker().publish("otro", "ajeno", "x")
+        assert shared_state.poll(force=True) == 1
+        assert seen == ["a#1"]
+        assert shared_state.poll(force=True) == 0
+
+    def test_ignora_los_propios(self, monkeypatch):
+        seen: list[str] = []
+        monkeypatch.setitem(shared_state._handlers, "prueba", [seen.append])
+        shared_state.poll(force=True)
+        shared_state.publish("prueba", "a#1")
+        assert shared_state.poll(force=True) == 0
+        assert seen == []
+
+    def test_publish_many_llega_a_otro_worker(self, monkeypatch):
+        log = _other_worker()
+        start = log.last_seq()
+        shared_state.publish_many("prueba", ["a#1", "b#2"])
+        assert [(c, p) for _, _, c, p in log.since(start)] == [("prueba", "a#1"), ("prueba", "b#2")]
+
+    def test_limitado_en_el_tiempo(self, monkeypatch):
+        seen: list[str] = []
+        monkeypatch.setitem(shared_state._handlers, "prueba", [seen.append])
+        shared_state.poll(force=True)
+        _other_worker().publish("otro", "prueba", "a#1")
+        assert shared_state.poll() == 0  # dentro de SHARED_STATE_POLL_S
+        monkeypatch.setattr(shared_state, "_next_poll", 0.0)
+        assert shared_state.poll() == 1
+
+    def test_manejador_que_falla_no_para_el_resto(self, monkeypatch):
+        seen: list[str] = []
+
+        def boom(prefix: str) -> None:
+            raise RuntimeError(prefix)
+
+        monkeypatch.setitem(shared_state._handlers, "prueba", [boom, seen.append])
+        shared_state.poll(force=True)
+        _other_worker().publish("otro", "prueba", "a#1")
+        assert shared_state.poll(force=True) == 1
+        assert seen == ["a#1"]
+
+
+    def test_polls_concurrentes_aplican_cada_evento_una_vez(self, monkeypatch):
+        seen: list[str] = []
+        inside, release = threading.Event(), threading.Event()
+        log = shared_state._get_log()
+        since = log.since
+
+        def slow_since(seq: int) -> list:
+            events = since(seq)
+            if threading.current_thread().name == "primero":
+                inside.set()
+                release.wait(5)
+            return events
+
+        monkeypatch.setitem(shared_state._handlers, "prueba", [seen.append])
+        monkeypatch.setattr(log, "since", slow_since)
+        shared_state.poll(force=True)
+        _other_worker().publish("otro", "prueba", "a#1")
+        first = threading.Thread(target=shared_state.poll, kwargs={"force": True}, name="primero")
+        first.start()
+        assert inside.wait(5)
+        # El primero ya leyó el evento sin avanzar el cursor: otro hilo no lo repite
+        assert shared_state.poll(force=True) == 0
+        release.set()
+        first.join(5)
+        assert seen == ["a#1"]
+        assert shared_state._last_seq == _other_worker().last_seq()
+        assert shared_state.poll(force=True) == 0
+
+
+    def test_eventos_borrados_sin_leer_vacian_todo(self, monkeypatch):
+        """Un worker inactivo más de _EVENTS_KEEP_S: otro proceso borra los eventos
+        que no había leído y este vacía lo que tiene en memoria."""
+        seen: list[str] = []
+        monkeypatch.setitem(shared_state._handlers, "prueba", [seen.append])
+        shared_state.poll(force=True)
+        other = _other_worker()
+        other.publish("otro", "prueba", "a#1")
+        other.trim(older_than=float("inf"))   # arranque de otro proceso, una hora después
+        shared_state.poll(force=True)
+        assert seen == [""]
+        assert shared_state.poll(force=True) == 0
+
+    def test_trim_de_eventos_ya_leidos_no_vacia(self, monkeypatch):
+        seen: list[str] = []
+        monkeypatch.setitem(shared_state._handlers, "prueba", [seen.append])
+        shared_state.poll(force=True)
+        other = _other_worker()
+        other.publish("otro", "prueba", "a#1")
+        assert shared_state.poll(force=True) == 1
+        other.trim(older_than=float("inf"))
+        assert shared_state.poll(force=True) == 0
+        assert seen == ["a#1"]
+
+
+class TestGetStore:
+
+    def test_misma_tabla_mismo_almacen(self):
+        assert shared_state.get_store("t") is shared_state.get_store("t")
+
+    def test_tablas_en_el_fichero_compartido(self):
+        shared_state.get_store("t").put("k", 1)
+        assert shared_state.get_store("t").path == shared_state._DB
+        shared_state.reset()
+        assert shared_state.get_store("t").get("k") == 1
@@ -0,0 +1,116 @@
+"""
+Tests unitarios — app/core/singleflight.py.
+
+Cubre (sin red):
+  - request_key  → hash canónico del cuerpo de la petición
+  - SingleFlight → coalescencia concurrente, ventana post-finalización, errores
+"""
+
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from app.core.singleflight import SingleFlight, request_key
+
+
+class _Body(BaseModel):
+    a: int
+    b: list[str]
+
+
+class TestRequestKey:
+
+    def test_mismo_cuerpo_misma_clave(self):
+        assert request_key("x", _Body(a=1, b=["q"])) == request_key("x", _Body(a=1, b=["q"]))
+
+    def test_cuerpo_distinto_clave_distinta(self):
+        assert request_key("x", _Body(a=1, b=["q"])) != request_key("x", _Body(a=2, b=["q"]))
+
+    def test_namespace_forma_parte_de_la_clave(self):
+        assert request_key("x", _Body(a=1, b=[])) != request_key("y", _Body(a=1, b=[]))
+
+
+class TestSingleFlight:
+
+    def test_concurrentes_comparten_un_calculo(self):
+        flight: SingleFlight[int] = SingleFlight("t", linger_s=0)
+        calls = 0
+
+        async def compute() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return 42
+
+        async def main():
+            return await asyncio.gather(*(flight.run("k", compute) for _ in range(5)))
+
+        assert asyncio.run(main()) == [42] * 5
+        assert calls == 1
+        assert flight.stats()["coalesced"] == 4
+
+    def test_claves_distintas_no_se_coalescen(self):
+        flight: SingleFlight[str] = SingleFlight("t", linger_s=0)
+
+        async def main():
+            async def compute(v):
+                return v
+            return await asyncio.gather(
+                flight.run("a", lambda: compute("a")),
+                flight.run("b", lambda: compute("b")),
+            )
+
+        assert asyncio.run(main()) == ["a", "b"]
+
+    def test_reintento_tardio_usa_resultado_reciente(self):
+        flight: SingleFlight[int] = SingleFlight("t", linger_s=60)
+        calls = 0
+
+        async def compute() -> int:
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert asyncio.run(flight.run("k", compute)) == 1
+        assert asyncio.run(flight.run("k", compute)) == 1
+        assert flight.stats()["recent_hits"] == 1
+
+    def test_sin_ventana_recalcula(self):
+        flight: SingleFlight[int] = SingleFlight("t", linger_s=0)
+        calls = 0
+
+        async def compute() -> int:
+            nonlocal calls
+            calls += 1
+            return calls
+
+        asyncio.run(flight.run("k", compute))
+        assert asyncio.run(flight.run("k", compute)) == 2
+
+    def test_errores_no_se_conservan(self):
+        flight: SingleFlight[int] = SingleFlight("t", linger_s=60)
+
+        async def boom() -> int:
+            raise ValueError("fallo")
+
+        with pytest.raises(ValueError):
+            asyncio.run(flight.run("k", boom))
+
+        async def ok() -> int:
+            return 7
+
+        assert asyncio.run(flight.run("k", ok)) == 7
+
+    def test_clear_olvida_resultados_recientes(self):
+        flight: SingleFlight[int] = SingleFlight("t", linger_s=60)
+
+        async def one() -> int:
+            return 1
+
+        async def two() -> int:
+            return 2
+
+        asyncio.run(flight.run("k", one))
+        flight.clear()
+        assert asyncio.run(flight.run("k", two)) == 2
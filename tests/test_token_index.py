@@ -0,0 +1,87 @@
+"""
+Tests unitarios — app/utils/token_index.py y su uso en _find_closest_street.
+
+Cubre (sin red):
+  - TokenIndex.candidates → filtro por nº de tokens y cobertura de tokens
+  - Equivalencia exacta con el recorrido lineal del catálogo (osm_streets.json
+    + variantes con erratas generadas con semilla fija)
+"""
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+import app.services.geocoding as geo
+from app.utils.token_index import TokenIndex
+
+_CATALOG = json.loads(
+    (Path(geo.__file__).resolve().parent.parent / "data" / "osm_streets.json").read_text("utf-8")
+)["streets"]
+_CATALOG_NORM = [geo._normalize(s) for s in _CATALOG]
+
+
+def _linear_closest(query_street: str) -> str | None:
+    """Implementación de referencia: recorre todo el catálogo."""
+    query_norm = geo._normalize(query_street)
+    if query_norm in set(_CATALOG_NORM):
+        return None
+    best_score, best_street = 0.0, None
+    for name, norm in zip(_CATALOG, _CATALOG_NORM):
+        score = geo._token_set_ratio(query_norm, norm)
+        if score > best_score:
+            best_score, best_street = score, name
+    if best_score >= geo.FUZZY_THRESHOLD and best_street and best_street != query_street:
+        return best_street
+    return None
+
+
+def _typo(text: str, rng: random.Random) -> str:
+    """Errata aleatoria: borrar, duplicar o cambiar un carácter, o quitar/añadir un token."""
+    tokens = text.split()
+    op = rng.randrange(5)
+    if op == 3 and len(tokens) > 1:
+        tokens.pop(rng.randrange(len(tokens)))
+        return " ".join(tokens)
+    if op == 4:
+        tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(["de", "la", "del", "san"]))
+        return " ".join(tokens)
+    i = rng.randrange(len(text))
+    if op == 0:
+        return text[:i] + text[i + 1:]
+    if op == 1:
+        return text[:i] + text[i] + text[i:]
+    return text[:i] + rng.choice("abcdeilmnorstu") + text[i + 1:]
+
+
+class TestTokenIndex:
+
+    def test_filtra_por_numero_de_tokens(self):
+        index = TokenIndex(["calle mayor", "calle mayor alta", "calle mayor de arriba"], 0.85, 1)
+        assert index.candidates("calle mayor") == [0, 1]
+
+    def test_exige_cobertura_de_todos_los_tokens(self):
+        index = TokenIndex(["calle hornos", "calle oro", "avenida hornos"], 0.85, 1)
+        assert index.candidates("calle hornoss") == [0]
+
+    def test_query_vacia(self):
+        assert TokenIndex(["calle mayor"], 0.85, 1).candidates("") == []
+
+
+class TestEquivalencia:
+
+    @pytest.fixture(autouse=True)
+    def catalogo_real(self, monkeypatch):
+        monkeypatch.setattr(geo, "_streets_version", geo._StreetsVersion(_CATALOG))
+
+    def test_mismo_resultado_que_el_recorrido_lineal(self):
+        rng = random.Random(1234)
+        queries = [_typo(rng.choice(_CATALOG), rng) for _ in range(200)]
+        queries += ["Calle Oro", "Avenida Blas Infante", "Calle Santiago", "Calle Inventada"]
+        corrected = 0
+        for q in queries:
+            expected = _linear_closest(q)
+            assert geo._find_closest_street(q) == expected, q
+            corrected += expected is not None
+        assert corrected > 25   # el muestreo ejercita de verdad las correcciones
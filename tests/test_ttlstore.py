@@ -0,0 +1,152 @@
+"""
+Tests unitarios — app/core/ttlstore.py.
+
+Cubre (sin red):
+  - TTLStore → acceso tipo dict, caducidad (fija y deslizante), límite LRU,
+               values() sin caducadas, contadores, expulsión por prefijo,
+               carga en bloque, memoria aproximada
+  - register_cache / registered_caches
+"""
+
+import math
+from unittest.mock import patch
+
+import pytest
+
+from app.core import ttlstore
+from app.core.ttlstore import TTLStore, register_cache, registered_caches
+
+
+class TestTTLStore:
+
+    def test_guarda_y_recupera(self):
+        store: TTLStore[int] = TTLStore(10, 60)
+        store["a"] = 1
+        assert store["a"] == 1
+        assert store.get("a") == 1
+        assert len(store) == 1
+
+    def test_clave_desconocida(self):
+        store: TTLStore[int] = TTLStore(10, 60)
+        with pytest.raises(KeyError):
+            store["x"]
+        assert store.get("x") is None
+
+    def test_valor_none_distinto_de_ausente(self):
+        store: TTLStore[int | None] = TTLStore(10, 60)
+        store["a"] = None
+        assert store["a"] is None
+
+    def test_expulsa_la_menos_usada_al_superar_el_limite(self):
+        store: TTLStore[int] = TTLStore(2, 60)
+        store["a"] = 1
+        store["b"] = 2
+        store["a"]            # a pasa a ser la más reciente
+        store["c"] = 3
+        assert store.get("b") is None
+        assert store.get("a") == 1
+        assert store.get("c") == 3
+
+    def test_caduca_tras_ttl(self):
+        store: TTLStore[int] = TTLStore(10, 60)
+        with patch("app.core.ttlstore.time.monotonic", return_value=1000.0):
+            store["a"] = 1
+        with patch("app.core.ttlstore.time.monotonic", return_value=1061.0):
+            assert store.get("a") is None
+        assert len(store) == 0
+
+    def test_sliding_renueva_con_cada_lectura(self):
+        store: TTLStore[int] = TTLStore(10, 60, sliding=True)
+        with patch("app.core.ttlstore.time.monotonic", return_value=1000.0):
+            store["a"] = 1
+        with patch("app.core.ttlstore.time.monotonic", return_value=1050.0):
+            assert store["a"] == 1
+        with patch("app.core.ttlstore.time.monotonic", return_value=1100.0):
+            assert store["a"] == 1
+
+    def test_pop_y_clear(self):
+        store: TTLStore[int] = TTLStore(10, 60)
+        store["a"] = 1
+        store["b"] = 2
+        assert store.pop("a") == 1
+        assert store.pop("a") is None
+        store.clear()
+        assert len(store) == 0
+
+    def test_values_omite_caducadas_en_orden_de_uso(self):
+        store: TTLStore[int] = TTLStore(10, 60)
+        with patch("app.core.ttlstore.time.monotonic", return_value=1000.0):
+            store["a"] = 1
+        with patch("app.core.ttlstore.time.monotonic", return_value=1030.0):
+            store["b"] = 2
+            store["c"] = 3
+        with patch("app.core.ttlstore.time.monotonic", return_value=1070.0):
+            assert store.values() == [2, 3]
+
+    def test_contadores_de_aciertos_fallos_y_expulsiones(self):
+        store: TTLStore[int] = TTLStore(2, 60)
+        with patch("app.core.ttlstore.time.monotonic", return_value=1000.0):
+            store["a"] = 1
+            store["b"] = 2
+            store["c"] = 3          # expulsa a
+            store.get("a")
+            store.get("b")
+        with patch("app.core.ttlstore.time.monotonic", return_value=1100.0):
+            store.get("c")          # caducada
+        stats = store.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+        assert stats["evictions"] == 1
+        assert stats["expirations"] == 1
+        assert stats["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+    def test_in_no_cuenta_ni_renueva(self):
+        store: TTLStore[int] = TTLStore(2, 60)
+        store["a"] = 1
+        store["b"] = 2
+        assert "a" in store
+        assert "x" not in store
+        store["c"] = 3              # a sigue siendo la menos usada
+        assert "a" not in store
+        assert store.stats()["hits"] == 0
+
+    def test_evict_prefix(self):
+        store: TTLStore[int] = TTLStore(10, math.inf)
+        store["calle mayor#1"] = 1
+        store["calle mayor#2"] = 2
+        store["@bar el sol"] = 3
+        assert store.evict_prefix("calle mayor#") == 2
+        assert [k for k, _ in store.items()] == ["@bar el sol"]
+        assert store.evict_prefix("") == 1
+        assert len(store) == 0
+
+    def test_update_respeta_el_limite_y_el_orden(self):
+        store: TTLStore[int] = TTLStore(2, math.inf)
+        store["a"] = 0
+        store.update([("b", 1), ("a", 2), ("c", 3)])
+        assert store.items() == [("a", 2), ("c", 3)]
+        assert store.stats()["evictions"] == 1
+
+    def test_update_en_vacio_se_queda_con_las_ultimas(self):
+        store: TTLStore[int] = TTLStore(2, math.inf)
+        store.update([("a", 1), ("b", 2), ("c", 3)])
+        assert store.items() == [("b", 2), ("c", 3)]
+
+    def test_sin_ttl_y_memoria_aproximada(self):
+        store: TTLStore[dict] = TTLStore(10, math.inf)
+        assert store.memory_bytes() == 0
+        store["a"] = {"lat": 37.8, "lon": -5.1, "street": "Calle Mayor"}
+        stats = store.stats()
+        assert stats["ttl_s"] is None
+        assert stats["bytes"] > 200
+
+
+class TestRegistro:
+
+    def test_registro_devuelve_el_almacen_vigente(self, monkeypatch):
+        monkeypatch.setattr(ttlstore, "_registry", {})
+        holder = {"store": TTLStore(1, 60)}
+        register_cache("prueba", lambda: holder["store"])
+        nuevo: TTLStore[int] = TTLStore(5, 60)
+        holder["store"] = nuevo
+        assert registered_caches() == {"prueba": nuevo}
@@ -1,17 +1,22 @@
 """
-Tests del endpoint POST /api/validation/start y POST /api/validation/override.
+Tests de los endpoints POST /api/validation/start, /api/validation/override
+(y /override/batch) y /api/validation/prefetch (+ GET de su progreso).
 
 La función geocode() se mockea para no necesitar clave de Google API.
 """
 
+import asyncio
 from unittest.mock import patch, call
 
+import msgpack
+
 COORD_OK = (37.805, -5.099)
 GEOCODE_OK = (COORD_OK, "EXACT_ADDRESS")
 GEOCODE_FAIL = (None, "FAILED")
 
 URL_START = "/api/validation/start"
 URL_OVERRIDE = "/api/validation/override"
+URL_OVERRIDE_BATCH = "/api/validation/override/batch"
 
 
 def _rows(*direcciones, clientes=None, alias=None, agencia=None):
@@ -28,7 +33,7 @@ def _rows(*direcciones, clientes=None, alias=None, agencia=None):
 # ── Casos básicos ─────────────────────────────────────────────────────────────
 
 def test_una_parada_geocodificada(client):
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
         r = client.post(URL_START, json={"rows": _rows("Calle Mayor 1", clientes=["Ana"])})
     assert r.status_code == 200
     data = r.json()
@@ -45,7 +50,7 @@ def test_una_parada_geocodificada(client):
 
 
 def test_parada_no_geocodificada_va_a_failed(client):
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_FAIL):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_FAIL):
         r = client.post(URL_START, json={"rows": _rows("Calle Inexistente 999")})
     assert r.status_code == 200
     data = r.json()
@@ -68,7 +73,7 @@ def test_lista_vacia_devuelve_cero_paradas(client):
 
 def test_dedup_misma_direccion_exacta(client):
     """Dos filas idénticas → 1 parada con 2 paquetes."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK) as mock_geo:
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
         r = client.post(URL_START, json={"rows": _rows(
             "Calle Mayor 1", "Calle Mayor 1",
             clientes=["Ana", "Luis"],
@@ -85,7 +90,7 @@ def test_dedup_misma_direccion_exacta(client):
 
 def test_dedup_misma_direccion_diferente_mayusculas(client):
     """'calle mayor 1' y 'Calle Mayor 1' son la misma parada."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK) as mock_geo:
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
         r = client.post(URL_START, json={"rows": _rows("calle mayor 1", "Calle Mayor 1")})
     assert r.status_code == 200
     data = r.json()
@@ -93,9 +98,23 @@ def test_dedup_misma_direccion_diferente_mayusculas(client):
     mock_geo.assert_called_once()
 
 
+def test_start_usa_cache_negativa_por_defecto(client):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
+        client.post(URL_START, json={"rows": _rows("Calle Mayor 1")})
+    assert mock_geo.call_args.kwargs["use_negative_cache"] is True
+
+
+def test_start_retry_failed_ignora_cache_negativa(client):
+    """retry_failed=true → se reintentan en Google los FAILED recientes."""
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
+        r = client.post(URL_START, json={"rows": _rows("Calle Mayor 1"), "retry_failed": True})
+    assert r.status_code == 200
+    assert mock_geo.call_args.kwargs["use_negative_cache"] is False
+
+
 def test_dedup_abreviatura_y_nombre_completo(client):
     """C/ Gaitán 24 y Calle Gaitán 24 son la misma parada."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK) as mock_geo:
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
         r = client.post(URL_START, json={"rows": _rows("C/ Gaitán 24", "Calle Gaitán 24")})
     assert r.status_code == 200
     data = r.json()
@@ -105,7 +124,7 @@ def test_dedup_abreviatura_y_nombre_completo(client):
 
 def test_dedup_con_sufijo_ciudad(client):
     """Con y sin sufijo de ciudad son la misma parada."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK) as mock_geo:
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
         r = client.post(URL_START, json={"rows": _rows("Calle Mayor 1, Posadas", "Calle Mayor 1")})
     assert r.status_code == 200
     assert r.json()["unique_addresses"] == 1
@@ -114,7 +133,7 @@ def test_dedup_con_sufijo_ciudad(client):
 
 def test_direccion_abreviada_se_normaliza_en_respuesta(client):
     """La dirección se muestra en forma canónica en la respuesta."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
         r = client.post(URL_START, json={"rows": _rows("C/ Mayor 1")})
     assert r.status_code == 200
     assert r.json()["geocoded"][0]["address"] == "Calle Mayor 1"
@@ -122,10 +141,10 @@ def test_direccion_abreviada_se_normaliza_en_respuesta(client):
 
 def test_dedup_dos_direcciones_distintas(client):
     """Dos direcciones diferentes → 2 paradas."""
-    def mock_geocode(addr, alias=""):
+    def mock_geocode(addr, alias="", **_):
         return GEOCODE_OK
 
-    with patch("app.routers.validation.geocode", side_effect=mock_geocode) as mock_geo:
+    with patch("app.routers.validation.geocode_async", side_effect=mock_geocode) as mock_geo:
         r = client.post(URL_START, json={"rows": _rows("Calle Mayor 1", "Calle Gaitán 5")})
     assert r.status_code == 200
     assert r.json()["unique_addresses"] == 2
@@ -135,10 +154,10 @@ def test_dedup_dos_direcciones_distintas(client):
 # ── Mezcla geocodificado / fallido ────────────────────────────────────────────
 
 def test_mezcla_geocodificado_y_fallido(client):
-    def mock_geocode(addr, alias=""):
+    def mock_geocode(addr, alias="", **_):
         return GEOCODE_OK if "Mayor" in addr else GEOCODE_FAIL
 
-    with patch("app.routers.validation.geocode", side_effect=mock_geocode):
+    with patch("app.routers.validation.geocode_async", side_effect=mock_geocode):
         r = client.post(URL_START, json={"rows": _rows("Calle Mayor 1", "Calle Inexistente 99")})
     assert r.status_code == 200
     data = r.json()
@@ -151,7 +170,7 @@ def test_mezcla_geocodificado_y_fallido(client):
 
 def test_agencia_se_incluye_en_paquete(client):
     """El campo agencia del CSV viaja en el Package de la parada geocodificada."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
         r = client.post(URL_START, json={"rows": _rows(
             "Calle Mayor 1", clientes=["Ana"], agencia=["MRW"],
         )})
@@ -162,7 +181,7 @@ def test_agencia_se_incluye_en_paquete(client):
 
 def test_agencia_vacia_cuando_no_se_provee(client):
     """Si el CSV no tiene agencia, el campo llega vacío en el Package."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
         r = client.post(URL_START, json={"rows": _rows("Calle Mayor 1")})
     assert r.status_code == 200
     packages = r.json()["geocoded"][0]["packages"]
@@ -171,7 +190,7 @@ def test_agencia_vacia_cuando_no_se_provee(client):
 
 def test_agencia_distintas_en_mismo_destino(client):
     """Dos paquetes en la misma dirección pueden tener agencias distintas."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
         r = client.post(URL_START, json={"rows": [
             {"cliente": "Ana", "direccion": "Calle Mayor 1", "ciudad": "Posadas",
              "agencia": "MRW", "alias": ""},
@@ -190,11 +209,11 @@ def test_agencia_distintas_en_mismo_destino(client):
 def test_alias_se_pasa_a_geocode(client):
     captured = {}
 
-    def mock_geocode(addr, alias=""):
+    def mock_geocode(addr, alias="", **_):
         captured["alias"] = alias
         return (COORD_OK, "EXACT_PLACE")
 
-    with patch("app.routers.validation.geocode", side_effect=mock_geocode):
+    with patch("app.routers.validation.geocode_async", side_effect=mock_geocode):
         r = client.post(URL_START, json={"rows": _rows(
             "Calle Mayor 1", clientes=["Ana"], alias=["Bar El Sol"],
         )})
@@ -205,7 +224,7 @@ def test_alias_se_pasa_a_geocode(client):
 
 def test_primer_alias_no_vacio_gana_en_grupo(client):
     """En un grupo deduplicado, el primer alias no vacío se usa para todo el grupo."""
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK) as mock_geo:
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
         r = client.post(URL_START, json={"rows": [
             {"cliente": "Ana", "direccion": "Calle Mayor 1", "ciudad": "Posadas", "alias": ""},
             {"cliente": "Luis", "direccion": "Calle Mayor 1", "ciudad": "Posadas", "alias": "Bar El Sol"},
@@ -262,6 +281,71 @@ def test_override_rechaza_latitud_fuera_de_bbox(client):
     assert r.status_code == 400
 
 
+def test_override_batch_guarda_todos_de_una_vez(client):
+    pins = [
+        {"address": "Calle Mayor 1", "lat": 37.805, "lon": -5.099},
+        {"address": "Calle Gaitán 3", "lat": 37.806, "lon": -5.100},
+    ]
+    with patch("app.routers.validation.add_overrides", return_value=2) as mock_batch, \
+         patch("app.routers.validation.snap_to_street_async") as mock_snap:
+        r = client.post(URL_OVERRIDE_BATCH, json={"overrides": pins})
+    assert r.status_code == 200
+    assert r.json() == {"ok": True, "saved": 2, "snapped": 0, "snap_failed": []}
+    mock_batch.assert_called_once_with([
+        ("Calle Mayor 1", 37.805, -5.099), ("Calle Gaitán 3", 37.806, -5.100),
+    ])
+    mock_snap.assert_not_called()
+
+
+def test_override_batch_una_invalida_no_guarda_ninguna(client):
+    pins = [
+        {"address": "Calle Mayor 1", "lat": 37.805, "lon": -5.099},
+        {"address": "Calle Gaitán 3", "lat": 37.806, "lon": 5.100},   # invertido
+    ]
+    with patch("app.routers.validation.add_overrides") as mock_batch:
+        r = client.post(URL_OVERRIDE_BATCH, json={"overrides": pins})
+    assert r.status_code == 400
+    assert "Calle Gaitán 3" in r.json()["detail"]
+    assert "Calle Mayor 1" not in r.json()["detail"]
+    mock_batch.assert_not_called()
+
+
+def test_override_batch_demasiados_pins(client):
+    from app.core.config import MAX_STOPS
+    pins = [{"address": f"Calle Mayor {i}", "lat": 37.805, "lon": -5.099} for i in range(MAX_STOPS + 1)]
+    with patch("app.routers.validation.add_overrides") as mock_batch:
+        r = client.post(URL_OVERRIDE_BATCH, json={"overrides": pins})
+    assert r.status_code == 422
+    mock_batch.assert_not_called()
+
+
+def test_override_batch_con_snap_precalienta(client):
+    pins = [
+        {"address": "Calle Mayor 1", "lat": 37.805, "lon": -5.099},
+        {"address": "Calle Gaitán 3", "lat": 37.806, "lon": -5.100},
+    ]
+
+    async def _snap(lat, lon, hint):
+        return (lat, lon) if hint == "Calle Mayor" else None
+
+    with patch("app.routers.validation.add_overrides", return_value=2), \
+         patch("app.routers.validation.snap_to_street_async", side_effect=_snap) as mock_snap:
+        r = client.post(URL_OVERRIDE_BATCH, json={"overrides": pins, "snap": True})
+    assert r.status_code == 200
+    assert r.json() == {"ok": True, "saved": 2, "snapped": 1, "snap_failed": ["Calle Gaitán 3"]}
+    assert mock_snap.call_count == 2
+
+
+def test_override_batch_invalida_start_reciente(client):
+    """Tras los pins, un /start idéntico no reutiliza el resultado compartido anterior."""
+    with patch("app.routers.validation.add_overrides", return_value=1), \
+         patch("app.routers.validation._start_flights") as flights:
+        client.post(URL_OVERRIDE_BATCH, json={"overrides": [
+            {"address": "Calle Mayor 1", "lat": 37.805, "lon": -5.099},
+        ]})
+    flights.clear.assert_called_once()
+
+
 def test_limite_paradas_unicas_rechaza_exceso(client):
     """Más de MAX_STOPS direcciones únicas → 422 antes de llamar a geocode."""
     from app.core.config import MAX_STOPS
@@ -270,7 +354,7 @@ def test_limite_paradas_unicas_rechaza_exceso(client):
          "alias": "", "agencia": ""}
         for i in range(MAX_STOPS + 1)
     ]
-    with patch("app.routers.validation.geocode") as mock_geo:
+    with patch("app.routers.validation.geocode_async") as mock_geo:
         r = client.post(URL_START, json={"rows": rows})
     assert r.status_code == 422
     mock_geo.assert_not_called()
@@ -284,6 +368,473 @@ def test_limite_paradas_unicas_acepta_exactamente_max(client):
          "alias": "", "agencia": ""}
         for i in range(MAX_STOPS)
     ]
-    with patch("app.routers.validation.geocode", return_value=GEOCODE_OK):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
         r = client.post(URL_START, json={"rows": rows})
     assert r.status_code == 200
+
+
+# ── Coalescencia de peticiones duplicadas (single-flight) ─────────────────────
+
+def test_start_duplicado_reutiliza_resultado_reciente(client):
+    body = {"rows": _rows("Calle Mayor 1", clientes=["Ana"])}
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
+        r1 = client.post(URL_START, json=body)
+        r2 = client.post(URL_START, json=body)
+    first, second = r1.json(), r2.json()
+    assert first.pop("validation_id") != second.pop("validation_id")
+    assert first == second
+    assert mock_geo.call_count == 1
+
+
+def test_override_invalida_resultados_recientes(client):
+    body = {"rows": _rows("Calle Mayor 1")}
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_FAIL) as mock_geo, \
+         patch("app.routers.validation.add_override"):
+        client.post(URL_START, json=body)
+        client.post(URL_OVERRIDE, json={"address": "Calle Mayor 1", "lat": 37.805, "lon": -5.099})
+        client.post(URL_START, json=body)
+    assert mock_geo.call_count == 2
+
+
+# ── Codificación de la respuesta ──────────────────────────────────────────────
+
+def test_start_msgpack_si_se_pide(client):
+    body = {"rows": _rows("Calle Mayor 1", clientes=["Ana"])}
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
+        r = client.post(URL_START, json=body, headers={"Accept": "application/msgpack"})
+    assert r.status_code == 200
+    data = msgpack.unpackb(r.content)
+    assert data["unique_addresses"] == 1
+    assert data["geocoded"][0]["address"] == "Calle Mayor 1"
+
+
+# ── Geocodificación concurrente ───────────────────────────────────────────────
+
+def test_geocodifica_en_paralelo_conservando_el_orden(client):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def _slow_geocode(addr, alias="", **_):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        # Las primeras direcciones tardan más: terminan en orden inverso
+        await asyncio.sleep(0.02 if addr.endswith(("1", "2")) else 0.001)
+        in_flight -= 1
+        return GEOCODE_OK
+
+    direcciones = [f"Calle Mayor {i}" for i in range(1, 21)]
+    with patch("app.routers.validation.geocode_async", side_effect=_slow_geocode), \
+         patch("app.routers.validation._GEOCODE_CONCURRENCY", 4):
+        r = client.post(URL_START, json={"rows": _rows(*direcciones)})
+
+    assert [s["address"] for s in r.json()["geocoded"]] == direcciones
+    assert 1 < max_in_flight <= 4
+
+
+# ── Precalentado (/prefetch) ──────────────────────────────────────────────────
+
+URL_PREFETCH = "/api/validation/prefetch"
+
+
+def test_prefetch_responde_202_y_el_job_termina(client):
+    with patch("app.services.prefetch.geocode_async", return_value=GEOCODE_OK), \
+         patch("app.services.prefetch.snap_to_street_async", return_value=COORD_OK), \
+         patch("app.services.prefetch.get_osrm_matrix_async", return_value=([[0]], [[0]])):
+        r = client.post(URL_PREFETCH, json={"rows": _rows("Calle Mayor 1", "C/ Mayor, 1", "Calle Real 2")})
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+
+    # TestClient ejecuta las BackgroundTasks antes de devolver la respuesta
+    status = client.get(f"{URL_PREFETCH}/{job_id}").json()
+    assert status["status"] == "done"
+    assert status["total"] == 2
+    assert status["geocoded"] == 2
+    assert status["snapped"] == 2
+    assert status["matrix_ready"] is True
+
+
+def test_prefetch_agrupa_como_start_y_se_consulta_desde_otro_worker(client):
+    """Mismo agrupado que /start (primer alias no vacío) y progreso en el almacén compartido."""
+    from app.services import prefetch
+
+    with patch("app.services.prefetch.geocode_async", return_value=GEOCODE_OK) as mock_geo, \
+         patch("app.services.prefetch.snap_to_street_async", return_value=COORD_OK), \
+         patch("app.services.prefetch.get_osrm_matrix_async", return_value=([[0]], [[0]])):
+        r = client.post(URL_PREFETCH, json={"rows": [
+            {"direccion": "Calle Mayor 1"},
+            {"direccion": "C/ Mayor, 1", "alias": "Bar Sol"},
+        ]})
+    assert mock_geo.call_args_list[0].kwargs["alias"] == "Bar Sol"
+    prefetch.clear_jobs()   # la consulta llega a otro worker
+    status = client.get(f"{URL_PREFETCH}/{r.json()['job_id']}")
+    assert status.status_code == 200
+    assert (status.json()["status"], status.json()["total"]) == ("done", 1)
+
+
+def test_prefetch_desconocido_devuelve_404(client):
+    assert client.get(f"{URL_PREFETCH}/no-existe").status_code == 404
+
+
+def test_prefetch_demasiadas_direcciones_devuelve_422(client):
+    rows = _rows(*(f"Calle Real {i}" for i in range(1, 202)))
+    assert client.post(URL_PREFETCH, json={"rows": rows}).status_code == 422
+
+
+# ── Subida del CSV en streaming (/upload) ─────────────────────────────────────
+
+URL_UPLOAD = "/api/validation/upload"
+
+CSV_UPLOAD = (
+    "cliente,direccion,ciudad,nota,agencia,alias,tipo\n"
+    "Ana,Calle Mayor 1,Posadas,,MRW,,Normal\n"
+    "Luis,C/ Mayor 1,Posadas,,SEUR,,Express\n"
+    "Eva,Calle Real 2,Posadas,,,Bar Pepe,\n"
+    ",,,,,,\n"
+).encode("utf-8")
+
+
+def _upload(client, data: bytes, **kwargs):
+    return client.post(URL_UPLOAD, files={"file": ("reparto.csv", data, "text/csv")}, **kwargs)
+
+
+def test_upload_agrupa_y_geocodifica_como_start(client):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
+        r = _upload(client, CSV_UPLOAD)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["total_packages"] == 3
+    assert data["unique_addresses"] == 2
+    assert [s["address"] for s in data["geocoded"]] == ["Calle Mayor 1", "Calle Real 2"]
+    assert [p["agencia"] for p in data["geocoded"][0]["packages"]] == ["MRW", "SEUR"]
+    assert data["geocoded"][0]["tipo"] == "Express"
+    assert data["geocoded"][1]["alias"] == "Bar Pepe"
+    assert data["bytes_read"] == len(CSV_UPLOAD)
+    assert data["rows_per_s"] > 0
+    assert mock_geo.call_count == 2
+
+
+def test_upload_geocodifica_mientras_llega_el_fichero(client):
+    """La primera dirección se geocodifica antes de que llegue la última fila."""
+    from app.core.uploads import multipart_file_chunks as real_chunks
+    events = []
+
+    async def _chunks(body, content_type, field="file"):
+        async for chunk in real_chunks(body, content_type, field):
+            for line in chunk.splitlines(keepends=True):
+                events.append("chunk")
+                yield line
+                await asyncio.sleep(0.01)
+
+    async def _geocode(addr, alias="", **_):
+        events.append(addr)
+        return GEOCODE_OK
+
+    rows = "".join(f"Cliente {i},Calle Real {i}\n" for i in range(1, 6))
+    with patch("app.routers.validation.multipart_file_chunks", _chunks), \
+         patch("app.routers.validation.geocode_async", side_effect=_geocode):
+        r = _upload(client, f"cliente,direccion\n{rows}".encode())
+    assert r.status_code == 200
+    assert events.index("Calle Real 1") < len(events) - 1 - events[::-1].index("chunk")
+
+
+def test_upload_alias_en_fila_posterior_geocodifica_con_el_alias(client):
+    """El grupo ya se geocodificó sin alias cuando llega la fila con alias: se repite con él."""
+    from app.core.uploads import multipart_file_chunks as real_chunks
+    calls = []
+
+    async def _chunks(body, content_type, field="file"):
+        async for chunk in real_chunks(body, content_type, field):
+            for line in chunk.splitlines(keepends=True):
+                yield line
+                await asyncio.sleep(0.01)
+
+    async def _geocode(addr, alias="", **_):
+        calls.append((addr, alias))
+        return (COORD_OK, "EXACT_PLACE") if alias else GEOCODE_OK
+
+    csv = "cliente,direccion,alias\nAna,Calle Mayor 1,\nLuis,Calle Real 2,\nEva,C/ Mayor 1,Bar Sol\n"
+    with patch("app.routers.validation.multipart_file_chunks", _chunks), \
+         patch("app.routers.validation.geocode_async", side_effect=_geocode):
+        r = _upload(client, csv.encode())
+    assert r.status_code == 200
+    stop = r.json()["geocoded"][0]
+    assert (stop["address"], stop["alias"], stop["confidence"]) == ("Calle Mayor 1", "Bar Sol", "EXACT_PLACE")
+    assert calls[-1] == ("Calle Mayor 1", "Bar Sol")
+
+
+def test_upload_retry_failed_ignora_cache_negativa(client):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_FAIL) as mock_geo:
+        r = _upload(client, CSV_UPLOAD, params={"retry_failed": "true"})
+    assert len(r.json()["failed"]) == 2
+    assert all(c.kwargs["use_negative_cache"] is False for c in mock_geo.call_args_list)
+
+
+def test_upload_sin_columna_direccion_devuelve_422(client):
+    r = _upload(client, b"cliente,ciudad\nAna,Posadas\n")
+    assert r.status_code == 422
+    assert "direccion" in r.json()["detail"]
+
+
+def test_upload_sin_multipart_devuelve_422(client):
+    r = client.post(URL_UPLOAD, content=CSV_UPLOAD, headers={"Content-Type": "text/csv"})
+    assert r.status_code == 422
+
+
+def test_upload_sin_campo_file_devuelve_422(client):
+    r = client.post(URL_UPLOAD, files={"otro": ("x.csv", CSV_UPLOAD, "text/csv")})
+    assert r.status_code == 422
+
+
+def test_upload_demasiado_grande_devuelve_413(client):
+    with patch("app.routers.validation.CSV_UPLOAD_MAX_BYTES", 50), \
+         patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
+        r = _upload(client, CSV_UPLOAD)
+    assert r.status_code == 413
+
+
+def test_upload_demasiadas_direcciones_corta_y_cancela(client):
+    from app.core.config import MAX_STOPS
+    rows = "".join(f"Calle Real {i}\n" for i in range(1, MAX_STOPS + 50))
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
+        r = _upload(client, f"direccion\n{rows}".encode())
+    assert r.status_code == 422
+    assert "al menos" in r.json()["detail"]
+    assert mock_geo.call_count <= MAX_STOPS
+
+
+# ── Validación en segundo plano (/jobs) ───────────────────────────────────────
+
+URL_JOBS = "/api/validation/jobs"
+
+
+def test_job_responde_202_y_termina_con_el_resultado_de_start(client):
+    def mock_geocode(addr, alias="", **_):
+        return GEOCODE_OK if addr == "Calle Mayor 1" else GEOCODE_FAIL
+
+    rows = _rows("Calle Mayor 1", "C/ Mayor, 1", "Calle Nada 9", clientes=["Ana", "Luis", "Eva"])
+    with patch("app.routers.validation.geocode_async", side_effect=mock_geocode):
+        r = client.post(URL_JOBS, json={"rows": rows})
+        start = client.post(URL_START, json={"rows": rows}).json()
+    assert r.status_code == 202
+    created = r.json()
+    assert created["status"] == "pending"
+    assert created["total"] == 2
+
+    # TestClient ejecuta las BackgroundTasks antes de devolver la respuesta
+    status = client.get(f"{URL_JOBS}/{created['job_id']}").json()
+    assert (status["status"], status["processed"], status["total_packages"]) == ("done", 2, 3)
+    assert status["geocoded"] == start["geocoded"]
+    assert status["failed"] == start["failed"]
+
+
+def test_job_retry_failed_ignora_cache_negativa(client):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_FAIL) as mock_geo:
+        client.post(URL_JOBS, json={"rows": _rows("Calle Mayor 1"), "retry_failed": True})
+    assert mock_geo.call_args.kwargs["use_negative_cache"] is False
+
+
+def test_job_desconocido_devuelve_404(client):
+    assert client.get(f"{URL_JOBS}/no-existe").status_code == 404
+    assert client.delete(f"{URL_JOBS}/no-existe").status_code == 404
+
+
+def test_job_demasiadas_direcciones_devuelve_422(client):
+    rows = _rows(*(f"Calle Real {i}" for i in range(1, 202)))
+    with patch("app.routers.validation.geocode_async") as mock_geo:
+        assert client.post(URL_JOBS, json={"rows": rows}).status_code == 422
+    mock_geo.assert_not_called()
+
+
+def test_cancelar_job_terminado_no_cambia_su_estado(client):
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
+        job_id = client.post(URL_JOBS, json={"rows": _rows("Calle Mayor 1")}).json()["job_id"]
+    r = client.delete(f"{URL_JOBS}/{job_id}")
+    assert r.status_code == 200
+    assert r.json()["status"] == "done"
+
+
+# ── Sesiones de validación (PATCH incremental) ────────────────────────────────
+
+URL_SESSIONS = "/api/validation/sessions"
+
+
+def _start_session(client, rows, geocode=GEOCODE_OK):
+    with patch("app.routers.validation.geocode_async", return_value=geocode):
+        data = client.post(URL_START, json={"rows": rows}).json()
+    assert data["validation_id"]
+    return data
+
+
+def test_start_devuelve_sesion_con_el_mismo_estado(client):
+    start = _start_session(client, _rows("Calle Mayor 1", "C/ Mayor, 1", "Calle Real 2"))
+    r = client.get(f"{URL_SESSIONS}/{start['validation_id']}")
+    assert r.status_code == 200
+    assert r.json() == start
+
+
+def test_start_duplicado_tiene_su_propia_sesion(client):
+    """Dos repartidores suben el mismo CSV: comparten geocodificación, no sesión."""
+    rows = _rows("Calle Mayor 1", "Calle Real 2")
+    first = _start_session(client, rows)
+    second = _start_session(client, rows)
+    assert first["validation_id"] != second["validation_id"]
+    with patch("app.routers.validation.geocode_async") as mock_geo:
+        client.patch(f"{URL_SESSIONS}/{first['validation_id']}", json={"remove": [1]})
+    mock_geo.assert_not_called()
+    assert client.get(f"{URL_SESSIONS}/{first['validation_id']}").json()["unique_addresses"] == 1
+    assert client.get(f"{URL_SESSIONS}/{second['validation_id']}").json()["unique_addresses"] == 2
+
+
+def test_patch_editar_nota_no_geocodifica(client):
+    start = _start_session(client, _rows("Calle Mayor 1", "Calle Real 2", clientes=["Ana", "Luis"]))
+    edit = {"id": 1, "row": {"cliente": "Luis", "direccion": "Calle Real 2", "nota": "Portal B"}}
+    with patch("app.routers.validation.geocode_async") as mock_geo:
+        r = client.patch(f"{URL_SESSIONS}/{start['validation_id']}", json={"update": [edit]})
+    assert r.status_code == 200
+    diff = r.json()
+    mock_geo.assert_not_called()
+    assert diff["regeocoded"] == 0
+    assert [s["address"] for s in diff["geocoded"]] == ["Calle Real 2"]
+    assert diff["geocoded"][0]["packages"][0]["nota"] == "Portal B"
+    assert diff["removed"] == [] and diff["failed"] == []
+
+
+def test_patch_corregir_errata_geocodifica_solo_la_nueva(client):
+    start = _start_session(client, _rows("Calle Mayor 1", "Calle Rela 2"), geocode=GEOCODE_FAIL)
+    edit = {"id": 1, "row": {"direccion": "Calle Real 2"}}
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
+        diff = client.patch(f"{URL_SESSIONS}/{start['validation_id']}", json={"update": [edit]}).json()
+    assert [c.args[0] for c in mock_geo.call_args_list] == ["Calle Real 2"]
+    assert [s["address"] for s in diff["geocoded"]] == ["Calle Real 2"]
+    assert diff["removed"] == ["Calle Rela 2"]
+    assert (diff["total_packages"], diff["unique_addresses"]) == (2, 2)
+
+
+def test_patch_anadir_a_grupo_existente_y_quitar_fila(client):
+    start = _start_session(client, _rows("Calle Mayor 1", "Calle Real 2", clientes=["Ana", "Luis"]))
+    body = {"add": [{"cliente": "Eva", "direccion": "C/ Mayor, 1"}], "remove": [1]}
+    with patch("app.routers.validation.geocode_async") as mock_geo:
+        diff = client.patch(f"{URL_SESSIONS}/{start['validation_id']}", json=body).json()
+    mock_geo.assert_not_called()
+    assert diff["added_ids"] == [2]
+    assert [p["client_name"] for p in diff["geocoded"][0]["packages"]] == ["Ana", "Eva"]
+    assert diff["removed"] == ["Calle Real 2"]
+
+    # La fila añadida se puede editar después por su id
+    edit = {"id": 2, "row": {"cliente": "Eva María", "direccion": "Calle Mayor 1"}}
+    diff = client.patch(f"{URL_SESSIONS}/{start['validation_id']}", json={"update": [edit]}).json()
+    assert [p["client_name"] for p in diff["geocoded"][0]["packages"]] == ["Ana", "Eva María"]
+    full = client.get(f"{URL_SESSIONS}/{start['validation_id']}").json()
+    assert (full["total_packages"], full["unique_addresses"]) == (2, 1)
+
+
+def test_patch_cambio_de_alias_vuelve_a_geocodificar(client):
+    start = _start_session(client, _rows("Calle Mayor 1"))
+    edit = {"id": 0, "row": {"direccion": "Calle Mayor 1", "alias": "Bar Sol"}}
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
+        diff = client.patch(f"{URL_SESSIONS}/{start['validation_id']}", json={"update": [edit]}).json()
+    assert mock_geo.call_args.kwargs["alias"] == "Bar Sol"
+    assert diff["regeocoded"] == 1
+
+
+def test_patch_retry_failed_reintenta_solo_las_afectadas(client):
+    start = _start_session(client, _rows("Calle Nada 1", "Calle Nada 2"), geocode=GEOCODE_FAIL)
+    edit = {"id": 0, "row": {"cliente": "Ana", "direccion": "Calle Nada 1"}}
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK) as mock_geo:
+        diff = client.patch(
+            f"{URL_SESSIONS}/{start['validation_id']}", json={"update": [edit], "retry_failed": True},
+        ).json()
+    assert [c.args[0] for c in mock_geo.call_args_list] == ["Calle Nada 1"]
+    assert mock_geo.call_args.kwargs["use_negative_cache"] is False
+    assert [s["address"] for s in diff["geocoded"]] == ["Calle Nada 1"]
+
+
+def test_patch_fila_desconocida_devuelve_422_sin_cambiar_la_sesion(client):
+    start = _start_session(client, _rows("Calle Mayor 1"))
+    body = {"add": [{"direccion": "Calle Real 2"}], "remove": [7]}
+    r = client.patch(f"{URL_SESSIONS}/{start['validation_id']}", json=body)
+    assert r.status_code == 422
+    assert client.get(f"{URL_SESSIONS}/{start['validation_id']}").json()["unique_addresses"] == 1
+
+
+def test_patch_demasiadas_direcciones_devuelve_422(client):
+    start = _start_session(client, _rows("Calle Mayor 1"))
+    body = {"add": _rows(*(f"Calle Real {i}" for i in range(1, 201)))}
+    with patch("app.routers.validation.geocode_async") as mock_geo:
+        r = client.patch(f"{URL_SESSIONS}/{start['validation_id']}", json=body)
+    assert r.status_code == 422
+    mock_geo.assert_not_called()
+
+
+def _otro_worker_anade(validation_id: str, row_id: int, direccion: str) -> None:
+    """Otro worker guarda la sesión (una fila más) sin pasar por la memoria de este."""
+    from app.adapters import shared_state
+    from app.services.geocoding import address_key
+
+    def _add(data):
+        key = address_key(direccion)
+        data["rows"].append([row_id, {"direccion": direccion}, key])
+        data["results"][key] = {"address": direccion, "alias": "", "lat": 37.8, "lon": -5.1,
+                                "confidence": "EXACT_ADDRESS"}
+        return {**data, "next_id": row_id + 1, "version": data["version"] + 1}
+
+    shared_state.get_store("validation_sessions").transform(validation_id, _add)
+
+
+def test_patch_concurrente_en_otro_worker_no_se_pierde(client):
+    start = _start_session(client, _rows("Calle Mayor 1"))
+    validation_id = start["validation_id"]
+    calls = 0
+
+    async def _geo(address, **_):
+        nonlocal calls
+        calls += 1
+        if calls == 1:   # mientras este PATCH geocodifica, otro worker guarda el suyo
+            _otro_worker_anade(validation_id, 1, "Calle Otra 5")
+        return GEOCODE_OK
+
+    with patch("app.routers.validation.geocode_async", side_effect=_geo):
+        r = client.patch(f"{URL_SESSIONS}/{validation_id}", json={"add": [{"direccion": "Calle Real 2"}]})
+    assert r.status_code == 200
+    assert r.json()["added_ids"] == [2]   # reaplicado sobre el estado del otro worker
+    full = client.get(f"{URL_SESSIONS}/{validation_id}").json()
+    assert {s["address"] for s in full["geocoded"]} == {"Calle Mayor 1", "Calle Otra 5", "Calle Real 2"}
+
+
+def test_patch_que_siempre_pierde_devuelve_409(client):
+    start = _start_session(client, _rows("Calle Mayor 1"))
+    validation_id = start["validation_id"]
+    n = iter(range(10, 100))
+
+    async def _geo(address, **_):
+        row_id = next(n)
+        _otro_worker_anade(validation_id, row_id, f"Calle Otra {row_id}")
+        return GEOCODE_OK
+
+    with patch("app.routers.validation.geocode_async", side_effect=_geo):
+        r = client.patch(f"{URL_SESSIONS}/{validation_id}", json={"add": [{"direccion": "Calle Real 2"}]})
+    assert r.status_code == 409
+    full = client.get(f"{URL_SESSIONS}/{validation_id}").json()
+    assert "Calle Real 2" not in {s["address"] for s in full["geocoded"]}
+
+
+def test_patch_con_almacen_caido_devuelve_503(client, monkeypatch):
+    from app.adapters import shared_state
+
+    start = _start_session(client, _rows("Calle Mayor 1"))
+    validation_id = start["validation_id"]
+    store = shared_state.get_store("validation_sessions")
+
+    def _down(key, fn):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(store, "transform", _down)
+    with patch("app.routers.validation.geocode_async", return_value=GEOCODE_OK):
+        r = client.patch(f"{URL_SESSIONS}/{validation_id}", json={"add": [{"direccion": "Calle Real 2"}]})
+    assert r.status_code == 503
+
+
+def test_sesion_desconocida_devuelve_404(client):
+    assert client.get(f"{URL_SESSIONS}/no-existe").status_code == 404
+    assert client.patch(f"{URL_SESSIONS}/no-existe", json={}).status_code == 404
@@ -0,0 +1,199 @@
+"""
+Tests del servicio de validación en segundo plano — app/services/validation_jobs.py.
+
+El trabajo por grupo es una corrutina de prueba (sin geocoding).
+
+Cubre:
+  - run_job     → pool de workers acotado, progreso, parciales en el orden
+                  de los grupos, error de un grupo
+  - cancel      → detiene el pool conservando lo resuelto; antes de arrancar
+  - otro worker → consulta por la copia compartida, cancelación por el canal
+                  (aplicada en el event loop del job aunque poll() corra en otro hilo)
+"""
+
+import asyncio
+import threading
+
+from app.adapters import shared_state
+from app.adapters.kvstore import InvalidationLog
+from app.models import Package
+from app.models.validation import FailedStop, GeocodedStop
+from app.services import validation_jobs
+
+
+def _groups(n: int) -> list[dict]:
+    return [
+        {"address": f"Calle Real {i}", "alias": "", "packages": [Package(client_name=f"C{i}")]}
+        for i in range(1, n + 1)
+    ]
+
+
+def _stop(group: dict) -> GeocodedStop | FailedStop:
+    """Impares geocodificadas, pares fallidas."""
+    n = int(group["address"].rsplit(" ", 1)[1])
+    if n % 2:
+        return GeocodedStop(
+            address=group["address"], client_name="", packages=group["packages"],
+            lat=37.8, lon=-5.1, confidence="EXACT_ADDRESS",
+        )
+    return FailedStop(address=group["address"], packages=group["packages"])
+
+
+def test_run_job_resuelve_todo_con_el_pool_acotado():
+    in_flight = max_in_flight = 0
+
+    async def _process(group):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        # Las primeras tardan más: terminan en otro orden
+        await asyncio.sleep(0.02 if group["address"].endswith(" 1") else 0.001)
+        in_flight -= 1
+        return _stop(group)
+
+    job = validation_jobs.create_job(_groups(10), total_packages=12)
+    asyncio.run(validation_jobs.run_job(job, _process, workers=3))
+
+    status = job.status()
+    assert (status.status, status.total, status.processed, status.total_packages) == ("done", 10, 10, 12)
+    assert [s.address for s in status.geocoded] == [f"Calle Real {i}" for i in (1, 3, 5, 7, 9)]
+    assert [s.address for s in status.failed] == [f"Calle Real {i}" for i in (2, 4, 6, 8, 10)]
+    assert 1 < max_in_flight <= 3
+
+
+def test_parciales_mientras_corre():
+    seen = []
+
+    async def _main():
+        job = validation_jobs.create_job(_groups(6), total_packages=6)
+
+        async def _process(group):
+            await asyncio.sleep(0.01)
+            return _stop(group)
+
+        runner = asyncio.ensure_future(validation_jobs.run_job(job, _process, workers=1))
+        while not job.finished:
+            seen.append(job.status().processed)
+            await asyncio.sleep(0.005)
+        await runner
+
+    asyncio.run(_main())
+    assert 0 < max(p for p in seen if p < 6)
+    assert seen == sorted(seen)
+
+
+def test_error_en_un_grupo_termina_en_error():
+    async def _process(group):
+        if group["address"].endswith(" 2"):
+            raise RuntimeError("boom")
+        return _stop(group)
+
+    job = validation_jobs.create_job(_groups(3), total_packages=3)
+    asyncio.run(validation_jobs.run_job(job, _process, workers=1))
+    assert job.status().status == "error"
+    assert "boom" in job.status().error
+
+
+def test_cancelar_detiene_el_pool_y_conserva_lo_resuelto():
+    async def _main():
+        job = validation_jobs.create_job(_groups(20), total_packages=20)
+
+        async def _process(group):
+            await asyncio.sleep(0.01)
+            return _stop(group)
+
+        runner = asyncio.ensure_future(validation_jobs.run_job(job, _process, workers=2))
+        while job.processed < 4:
+            await asyncio.sleep(0.002)
+        assert validation_jobs.cancel_job(job.job_id).status == "cancelled"
+        await runner
+        return job
+
+    job = asyncio.run(_main())
+    status = job.status()
+    assert status.status == "cancelled"
+    assert 4 <= status.processed < 20
+    assert len(status.geocoded) + len(status.failed) == status.processed
+
+
+def test_cancelado_antes_de_arrancar_no_procesa():
+    calls = []
+
+    async def _process(group):
+        calls.append(group)
+        return _stop(group)
+
+    job = validation_jobs.create_job(_groups(3), total_packages=3)
+    assert job.cancel() is True
+    asyncio.run(validation_jobs.run_job(job, _process, workers=2))
+    assert calls == []
+    assert job.cancel() is False
+
+
+def test_desconocido_devuelve_none():
+    assert validation_jobs.get_status("no-existe") is None
+    assert validation_jobs.cancel_job("no-existe") is None
+
+
+def test_otro_worker_consulta_la_copia_compartida():
+    job = validation_jobs.create_job(_groups(4), total_packages=4)
+
+    async def _process(group):
+        return _stop(group)
+
+    asyncio.run(validation_jobs.run_job(job, _process, workers=2))
+    validation_jobs._jobs.clear()   # otro worker: sin el job en memoria
+    status = validation_jobs.get_status(job.job_id)
+    assert status is not None
+    assert (status.status, status.processed) == ("done", 4)
+    assert [s.address for s in status.geocoded] == ["Calle Real 1", "Calle Real 3"]
+
+
+def test_cancelacion_pedida_desde_otro_worker():
+    async def _main():
+        shared_state.poll(force=True)
+        job = validation_jobs.create_job(_groups(50), total_packages=50)
+
+        async def _process(group):
+            await asyncio.sleep(0.005)
+            if job.processed == 3:
+                InvalidationLog(shared_state._DB).publish("otro", "validation_jobs", job.job_id)
+                shared_state._next_poll = 0.0
+            return _stop(group)
+
+        await validation_jobs.run_job(job, _process, workers=1)
+        return job
+
+    job = asyncio.run(_main())
+    assert job.state == "cancelled"
+    assert job.processed < 50
+
+
+def test_cancelacion_remota_desde_otro_hilo_se_aplica_en_el_loop(monkeypatch):
+    """poll() en un hilo del pool (geocode_async): cancel() corre en el loop del job."""
+    threads: list[int] = []
+    cancel = validation_jobs.ValidationJob.cancel
+
+    def _cancel(self):
+        threads.append(threading.get_ident())
+        return cancel(self)
+
+    monkeypatch.setattr(validation_jobs.ValidationJob, "cancel", _cancel)
+
+    async def _main():
+        shared_state.poll(force=True)
+        job = validation_jobs.create_job(_groups(50), total_packages=50)
+
+        async def _process(group):
+            if job.processed == 3:
+                InvalidationLog(shared_state._DB).publish("otro", "validation_jobs", job.job_id)
+                await asyncio.to_thread(shared_state.poll, True)
+            await asyncio.sleep(0.005)
+            return _stop(group)
+
+        await validation_jobs.run_job(job, _process, workers=1)
+        return job, threading.get_ident()
+
+    job, loop_thread = asyncio.run(_main())
+    assert job.state == "cancelled"
+    assert threads == [loop_thread]
@@ -0,0 +1,138 @@
+"""
+Tests unitarios — app/services/validation_sessions.py.
+
+Cubre (sin red):
+  - create_session / get_session / save_session / clear_sessions
+  - ida y vuelta JSON de ValidationSession
+  - almacén compartido entre workers (otro worker = memoria vacía)
+  - save_session no pisa lo que otro worker guardó después de leer (versión)
+  - leer una sesión renueva su caducidad en SQLite (deslizante para todos los workers)
+  - save_session con el almacén caído propaga el error sin dar nada por guardado
+"""
+
+import time
+
+import pytest
+
+from app.adapters import shared_state
+from app.adapters.kvstore import InvalidationLog
+from app.models.validation import CsvRow
+from app.services import validation_sessions
+from app.services.validation_sessions import (
+    ValidationSession,
+    clear_sessions,
+    create_session,
+    get_session,
+    save_session,
+)
+
+ROWS = [CsvRow(cliente="Ana", direccion="Calle Mayor 1"), CsvRow(direccion="C/ Mayor, 1")]
+KEYS = ["calle mayor#1", "calle mayor#1"]
+RESULTS = {
+    "calle mayor#1": {"address": "Calle Mayor 1", "alias": "", "lat": 37.8, "lon": -5.1,
+                      "confidence": "EXACT_ADDRESS"},
+}
+
+
+class TestStore:
+
+    def test_crear_y_recuperar(self):
+        session = get_session(create_session(ROWS, KEYS, RESULTS))
+        assert session is not None
+        assert session.rows == {0: ROWS[0], 1: ROWS[1]}
+        assert session.keys == {0: KEYS[0], 1: KEYS[1]}
+        assert session.next_id == 2
+
+    def test_id_desconocido(self):
+        assert get_session("no-existe") is None
+
+    def test_clear_sessions(self):
+        validation_id = create_session(ROWS, KEYS, RESULTS)
+        clear_sessions()
+        assert get_session(validation_id) is None
+
+    def test_json_ida_y_vuelta(self):
+        session = ValidationSession({0: ROWS[0], 5: ROWS[1]}, {0: KEYS[0], 5: KEYS[1]}, RESULTS, 6)
+        copy = ValidationSession.from_json(session.to_json())
+        assert (copy.rows, copy.keys, copy.results, copy.next_id) == (
+            session.rows, session.keys, session.results, 6,
+        )
+
+
+def _otro_worker() -> None:
+    validation_sessions._sessions.clear()
+
+
+class TestAlmacenCompartido:
+
+    def test_sesion_creada_en_otro_worker(self):
+        validation_id = create_session(ROWS, KEYS, RESULTS)
+        _otro_worker()
+        session = get_session(validation_id)
+        assert session is not None
+        assert session.results == RESULTS
+
+    def test_caducada_en_sqlite_no_se_devuelve(self):
+        validation_id = create_session(ROWS, KEYS, RESULTS)
+        shared_state.get_store("validation_sessions").transform(
+            validation_id, lambda data: {**data, "expires_at": time.time() - 1},
+        )
+        _otro_worker()
+        assert get_session(validation_id) is None
+
+    def test_cambio_guardado_llega_a_otro_worker(self):
+        validation_id = create_session(ROWS, KEYS, RESULTS)
+        session = get_session(validation_id)
+        session.rows[2] = CsvRow(direccion="Calle Real 2")
+        session.keys[2] = "calle real#2"
+        session.next_id = 3
+        save_session(validation_id, session)
+        _otro_worker()
+        assert get_session(validation_id).next_id == 3
+
+    def test_cambio_en_otro_worker_descarta_la_copia_en_memoria(self):
+        shared_state.poll(force=True)
+        validation_id = create_session(ROWS, KEYS, RESULTS)
+        InvalidationLog(shared_state._DB).publish("otro", "validation_sessions", validation_id)
+        shared_state.poll(force=True)
+        assert validation_id not in validation_sessions._sessions
+
+    def test_guardado_con_version_vieja_no_pisa_el_de_otro_worker(self):
+        validation_id = create_session(ROWS, KEYS, RESULTS)
+        mine = get_session(validation_id)
+        _otro_worker()
+        theirs = get_session(validation_id)
+        theirs.next_id = 7
+        assert save_session(validation_id, theirs) is True
+        assert theirs.version == 1
+
+        mine.next_id = 3   # leída antes del cambio del otro worker
+        assert save_session(validation_id, mine) is False
+        assert validation_id not in validation_sessions._sessions
+        fresh = get_session(validation_id)
+        assert (fresh.next_id, fresh.version) == (7, 1)
+
+    def test_almacen_caido_propaga_el_error(self, monkeypatch):
+        validation_id = create_session(ROWS, KEYS, RESULTS)
+        session = get_session(validation_id)
+        store = shared_state.get_store("validation_sessions")
+
+        def _down(key, fn):
+            raise OSError("disco lleno")
+
+        monkeypatch.setattr(store, "transform", _down)
+        with pytest.raises(OSError):
+            save_session(validation_id, session)
+        assert session.version == 0
+        assert validation_id not in validation_sessions._sessions
+
+    def test_leer_renueva_la_caducidad_compartida(self, monkeypatch):
+        validation_id = create_session(ROWS, KEYS, RESULTS)
+        store = shared_state.get_store("validation_sessions")
+        before = store.get(validation_id)["expires_at"]
+        now = time.time() + 2 * validation_sessions._TOUCH_S
+        monkeypatch.setattr(validation_sessions.time, "time", lambda: now)
+        session = get_session(validation_id)   # de memoria, solo lectura
+        stored = store.get(validation_id)
+        assert stored["expires_at"] > before
+        assert stored["version"] == session.version == 0